@@ -31,6 +31,7 @@ from src.omanta_3rd.jobs.batch_longterm_run import get_monthly_rebalance_dates
 from src.omanta_3rd.backtest.timeseries import calculate_timeseries_returns_from_portfolios
 from src.omanta_3rd.backtest.eval_common import calculate_metrics_from_timeseries_data
 from src.omanta_3rd.backtest.feature_cache import FeatureCache
+from src.omanta_3rd.backtest.bootstrap import bootstrap_metric_cis
 from src.omanta_3rd.backtest.metrics import (
     calculate_sharpe_ratio,
     calculate_cagr,
@@ -462,6 +463,7 @@ def _calculate_detailed_metrics(
     
     # 2. Holdout期間の超過リターン時系列（月次）
     result["monthly_excess_returns"] = monthly_excess_returns
+    result["monthly_returns"] = monthly_returns
     result["monthly_dates"] = dates
     
     # 3. Holdoutの年超過ボラと平均超過リターン
@@ -621,6 +623,8 @@ def main():
     parser.add_argument("--n-jobs", type=int, default=-1, help="並列実行数（-1でCPU数、1で逐次実行、デフォルト: -1）")
     parser.add_argument("--use-cache", action="store_true", help="FeatureCacheを使用して特徴量と価格データを事前計算（推奨）")
     parser.add_argument("--cache-dir", type=str, default="cache/features", help="キャッシュディレクトリ（デフォルト: cache/features）")
+    parser.add_argument("--n-boot", type=int, default=2000, help="指標の信頼区間のブートストラップ回数（0で無効、デフォルト: 2000）")
+    parser.add_argument("--block-length", type=float, default=3.0, help="stationary block bootstrap の平均ブロック長（月数、デフォルト: 3.0）")
     
     args = parser.parse_args()
     
@@ -788,6 +792,18 @@ def main():
     # 結果をtrial_numberでソート（元の順序を保持）
     results.sort(key=lambda x: next((c["trial_number"] for c in candidates if c["trial_number"] == x.get("trial_number", -1)), -1))
     
+    # 指標の信頼区間（全候補を一括で block bootstrap）
+    if args.n_boot > 0:
+        series_by_trial = {
+            r["trial_number"]: (r["holdout_metrics"]["monthly_returns"], r["holdout_metrics"]["monthly_excess_returns"])
+            for r in results
+            if "error" not in r and r["holdout_metrics"].get("monthly_returns")
+        }
+        cis = bootstrap_metric_cis(series_by_trial, n_boot=args.n_boot, mean_block_length=args.block_length)
+        for r in results:
+            if r.get("trial_number") in cis:
+                r["holdout_metrics_ci"] = cis[r["trial_number"]]
+    
     # 結果をまとめる
     summary = {
         "config": {
@@ -796,6 +812,8 @@ def main():
             "holdout_end": args.holdout_end,
             "cost_bps": args.cost_bps,
             "n_candidates": len(candidates),
+            "n_boot": args.n_boot,
+            "block_length": args.block_length,
         },
         "results": results,
     }
@@ -805,8 +823,8 @@ def main():
     print("評価結果サマリー")
     print("=" * 80)
     print()
-    print("| Trial # | Train Sharpe | Holdout Sharpe | ギャップ |")
-    print("|---------|--------------|----------------|----------|")
+    print("| Trial # | Train Sharpe | Holdout Sharpe | ギャップ | Holdout Sharpe 95%CI |")
+    print("|---------|--------------|----------------|----------|----------------------|")
     
     for result in results:
         if "error" in result:
@@ -818,7 +836,12 @@ def main():
         
         if train_sharpe is not None and holdout_sharpe is not None:
             gap = train_sharpe - holdout_sharpe
-            print(f"| #{trial_num} | {train_sharpe:.4f} | {holdout_sharpe:.4f} | {gap:.4f} |")
+            sharpe_ci = result.get("holdout_metrics_ci", {}).get("sharpe_ratio", {})
+            if sharpe_ci.get("ci_low") is not None and sharpe_ci.get("ci_high") is not None:
+                ci_str = f"[{sharpe_ci['ci_low']:.4f}, {sharpe_ci['ci_high']:.4f}]"
+            else:
+                ci_str = "-"
+            print(f"| #{trial_num} | {train_sharpe:.4f} | {holdout_sharpe:.4f} | {gap:.4f} | {ci_str} |")
     
     print()
     
@@ -15,6 +15,7 @@ import pandas as pd
 from omanta_3rd.infra.db import connect_db
 from omanta_3rd.infra.jquants import JQuantsClient
 from omanta_3rd.ingest.listed import fetch_listed_info, save_listed_info
+from omanta_3rd.ingest.listed_segments import refresh_listed_segments
 from omanta_3rd.jobs.batch_longterm_run import get_last_trading_day_of_month
 
 
@@ -112,6 +113,7 @@ def main():
     
     success_count = 0
     error_count = 0
+    saved_dates = []
     
     for i, date in enumerate(dates_to_fetch, 1):
         print(f"[{i}/{len(dates_to_fetch)}] {date} のlisted_infoを取得中...")
@@ -126,7 +128,8 @@ def main():
                 continue
             
             # データを保存
-            save_listed_info(data)
+            save_listed_info(data, refresh_segments=False)
+            saved_dates.append(date)
             
             print(f"  ✅ 取得完了: {len(data)}銘柄")
             success_count += 1
@@ -149,6 +152,12 @@ def main():
     print(f"エラー: {error_count}/{len(dates_to_fetch)}")
     print()
     
+    # 市場区分の期間テーブルを取り込んだ日付の分だけまとめて更新
+    if saved_dates:
+        with connect_db() as conn:
+            refresh_listed_segments(conn, changed_date=min(saved_dates))
+        print()
+    
     # 最終的なデータ状況を確認
     print("=" * 80)
     print("最終的なデータ状況")
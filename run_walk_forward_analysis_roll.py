@@ -22,6 +22,9 @@ SEED = 42  # 乱数シード（固定）
 # 並列戦略: roll方式ではfold並列を有効化、Optuna並列は無効化
 N_JOBS_FOLD = 1  # fold間の並列数（安定優先のため1に設定）
 N_JOBS_OPTUNA = 1  # Optunaの並列数（安定優先のため1に設定）
+# 隣接foldはtrain期間の大部分が重なるため、前foldの上位trialから開始し評価結果も再利用する
+WARM_START_TOP_K = 5  # 前foldの上位K件のtrialを次のfoldにenqueue（0で無効）
+EVAL_CACHE = True  # パラメータ × リバランス日の評価キャッシュをfold間で共有
 
 
 def main():
@@ -41,6 +44,8 @@ def main():
     print(f"  乱数シード: {SEED}")
     print(f"  Fold間並列数: {N_JOBS_FOLD}")
     print(f"  Optuna並列数: {N_JOBS_OPTUNA}")
+    print(f"  ウォームスタート: 前foldの上位{WARM_START_TOP_K}件")
+    print(f"  評価キャッシュ: {'有効' if EVAL_CACHE else '無効'}")
     print()
     print("【期待される成果物】")
     print("  1. walk_forward_longterm_12M_roll_evalYear2025.json（fold別 + 集計）")
@@ -63,7 +68,10 @@ def main():
         "--seed", str(SEED),
         "--n-jobs-fold", str(N_JOBS_FOLD),
         "--n-jobs-optuna", str(N_JOBS_OPTUNA),
+        "--warm-start-top-k", str(WARM_START_TOP_K),
     ]
+    if EVAL_CACHE:
+        cmd.append("--eval-cache")
     
     print("実行コマンド:")
     print(" ".join(cmd))
@@ -8,11 +8,22 @@ CREATE INDEX IF NOT EXISTS idx_feat_date_score ON features_monthly (as_of_date,
 CREATE INDEX IF NOT EXISTS idx_backtest_rebalance ON backtest_performance (rebalance_date);
 CREATE INDEX IF NOT EXISTS idx_backtest_asof ON backtest_performance (as_of_date);
 CREATE INDEX IF NOT EXISTS idx_backtest_stock_rebalance ON backtest_stock_performance (rebalance_date, as_of_date);
-CREATE INDEX IF NOT EXISTS idx_index_date_code ON index_daily (date, index_code);
 CREATE INDEX IF NOT EXISTS idx_holdings_code ON holdings (code);
 CREATE INDEX IF NOT EXISTS idx_holdings_purchase_date ON holdings (purchase_date);
 CREATE INDEX IF NOT EXISTS idx_holdings_sell_date ON holdings (sell_date);
 CREATE INDEX IF NOT EXISTS idx_holdings_active ON holdings (sell_date) WHERE sell_date IS NULL;
 CREATE INDEX IF NOT EXISTS idx_holdings_summary_date ON holdings_summary (as_of_date);
 CREATE INDEX IF NOT EXISTS idx_earnings_calendar_date ON earnings_calendar (announcement_date);
-CREATE INDEX IF NOT EXISTS idx_earnings_calendar_code ON earnings_calendar (code);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_earnings_calendar_code ON earnings_calendar (code);
+CREATE INDEX IF NOT EXISTS idx_prices_rolling_code_date ON prices_rolling_daily (code, date);
+CREATE INDEX IF NOT EXISTS idx_listed_segments_segment_range ON listed_segments (segment, valid_from, valid_to);
+-- ---------------------------------------------------------
+-- 分析用インデックス（ホットクエリ用、infra/query_plan.py の HOT_QUERIES で計画を検査）
+-- ---------------------------------------------------------
+-- 指数の時系列（regime.py / performance.py: WHERE index_code = ? AND date <= ? ORDER BY date DESC）
+-- 主キー (date, index_code) は日付が先頭のため、指数コードで絞ると全期間を走査していた
+CREATE INDEX IF NOT EXISTS idx_index_code_date ON index_daily (index_code, date, close, open);
+-- FY開示の時点断面（loader.py: WHERE type_of_current_period = 'FY' AND disclosed_date <= ?）
+CREATE INDEX IF NOT EXISTS idx_fins_type_disclosed ON fins_statements (type_of_current_period, disclosed_date, code, current_period_end);
+-- 銘柄ごとのFY開示（adjustments.py: WHERE code = ? AND type_of_current_period = 'FY' AND disclosed_date <= ?）
+CREATE INDEX IF NOT EXISTS idx_fins_code_type_disclosed ON fins_statements (code, type_of_current_period, disclosed_date, current_period_end);
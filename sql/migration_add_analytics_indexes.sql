@@ -0,0 +1,13 @@
+-- =========================================================
+-- Migration: Add analytics indexes
+-- =========================================================
+-- ホットクエリ（loader / adjustments / regime / performance / timeseries）用のインデックスを追加する
+-- 計画の確認: python -m omanta_3rd.jobs.check_query_plans
+
+CREATE INDEX IF NOT EXISTS idx_index_code_date ON index_daily (index_code, date, close, open);
+CREATE INDEX IF NOT EXISTS idx_fins_type_disclosed ON fins_statements (type_of_current_period, disclosed_date, code, current_period_end);
+CREATE INDEX IF NOT EXISTS idx_fins_code_type_disclosed ON fins_statements (code, type_of_current_period, disclosed_date, current_period_end);
+
+-- 主キー (date, index_code) と同じ列構成で冗長なため削除
+DROP INDEX IF EXISTS idx_index_date_code;
+ANALYZE;
@@ -0,0 +1,34 @@
+-- =========================================================
+-- Migration: Add db_maintenance_log / db_table_stats tables
+-- =========================================================
+-- DBメンテナンス（jobs/maintain_db.py、取り込み後に自動実行）の履歴を保持する
+-- 未作成でも初回のメンテナンス時に自動的に作成される
+
+CREATE TABLE IF NOT EXISTS db_maintenance_log (
+  ran_at TEXT NOT NULL,
+  db_name TEXT NOT NULL,
+  db_bytes_before INTEGER,
+  db_bytes_after INTEGER,
+  wal_bytes_before INTEGER,
+  wal_bytes_after INTEGER,
+  freelist_pages INTEGER,
+  analyze_sec REAL,
+  checkpoint_sec REAL,
+  vacuum_sec REAL,
+  stats_sec REAL,
+  total_sec REAL,
+  plan_problems INTEGER,
+  PRIMARY KEY (ran_at, db_name)
+);
+
+CREATE TABLE IF NOT EXISTS db_table_stats (
+  ran_at TEXT NOT NULL,
+  db_name TEXT NOT NULL,
+  name TEXT NOT NULL,
+  type TEXT NOT NULL,
+  tbl_name TEXT NOT NULL,
+  row_count INTEGER,
+  bytes INTEGER,
+  unused_bytes INTEGER,
+  PRIMARY KEY (ran_at, db_name, name)
+);
@@ -0,0 +1,14 @@
+-- =========================================================
+-- Migration: Add fins_sync_state table
+-- =========================================================
+-- 財務データの差分同期（jobs/sync_fins.py）で使うウォーターマークを保持する
+-- 未作成でも初回の同期時に自動的に作成される
+
+CREATE TABLE IF NOT EXISTS fins_sync_state (
+  scope TEXT NOT NULL,
+  -- table / code
+  key TEXT NOT NULL,
+  watermark TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  PRIMARY KEY (scope, key)
+);
@@ -0,0 +1,14 @@
+-- =========================================================
+-- Migration: Add ingest_skip_dates table
+-- =========================================================
+-- 取得結果が0件だった日（休場日など）を記録し、取り込み計画で再取得しないようにする
+-- 次回以降の prices / fins 取り込みで自動的に記録される
+
+CREATE TABLE IF NOT EXISTS ingest_skip_dates (
+  dataset TEXT NOT NULL,
+  -- prices / fins / indices:{index_code}
+  date TEXT NOT NULL,
+  reason TEXT NOT NULL,
+  recorded_at TEXT NOT NULL,
+  PRIMARY KEY (dataset, date)
+);
@@ -0,0 +1,72 @@
+-- =========================================================
+-- Migration: Add listed_segments table
+-- =========================================================
+-- listed_info のスナップショットを (code, 属性) が変わらない区間にまとめた期間テーブル
+-- 既存の listed_info から全期間を構築する（build_segment_intervals と同じ区切り方、再実行時は作り直す）
+
+CREATE TABLE IF NOT EXISTS listed_segments (
+  code TEXT NOT NULL,
+  valid_from TEXT NOT NULL,
+  valid_to TEXT NOT NULL,
+  next_from TEXT,
+  segment TEXT NOT NULL,
+  -- prime / standard / growth / other
+  company_name TEXT,
+  market_name TEXT,
+  sector17 TEXT,
+  sector33 TEXT,
+  PRIMARY KEY (code, valid_from)
+);
+
+-- インデックスの作成
+CREATE INDEX IF NOT EXISTS idx_listed_segments_segment_range ON listed_segments (segment, valid_from, valid_to);
+
+-- 既存の listed_info から区間を構築
+-- 連続するスナップショットで属性（社名・市場名・業種、NULLは空文字扱い）が同じ行を1区間にまとめる
+DELETE FROM listed_segments;
+
+INSERT INTO listed_segments (code, valid_from, valid_to, next_from, segment, company_name, market_name, sector17, sector33)
+WITH snaps AS (
+  SELECT date, ROW_NUMBER() OVER (ORDER BY date) AS si
+  FROM (SELECT DISTINCT date FROM listed_info)
+),
+rows AS (
+  SELECT li.code, li.date, s.si, li.company_name, li.market_name, li.sector17, li.sector33,
+         LAG(s.si) OVER w AS prev_si,
+         LAG(COALESCE(li.company_name, '')) OVER w AS prev_company_name,
+         LAG(COALESCE(li.market_name, '')) OVER w AS prev_market_name,
+         LAG(COALESCE(li.sector17, '')) OVER w AS prev_sector17,
+         LAG(COALESCE(li.sector33, '')) OVER w AS prev_sector33
+  FROM listed_info li
+  JOIN snaps s ON s.date = li.date
+  WINDOW w AS (PARTITION BY li.code ORDER BY li.date)
+),
+runs AS (
+  SELECT *,
+         SUM(CASE
+               WHEN prev_si = si - 1
+                AND prev_company_name = COALESCE(company_name, '')
+                AND prev_market_name = COALESCE(market_name, '')
+                AND prev_sector17 = COALESCE(sector17, '')
+                AND prev_sector33 = COALESCE(sector33, '')
+               THEN 0 ELSE 1
+             END) OVER (PARTITION BY code ORDER BY date) AS run_id
+  FROM rows
+),
+intervals AS (
+  SELECT code, run_id, MIN(date) AS valid_from, MAX(date) AS valid_to,
+         MAX(company_name) AS company_name, MAX(market_name) AS market_name,
+         MAX(sector17) AS sector17, MAX(sector33) AS sector33
+  FROM runs
+  GROUP BY code, run_id
+)
+SELECT code, valid_from, valid_to,
+       LEAD(valid_from) OVER (PARTITION BY code ORDER BY valid_from) AS next_from,
+       CASE
+         WHEN instr(lower(market_name), 'プライム') > 0 OR instr(lower(market_name), 'prime') > 0 OR instr(market_name, '東証一部') > 0 THEN 'prime'
+         WHEN instr(lower(market_name), 'スタンダード') > 0 OR instr(lower(market_name), 'standard') > 0 OR instr(market_name, '東証二部') > 0 THEN 'standard'
+         WHEN instr(lower(market_name), 'グロース') > 0 OR instr(lower(market_name), 'growth') > 0 OR instr(market_name, 'マザーズ') > 0 THEN 'growth'
+         ELSE 'other'
+       END AS segment,
+       company_name, market_name, sector17, sector33
+FROM intervals;
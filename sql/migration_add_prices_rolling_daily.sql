@@ -0,0 +1,19 @@
+-- =========================================================
+-- Migration: Add prices_rolling_daily table
+-- =========================================================
+-- 60日流動性と累積分割倍率を (date, code) 単位で事前計算して保存するテーブル
+-- 作成後、python -m omanta_3rd.jobs.rebuild_price_aggregates で全期間を構築する
+
+CREATE TABLE IF NOT EXISTS prices_rolling_daily (
+  date TEXT NOT NULL,
+  -- YYYY-MM-DD
+  code TEXT NOT NULL,
+  liquidity_60d REAL,
+  -- 直近60営業日行の売買代金平均
+  split_factor_cum REAL NOT NULL,
+  -- 株数倍率の累積積 ∏(1 / adjustment_factor)
+  PRIMARY KEY (date, code)
+);
+
+-- インデックスの作成
+CREATE INDEX IF NOT EXISTS idx_prices_rolling_code_date ON prices_rolling_daily (code, date);
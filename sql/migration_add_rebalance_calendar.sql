@@ -0,0 +1,17 @@
+-- =========================================================
+-- Migration: Add rebalance_calendar table
+-- =========================================================
+-- 月次リバランス日（各月の最初・最後の営業日）を prices_daily から事前集計する
+-- 以降は ingest_prices が取り込んだ月以降を自動的に再集計する
+
+CREATE TABLE IF NOT EXISTS rebalance_calendar (
+  month TEXT PRIMARY KEY,
+  first_trading_day TEXT NOT NULL,
+  last_trading_day TEXT NOT NULL,
+  n_trading_days INTEGER NOT NULL
+);
+
+INSERT OR REPLACE INTO rebalance_calendar (month, first_trading_day, last_trading_day, n_trading_days)
+SELECT substr(date, 1, 7), MIN(date), MAX(date), COUNT(DISTINCT date)
+FROM prices_daily
+GROUP BY substr(date, 1, 7);
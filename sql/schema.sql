@@ -431,4 +431,109 @@ CREATE TABLE IF NOT EXISTS monthly_rebalance_candidate_detailed_metrics (
   UNIQUE(trial_number, evaluation_period, cost_bps)
 );
 CREATE INDEX IF NOT EXISTS idx_monthly_rebalance_detailed_metrics_trial_period 
-  ON monthly_rebalance_candidate_detailed_metrics(trial_number, evaluation_period);
\ No newline at end of file
+  ON monthly_rebalance_candidate_detailed_metrics(trial_number, evaluation_period);
+-- -----------------------
+-- 16) prices_rolling_daily : prices_daily から派生する日次集計（取り込み時に増分更新）
+-- -----------------------
+CREATE TABLE IF NOT EXISTS prices_rolling_daily (
+  date TEXT NOT NULL,
+  -- YYYY-MM-DD
+  code TEXT NOT NULL,
+  liquidity_60d REAL,
+  -- 直近60営業日行の売買代金平均
+  split_factor_cum REAL NOT NULL,
+  -- 株数倍率の累積積 ∏(1 / adjustment_factor)。期間(a, b]の分割倍率 = cum(b) / cum(a)
+  PRIMARY KEY (date, code)
+);
+-- -----------------------
+-- 17) listed_segments : 市場区分の期間テーブル（listed_info から構築）
+-- -----------------------
+CREATE TABLE IF NOT EXISTS listed_segments (
+  code TEXT NOT NULL,
+  valid_from TEXT NOT NULL,
+  -- 区間の最初のスナップショット日（YYYY-MM-DD）
+  valid_to TEXT NOT NULL,
+  -- 区間の最後のスナップショット日（YYYY-MM-DD、両端含む）
+  next_from TEXT,
+  -- 同一銘柄の次の区間の開始日（最新区間はNULL）
+  segment TEXT NOT NULL,
+  -- 正規化した市場区分: prime / standard / growth / other
+  company_name TEXT,
+  market_name TEXT,
+  sector17 TEXT,
+  sector33 TEXT,
+  PRIMARY KEY (code, valid_from)
+);
+-- -----------------------
+-- 18) ingest_skip_dates : 取得結果が0件だった日（取り込み計画で再取得しない）
+-- -----------------------
+CREATE TABLE IF NOT EXISTS ingest_skip_dates (
+  dataset TEXT NOT NULL,
+  -- prices / fins / indices:{index_code}
+  date TEXT NOT NULL,
+  -- YYYY-MM-DD
+  reason TEXT NOT NULL,
+  -- empty_response
+  recorded_at TEXT NOT NULL,
+  PRIMARY KEY (dataset, date)
+);
+-- -----------------------
+-- 19) fins_sync_state : 財務データの同期ウォーターマーク
+-- -----------------------
+CREATE TABLE IF NOT EXISTS fins_sync_state (
+  scope TEXT NOT NULL,
+  -- table: 開示日ベースの取得 / code: 銘柄コード指定の履歴取得
+  key TEXT NOT NULL,
+  -- scope=table: fins_statements / scope=code: 銘柄コード
+  watermark TEXT NOT NULL,
+  -- 取得が完了している最終開示日（YYYY-MM-DD）
+  updated_at TEXT NOT NULL,
+  PRIMARY KEY (scope, key)
+);
+-- -----------------------
+-- 20) rebalance_calendar : 月ごとの最初・最後の営業日（prices_daily から派生）
+-- -----------------------
+CREATE TABLE IF NOT EXISTS rebalance_calendar (
+  month TEXT PRIMARY KEY,
+  -- YYYY-MM
+  first_trading_day TEXT NOT NULL,
+  -- 月初営業日（YYYY-MM-DD）
+  last_trading_day TEXT NOT NULL,
+  -- 月末営業日（YYYY-MM-DD、当月は取り込み済みの最終日）
+  n_trading_days INTEGER NOT NULL
+);
+-- -----------------------
+-- 21) db_maintenance_log / db_table_stats : DBメンテナンスの履歴（infra/maintenance）
+-- -----------------------
+CREATE TABLE IF NOT EXISTS db_maintenance_log (
+  ran_at TEXT NOT NULL,
+  db_name TEXT NOT NULL,
+  -- 対象DBのファイル名（メインDB / optuna_*.db）
+  db_bytes_before INTEGER,
+  db_bytes_after INTEGER,
+  wal_bytes_before INTEGER,
+  wal_bytes_after INTEGER,
+  freelist_pages INTEGER,
+  analyze_sec REAL,
+  checkpoint_sec REAL,
+  vacuum_sec REAL,
+  stats_sec REAL,
+  total_sec REAL,
+  plan_problems INTEGER,
+  -- ホットクエリの実行計画の問題数（infra/query_plan）
+  PRIMARY KEY (ran_at, db_name)
+);
+CREATE TABLE IF NOT EXISTS db_table_stats (
+  ran_at TEXT NOT NULL,
+  db_name TEXT NOT NULL,
+  name TEXT NOT NULL,
+  -- テーブル名またはインデックス名
+  type TEXT NOT NULL,
+  -- table / index
+  tbl_name TEXT NOT NULL,
+  row_count INTEGER,
+  bytes INTEGER,
+  unused_bytes INTEGER,
+  -- ページ内の未使用バイト（断片化の目安）
+  PRIMARY KEY (ran_at, db_name, name)
+);
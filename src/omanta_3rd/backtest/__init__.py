@@ -11,6 +11,16 @@ from .metrics import (
     calculate_win_rate_timeseries,
     calculate_annualized_return_from_period,
     calculate_percentile,
+    equity_curves_2d,
+    calculate_max_drawdown_2d,
+    calculate_sharpe_ratio_2d,
+    calculate_sortino_ratio_2d,
+    calculate_calmar_ratio_2d,
+    calculate_cagr_2d,
+    calculate_volatility_2d,
+    calculate_profit_factor_2d,
+    calculate_win_rate_2d,
+    calculate_percentile_2d,
 )
 from .performance import (
     calculate_portfolio_performance,
@@ -22,8 +32,34 @@ from .timeseries import (
     calculate_timeseries_returns_from_portfolios,
 )
 from .performance_from_dataframe import calculate_portfolio_performance_from_dataframe
-from .eval_common import calculate_metrics_from_timeseries_data, get_git_commit_hash
-from .feature_cache import FeatureCache
+from .eval_common import (
+    calculate_metrics_from_timeseries_data,
+    calculate_metrics_from_timeseries_batch,
+    get_git_commit_hash,
+)
+from .feature_cache import FeatureCache, SELECTION_FEATURE_COLUMNS
+from .feature_matrix import FeatureMatrix, MATRIX_FEATURE_COLUMNS, build_feature_matrices
+from .data_plane import SharedDataPlane
+from .eval_cache import EvaluationCache
+from .bootstrap import (
+    stationary_bootstrap_indices,
+    timeseries_metrics_2d,
+    bootstrap_metric_cis,
+)
+from .seed_robustness import (
+    PerDateResults,
+    aggregate_splits,
+    bootstrap_mean_excess,
+    sign_flip_pvalues,
+)
+from .regime_simulator import (
+    HOLD,
+    RegimePolicy,
+    ParamsOutcomeTable,
+    PolicySimulation,
+    simulate_policy,
+    simulate_policies,
+)
 
 __all__ = [
     # metrics
@@ -37,6 +73,16 @@ __all__ = [
     "calculate_win_rate_timeseries",
     "calculate_annualized_return_from_period",
     "calculate_percentile",
+    "equity_curves_2d",
+    "calculate_max_drawdown_2d",
+    "calculate_sharpe_ratio_2d",
+    "calculate_sortino_ratio_2d",
+    "calculate_calmar_ratio_2d",
+    "calculate_cagr_2d",
+    "calculate_volatility_2d",
+    "calculate_profit_factor_2d",
+    "calculate_win_rate_2d",
+    "calculate_percentile_2d",
     # performance
     "calculate_portfolio_performance",
     "calculate_all_portfolios_performance",
@@ -47,6 +93,29 @@ __all__ = [
     # misc
     "calculate_portfolio_performance_from_dataframe",
     "calculate_metrics_from_timeseries_data",
+    "calculate_metrics_from_timeseries_batch",
     "get_git_commit_hash",
     "FeatureCache",
+    "SELECTION_FEATURE_COLUMNS",
+    "FeatureMatrix",
+    "MATRIX_FEATURE_COLUMNS",
+    "build_feature_matrices",
+    "SharedDataPlane",
+    "EvaluationCache",
+    # bootstrap
+    "stationary_bootstrap_indices",
+    "timeseries_metrics_2d",
+    "bootstrap_metric_cis",
+    # seed_robustness
+    "PerDateResults",
+    "aggregate_splits",
+    "bootstrap_mean_excess",
+    "sign_flip_pvalues",
+    # regime_simulator
+    "HOLD",
+    "RegimePolicy",
+    "ParamsOutcomeTable",
+    "PolicySimulation",
+    "simulate_policy",
+    "simulate_policies",
 ]
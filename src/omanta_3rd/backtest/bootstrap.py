@@ -0,0 +1,186 @@
+"""
+月次リターン系列のブートストラップ信頼区間
+
+holdout 評価（evaluate_candidates_holdout.py）の指標は点推定のみで、
+24ヶ月程度の holdout では Sharpe の差がノイズの範囲かどうか判断できない。
+
+月次リターンは自己相関・ボラティリティクラスタリングを持つため、
+リバランス月を独立に復元抽出せず、stationary block bootstrap（Politis & Romano）で
+平均長 mean_block_length のブロック単位に再標本化する。
+
+- stationary_bootstrap_indices: 再標本化インデックスを (n_boot, n) の配列で一括生成
+- timeseries_metrics_2d: metrics.py の配列版の指標を (..., n) の配列に対して一括計算
+- bootstrap_metric_cis: 複数候補の全指標の信頼区間を1回の呼び出しで計算
+
+候補間で同じ再標本化インデックスを使う（共通乱数）ため、同じ期間の候補同士の比較では
+再標本化のばらつきが打ち消し合う。
+"""
+
+from __future__ import annotations
+
+import warnings
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .metrics import (
+    calculate_cagr_2d,
+    calculate_calmar_ratio_2d,
+    calculate_max_drawdown_2d,
+    calculate_percentile_2d,
+    calculate_profit_factor_2d,
+    calculate_sharpe_ratio_2d,
+    calculate_sortino_ratio_2d,
+    calculate_volatility_2d,
+    calculate_win_rate_2d,
+    equity_curves_2d,
+)
+
+
+def stationary_bootstrap_indices(
+    n: int,
+    n_boot: int,
+    mean_block_length: float = 3.0,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    stationary block bootstrap の再標本化インデックスを生成
+
+    各位置で確率 1/mean_block_length で新しいブロックを開始し（開始位置は一様）、
+    それ以外は直前の位置の次（末尾の次は先頭に循環）を取る。
+    mean_block_length=1 は通常の（i.i.d.）ブートストラップと同じ。
+
+    Args:
+        n: 系列長
+        n_boot: 再標本化回数
+        mean_block_length: ブロック長の期待値（月数）
+        rng: 乱数生成器（Noneの場合は default_rng()）
+
+    Returns:
+        (n_boot, n) の int 配列
+    """
+    if n <= 0:
+        return np.zeros((n_boot, 0), dtype=np.int64)
+    if rng is None:
+        rng = np.random.default_rng()
+    p_new = 1.0 / max(float(mean_block_length), 1.0)
+
+    new_block = rng.random((n_boot, n)) < p_new
+    new_block[:, 0] = True
+    starts = rng.integers(0, n, size=(n_boot, n))
+
+    # 各位置が属するブロックの開始位置
+    t = np.arange(n)
+    block_start = np.maximum.accumulate(np.where(new_block, t[None, :], 0), axis=1)
+    start_value = np.take_along_axis(starts, block_start, axis=1)
+    return (start_value + (t[None, :] - block_start)) % n
+
+
+def timeseries_metrics_2d(
+    monthly_returns: np.ndarray,
+    monthly_excess_returns: np.ndarray,
+    percentiles: Sequence[float] = (5.0, 95.0),
+) -> Dict[str, np.ndarray]:
+    """
+    最終軸を月次系列とみなして metrics.py の指標を一括計算
+
+    定義は calculate_metrics_from_timeseries_data と同じ（Sharpe・Sortino・勝率は超過リターン、
+    CAGR・ボラティリティ・MaxDD・Calmar・Profit Factor はリターンのエクイティカーブ）。
+    単位は metrics.py と同じ小数で、計算不可（metrics.py で None）は NaN。
+
+    Args:
+        monthly_returns: (..., n) の月次リターン（小数）
+        monthly_excess_returns: (..., n) の月次超過リターン（小数）
+        percentiles: 超過リターンのパーセンタイル（calculate_percentile 相当）
+
+    Returns:
+        {指標名: (...) の配列}（パーセンタイルは "excess_percentile_{p}"）
+    """
+    r = np.asarray(monthly_returns, dtype=float)
+    x = np.asarray(monthly_excess_returns, dtype=float)
+    n = r.shape[-1]
+    equity = equity_curves_2d(r)
+    out = {
+        "sharpe_ratio": calculate_sharpe_ratio_2d(x),
+        "sortino_ratio": calculate_sortino_ratio_2d(x),
+        "calmar_ratio": calculate_calmar_ratio_2d(equity, n),
+        "max_drawdown": calculate_max_drawdown_2d(equity),
+        "cagr": calculate_cagr_2d(equity, n),
+        "volatility": calculate_volatility_2d(r),
+        "win_rate": calculate_win_rate_2d(x),
+        "profit_factor": calculate_profit_factor_2d(r, equity),
+        "mean_excess_return": x.mean(axis=-1) if n > 0 else np.full(x.shape[:-1], np.nan),
+    }
+    for p in percentiles:
+        out[f"excess_percentile_{p:g}"] = calculate_percentile_2d(x, p) if n > 0 else np.full(x.shape[:-1], np.nan)
+    return out
+
+
+def bootstrap_metric_cis(
+    series_by_candidate: Mapping[Any, Tuple[Sequence[float], Sequence[float]]],
+    n_boot: int = 2000,
+    mean_block_length: float = 3.0,
+    ci: float = 0.95,
+    random_seed: Optional[int] = 0,
+    percentiles: Sequence[float] = (5.0, 95.0),
+) -> Dict[Any, Dict[str, Dict[str, Optional[float]]]]:
+    """
+    複数候補の全指標について block bootstrap の信頼区間を計算
+
+    系列長が同じ候補は (n_candidates, n_boot, n) の配列にまとめて1回で計算する。
+
+    Args:
+        series_by_candidate: {候補キー: (monthly_returns, monthly_excess_returns)}
+        n_boot: 再標本化回数
+        mean_block_length: ブロック長の期待値（月数）
+        ci: 信頼水準
+        random_seed: 乱数シード（系列長ごとに同じシードからインデックスを生成）
+        percentiles: 超過リターンのパーセンタイル
+
+    Returns:
+        {候補キー: {指標名: {"point", "ci_low", "ci_high", "std"}}}
+        （計算不可の値は None）
+    """
+    alpha = (1.0 - ci) / 2.0
+
+    by_length: Dict[int, list] = {}
+    for key, (returns, excess) in series_by_candidate.items():
+        if len(returns) != len(excess):
+            raise ValueError(f"{key}: monthly_returns と monthly_excess_returns の長さが一致しません")
+        by_length.setdefault(len(returns), []).append(key)
+
+    def _value(v) -> Optional[float]:
+        return float(v) if np.isfinite(v) else None
+
+    results: Dict[Any, Dict[str, Dict[str, Optional[float]]]] = {}
+    for n, keys in by_length.items():
+        returns = np.array([series_by_candidate[k][0] for k in keys], dtype=float).reshape(len(keys), n)
+        excess = np.array([series_by_candidate[k][1] for k in keys], dtype=float).reshape(len(keys), n)
+        point = timeseries_metrics_2d(returns, excess, percentiles)
+
+        rng = np.random.default_rng(random_seed)
+        idx = stationary_bootstrap_indices(n, n_boot, mean_block_length, rng)
+        boot = timeseries_metrics_2d(returns[:, idx], excess[:, idx], percentiles)  # (n_cand, n_boot)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN slice
+            stats = {
+                name: (
+                    np.nanquantile(values, alpha, axis=1),
+                    np.nanquantile(values, 1.0 - alpha, axis=1),
+                    np.nanstd(values, axis=1, ddof=1),
+                )
+                for name, values in boot.items()
+            }
+
+        for i, key in enumerate(keys):
+            results[key] = {
+                name: {
+                    "point": _value(point[name][i]),
+                    "ci_low": _value(low[i]),
+                    "ci_high": _value(high[i]),
+                    "std": _value(std[i]),
+                }
+                for name, (low, high, std) in stats.items()
+            }
+    return results
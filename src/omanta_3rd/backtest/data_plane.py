@@ -0,0 +1,267 @@
+"""プロセス間で共有する読み取り専用のデータプレーン（memmap）
+
+WFA の fold 並列では、各ワーカープロセスが FeatureCache を個別に warm し、
+全日付分の特徴量・価格をプロセスごとに保持していた（fold 数 × データサイズのメモリ）。
+
+SharedDataPlane は親プロセスで一度だけ warm した FeatureMatrix と価格データを
+npy ファイルに書き出し、ワーカーは np.load(mmap_mode="r") で開く。
+ページは OS のページキャッシュで共有されるため、ワーカー数を増やしてもメモリはほぼ増えない。
+
+ディレクトリ構成:
+- manifest.json: リバランス日（カレンダー）、日付ごとの行オフセット、列名
+- registry.json: 銘柄コード・業種の対応表（CodeRegistry）
+- code_ids.npy / sector_ids.npy / values.npy / valid.npy: 全日付の FeatureMatrix を縦に連結したもの
+- price_codes.npy / price_starts.npy / price_values.npy: 価格系列（日付 × 銘柄ごとの adj_close）を連結したもの
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ..features.code_registry import CodeRegistry
+from .feature_matrix import FeatureMatrix, MATRIX_FEATURE_COLUMNS
+
+PLANE_FORMAT_VERSION = 1
+
+_MANIFEST = "manifest.json"
+_REGISTRY = "registry.json"
+
+
+class MappedPrices(Mapping):
+    """
+    {rebalance_date: {code: [adj_close, ...]}} の読み取り専用ビュー
+
+    日付ごとの辞書はアクセスされた時点で memmap から作成してキャッシュする
+    （ワーカーは担当する日付分だけ実体化する）。
+    """
+
+    def __init__(
+        self,
+        dates: List[str],
+        date_offsets: np.ndarray,
+        codes: np.ndarray,
+        starts: np.ndarray,
+        values: np.ndarray,
+    ):
+        self._index = {d: i for i, d in enumerate(dates)}
+        self._date_offsets = date_offsets
+        self._codes = codes
+        self._starts = starts
+        self._values = values
+        self._cache: Dict[str, Dict[str, List[float]]] = {}
+
+    def __getitem__(self, rebalance_date: str) -> Dict[str, List[float]]:
+        if rebalance_date not in self._cache:
+            i = self._index[rebalance_date]
+            lo, hi = int(self._date_offsets[i]), int(self._date_offsets[i + 1])
+            starts = self._starts[lo:hi + 1]
+            self._cache[rebalance_date] = {
+                str(self._codes[k]): self._values[starts[k - lo]:starts[k - lo + 1]].tolist()
+                for k in range(lo, hi)
+            }
+        return self._cache[rebalance_date]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class SharedDataPlane:
+    """memmap で共有する特徴量行列・価格データ・リバランス日カレンダー"""
+
+    def __init__(
+        self,
+        root: Path,
+        rebalance_dates: List[str],
+        features: Dict[str, FeatureMatrix],
+        prices: MappedPrices,
+        registry: CodeRegistry,
+        nbytes: int,
+    ):
+        self.root = root
+        self.rebalance_dates = rebalance_dates
+        self.features = features
+        self.prices = prices
+        self.registry = registry
+        self.nbytes = nbytes
+
+    # -----------------------------
+    # 書き出し
+    # -----------------------------
+
+    @classmethod
+    def build(
+        cls,
+        root: Path,
+        features: Dict[str, FeatureMatrix],
+        prices_dict: Dict[str, Dict[str, List[float]]],
+        registry: CodeRegistry,
+        columns: Tuple[str, ...] = MATRIX_FEATURE_COLUMNS,
+    ) -> "SharedDataPlane":
+        """
+        FeatureMatrix と価格データを root に書き出して開く
+
+        一時ディレクトリに書き出してから置き換えるため、書き出し途中のプレーンを
+        他のプロセスが開くことはない。
+        """
+        root = Path(root)
+        dates = sorted(set(features) | set(prices_dict))
+        tmp = root.with_name(f"{root.name}.tmp{os.getpid()}")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+
+        empty = FeatureMatrix(
+            as_of_date="",
+            code_ids=np.empty(0, dtype=np.int32),
+            sector_ids=np.empty(0, dtype=np.int16),
+            values=np.empty((0, len(columns)), dtype=np.float32),
+            valid=np.empty((0, len(columns)), dtype=bool),
+            columns=tuple(columns),
+            registry=registry,
+        )
+        mats = [features.get(d, empty) for d in dates]
+        for m in mats:
+            if m.columns != tuple(columns):
+                raise ValueError(f"FeatureMatrix の列が一致しません: {m.columns} != {tuple(columns)}")
+        feature_offsets = np.cumsum([0] + [len(m) for m in mats]).tolist()
+        np.save(tmp / "code_ids.npy", np.concatenate([m.code_ids for m in mats]).astype(np.int32))
+        np.save(tmp / "sector_ids.npy", np.concatenate([m.sector_ids for m in mats]).astype(np.int16))
+        np.save(tmp / "values.npy", np.concatenate([m.values for m in mats]).astype(np.float32))
+        np.save(tmp / "valid.npy", np.concatenate([m.valid for m in mats]).astype(bool))
+
+        codes: List[str] = []
+        lengths: List[int] = []
+        chunks: List[np.ndarray] = []
+        price_offsets = [0]
+        for d in dates:
+            for code, series in (prices_dict.get(d) or {}).items():
+                codes.append(str(code))
+                arr = np.asarray(series, dtype=np.float64)
+                lengths.append(len(arr))
+                chunks.append(arr)
+            price_offsets.append(len(codes))
+        np.save(tmp / "price_codes.npy", np.asarray(codes, dtype=str) if codes else np.empty(0, dtype="<U1"))
+        np.save(tmp / "price_starts.npy", np.cumsum([0] + lengths).astype(np.int64))
+        np.save(
+            tmp / "price_values.npy",
+            np.concatenate(chunks) if chunks else np.empty(0, dtype=np.float64),
+        )
+
+        registry.save(tmp / _REGISTRY)
+        manifest = {
+            "format_version": PLANE_FORMAT_VERSION,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "rebalance_dates": dates,
+            "as_of_dates": [m.as_of_date for m in mats],
+            "columns": list(columns),
+            "feature_offsets": feature_offsets,
+            "price_offsets": price_offsets,
+        }
+        with open(tmp / _MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        if root.exists():
+            shutil.rmtree(root)
+        tmp.rename(root)
+        return cls.open(root)
+
+    # -----------------------------
+    # 読み込み
+    # -----------------------------
+
+    @staticmethod
+    def exists(root: Path) -> bool:
+        return (Path(root) / _MANIFEST).exists()
+
+    @classmethod
+    def open(cls, root: Path) -> "SharedDataPlane":
+        """root のプレーンを memmap で開く（配列はコピーしない）"""
+        root = Path(root)
+        with open(root / _MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != PLANE_FORMAT_VERSION:
+            raise ValueError(f"未対応のデータプレーン形式です: {root}")
+        registry = CodeRegistry.load(root / _REGISTRY)
+
+        arrays = {
+            name: np.load(root / f"{name}.npy", mmap_mode="r")
+            for name in (
+                "code_ids", "sector_ids", "values", "valid",
+                "price_codes", "price_starts", "price_values",
+            )
+        }
+        dates: List[str] = manifest["rebalance_dates"]
+        columns = tuple(manifest["columns"])
+        offsets = manifest["feature_offsets"]
+        features: Dict[str, FeatureMatrix] = {}
+        for i, d in enumerate(dates):
+            lo, hi = offsets[i], offsets[i + 1]
+            if hi == lo:
+                continue
+            features[d] = FeatureMatrix(
+                as_of_date=manifest["as_of_dates"][i],
+                code_ids=arrays["code_ids"][lo:hi],
+                sector_ids=arrays["sector_ids"][lo:hi],
+                values=arrays["values"][lo:hi],
+                valid=arrays["valid"][lo:hi],
+                columns=columns,
+                registry=registry,
+            )
+        prices = MappedPrices(
+            dates,
+            np.asarray(manifest["price_offsets"], dtype=np.int64),
+            arrays["price_codes"],
+            arrays["price_starts"],
+            arrays["price_values"],
+        )
+        nbytes = sum(a.nbytes for a in arrays.values())
+        return cls(root, dates, features, prices, registry, nbytes)
+
+    @classmethod
+    def warm(
+        cls,
+        feature_cache,
+        rebalance_dates: List[str],
+        root: Optional[Path] = None,
+        n_jobs: int = -1,
+        force_rebuild: bool = False,
+    ) -> "SharedDataPlane":
+        """
+        FeatureCache を warm してプレーンを作成（同じリバランス日のプレーンがあれば再利用）
+
+        Args:
+            feature_cache: FeatureCache
+            rebalance_dates: リバランス日のリスト
+            root: 書き出し先（Noneの場合は cache_dir/plane_{start}_{end}_{data_version}）
+            n_jobs: 特徴量構築の並列数（キャッシュが無い場合）
+            force_rebuild: キャッシュ・既存プレーンを作り直すか
+        """
+        dates = sorted(rebalance_dates)
+        if root is None:
+            root = feature_cache.cache_dir / f"plane_{dates[0]}_{dates[-1]}_{feature_cache.data_version}"
+        root = Path(root)
+        if not force_rebuild and cls.exists(root):
+            plane = cls.open(root)
+            if set(dates) <= set(plane.rebalance_dates):
+                print(f"[SharedDataPlane] 既存のプレーンを使用: {root}")
+                return plane
+        matrices, prices_dict = feature_cache.warm_matrices(dates, n_jobs=n_jobs, force_rebuild=force_rebuild)
+        registry = feature_cache.registry
+        if registry is None:
+            registry = CodeRegistry()
+        plane = cls.build(root, matrices, prices_dict, registry)
+        print(
+            f"[SharedDataPlane] 作成: {root}（特徴量 {len(plane.features)}日分、"
+            f"価格 {len(plane.prices)}日分、{plane.nbytes / 1024 / 1024:.1f}MB）"
+        )
+        return plane
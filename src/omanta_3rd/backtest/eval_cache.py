@@ -0,0 +1,181 @@
+"""パラメータ × リバランス日の評価結果キャッシュ
+
+WFA の roll fold は train 期間の大部分が隣の fold と重なり、前 fold の上位パラメータを
+次の fold に enqueue すると、同じパラメータを同じリバランス日で再評価することになる。
+
+固定ホライズン評価（require_full_horizon=True）では、1リバランス日の評価結果は
+（パラメータ, リバランス日, ホライズン, コスト）とデータバージョンだけで決まり、
+as_of_date には依存しない（eval_end <= as_of_date の日付だけが評価対象のため）。
+EvaluationCache はこの単位で calculate_portfolio_performance の結果を保持し、
+calculate_longterm_performance は未評価の日付だけを計算する。
+
+path を指定した場合は SQLite ファイルにも保存し、fold をサブプロセスで実行する場合
+（run_walk_forward_analysis_roll.py、fold 並列）でもプロセス間で再利用する。
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS eval_cache (
+    params_key TEXT NOT NULL,
+    rebalance_date TEXT NOT NULL,
+    horizon_months INTEGER NOT NULL,
+    cost_bps REAL NOT NULL,
+    performance BLOB NOT NULL,
+    PRIMARY KEY (params_key, rebalance_date, horizon_months, cost_bps)
+)
+"""
+
+_Key = Tuple[str, str, int, float]
+
+
+class EvaluationCache:
+    """{(params_key, rebalance_date, horizon_months, cost_bps): performance} のキャッシュ"""
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: 保存先の SQLite ファイル（Noneの場合はプロセス内のメモリのみ）
+        """
+        self.path = Path(path) if path is not None else None
+        self._memory: Dict[_Key, Dict[str, Any]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._lock = threading.Lock()  # Optuna の n_jobs>1（スレッド並列）用
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_feature_cache(cls, feature_cache) -> "EvaluationCache":
+        """FeatureCache と同じディレクトリ・データバージョンのキャッシュを開く"""
+        return cls(feature_cache.cache_dir / f"eval_cache_{feature_cache.data_version}.sqlite")
+
+    @staticmethod
+    def params_key(strategy_params_dict: Dict[str, Any], entry_params_dict: Dict[str, Any]) -> str:
+        """StrategyParams・EntryScoreParams（asdict）からキーを作成"""
+        payload = json.dumps(
+            {"strategy": strategy_params_dict, "entry": entry_params_dict},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    # -----------------------------
+    # SQLite
+    # -----------------------------
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        # fork 後の子プロセスでは親の接続を使わない
+        if self._conn is None or self._conn_pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=60.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        self._conn_pid = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        state["_conn_pid"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # 参照・保存
+    # -----------------------------
+
+    @staticmethod
+    def _key(params_key: str, rebalance_date: str, horizon_months: int, cost_bps: float) -> _Key:
+        return (params_key, rebalance_date, int(horizon_months), float(cost_bps))
+
+    def get(
+        self,
+        params_key: str,
+        rebalance_date: str,
+        horizon_months: int,
+        cost_bps: float,
+    ) -> Optional[Dict[str, Any]]:
+        """評価済みであれば performance のコピーを返す（未評価はNone）"""
+        key = self._key(params_key, rebalance_date, horizon_months, cost_bps)
+        with self._lock:
+            perf = self._memory.get(key)
+            if perf is None:
+                conn = self._connection()
+                if conn is not None:
+                    row = conn.execute(
+                        """
+                        SELECT performance FROM eval_cache
+                        WHERE params_key = ? AND rebalance_date = ? AND horizon_months = ? AND cost_bps = ?
+                        """,
+                        key,
+                    ).fetchone()
+                    if row is not None:
+                        perf = pickle.loads(row[0])
+                        self._memory[key] = perf
+            if perf is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(perf)
+
+    def put_many(
+        self,
+        params_key: str,
+        horizon_months: int,
+        cost_bps: float,
+        performances: Iterable[Dict[str, Any]],
+    ) -> int:
+        """performance（rebalance_date を含む）をまとめて保存し、保存件数を返す"""
+        rows = []
+        with self._lock:
+            for perf in performances:
+                key = self._key(params_key, perf["rebalance_date"], horizon_months, cost_bps)
+                self._memory[key] = copy.deepcopy(perf)
+                rows.append(key + (pickle.dumps(perf, protocol=pickle.HIGHEST_PROTOCOL),))
+            conn = self._connection()
+            if conn is not None and rows:
+                conn.executemany("INSERT OR REPLACE INTO eval_cache VALUES (?, ?, ?, ?, ?)", rows)
+                conn.commit()
+        return len(rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return len(self._memory)
+            return conn.execute("SELECT COUNT(*) FROM eval_cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -7,7 +7,7 @@
 from __future__ import annotations
 
 import subprocess
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence
 import numpy as np
 
 from ..backtest.timeseries import calculate_timeseries_returns
@@ -19,6 +19,13 @@ from ..backtest.metrics import (
     calculate_volatility_timeseries,
     calculate_profit_factor_timeseries,
     calculate_win_rate_timeseries,
+    calculate_max_drawdown_2d,
+    calculate_sharpe_ratio_2d,
+    calculate_sortino_ratio_2d,
+    calculate_cagr_2d,
+    calculate_volatility_2d,
+    calculate_profit_factor_2d,
+    calculate_win_rate_2d,
 )
 
 
@@ -112,6 +119,81 @@ def calculate_metrics_from_timeseries_data(
     }
 
 
+def calculate_metrics_from_timeseries_batch(
+    timeseries_list: Sequence[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    複数の時系列データのメトリクスを一括計算（calculate_metrics_from_timeseries_data の配列版）
+
+    月数が同じ系列を (n_series, n_periods) の配列にまとめ、metrics.py の配列版で計算する。
+    結果は calculate_metrics_from_timeseries_data を1件ずつ呼んだ場合と同じ。
+    系列長が揃っていないデータ（超過リターンやエクイティカーブの欠損）は1件ずつ計算する。
+
+    Args:
+        timeseries_list: calculate_timeseries_returns()の戻り値のリスト（trial・候補ごと）
+
+    Returns:
+        メトリクスの辞書のリスト（timeseries_list と同じ順序）
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(timeseries_list)
+    groups: Dict[int, List[int]] = {}
+    for i, data in enumerate(timeseries_list):
+        n = len(data.get("monthly_returns", []))
+        if (
+            n > 0
+            and len(data.get("monthly_excess_returns", [])) == n
+            and len(data.get("equity_curve", [])) == n + 1
+        ):
+            groups.setdefault(n, []).append(i)
+        else:
+            results[i] = calculate_metrics_from_timeseries_data(data)
+
+    def _opt(value, scale: float = 1.0) -> Optional[float]:
+        return float(value) * scale if np.isfinite(value) else None
+
+    for n, indices in groups.items():
+        returns = np.array([timeseries_list[i]["monthly_returns"] for i in indices], dtype=float)
+        excess = np.array([timeseries_list[i]["monthly_excess_returns"] for i in indices], dtype=float)
+        equity = np.array([timeseries_list[i]["equity_curve"] for i in indices], dtype=float)
+
+        mean_return = returns.mean(axis=1)
+        mean_excess_return = excess.mean(axis=1)
+        max_dd = calculate_max_drawdown_2d(equity)
+        cagr = calculate_cagr_2d(equity, n)
+        volatility = calculate_volatility_2d(returns, annualize=True)
+        sharpe = calculate_sharpe_ratio_2d(excess, risk_free_rate=0.0, annualize=True)
+        sortino = calculate_sortino_ratio_2d(excess, annualize=True)
+        win_rate = calculate_win_rate_2d(excess)
+        profit_factor = calculate_profit_factor_2d(returns, equity)
+        total_return = (equity[:, -1] / equity[:, 0] - 1.0) * 100.0
+
+        for j, i in enumerate(indices):
+            portfolio_details = timeseries_list[i].get("portfolio_details", [])
+            results[i] = {
+                # リターン指標
+                "cagr": _opt(cagr[j], 100.0),
+                "mean_return": float(mean_return[j]) * 100.0,
+                "mean_excess_return": float(mean_excess_return[j]) * 100.0,
+                "total_return": float(total_return[j]),
+                "volatility": _opt(volatility[j], 100.0),
+                # リスク指標
+                "max_drawdown": float(max_dd[j]) * 100.0,
+                # リスク調整後リターン
+                "sharpe_ratio": _opt(sharpe[j]),
+                "sortino_ratio": _opt(sortino[j]),
+                # 勝率・Profit Factor
+                "win_rate": _opt(win_rate[j]),
+                "profit_factor": _opt(profit_factor[j]),
+                # その他
+                "num_periods": n,
+                "num_missing_stocks": sum(
+                    detail.get("num_missing_stocks", 0) for detail in portfolio_details
+                ),
+            }
+
+    return results
+
+
 def get_git_commit_hash() -> Optional[str]:
     """Gitコミットハッシュを取得"""
     try:
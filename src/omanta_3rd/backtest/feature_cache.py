@@ -15,7 +15,28 @@ import pandas as pd
 import numpy as np
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from ..infra.db import connect_db
+from ..infra.db import borrow_db
+from ..features.code_registry import CodeRegistry
+from ..features.technicals import ENTRY_SCORE_LOOKBACK
+from .feature_matrix import FeatureMatrix, build_feature_matrices
+
+
+# 最適化（_select_portfolio_with_params）で使用する特徴量列
+# warm/get の columns に渡すと、キャッシュからこれらの列だけを読み込む
+SELECTION_FEATURE_COLUMNS = [
+    "as_of_date",
+    "code",
+    "sector33",
+    "liquidity_60d",
+    "market_cap",
+    "roe",
+    "pbr",
+    "forward_per",
+    "op_growth",
+    "profit_growth",
+    "op_trend",
+    "record_high_forecast_flag",
+]
 
 
 def _get_build_features():
@@ -35,21 +56,29 @@ class FeatureCache:
         self,
         cache_dir: str = "cache/features",
         data_version: Optional[str] = None,
+        snapshot_path: Optional[str] = None,
     ):
         """
         Args:
             cache_dir: キャッシュディレクトリ
             data_version: データバージョン（Noneの場合は自動計算）
+            snapshot_path: キャッシュ構築時に読むスナップショットDB（Noneの場合はライブDB）
         """
         self.cache_dir = Path(cache_dir)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.data_version = data_version or self._compute_data_version()
+        # 直近に読み込んだキャッシュの銘柄コード・業種対応表（FeatureMatrix の ID に使用）
+        # warm / get / _load_cache が返すフレームの code / sector33 は文字列のまま
+        self.registry: Optional[CodeRegistry] = None
     
     def _compute_data_version(self) -> str:
         """データバージョンを計算（DBの最新データのハッシュ）"""
         # 簡易版: 現在の日時ベース（実際にはDBのデータハッシュを計算すべき）
         # 本実装では、start_date/end_dateと組み合わせて一意性を確保
-        return "v1"
+        # v2: 価格データを各リバランス日の as_of_date までの直近 ENTRY_SCORE_LOOKBACK 本に変更
+        #     （v1 は最後のリバランス日の翌営業日までの全履歴で、選定に使うと未来参照になる）
+        return "v2"
     
     def _get_cache_path(self, start_date: str, end_date: str) -> Path:
         """キャッシュファイルのパスを取得"""
@@ -66,11 +95,17 @@ class FeatureCache:
         cache_name = f"metadata_{start_date}_{end_date}_{self.data_version}.json"
         return self.cache_dir / cache_name
     
+    def _get_registry_path(self, start_date: str, end_date: str) -> Path:
+        """銘柄コード・業種の対応表（CodeRegistry）のパスを取得"""
+        cache_name = f"registry_{start_date}_{end_date}_{self.data_version}.json"
+        return self.cache_dir / cache_name
+    
     def warm(
         self,
         rebalance_dates: List[str],
         n_jobs: int = -1,
         force_rebuild: bool = False,
+        columns: Optional[List[str]] = None,
     ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, List[float]]]]:
         """
         全rebalance_dateの特徴量を計算してキャッシュに保存
@@ -79,6 +114,7 @@ class FeatureCache:
             rebalance_dates: リバランス日のリスト
             n_jobs: 並列実行数（-1でCPU数）
             force_rebuild: 既存キャッシュを無視して再構築するか
+            columns: 既存キャッシュから読み込む列（Noneで全列、例: SELECTION_FEATURE_COLUMNS）
         
         Returns:
             {rebalance_date: features_df} の辞書
@@ -87,17 +123,8 @@ class FeatureCache:
             return {}
         
         start_date = rebalance_dates[0]
-        # 重要: 最後のリバランス日の翌営業日まで含める（購入価格取得用）
-        # キャッシュファイル名はリバランス日の範囲を使用するが、
-        # 実際のデータ取得範囲は翌営業日まで含める
-        last_rebalance_date = rebalance_dates[-1]
-        with connect_db(read_only=True) as conn:
-            from ..backtest.performance import _get_next_trading_day
-            next_trading_day = _get_next_trading_day(conn, last_rebalance_date)
-            # 翌営業日が存在する場合はそれを使用、存在しない場合は最後のリバランス日を使用
-            end_date_for_data = next_trading_day if next_trading_day else last_rebalance_date
-        # キャッシュファイル名はリバランス日の範囲を使用（既存キャッシュとの互換性のため）
-        end_date = last_rebalance_date
+        # キャッシュファイル名はリバランス日の範囲を使用
+        end_date = rebalance_dates[-1]
         
         cache_path = self._get_cache_path(start_date, end_date)
         prices_cache_path = self._get_prices_cache_path(start_date, end_date)
@@ -106,7 +133,9 @@ class FeatureCache:
         # 既存キャッシュを確認
         if not force_rebuild and cache_path.exists() and prices_cache_path.exists():
             print(f"[FeatureCache] 既存のキャッシュを読み込みます: {cache_path}")
-            features_dict = self._load_cache(start_date, end_date)
+            features_dict = self._load_cache(
+                start_date, end_date, columns=columns, rebalance_dates=rebalance_dates
+            )
             # 価格データも一括読み込み（効率化）
             print(f"[FeatureCache] 価格データキャッシュを読み込みます...")
             import json
@@ -138,7 +167,9 @@ class FeatureCache:
             # 並列実行
             with ProcessPoolExecutor(max_workers=n_jobs) as executor:
                 futures = {
-                    executor.submit(self._build_features_single, rebalance_date, end_date_for_data): rebalance_date
+                    executor.submit(
+                        self._build_features_single, rebalance_date, self.snapshot_path
+                    ): rebalance_date
                     for rebalance_date in rebalance_dates
                 }
                 
@@ -159,7 +190,7 @@ class FeatureCache:
             # 逐次実行
             for rebalance_date in rebalance_dates:
                 try:
-                    result = self._build_features_single(rebalance_date, end_date_for_data)
+                    result = self._build_features_single(rebalance_date, self.snapshot_path)
                     if result is not None:
                         feat, prices = result
                         if feat is not None and not feat.empty:
@@ -179,19 +210,57 @@ class FeatureCache:
         
         print(f"[FeatureCache] キャッシュ構築完了: {len(features_dict)}日分")
         
+        # キャッシュには全列を保存し、返り値だけ指定列に絞る（既存キャッシュ読み込み時と揃える）
+        if columns is not None:
+            features_dict = {
+                rd: feat[[c for c in columns if c in feat.columns]].copy()
+                for rd, feat in features_dict.items()
+            }
+        
+        self.registry = CodeRegistry.load(self._get_registry_path(start_date, end_date))
+        
         return features_dict, prices_dict
     
+    def warm_matrices(
+        self,
+        rebalance_dates: List[str],
+        n_jobs: int = -1,
+        force_rebuild: bool = False,
+    ) -> Tuple[Dict[str, FeatureMatrix], Dict[str, Dict[str, List[float]]]]:
+        """
+        warm と同じくキャッシュを構築・読み込み、特徴量を FeatureMatrix で返す
+        
+        選定に必要な列（SELECTION_FEATURE_COLUMNS）だけを読み込み、
+        DataFrame は変換後に破棄する。
+        
+        Returns:
+            ({rebalance_date: FeatureMatrix}, {rebalance_date: {code: [adj_close, ...]}})
+            価格は as_of_date までの直近 ENTRY_SCORE_LOOKBACK 本（選定の entry_score に使用）
+        """
+        features_dict, prices_dict = self.warm(
+            rebalance_dates,
+            n_jobs=n_jobs,
+            force_rebuild=force_rebuild,
+            columns=SELECTION_FEATURE_COLUMNS,
+        )
+        matrices = build_feature_matrices(features_dict, self.registry)
+        return matrices, prices_dict
+    
     @staticmethod
-    def _build_features_single(rebalance_date: str, end_date_for_data: Optional[str] = None) -> Optional[tuple]:
+    def _build_features_single(
+        rebalance_date: str,
+        snapshot_path: Optional[Path] = None,
+    ) -> Optional[tuple]:
         """単一のrebalance_dateの特徴量を計算（並列化用）
         
         Args:
             rebalance_date: リバランス日
-            end_date_for_data: 価格データ取得の終了日（Noneの場合はリバランス日の翌営業日を自動計算）
+            snapshot_path: 読み取るスナップショットDB（Noneの場合はライブDB）
         """
         try:
             build_features = _get_build_features()
-            with connect_db(read_only=True) as conn:
+            # リバランス日ごとに呼ばれるため、ワーカープロセス内で接続を再利用する
+            with borrow_db(snapshot=snapshot_path) as conn:
                 feat = build_features(conn, rebalance_date)
             
             if feat is None or feat.empty:
@@ -210,22 +279,10 @@ class FeatureCache:
                 print(f"[FeatureCache._build_features_single] スコアを削除しました（{rebalance_date}）: {removed_columns}")
             
             # 価格データも取得（entry_score計算用）
-            # build_features内で使用される価格データを再取得
-            # 重要: リバランス日の翌営業日までのデータも含める（購入価格取得用）
+            # 重要: 選定時の entry_score と同じく as_of_date までに限る（翌営業日以降を含めると未来参照になる）
+            # entry_score は直近 ENTRY_SCORE_LOOKBACK 本しか使わないため、それだけを保存する
             price_date = feat["as_of_date"].iloc[0]
-            with connect_db(read_only=True) as conn:
-                # 価格データ取得の終了日を決定
-                if end_date_for_data:
-                    # 明示的に指定された場合はそれを使用（最後のリバランス日の翌営業日）
-                    price_end_date = end_date_for_data
-                else:
-                    # リバランス日の翌営業日を取得
-                    from ..backtest.performance import _get_next_trading_day
-                    next_trading_day = _get_next_trading_day(conn, price_date)
-                    # 翌営業日が存在する場合はそれを使用、存在しない場合はリバランス日を使用
-                    price_end_date = next_trading_day if next_trading_day else price_date
-                
-                # 価格データを取得（翌営業日まで含む）
+            with borrow_db(snapshot=snapshot_path) as conn:
                 prices_win = pd.read_sql_query(
                     """
                     SELECT code, date, adj_close
@@ -234,13 +291,13 @@ class FeatureCache:
                     ORDER BY code, date
                     """,
                     conn,
-                    params=(price_end_date,),
+                    params=(price_date,),
                 )
             
             # 各銘柄の終値系列を辞書形式で保存
             prices_dict = {}
             for code, g in prices_win.groupby("code"):
-                prices_dict[code] = g["adj_close"].reset_index(drop=True).tolist()
+                prices_dict[code] = g["adj_close"].iloc[-ENTRY_SCORE_LOOKBACK:].tolist()
             
             return feat, prices_dict
         except Exception as e:
@@ -270,9 +327,12 @@ class FeatureCache:
         
         if all_features:
             combined_features = pd.concat(all_features, ignore_index=True)
+            combined_features = combined_features.sort_values(
+                ["rebalance_date", "code"], kind="mergesort"
+            ).reset_index(drop=True)
             # parquet保存を試行（pyarrow優先、なければfastparquet、それもなければpickle）
             try:
-                combined_features.to_parquet(cache_path, index=False, engine="pyarrow")
+                self._write_parquet_by_date(combined_features, cache_path)
                 print(f"[FeatureCache] 特徴量キャッシュを保存（pyarrow）: {cache_path}")
             except (ImportError, ValueError):
                 try:
@@ -288,6 +348,11 @@ class FeatureCache:
                     # parquetファイルも作成（空のDataFrameで）
                     cache_path.touch()
         
+        # 銘柄コード・業種の対応表を保存（FeatureMatrix の ID に使用）
+        CodeRegistry.from_frames(features_dict.values()).save(
+            self._get_registry_path(start_date, end_date)
+        )
+        
         # 価格データを保存（JSON形式、圧縮なしで高速化）
         import json
         with open(prices_cache_path, "w", encoding="utf-8") as f:
@@ -301,73 +366,164 @@ class FeatureCache:
             "data_version": self.data_version,
             "rebalance_dates": list(features_dict.keys()),
             "num_features": len(combined_features) if all_features else 0,
+            "layout": "row_group_per_rebalance_date",
         }
         with open(metadata_path, "w", encoding="utf-8") as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
     
-    def _load_cache(self, start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
-        """キャッシュを読み込み"""
+    @staticmethod
+    def _write_parquet_by_date(combined_features: pd.DataFrame, cache_path: Path):
+        """
+        rebalance_dateごとに1つのrow groupとしてparquetに書き出す
+
+        row groupの統計情報（min/max）によって、読み込み時に日付フィルタで
+        対象外のrow groupを丸ごとスキップできる（predicate pushdown）。
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.Schema.from_pandas(combined_features, preserve_index=False)
+        with pq.ParquetWriter(cache_path, schema) as writer:
+            for _, idx in combined_features.groupby("rebalance_date", sort=True).indices.items():
+                table = pa.Table.from_pandas(
+                    combined_features.iloc[idx], schema=schema, preserve_index=False
+                )
+                writer.write_table(table, row_group_size=len(idx))
+
+    @staticmethod
+    def _read_parquet(
+        cache_path: Path,
+        columns: Optional[List[str]] = None,
+        rebalance_dates: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        列の射影と日付フィルタ付きでparquetを読み込む
+
+        pyarrowでは filters が row group 単位でプッシュダウンされるため、
+        指定日付以外のrow groupと不要な列は読み込まれない。
+        """
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(list(columns) + ["rebalance_date"]))
+        filters = [("rebalance_date", "in", list(rebalance_dates))] if rebalance_dates else None
+        try:
+            return pd.read_parquet(cache_path, engine="pyarrow", columns=read_columns, filters=filters)
+        except ImportError:
+            return pd.read_parquet(cache_path, engine="fastparquet", columns=read_columns, filters=filters)
+
+    @staticmethod
+    def _read_pickle(
+        pickle_path: Path,
+        columns: Optional[List[str]] = None,
+        rebalance_dates: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """pickleキャッシュを読み込み、列と日付を絞り込む（フォールバック用）"""
+        import pickle
+        with open(pickle_path, "rb") as f:
+            combined_features = pickle.load(f)
+        if rebalance_dates:
+            combined_features = combined_features[combined_features["rebalance_date"].isin(rebalance_dates)]
+        if columns is not None:
+            keep = [c for c in dict.fromkeys(list(columns) + ["rebalance_date"]) if c in combined_features.columns]
+            combined_features = combined_features[keep]
+        return combined_features
+
+    def _load_cache(
+        self,
+        start_date: str,
+        end_date: str,
+        columns: Optional[List[str]] = None,
+        rebalance_dates: Optional[List[str]] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        キャッシュを読み込み
+        
+        Args:
+            start_date: 開始日（キャッシュファイル特定用）
+            end_date: 終了日（キャッシュファイル特定用）
+            columns: 読み込む列（Noneで全列）
+            rebalance_dates: 読み込むリバランス日（Noneで全日付）
+        """
         cache_path = self._get_cache_path(start_date, end_date)
         pickle_path = cache_path.with_suffix(".pkl")
         
         # pickleファイルを優先（フォールバック用）
         if pickle_path.exists():
             print(f"[FeatureCache] キャッシュを読み込みます（pickle）: {pickle_path}")
-            import pickle
-            with open(pickle_path, "rb") as f:
-                combined_features = pickle.load(f)
+            combined_features = self._read_pickle(pickle_path, columns, rebalance_dates)
         elif cache_path.exists():
             print(f"[FeatureCache] キャッシュを読み込みます: {cache_path}")
             # parquet読み込みを試行
             try:
-                combined_features = pd.read_parquet(cache_path, engine="pyarrow")
+                combined_features = self._read_parquet(cache_path, columns, rebalance_dates)
             except (ImportError, ValueError, OSError) as e:
                 # OSError: Repetition level histogram size mismatch などのファイル破損エラー
-                try:
-                    combined_features = pd.read_parquet(cache_path, engine="fastparquet")
-                except (ImportError, ValueError, OSError):
-                    # エンジンが利用できない、またはファイルが破損している
-                    if isinstance(e, OSError):
-                        raise OSError(
-                            f"キャッシュファイルが破損している可能性があります: {cache_path}\n"
-                            f"エラー: {e}\n"
-                            f"キャッシュを削除して再構築してください: rm {cache_path}"
-                        )
-                    else:
-                        raise ImportError(
-                            "parquetファイルを読み込むにはpyarrowまたはfastparquetが必要です。"
-                            "インストール: pip install pyarrow または pip install fastparquet"
-                        )
+                if isinstance(e, OSError):
+                    raise OSError(
+                        f"キャッシュファイルが破損している可能性があります: {cache_path}\n"
+                        f"エラー: {e}\n"
+                        f"キャッシュを削除して再構築してください: rm {cache_path}"
+                    )
+                raise ImportError(
+                    "parquetファイルを読み込むにはpyarrowまたはfastparquetが必要です。"
+                    "インストール: pip install pyarrow または pip install fastparquet"
+                )
         else:
             raise FileNotFoundError(f"キャッシュが見つかりません: {cache_path} または {pickle_path}")
         
-        # rebalance_dateごとに分割
-        features_dict = {}
-        for rebalance_date, group in combined_features.groupby("rebalance_date"):
-            feat = group.drop(columns=["rebalance_date"]).copy()
-            
-            # 重要: 既存キャッシュから読み込んだ場合でも、entry_score/core_scoreを削除
-            # これにより、古いキャッシュ（スコア列が含まれている）でも安全に使用できる
-            score_columns_to_remove = ["entry_score", "core_score"]
-            removed_columns = [col for col in score_columns_to_remove if col in feat.columns]
-            if removed_columns:
-                feat = feat.drop(columns=removed_columns)
-                print(f"[FeatureCache._load_cache] スコアを削除しました（{rebalance_date}）: {removed_columns}")
-            
-            features_dict[rebalance_date] = feat
+        # 重要: 既存キャッシュから読み込んだ場合でも、entry_score/core_scoreを削除
+        # これにより、古いキャッシュ（スコア列が含まれている）でも安全に使用できる
+        score_columns_to_remove = [
+            col for col in ["entry_score", "core_score"] if col in combined_features.columns
+        ]
+        if score_columns_to_remove:
+            combined_features = combined_features.drop(columns=score_columns_to_remove)
+            print(f"[FeatureCache._load_cache] スコアを削除しました: {score_columns_to_remove}")
+        
+        self.registry = self._load_registry(start_date, end_date, combined_features)
+        
+        # rebalance_dateごとに分割（位置インデックスで切り出し、日付ごとの追加コピーはしない）
+        dates = combined_features["rebalance_date"].astype(str)
+        combined_features = combined_features.drop(columns=["rebalance_date"])
+        features_dict = {
+            rebalance_date: combined_features.iloc[idx].reset_index(drop=True)
+            for rebalance_date, idx in dates.groupby(dates, sort=True).indices.items()
+        }
         
         print(f"[FeatureCache] キャッシュ読み込み完了: {len(features_dict)}日分")
         
         return features_dict
     
-    def get(self, rebalance_date: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+    def _load_registry(
+        self, start_date: str, end_date: str, combined_features: pd.DataFrame
+    ) -> CodeRegistry:
+        """
+        対応表を読み込み（対応表の無い古いキャッシュは読み込んだ特徴量から構築）
+        
+        全日付の銘柄で構築した対応表を使うため、日付を絞って読み込んでも ID は変わらない。
+        """
+        registry_path = self._get_registry_path(start_date, end_date)
+        if registry_path.exists():
+            return CodeRegistry.load(registry_path)
+        return CodeRegistry.from_frames([combined_features])
+    
+    def get(
+        self,
+        rebalance_date: str,
+        start_date: str,
+        end_date: str,
+        columns: Optional[List[str]] = None,
+    ) -> Optional[pd.DataFrame]:
         """
         指定日付の特徴量DataFrameを取得
         
+        日付フィルタをparquetにプッシュダウンするため、該当日のrow groupだけを読み込む。
+        
         Args:
             rebalance_date: リバランス日
             start_date: 開始日（キャッシュファイル特定用）
             end_date: 終了日（キャッシュファイル特定用）
+            columns: 読み込む列（Noneで全列）
         
         Returns:
             特徴量DataFrame（見つからない場合はNone）
@@ -377,27 +533,17 @@ class FeatureCache:
         
         # pickleファイルを優先（フォールバック用）
         if pickle_path.exists():
-            import pickle
-            with open(pickle_path, "rb") as f:
-                combined_features = pickle.load(f)
+            feat = self._read_pickle(pickle_path, columns, [rebalance_date])
         elif cache_path.exists():
-            # parquet読み込みを試行
             try:
-                combined_features = pd.read_parquet(cache_path, engine="pyarrow")
+                feat = self._read_parquet(cache_path, columns, [rebalance_date])
             except (ImportError, ValueError):
-                try:
-                    combined_features = pd.read_parquet(cache_path, engine="fastparquet")
-                except (ImportError, ValueError):
-                    return None
+                return None
         else:
             return None
         
-        # 指定日付のデータを抽出
-        if "rebalance_date" in combined_features.columns:
-            feat = combined_features[combined_features["rebalance_date"] == rebalance_date].copy()
-            if not feat.empty:
-                feat = feat.drop(columns=["rebalance_date"])
-                return feat
+        if "rebalance_date" in feat.columns and not feat.empty:
+            return feat.drop(columns=["rebalance_date"]).reset_index(drop=True)
         
         return None
     
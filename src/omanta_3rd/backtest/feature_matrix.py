@@ -0,0 +1,135 @@
+"""最適化用のコンパクトな特徴量行列
+
+FeatureCache の特徴量は日付ごとの pandas DataFrame（object列・float64列を含む）で、
+最適化ワーカーはそれを全日付分プロセスごとに保持・受け渡ししている。
+
+FeatureMatrix は1日分の特徴量を以下の numpy 配列だけで保持する。
+- values: float32 の2次元配列（銘柄 × 特徴量、欠損は NaN）
+- valid: values と同じ形の bool 配列（値が有効か）
+- code_ids / sector_ids: CodeRegistry の int ID（int32 / int16、未登録・欠損は -1）
+
+文字列は CodeRegistry に1つだけ持ち、選定結果の銘柄だけを decode_codes で文字列に戻す。
+float32 への丸めにより、閾値（roe_min 等）ちょうどの銘柄やスコア同順位の並びが
+float64 の DataFrame と異なる可能性がある点に注意。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..features.code_registry import CodeRegistry
+
+
+# 行列に格納する数値特徴量（SELECTION_FEATURE_COLUMNS から as_of_date / code / sector33 を除いたもの）
+MATRIX_FEATURE_COLUMNS: Tuple[str, ...] = (
+    "liquidity_60d",
+    "market_cap",
+    "roe",
+    "pbr",
+    "forward_per",
+    "op_growth",
+    "profit_growth",
+    "op_trend",
+    "record_high_forecast_flag",
+)
+
+
+@dataclass
+class FeatureMatrix:
+    """1リバランス日分の特徴量（銘柄 × 特徴量の float32 行列）"""
+
+    as_of_date: str
+    code_ids: np.ndarray
+    sector_ids: np.ndarray
+    values: np.ndarray
+    valid: np.ndarray
+    columns: Tuple[str, ...]
+    registry: CodeRegistry
+
+    @classmethod
+    def from_frame(
+        cls,
+        feat: pd.DataFrame,
+        registry: CodeRegistry,
+        columns: Sequence[str] = MATRIX_FEATURE_COLUMNS,
+    ) -> "FeatureMatrix":
+        """
+        特徴量DataFrame（FeatureCache / build_features の出力）から構築
+
+        Args:
+            feat: as_of_date, code, sector33 と数値特徴量列を持つDataFrame
+            registry: 銘柄コード・業種の対応表
+            columns: 行列に格納する列（feat に無い列は全て欠損になる）
+        """
+        columns = tuple(columns)
+        n = len(feat)
+        values = np.full((n, len(columns)), np.nan, dtype=np.float32)
+        for j, col in enumerate(columns):
+            if col in feat.columns:
+                values[:, j] = pd.to_numeric(feat[col], errors="coerce").to_numpy(
+                    dtype=np.float32, na_value=np.nan
+                )
+        return cls(
+            as_of_date=str(feat["as_of_date"].iloc[0]) if n else "",
+            code_ids=registry.encode_codes(feat["code"]),
+            sector_ids=registry.encode_sectors(feat["sector33"])
+            if "sector33" in feat.columns
+            else np.full(n, -1, dtype=np.int16),
+            values=values,
+            valid=~np.isnan(values),
+            columns=columns,
+            registry=registry,
+        )
+
+    def __len__(self) -> int:
+        return len(self.code_ids)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def nbytes(self) -> int:
+        """配列部分のメモリ使用量（registry は全日付で共有するため含めない）"""
+        return self.code_ids.nbytes + self.sector_ids.nbytes + self.values.nbytes + self.valid.nbytes
+
+    def column(self, name: str) -> np.ndarray:
+        """指定列の値（float32、欠損はNaN）"""
+        return self.values[:, self.columns.index(name)]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        選定用の DataFrame に戻す
+
+        code / sector33 は文字列（未登録・欠損は None）、数値列は float64。
+        """
+        df = pd.DataFrame(self.values.astype(np.float64), columns=list(self.columns))
+        df.insert(0, "as_of_date", self.as_of_date)
+        df.insert(1, "code", self.registry.decode_codes(self.code_ids))
+        df.insert(2, "sector33", self.registry.decode_sectors(self.sector_ids))
+        return df
+
+
+def build_feature_matrices(
+    features_dict: Dict[str, pd.DataFrame],
+    registry: Optional[CodeRegistry] = None,
+    columns: Sequence[str] = MATRIX_FEATURE_COLUMNS,
+) -> Dict[str, FeatureMatrix]:
+    """
+    {rebalance_date: features_df} を {rebalance_date: FeatureMatrix} に変換
+
+    Args:
+        features_dict: FeatureCache.warm の返り値の特徴量辞書
+        registry: 銘柄コード・業種の対応表（Noneの場合は features_dict から構築）
+        columns: 行列に格納する列
+    """
+    if registry is None:
+        registry = CodeRegistry.from_frames(features_dict.values())
+    return {
+        rd: FeatureMatrix.from_frame(feat, registry, columns)
+        for rd, feat in features_dict.items()
+    }
@@ -348,3 +348,136 @@ def calculate_percentile(returns: List[float], percentile: float) -> float:
         return 0.0
     return float(np.percentile(returns, percentile))
 
+
+
+# =============================================================================
+# 2次元配列版（n_series × n_periods）
+# =============================================================================
+#
+# 上の関数と同じ定義を、最終軸を期間とする配列に対して一括計算する。
+# 多数の trial・候補を1回で採点するためのもの（結果は上の関数と一致する）。
+# 上の関数が None を返すケースは NaN を返す。
+
+
+def _as_2d(values) -> np.ndarray:
+    arr = np.asarray(values, dtype=float)
+    return arr.reshape(1, -1) if arr.ndim == 1 else arr
+
+
+def equity_curves_2d(monthly_returns) -> np.ndarray:
+    """月次リターン (n_series, n) から初期値1.0のエクイティカーブ (n_series, n+1) を作成"""
+    r = _as_2d(monthly_returns)
+    ones = np.ones(r.shape[:-1] + (1,))
+    return np.concatenate([ones, np.cumprod(1.0 + r, axis=-1)], axis=-1)
+
+
+def calculate_max_drawdown_2d(equity_curves) -> np.ndarray:
+    """calculate_max_drawdown の配列版（小数、-0.1 = -10%）"""
+    values = _as_2d(equity_curves)
+    if values.shape[-1] < 2:
+        return np.zeros(values.shape[:-1])
+    peak = np.maximum.accumulate(values, axis=-1)
+    return np.min((values - peak) / peak, axis=-1)
+
+
+def calculate_sharpe_ratio_2d(
+    monthly_returns,
+    risk_free_rate: float = 0.0,
+    annualize: bool = True,
+) -> np.ndarray:
+    """
+    calculate_sharpe_ratio の配列版
+
+    超過リターンを渡す場合は risk_free_rate=0.0（calculate_sharpe_ratio に
+    monthly_excess_returns を渡した場合と同じ）。
+    """
+    r = _as_2d(monthly_returns)
+    if r.shape[-1] < 2:
+        return np.full(r.shape[:-1], np.nan)
+    mean_return = r.mean(axis=-1)
+    std_return = r.std(axis=-1, ddof=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std_return == 0, np.nan, (mean_return - risk_free_rate / 12.0) / std_return)
+    return sharpe * np.sqrt(12.0) if annualize else sharpe
+
+
+def calculate_sortino_ratio_2d(
+    monthly_returns,
+    annualize: bool = True,
+    target: float = 0.0,
+) -> np.ndarray:
+    """calculate_sortino_ratio の配列版（標準定義）"""
+    r = _as_2d(monthly_returns)
+    if r.shape[-1] < 2:
+        return np.full(r.shape[:-1], np.nan)
+    mean_return = r.mean(axis=-1)
+    downside_dev = np.sqrt(np.mean(np.minimum(0.0, r - target) ** 2, axis=-1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sortino = np.where(downside_dev == 0, np.nan, (mean_return - target) / downside_dev)
+    return sortino * np.sqrt(12.0) if annualize else sortino
+
+
+def calculate_cagr_2d(equity_curves, num_months: int) -> np.ndarray:
+    """calculate_cagr の配列版"""
+    equity = _as_2d(equity_curves)
+    if equity.shape[-1] == 0 or num_months == 0:
+        return np.full(equity.shape[:-1], np.nan)
+    with np.errstate(invalid="ignore"):
+        return (equity[..., -1] / equity[..., 0]) ** (12.0 / num_months) - 1.0
+
+
+def calculate_calmar_ratio_2d(equity_curves, num_months: int) -> np.ndarray:
+    """calculate_calmar_ratio の配列版（num_months は monthly_returns の長さ）"""
+    equity = _as_2d(equity_curves)
+    if equity.shape[-1] == 0 or num_months == 0:
+        return np.full(equity.shape[:-1], np.nan)
+    annual_return = calculate_cagr_2d(equity, num_months)
+    max_dd = np.abs(calculate_max_drawdown_2d(equity))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(max_dd == 0, np.nan, annual_return / max_dd)
+
+
+def calculate_volatility_2d(monthly_returns, annualize: bool = True) -> np.ndarray:
+    """calculate_volatility_timeseries の配列版"""
+    r = _as_2d(monthly_returns)
+    if r.shape[-1] < 2:
+        return np.full(r.shape[:-1], np.nan)
+    std_return = r.std(axis=-1, ddof=1)
+    return std_return * np.sqrt(12.0) if annualize else std_return
+
+
+def calculate_profit_factor_2d(monthly_returns, equity_curves=None) -> np.ndarray:
+    """
+    calculate_profit_factor_timeseries の配列版
+
+    equity_curves（n+1 点）を渡した場合は pnl_t = equity_{t-1} * r_t の標準定義、
+    それ以外は月次リターンの正負の単純合計。損失ゼロは NaN。
+    """
+    r = _as_2d(monthly_returns)
+    if r.shape[-1] == 0:
+        return np.full(r.shape[:-1], np.nan)
+    pnl = r
+    if equity_curves is not None:
+        equity = _as_2d(equity_curves)
+        if equity.shape[-1] == r.shape[-1] + 1:
+            pnl = equity[..., :-1] * r
+    gains = np.where(pnl > 0, pnl, 0.0).sum(axis=-1)
+    losses = np.abs(np.where(pnl < 0, pnl, 0.0).sum(axis=-1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(losses == 0, np.nan, gains / losses)
+
+
+def calculate_win_rate_2d(monthly_returns) -> np.ndarray:
+    """calculate_win_rate_timeseries の配列版（勝率 0.0-1.0）"""
+    r = _as_2d(monthly_returns)
+    if r.shape[-1] == 0:
+        return np.full(r.shape[:-1], np.nan)
+    return (r > 0).mean(axis=-1)
+
+
+def calculate_percentile_2d(returns, percentile: float) -> np.ndarray:
+    """calculate_percentile の配列版（空の系列は0.0）"""
+    r = _as_2d(returns)
+    if r.shape[-1] == 0:
+        return np.zeros(r.shape[:-1])
+    return np.percentile(r, percentile, axis=-1)
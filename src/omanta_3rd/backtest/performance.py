@@ -8,6 +8,14 @@ import sqlite3
 import pandas as pd
 
 from ..infra.db import connect_db, upsert
+from ..infra.queries import (
+    INDEX_PRICE_ASOF_SQL,
+    LAST_CLOSE_SQL,
+    NEXT_TRADING_DAYS_SQL,
+    NEXT_TRADING_DAYS_UNTIL_SQL,
+    PRICE_ON_DATE_SQL,
+    SPLIT_EVENTS_SQL,
+)
 from ..ingest.indices import TOPIX_CODE
 
 
@@ -36,28 +44,13 @@ def _get_next_trading_day(conn, date: str, max_date: Optional[str] = None) -> Op
     # 重要: max_dateが指定されている場合、max_date以前のデータのみを参照（データリーク防止）
     if max_date is not None:
         next_dates_df = pd.read_sql_query(
-            """
-            SELECT DISTINCT date
-            FROM prices_daily
-            WHERE date > ?
-              AND date <= ?
-              AND (open IS NOT NULL OR close IS NOT NULL)
-            ORDER BY date
-            LIMIT 7
-            """,
+            NEXT_TRADING_DAYS_UNTIL_SQL,
             conn,
             params=(date, max_date),
         )
     else:
         next_dates_df = pd.read_sql_query(
-            """
-            SELECT DISTINCT date
-            FROM prices_daily
-            WHERE date > ?
-              AND (open IS NOT NULL OR close IS NOT NULL)
-            ORDER BY date
-            LIMIT 7
-            """,
+            NEXT_TRADING_DAYS_SQL,
             conn,
             params=(date,),
         )
@@ -94,13 +87,7 @@ def _get_topix_price(conn, date: str, use_open: bool = False) -> Optional[float]
     """
     price_column = "open" if use_open else "close"
     price_df = pd.read_sql_query(
-        f"""
-        SELECT {price_column}
-        FROM index_daily
-        WHERE index_code = ? AND date <= ?
-        ORDER BY date DESC
-        LIMIT 1
-        """,
+        INDEX_PRICE_ASOF_SQL.format(price_column=price_column),
         conn,
         params=(TOPIX_CODE, date),
     )
@@ -132,16 +119,7 @@ def _split_multiplier_between(conn, code: str, start_date: str, end_date: str) -
     """
     # start_dateより後、end_date以下のAdjustmentFactorを取得
     df = pd.read_sql_query(
-        """
-        SELECT date, adjustment_factor
-        FROM prices_daily
-        WHERE code = ?
-          AND date > ?
-          AND date <= ?
-          AND adjustment_factor IS NOT NULL
-          AND adjustment_factor != 1.0
-        ORDER BY date ASC
-        """,
+        SPLIT_EVENTS_SQL,
         conn,
         params=(code, start_date, end_date),
     )
@@ -182,6 +160,7 @@ def calculate_portfolio_performance(
     as_of_date: Optional[str] = None,
     portfolio_table: str = "portfolio_monthly",
     cost_bps: float = 0.0,
+    snapshot_path: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     指定されたrebalance_dateのポートフォリオのパフォーマンスを計算
@@ -194,6 +173,8 @@ def calculate_portfolio_performance(
                          月次リバランス型: "monthly_rebalance_portfolio"
         cost_bps: 取引コスト（bps、デフォルト: 0.0）
                   長期保有型の場合、購入時と売却時のコストが適用される
+        snapshot_path: 価格・TOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
+                       ポートフォリオは呼び出し側が書き込んだ本番DBから読む
         
     Returns:
         パフォーマンス情報の辞書
@@ -209,7 +190,8 @@ def calculate_portfolio_performance(
             conn,
             params=(rebalance_date,),
         )
-        
+    
+    with connect_db(snapshot=snapshot_path) as conn:
         if portfolio.empty:
             return {
                 "rebalance_date": rebalance_date,
@@ -249,11 +231,7 @@ def calculate_portfolio_performance(
         missing_buy_prices = []
         for code in portfolio["code"]:
             price_row = pd.read_sql_query(
-                """
-                SELECT open, close
-                FROM prices_daily
-                WHERE code = ? AND date = ?
-                """,
+                PRICE_ON_DATE_SQL,
                 conn,
                 params=(code, next_trading_day),
             )
@@ -350,13 +328,7 @@ def calculate_portfolio_performance(
         missing_sell_prices = []
         for code in portfolio["code"]:
             price_row = pd.read_sql_query(
-                """
-                SELECT date, close
-                FROM prices_daily
-                WHERE code = ? AND date <= ?
-                ORDER BY date DESC
-                LIMIT 1
-                """,
+                LAST_CLOSE_SQL,
                 conn,
                 params=(code, as_of_date),
             )
@@ -0,0 +1,336 @@
+"""レジーム切替ポリシーのシミュレーター
+
+切替戦略が各リバランス日に採用するポートフォリオは、常にいずれかの固定パラメータ
+（params_id）のポートフォリオである。そこで (rebalance_date, params_id) ごとの
+ポートフォリオとホライズン固定の評価結果を一度だけ計算して表（ParamsOutcomeTable）に保持し、
+固定・レジーム切替・ヒステリシスの各ポリシーはこの表から行を選ぶだけで評価する。
+
+ポリシーを何本比較しても、特徴量構築・選定・評価の回数は
+「使われる params_id の数 × リバランス日数」で頭打ちになる。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from ..infra.db import connect_db
+from .metrics import calculate_annualized_return_from_period
+
+# ポリシーの値に指定すると、前回の params_id を維持する（ヒステリシス）
+HOLD = "hold"
+
+DEFAULT_PARAMS_ID = "12M_momentum"
+
+
+@dataclass(frozen=True)
+class RegimePolicy:
+    """
+    レジーム → params_id のポリシー
+
+    Attributes:
+        name: ポリシー名（結果の表示用）
+        mapping: {regime: params_id}。値が HOLD の場合は前回の params_id を維持
+        initial_params_id: HOLD で前回の params_id が無い場合に使う params_id
+        allowed_params_ids: 許可する params_id（None は全て許可）。許可されない場合は fallback_params_id
+        fallback_params_id: mapping に無いレジーム・許可されない params_id の代わり
+    """
+
+    name: str
+    mapping: Tuple[Tuple[str, str], ...]
+    initial_params_id: str = DEFAULT_PARAMS_ID
+    allowed_params_ids: Optional[FrozenSet[str]] = None
+    fallback_params_id: str = DEFAULT_PARAMS_ID
+
+    @classmethod
+    def from_mapping(cls, name: str, mapping: Dict[str, str], **kwargs) -> "RegimePolicy":
+        allowed = kwargs.pop("allowed_params_ids", None)
+        return cls(
+            name=name,
+            mapping=tuple(sorted(mapping.items())),
+            allowed_params_ids=frozenset(allowed) if allowed is not None else None,
+            **kwargs,
+        )
+
+    @classmethod
+    def fixed(cls, params_id: str, name: Optional[str] = None) -> "RegimePolicy":
+        """常に同じ params_id を使うポリシー"""
+        return cls(name=name or f"固定{params_id}", mapping=(), fallback_params_id=params_id)
+
+    @classmethod
+    def from_policy_file(cls, name: str, **kwargs) -> "RegimePolicy":
+        """config/regime_policy_longterm.json のポリシー"""
+        from ..config.regime_policy import load_regime_policy
+
+        return cls.from_mapping(name, load_regime_policy(), **kwargs)
+
+    def choose(self, regime: str, previous: Optional[str]) -> str:
+        params_id = dict(self.mapping).get(regime, self.fallback_params_id)
+        if params_id == HOLD:
+            params_id = previous or self.initial_params_id
+        if self.allowed_params_ids is not None and params_id not in self.allowed_params_ids:
+            params_id = self.fallback_params_id
+        return params_id
+
+    def params_ids(self) -> List[str]:
+        """このポリシーが使い得る params_id"""
+        ids = {v for _, v in self.mapping if v != HOLD} | {self.fallback_params_id}
+        if any(v == HOLD for _, v in self.mapping):
+            ids.add(self.initial_params_id)
+        if self.allowed_params_ids is not None:
+            ids = {i for i in ids if i in self.allowed_params_ids} | {self.fallback_params_id}
+        return sorted(ids)
+
+
+@dataclass
+class ParamsOutcome:
+    """(rebalance_date, params_id) のポートフォリオとホライズン"""
+
+    rebalance_date: str
+    params_id: str
+    portfolio: Optional[pd.DataFrame]
+    horizon_months: Optional[int]
+    full_horizon: bool
+
+
+# build_portfolio(rebalance_date, params_id) -> (portfolio or None, horizon_months)
+BuildPortfolioFn = Callable[[str, str], Tuple[Optional[pd.DataFrame], Optional[int]]]
+# evaluate(portfolio, rebalance_date, horizon_months, as_of_date) -> 評価結果 or None
+EvaluateFn = Callable[[pd.DataFrame, str, int, str], Optional[Dict[str, Any]]]
+
+
+def _horizon_end(rebalance_date: str, horizon_months: int) -> datetime:
+    return datetime.strptime(rebalance_date, "%Y-%m-%d") + relativedelta(months=horizon_months)
+
+
+def build_portfolio_for_params(
+    rebalance_date: str,
+    params_id: str,
+    save_to_db: bool = False,
+) -> Tuple[Optional[pd.DataFrame], Optional[int]]:
+    """固定パラメータでポートフォリオを作成（デフォルトではDBに保存しない）"""
+    from ..config.params_registry import get_registry_entry
+    from ..jobs.batch_longterm_run_with_regime import run_monthly_portfolio_with_regime
+
+    result = run_monthly_portfolio_with_regime(
+        rebalance_date,
+        fixed_params_id=params_id,
+        calculate_performance=False,
+        save_log=False,
+        save_to_db=save_to_db,
+    )
+    horizon_months = result.get("horizon_months")
+    if not horizon_months:
+        try:
+            horizon_months = get_registry_entry(params_id).get("horizon_months")
+        except Exception as e:
+            print(f"警告: {rebalance_date}のhorizon_months取得に失敗: {e}")
+    if not result.get("portfolio_created") or "portfolio" not in result:
+        return None, horizon_months
+    return result["portfolio"], horizon_months
+
+
+def evaluate_fixed_horizon(
+    portfolio: pd.DataFrame,
+    rebalance_date: str,
+    horizon_months: int,
+    as_of_date: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    ホライズン固定の評価（評価終点 = rebalance_date + horizon_months を営業日にスナップ、as_of_date が上限）
+
+    Returns:
+        評価結果（リターン・TOPIX・超過の総リターンと年率、snap_diff_days）。評価できない場合は None
+    """
+    from ..features.loader import _snap_price_date
+    from .performance_from_dataframe import calculate_portfolio_performance_from_dataframe
+
+    eval_end_raw = _horizon_end(rebalance_date, horizon_months)
+    eval_end_raw_str = eval_end_raw.strftime("%Y-%m-%d")
+    with connect_db(read_only=True) as conn:
+        eval_end_snapped = _snap_price_date(conn, min(eval_end_raw_str, as_of_date))
+    snap_diff_days = (eval_end_raw - datetime.strptime(eval_end_snapped, "%Y-%m-%d")).days
+
+    perf = calculate_portfolio_performance_from_dataframe(portfolio, rebalance_date, eval_end_snapped)
+    if "error" in perf:
+        return None
+
+    total_return_pct = perf.get("total_return_pct", 0.0)
+    topix_comp = perf.get("topix_comparison", {})
+    topix_return_pct = topix_comp.get("topix_return_pct", 0.0)
+    excess_return_pct = topix_comp.get("excess_return_pct", 0.0)
+
+    eval_end_used = perf.get("as_of_date", eval_end_snapped)
+    annualized_ret = calculate_annualized_return_from_period(total_return_pct / 100.0, rebalance_date, eval_end_used)
+    annualized_topix_ret = calculate_annualized_return_from_period(
+        topix_return_pct / 100.0, rebalance_date, eval_end_used
+    )
+    return {
+        "eval_end_date": eval_end_used,
+        "snap_diff_days": snap_diff_days,
+        "total_return_pct": total_return_pct,
+        "topix_return_pct": topix_return_pct,
+        "excess_return_pct": excess_return_pct,
+        "annualized_return_pct": annualized_ret * 100.0,
+        "annualized_topix_return_pct": annualized_topix_ret * 100.0,
+        "annualized_excess_return_pct": (annualized_ret - annualized_topix_ret) * 100.0,
+    }
+
+
+class ParamsOutcomeTable:
+    """
+    (rebalance_date, params_id) ごとのポートフォリオ・評価結果の表（必要になった組だけ計算してメモ化）
+    """
+
+    def __init__(
+        self,
+        as_of_date: str,
+        regimes: Optional[Dict[str, str]] = None,
+        build_portfolio: Optional[BuildPortfolioFn] = None,
+        evaluate: Optional[EvaluateFn] = None,
+    ):
+        """
+        Args:
+            as_of_date: 評価の打ち切り日
+            regimes: {rebalance_date: regime}（None の場合はレジームタイムラインから引く）
+            build_portfolio: ポートフォリオ作成関数（テスト用に差し替え可能）
+            evaluate: 評価関数（テスト用に差し替え可能）
+        """
+        self.as_of_date = as_of_date
+        self._as_of_dt = datetime.strptime(as_of_date, "%Y-%m-%d")
+        self._regimes: Dict[str, str] = dict(regimes) if regimes is not None else {}
+        self._timeline = None
+        self._build = build_portfolio or build_portfolio_for_params
+        self._evaluate = evaluate or evaluate_fixed_horizon
+        self._outcomes: Dict[Tuple[str, str], ParamsOutcome] = {}
+        self._performances: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+
+    @property
+    def n_built(self) -> int:
+        return len(self._outcomes)
+
+    @property
+    def n_evaluated(self) -> int:
+        return len(self._performances)
+
+    def regime(self, rebalance_date: str) -> str:
+        if rebalance_date not in self._regimes:
+            if self._timeline is None:
+                from ..market.regime import get_regime_timeline
+
+                with connect_db(read_only=True) as conn:
+                    self._timeline = get_regime_timeline(conn)
+            self._regimes[rebalance_date] = self._timeline.lookup(rebalance_date)["regime"]
+        return self._regimes[rebalance_date]
+
+    def outcome(self, rebalance_date: str, params_id: str) -> ParamsOutcome:
+        key = (rebalance_date, params_id)
+        if key not in self._outcomes:
+            portfolio, horizon_months = self._build(rebalance_date, params_id)
+            full_horizon = bool(horizon_months) and _horizon_end(rebalance_date, horizon_months) <= self._as_of_dt
+            self._outcomes[key] = ParamsOutcome(
+                rebalance_date, params_id, portfolio, horizon_months, full_horizon
+            )
+        return self._outcomes[key]
+
+    def performance(self, rebalance_date: str, params_id: str) -> Optional[Dict[str, Any]]:
+        key = (rebalance_date, params_id)
+        if key not in self._performances:
+            outcome = self.outcome(rebalance_date, params_id)
+            perf = None
+            if outcome.portfolio is not None and outcome.horizon_months:
+                perf = self._evaluate(outcome.portfolio, rebalance_date, outcome.horizon_months, self.as_of_date)
+            self._performances[key] = perf
+        return self._performances[key]
+
+    def prefetch(self, rebalance_dates: Iterable[str], params_ids: Iterable[str]) -> None:
+        """指定した組のポートフォリオを先に作成"""
+        for d in rebalance_dates:
+            for pid in params_ids:
+                self.outcome(d, pid)
+
+
+@dataclass
+class PolicySimulation:
+    """ポリシーの評価結果"""
+
+    name: str
+    performances: List[Dict[str, Any]] = field(default_factory=list)
+    portfolio_metadata: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def switch_count(self) -> int:
+        ids = [self.portfolio_metadata[d]["params_id"] for d in sorted(self.portfolio_metadata)]
+        return sum(1 for a, b in zip(ids, ids[1:]) if a != b)
+
+
+def simulate_policy(
+    table: ParamsOutcomeTable,
+    policy: RegimePolicy,
+    rebalance_dates: Iterable[str],
+    require_full_horizon: bool = True,
+    max_snap_diff_days: Optional[int] = None,
+) -> PolicySimulation:
+    """
+    ポリシーを表から評価（新たな計算は表に無い組だけ）
+
+    ポートフォリオが作れない日・ホライズン未達の日（require_full_horizon）は採用せず、
+    ヒステリシスの「前回の params_id」も更新しない。
+
+    Args:
+        table: ParamsOutcomeTable
+        policy: RegimePolicy
+        rebalance_dates: リバランス日（昇順）
+        require_full_horizon: ホライズン未達の日を除外するか
+        max_snap_diff_days: 評価終点のスナップが何日以上ずれたら除外するか（None は除外しない）
+    """
+    sim = PolicySimulation(name=policy.name)
+    previous: Optional[str] = None
+    for d in sorted(rebalance_dates):
+        regime = table.regime(d)
+        params_id = policy.choose(regime, previous)
+        outcome = table.outcome(d, params_id)
+        if outcome.portfolio is None:
+            continue
+        if require_full_horizon and not outcome.full_horizon:
+            continue
+
+        sim.portfolio_metadata[d] = {
+            "params_id": params_id,
+            "horizon_months": outcome.horizon_months,
+            "regime": regime,
+        }
+        previous = params_id
+
+        perf = table.performance(d, params_id)
+        if perf is None:
+            continue
+        if max_snap_diff_days is not None and perf["snap_diff_days"] > max_snap_diff_days:
+            print(
+                f"      [regime_simulator] ⚠️  {d}のeval_endスナップ差分が大きい"
+                f"（{perf['snap_diff_days']}日）のため除外"
+            )
+            continue
+        sim.performances.append({
+            "rebalance_date": d,
+            "params_id": params_id,
+            "horizon_months": outcome.horizon_months,
+            "regime": regime,
+            **{k: v for k, v in perf.items() if k != "snap_diff_days"},
+        })
+    return sim
+
+
+def simulate_policies(
+    table: ParamsOutcomeTable,
+    policies: Iterable[RegimePolicy],
+    rebalance_dates: Iterable[str],
+    **kwargs,
+) -> Dict[str, PolicySimulation]:
+    """複数ポリシーを同じ表で評価（{policy.name: PolicySimulation}）"""
+    dates = sorted(rebalance_dates)
+    return {p.name: simulate_policy(table, p, dates, **kwargs) for p in policies}
@@ -0,0 +1,190 @@
+"""seed耐性テストのリバランス日単位の集計
+
+seed耐性テスト（test_seed_robustness_fixed_horizon*.py）は、固定パラメータのまま
+train/test の分割 seed だけを変えて test 期間の成績を比較する。分割が変えるのは
+「どのリバランス日を test に数えるか」だけなので、各リバランス日の評価は1回で足りる。
+
+PerDateResults に全リバランス日の年率リターン・年率超過リターンを1回だけ保持し、
+各 seed の test 期間は (n_seeds, n_dates) の bool マスクとして numpy で一括集計する。
+ブートストラップ・符号反転の並べ替え検定も seed 方向にベクトル化している。
+"""
+
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def annualize_fixed_horizon(
+    perf: Mapping[str, Any],
+    holding_years: float,
+) -> Tuple[float, float]:
+    """
+    1リバランス日の performance を年率化（固定ホライズン、年率化できない場合はNaN）
+
+    Returns:
+        (年率リターン%, 年率超過リターン%)
+    """
+    def _annualize(pct) -> float:
+        if pct is None or pct != pct:  # None / NaN
+            return float("nan")
+        factor = 1 + pct / 100
+        if factor <= 0 or holding_years <= 0:
+            return float("nan")
+        return (factor ** (1 / holding_years) - 1) * 100
+
+    excess = (perf.get("topix_comparison") or {}).get("excess_return_pct")
+    return _annualize(perf.get("total_return_pct")), _annualize(excess)
+
+
+@dataclass
+class PerDateResults:
+    """リバランス日ごとの評価結果（固定パラメータ・固定ホライズン）"""
+
+    dates: List[str]
+    evaluated: np.ndarray  # bool: performance を計算できた日
+    annual_return: np.ndarray  # 年率リターン%（年率化できない日はNaN）
+    annual_excess: np.ndarray  # 年率超過リターン%（年率化できない日はNaN）
+    holding_years: float
+
+    @classmethod
+    def from_performances(
+        cls,
+        dates: Sequence[str],
+        performances: Mapping[str, Mapping[str, Any]],
+        horizon_months: int,
+    ) -> "PerDateResults":
+        """
+        Args:
+            dates: 全リバランス日
+            performances: {rebalance_date: performance}（評価できなかった日は含めない）
+            horizon_months: ホライズン（月数）
+        """
+        dates = list(dates)
+        holding_years = horizon_months / 12.0
+        annual_return = np.full(len(dates), np.nan)
+        annual_excess = np.full(len(dates), np.nan)
+        evaluated = np.zeros(len(dates), dtype=bool)
+        for i, d in enumerate(dates):
+            perf = performances.get(d)
+            if perf is None:
+                continue
+            evaluated[i] = True
+            annual_return[i], annual_excess[i] = annualize_fixed_horizon(perf, holding_years)
+        return cls(dates, evaluated, annual_return, annual_excess, holding_years)
+
+    def masks(self, date_sets: Iterable[Iterable[str]]) -> np.ndarray:
+        """日付集合のリストを (n_sets, n_dates) の bool マスクに変換（未知の日付は無視）"""
+        index = {d: i for i, d in enumerate(self.dates)}
+        rows = [[index[d] for d in dates if d in index] for dates in date_sets]
+        masks = np.zeros((len(rows), len(self.dates)), dtype=bool)
+        for r, cols in enumerate(rows):
+            masks[r, cols] = True
+        return masks
+
+
+def _masked(values: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    return np.where(masks & np.isfinite(values)[None, :], values[None, :], np.nan)
+
+
+def _nan_stat(func, x: np.ndarray, empty: float = 0.0) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN slice / Mean of empty slice
+        out = func(x, axis=1)
+    return np.where(np.isnan(out), empty, out)
+
+
+def aggregate_splits(per_date: PerDateResults, masks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    各マスク（seed の test 期間）の集計指標を一括計算
+
+    calculate_fixed_horizon_performance と同じ定義（年率化できない日は平均から除外し、
+    対象が無い指標は0.0）。num_portfolios が0のマスクは評価不能（従来は RuntimeError）。
+    """
+    masks = np.asarray(masks, dtype=bool)
+    excess = _masked(per_date.annual_excess, masks)
+    returns = _masked(per_date.annual_return, masks)
+    n_excess = np.isfinite(excess).sum(axis=1)
+    n_returns = np.isfinite(returns).sum(axis=1)
+    wins = (np.nan_to_num(excess, nan=0.0) > 0).sum(axis=1)
+    return {
+        "mean_annual_excess_return_pct": _nan_stat(np.nanmean, excess),
+        "median_annual_excess_return_pct": _nan_stat(np.nanmedian, excess),
+        "mean_annual_return_pct": _nan_stat(np.nanmean, returns),
+        "median_annual_return_pct": _nan_stat(np.nanmedian, returns),
+        "win_rate": np.where(n_excess > 0, wins / np.maximum(n_excess, 1), 0.0),
+        "num_portfolios": (masks & per_date.evaluated[None, :]).sum(axis=1),
+        "n_periods": n_excess,
+        "mean_holding_years": np.where(n_returns > 0, per_date.holding_years, 0.0),
+    }
+
+
+def _packed_excess(per_date: PerDateResults, masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """各マスクの有効な年率超過リターンを左詰めした (n_sets, k_max) 行列と件数"""
+    valid = np.asarray(masks, dtype=bool) & np.isfinite(per_date.annual_excess)[None, :]
+    counts = valid.sum(axis=1)
+    k_max = max(int(counts.max()) if len(counts) else 0, 1)
+    order = np.argsort(~valid, axis=1, kind="stable")[:, :k_max]
+    values = np.nan_to_num(per_date.annual_excess, nan=0.0)[order]
+    values[np.arange(k_max)[None, :] >= counts[:, None]] = 0.0
+    return values, counts
+
+
+def bootstrap_mean_excess(
+    per_date: PerDateResults,
+    masks: np.ndarray,
+    n_boot: int = 2000,
+    ci: float = 0.95,
+    random_seed: Optional[int] = 0,
+) -> Dict[str, np.ndarray]:
+    """
+    各マスクの年率超過リターン平均のブートストラップ（リバランス日の復元抽出）
+
+    Returns:
+        ci_low / ci_high: 平均の信頼区間、prob_le_zero: 平均 <= 0 となる割合（件数0はNaN）
+    """
+    values, counts = _packed_excess(per_date, masks)
+    n_sets, k_max = values.shape
+    rng = np.random.default_rng(random_seed)
+    u = rng.random((n_sets, n_boot, k_max))
+    pos = np.minimum((u * counts[:, None, None]).astype(np.int64), np.maximum(counts - 1, 0)[:, None, None])
+    # 各マスクの標本サイズは counts 件（k_max までの余りの抽出は使わない）
+    sampled = values[np.arange(n_sets)[:, None, None], pos]
+    sampled *= (np.arange(k_max)[None, :] < counts[:, None])[:, None, :]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sampled.sum(axis=2) / counts[:, None]
+    alpha = (1 - ci) / 2
+    empty = counts == 0
+    out = {
+        "ci_low": np.quantile(means, alpha, axis=1),
+        "ci_high": np.quantile(means, 1 - alpha, axis=1),
+        "prob_le_zero": (means <= 0).mean(axis=1),
+    }
+    for key in out:
+        out[key] = np.where(empty, np.nan, out[key])
+    return out
+
+
+def sign_flip_pvalues(
+    per_date: PerDateResults,
+    masks: np.ndarray,
+    n_perm: int = 2000,
+    random_seed: Optional[int] = 0,
+) -> np.ndarray:
+    """
+    各マスクの年率超過リターン平均 > 0 の片側 p 値（符号反転の並べ替え検定）
+
+    帰無仮説（超過リターンの分布が0に対して対称）の下で各リバランス日の符号を反転させ、
+    観測平均以上となる割合を (count + 1) / (n_perm + 1) で返す（件数0はNaN）。
+    """
+    values, counts = _packed_excess(per_date, masks)
+    rng = np.random.default_rng(random_seed)
+    signs = rng.choice(np.array([-1.0, 1.0]), size=(n_perm, values.shape[1]))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        observed = values.sum(axis=1) / counts
+        permuted = (values @ signs.T) / counts[:, None]  # (n_sets, n_perm)
+    exceed = (permuted >= observed[:, None] - 1e-12).sum(axis=1)
+    return np.where(counts > 0, (exceed + 1) / (n_perm + 1), np.nan)
@@ -9,6 +9,14 @@ import pandas as pd
 import numpy as np
 
 from ..infra.db import connect_db
+from ..infra.queries import (
+    INDEX_MATRIX_SQL,
+    INDEX_PRICE_ON_DATE_SQL,
+    PORTFOLIO_SQL,
+    PREV_TRADING_DAY_SQL,
+    PRICES_MATRIX_SQL,
+    STOCK_PRICE_ON_DATE_SQL,
+)
 from .performance import _split_multiplier_between, _get_next_trading_day
 from ..ingest.indices import TOPIX_CODE
 
@@ -25,11 +33,7 @@ def _get_previous_trading_day(conn, date: str) -> Optional[str]:
         前営業日（YYYY-MM-DD）、存在しない場合はNone
     """
     prev_date_df = pd.read_sql_query(
-        """
-        SELECT MAX(date) AS prev_date
-        FROM prices_daily
-        WHERE date < ?
-        """,
+        PREV_TRADING_DAY_SQL,
         conn,
         params=(date,),
     )
@@ -56,11 +60,7 @@ def _get_topix_price_exact(conn, date: str, use_open: bool = False) -> Optional[
     """
     price_column = "open" if use_open else "close"
     price_df = pd.read_sql_query(
-        f"""
-        SELECT {price_column}
-        FROM index_daily
-        WHERE index_code = ? AND date = ?
-        """,
+        INDEX_PRICE_ON_DATE_SQL.format(price_column=price_column),
         conn,
         params=(TOPIX_CODE, date),
     )
@@ -89,11 +89,7 @@ def _get_price(conn, code: str, date: str, use_open: bool = False) -> Optional[f
     """
     price_column = "open" if use_open else "close"
     price_df = pd.read_sql_query(
-        f"""
-        SELECT {price_column}
-        FROM prices_daily
-        WHERE code = ? AND date = ?
-        """,
+        STOCK_PRICE_ON_DATE_SQL.format(price_column=price_column),
         conn,
         params=(code, date),
     )
@@ -129,11 +125,7 @@ def _get_prices_bulk(
     dates_str = ",".join("?" * len(dates))
     
     price_df = pd.read_sql_query(
-        f"""
-        SELECT code, date, {price_column} AS price
-        FROM prices_daily
-        WHERE code IN ({codes_str}) AND date IN ({dates_str})
-        """,
+        PRICES_MATRIX_SQL.format(price_column=price_column, codes=codes_str, dates=dates_str),
         conn,
         params=(*codes, *dates),
     )
@@ -162,11 +154,7 @@ def _get_topix_prices_bulk(
     dates_str = ",".join("?" * len(dates))
     
     price_df = pd.read_sql_query(
-        f"""
-        SELECT date, {price_column} AS price
-        FROM index_daily
-        WHERE index_code = ? AND date IN ({dates_str})
-        """,
+        INDEX_MATRIX_SQL.format(price_column=price_column, dates=dates_str),
         conn,
         params=(TOPIX_CODE, *dates),
     )
@@ -211,11 +199,7 @@ def _get_portfolio(conn, rebalance_date: str) -> pd.DataFrame:
         ポートフォリオのDataFrame（code, weight列を含む）
     """
     return pd.read_sql_query(
-        """
-        SELECT code, weight
-        FROM monthly_rebalance_portfolio
-        WHERE rebalance_date = ?
-        """,
+        PORTFOLIO_SQL,
         conn,
         params=(rebalance_date,),
     )
@@ -284,6 +268,7 @@ def calculate_timeseries_returns_from_portfolios(
     cost_bps: float = 0.0,
     buy_cost_bps: Optional[float] = None,
     sell_cost_bps: Optional[float] = None,
+    snapshot_path: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     時系列P/Lを計算（ポートフォリオを直接受け取る版）
@@ -300,6 +285,7 @@ def calculate_timeseries_returns_from_portfolios(
         cost_bps: 取引コスト（bps、デフォルト: 0.0）
         buy_cost_bps: 購入コスト（bps、Noneの場合はcost_bpsを使用）
         sell_cost_bps: 売却コスト（bps、Noneの場合はcost_bpsを使用）
+        snapshot_path: 価格・TOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
     
     Returns:
         時系列P/L情報の辞書（calculate_timeseries_returnsと同じ形式）
@@ -334,7 +320,7 @@ def calculate_timeseries_returns_from_portfolios(
     
     previous_portfolio = None
     
-    with connect_db() as conn:
+    with connect_db(snapshot=snapshot_path) as conn:
         for i, rebalance_date in enumerate(rebalance_dates):
             # 次のリバランス日を取得
             if i + 1 < len(rebalance_dates):
@@ -32,6 +32,15 @@ DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 JQUANTS_API_KEY = os.getenv("JQUANTS_API_KEY", "")
 JQUANTS_API_BASE_URL = os.getenv("JQUANTS_API_BASE_URL", "https://api.jquants.com/v2")
 
+# J-Quants APIレスポンスのディスクキャッシュ（infra/jquants.py の ResponseCache）
+# off: 使わない / readwrite: ヒット時はキャッシュ、ミス時は取得して保存
+# replay: キャッシュのみ（ネットワークに出ない） / refresh: 常に取得して保存し直す
+JQUANTS_CACHE_MODE = os.getenv("JQUANTS_CACHE_MODE", "off")
+JQUANTS_CACHE_DIR = Path(os.getenv("JQUANTS_CACHE_DIR", PROJECT_ROOT / "cache" / "jquants"))
+# 日付の上限（date / to）を指定しないリクエスト（code だけの全履歴取得など）のキャッシュ有効期間（時間）
+# 後から開示が追加されるため、readwrite モードでは期限切れのものを取得し直す（replay では期限を見ない）
+JQUANTS_CACHE_OPEN_TTL_HOURS = float(os.getenv("JQUANTS_CACHE_OPEN_TTL_HOURS", "24"))
+
 # V1 API用の設定（後方互換性のため残すが、V2では不要）
 JQUANTS_REFRESH_TOKEN = os.getenv("JQUANTS_REFRESH_TOKEN", "")
 JQUANTS_MAILADDRESS = os.getenv("JQUANTS_MAILADDRESS", "")
@@ -24,6 +24,7 @@ from .universe import (
     calculate_liquidity_60d,
     estimate_market_cap,
 )
+from .code_registry import CodeRegistry
 
 __all__ = [
     # fundamentals
@@ -46,4 +47,6 @@ __all__ = [
     "is_prime_market",
     "calculate_liquidity_60d",
     "estimate_market_cap",
+    # code_registry
+    "CodeRegistry",
 ]
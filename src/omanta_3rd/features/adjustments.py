@@ -5,6 +5,8 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
+from ..infra.queries import SHARES_ASOF_SQL, SHARES_FOR_PERIOD_SQL
+
 
 def _get_shares_at_date(conn, code: str, target_date: str) -> tuple:
     """
@@ -24,16 +26,7 @@ def _get_shares_at_date(conn, code: str, target_date: str) -> tuple:
         データがない場合は (np.nan, np.nan)
     """
     df = pd.read_sql_query(
-        """
-        SELECT shares_outstanding, treasury_shares, equity
-        FROM fins_statements
-        WHERE code = ?
-          AND type_of_current_period = 'FY'
-          AND disclosed_date <= ?
-          AND shares_outstanding IS NOT NULL
-        ORDER BY current_period_end DESC, disclosed_date DESC
-        LIMIT 1
-        """,
+        SHARES_ASOF_SQL,
         conn,
         params=(code, target_date),
     )
@@ -75,16 +68,7 @@ def _get_shares_adjustment_factor(conn, code: str, period_end: str, latest_share
         return 1.0
 
     period_data = pd.read_sql_query(
-        """
-        SELECT shares_outstanding, treasury_shares, equity, bvps
-        FROM fins_statements
-        WHERE code = ?
-          AND type_of_current_period = 'FY'
-          AND current_period_end = ?
-          AND shares_outstanding IS NOT NULL
-        ORDER BY disclosed_date DESC
-        LIMIT 1
-        """,
+        SHARES_FOR_PERIOD_SQL,
         conn,
         params=(code, period_end),
     )
@@ -0,0 +1,131 @@
+"""銘柄コード・業種の辞書エンコーディング
+
+CodeRegistry は code → int32 ID、sector33 → int16 ID の対応表を持つ。
+ID は最適化の内部表現（FeatureMatrix / SharedDataPlane）でだけ使う。
+FeatureCache が返す特徴量フレーム、価格データ（{code: [...]}）、バックテストの
+ポートフォリオはいずれも文字列の code をキーにしたままで、選定結果は decode_codes で
+文字列に戻してから渡す。
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_ID = -1
+
+
+class CodeRegistry:
+    """銘柄コード・業種（33業種）の ID 対応表
+
+    ID はソート済みの値の位置で決まるため、同じ集合からは常に同じ ID が得られる。
+    未登録の値・欠損は UNKNOWN_ID（-1）にエンコードされる。
+    """
+
+    def __init__(self, codes: Iterable[Any] = (), sectors: Iterable[Any] = ()):
+        self.codes: List[str] = sorted({str(c) for c in codes if _is_present(c)})
+        self.sectors: List[str] = sorted({str(s) for s in sectors if _is_present(s)})
+        self._code_dtype = pd.CategoricalDtype(self.codes)
+        self._sector_dtype = pd.CategoricalDtype(self.sectors)
+
+    def __getstate__(self) -> Dict[str, List[str]]:
+        # dtype は復元時に再構築する（プロセス間の受け渡しを軽くする）
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict[str, List[str]]) -> None:
+        self.__init__(state["codes"], state["sectors"])
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CodeRegistry):
+            return NotImplemented
+        return self.codes == other.codes and self.sectors == other.sectors
+
+    # -----------------------------
+    # 構築・永続化
+    # -----------------------------
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[pd.DataFrame]) -> "CodeRegistry":
+        """code / sector33 列を持つフレーム群から構築"""
+        codes: set = set()
+        sectors: set = set()
+        for df in frames:
+            if "code" in df.columns:
+                codes.update(df["code"].dropna().astype(str).unique())
+            if "sector33" in df.columns:
+                sectors.update(df["sector33"].dropna().astype(str).unique())
+        return cls(codes, sectors)
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {"codes": list(self.codes), "sectors": list(self.sectors)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Sequence[str]]) -> "CodeRegistry":
+        return cls(data.get("codes", ()), data.get("sectors", ()))
+
+    def save(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: Path) -> "CodeRegistry":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    # -----------------------------
+    # エンコード・デコード
+    # -----------------------------
+
+    def encode_codes(self, values: Iterable[Any]) -> np.ndarray:
+        """銘柄コード列を int32 ID 配列に変換"""
+        return self._as_categorical(values, self._code_dtype).codes.astype(np.int32)
+
+    def encode_sectors(self, values: Iterable[Any]) -> np.ndarray:
+        """業種列を int16 ID 配列に変換"""
+        return self._as_categorical(values, self._sector_dtype).codes.astype(np.int16)
+
+    def decode_codes(self, ids: Iterable[int]) -> np.ndarray:
+        """int ID 配列を銘柄コード（object配列、未登録はNone）に戻す"""
+        return _decode(np.asarray(ids), self.codes)
+
+    def decode_sectors(self, ids: Iterable[int]) -> np.ndarray:
+        """int ID 配列を業種（object配列、未登録はNone）に戻す"""
+        return _decode(np.asarray(ids), self.sectors)
+
+    @staticmethod
+    def _as_categorical(values: Iterable[Any], dtype: pd.CategoricalDtype) -> pd.Categorical:
+        """値を dtype のカテゴリで Categorical 化（未登録・欠損は欠損扱い = codes -1）"""
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            if values.dtype == dtype:
+                return values.array
+        values = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values.astype(object)
+        if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+            # 数値で読み込まれたコードなどはカテゴリ（文字列）に合わせる
+            values = values.where(values.isna(), values.astype(str))
+        # pd.Categorical(values, dtype=dtype) は未登録の値を含むと非推奨警告になるため、
+        # 同じ処理（カテゴリの位置を引く）を get_indexer で行う
+        codes = dtype.categories.get_indexer(values)
+        return pd.Categorical.from_codes(codes, dtype=dtype)
+
+
+def _is_present(value: Any) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, float) and np.isnan(value):
+        return False
+    return True
+
+
+def _decode(ids: np.ndarray, labels: List[str]) -> np.ndarray:
+    out = np.full(ids.shape, None, dtype=object)
+    valid = (ids >= 0) & (ids < len(labels))
+    if valid.any():
+        out[valid] = np.asarray(labels, dtype=object)[ids[valid]]
+    return out
@@ -2,15 +2,34 @@
 
 from __future__ import annotations
 
+from typing import Dict, List, Optional
+
 import pandas as pd
 
 from .adjustments import _get_shares_adjustment_factor
-from ..infra.db import upsert
+from ..infra.db import table_exists, upsert
+from ..infra.queries import (
+    FY_HISTORY_SQL,
+    LATEST_FY_FORECAST_SQL,
+    LATEST_FY_PERIOD_SQL,
+    LATEST_FY_SQL,
+    LATEST_LISTED_DATE_SQL,
+    LATEST_PRICE_DATE_SQL,
+    LATEST_QUARTER_FORECAST_SQL,
+    LIQUIDITY_60D_SQL,
+    LISTED_SNAPSHOT_SQL,
+    PRICES_WINDOW_SQL,
+    SPLIT_FACTOR_ASOF_FOR_CODE_SQL,
+    SPLIT_FACTOR_ASOF_SQL,
+    SPLIT_FACTOR_ON_DATE_SQL,
+    UNIVERSE_SEGMENTS_SQL,
+)
+from ..ingest.listed_segments import listed_segments_ready
 
 
 def _snap_price_date(conn, asof: str) -> str:
     row = conn.execute(
-        "SELECT MAX(date) AS d FROM prices_daily WHERE date <= ?",
+        LATEST_PRICE_DATE_SQL,
         (asof,),
     ).fetchone()
     d = row["d"] if row else None
@@ -21,7 +40,7 @@ def _snap_price_date(conn, asof: str) -> str:
 
 def _snap_listed_date(conn, asof: str) -> str:
     row = conn.execute(
-        "SELECT MAX(date) AS d FROM listed_info WHERE date <= ?",
+        LATEST_LISTED_DATE_SQL,
         (asof,),
     ).fetchone()
     d = row["d"] if row else None
@@ -42,13 +61,21 @@ def _load_universe(conn, listed_date: str) -> pd.DataFrame:
     - 2022年4月以降: 「プライム」「スタンダード」「グロース」など
 
     プライム市場 = 「プライム」「Prime」「東証一部」
+
+    listed_segments（市場区分の期間テーブル）が listed_info の最新日まで集計済みなら区間の範囲検索で取得し、
+    なければ listed_info のスナップショットを市場名で判定する。
     """
+    if listed_segments_ready(conn):
+        df = pd.read_sql_query(
+            UNIVERSE_SEGMENTS_SQL,
+            conn,
+            params=(listed_date, listed_date),
+        )
+        if not df.empty:
+            return df
+
     df = pd.read_sql_query(
-        """
-        SELECT code, company_name, market_name, sector17, sector33
-        FROM listed_info
-        WHERE date = ?
-        """,
+        LISTED_SNAPSHOT_SQL,
         conn,
         params=(listed_date,),
     )
@@ -63,11 +90,7 @@ def _load_universe(conn, listed_date: str) -> pd.DataFrame:
 
 def _load_prices_window(conn, price_date: str, lookback_days: int = 200) -> pd.DataFrame:
     df = pd.read_sql_query(
-        """
-        SELECT date, code, close, adj_close, turnover_value
-        FROM prices_daily
-        WHERE date <= ?
-        """,
+        PRICES_WINDOW_SQL,
         conn,
         params=(price_date,),
     )
@@ -77,6 +100,78 @@ def _load_prices_window(conn, price_date: str, lookback_days: int = 200) -> pd.D
     return df
 
 
+def _load_liquidity_60d(conn, price_date: str) -> Optional[pd.DataFrame]:
+    """
+    prices_rolling_daily から price_date 時点の60日流動性を取得
+
+    集計テーブルが無い、または price_date が未集計の場合は None を返す（呼び出し側で再計算）。
+    """
+    if not table_exists(conn, "prices_rolling_daily"):
+        return None
+    df = pd.read_sql_query(
+        LIQUIDITY_60D_SQL,
+        conn,
+        params=(price_date,),
+    )
+    if df.empty:
+        return None
+    return df
+
+
+def _load_split_multipliers(conn, start_by_code: Dict[str, str], end_date: str) -> Optional[Dict[str, float]]:
+    """
+    prices_rolling_daily の累積分割倍率から、銘柄ごとの (start, end_date] の分割倍率を一括計算
+
+    _split_multiplier_between(conn, code, start, end_date) と同値。
+    start の値（通常はFY期末日）ごとに1クエリで済むため、銘柄ごとのSQLを回避できる。
+
+    Args:
+        conn: データベース接続
+        start_by_code: {code: start_date(YYYY-MM-DD)}
+        end_date: 終了日（YYYY-MM-DD、集計済みの営業日）
+
+    Returns:
+        {code: 分割倍率}（集計テーブルが使えない場合は None）
+    """
+    if not table_exists(conn, "prices_rolling_daily"):
+        return None
+    end_df = pd.read_sql_query(
+        SPLIT_FACTOR_ON_DATE_SQL,
+        conn,
+        params=(end_date,),
+    )
+    if end_df.empty:
+        return None
+    end_cum = dict(zip(end_df["code"], end_df["split_factor_cum"]))
+
+    codes_by_start: Dict[str, List[str]] = {}
+    for code, start in start_by_code.items():
+        codes_by_start.setdefault(start, []).append(code)
+
+    result: Dict[str, float] = {}
+    for start, codes in codes_by_start.items():
+        start_df = pd.read_sql_query(
+            SPLIT_FACTOR_ASOF_SQL,
+            conn,
+            params=(start,),
+        )
+        start_cum = dict(zip(start_df["code"], start_df["split_factor_cum"]))
+        for code in codes:
+            if code not in end_cum:
+                result[code] = 1.0
+                continue
+            base = start_cum.get(code)
+            if base is None:
+                # start 時点の営業日に行が無い銘柄（売買停止・上場前など）は個別に遡る
+                row = conn.execute(
+                    SPLIT_FACTOR_ASOF_FOR_CODE_SQL,
+                    (code, start),
+                ).fetchone()
+                base = row["split_factor_cum"] if row is not None else 1.0
+            result[code] = end_cum[code] / base if base else 1.0
+    return result
+
+
 def _save_fy_to_statements(conn, fy_df: pd.DataFrame):
     """
     FYデータをfins_statementsテーブルに保存
@@ -148,23 +243,7 @@ def _load_latest_fy(conn, asof: str) -> pd.DataFrame:
     - 予想値が欠損している場合、他のFYレコードから予想値を補完
     """
     df_latest_period = pd.read_sql_query(
-        """
-        WITH ranked AS (
-          SELECT
-            code, current_period_end,
-            ROW_NUMBER() OVER (
-              PARTITION BY code
-              ORDER BY current_period_end DESC, disclosed_date DESC
-            ) AS rn
-          FROM fins_statements
-          WHERE disclosed_date <= ?
-            AND current_period_end <= ?
-            AND type_of_current_period = 'FY'
-        )
-        SELECT code, current_period_end
-        FROM ranked
-        WHERE rn = 1
-        """,
+        LATEST_FY_PERIOD_SQL,
         conn,
         params=(asof, asof),
     )
@@ -173,38 +252,7 @@ def _load_latest_fy(conn, asof: str) -> pd.DataFrame:
         return pd.DataFrame()
 
     df = pd.read_sql_query(
-        """
-        WITH latest AS (
-          SELECT
-            code, current_period_end
-          FROM (
-            SELECT
-              code, current_period_end,
-              ROW_NUMBER() OVER (
-                PARTITION BY code
-                ORDER BY current_period_end DESC, disclosed_date DESC
-              ) AS rn
-            FROM fins_statements
-            WHERE disclosed_date <= ?
-              AND current_period_end <= ?
-              AND type_of_current_period = 'FY'
-          )
-          WHERE rn = 1
-        )
-        SELECT
-          fs.disclosed_date, fs.disclosed_time, fs.code, fs.type_of_current_period, fs.current_period_end,
-          fs.operating_profit, fs.profit, fs.equity, fs.eps, fs.bvps,
-          fs.forecast_operating_profit, fs.forecast_profit, fs.forecast_eps,
-          fs.next_year_forecast_operating_profit, fs.next_year_forecast_profit, fs.next_year_forecast_eps,
-          fs.shares_outstanding, fs.treasury_shares
-        FROM fins_statements fs
-        JOIN latest l
-          ON fs.code = l.code
-         AND fs.current_period_end = l.current_period_end
-        WHERE fs.disclosed_date <= ?
-          AND fs.current_period_end <= ?
-          AND fs.type_of_current_period = 'FY'
-        """,
+        LATEST_FY_SQL,
         conn,
         params=(asof, asof, asof, asof),
     )
@@ -257,16 +305,7 @@ def _load_fy_history(conn, asof: str, years: int = 10) -> pd.DataFrame:
     重要: current_period_end <= asof の条件を追加（計算日より後の期末日のデータは除外）
     """
     df = pd.read_sql_query(
-        """
-        SELECT code, disclosed_date, current_period_end,
-               operating_profit, profit, equity, eps, bvps,
-               shares_outstanding, treasury_shares
-        FROM fins_statements
-        WHERE disclosed_date <= ?
-          AND current_period_end <= ?
-          AND type_of_current_period = 'FY'
-          AND (operating_profit IS NOT NULL OR profit IS NOT NULL OR equity IS NOT NULL)
-        """,
+        FY_HISTORY_SQL,
         conn,
         params=(asof, asof),
     )
@@ -337,30 +376,7 @@ def _load_latest_forecast(conn, asof: str) -> pd.DataFrame:
     2. 四半期データ（3Q → 2Q → 1Qの順、開示日が最新のもの）
     """
     df_fy = pd.read_sql_query(
-        """
-        WITH ranked AS (
-          SELECT
-            code, disclosed_date, type_of_current_period,
-            forecast_operating_profit, forecast_profit, forecast_eps,
-            next_year_forecast_operating_profit, next_year_forecast_profit, next_year_forecast_eps,
-            ROW_NUMBER() OVER (
-              PARTITION BY code
-              ORDER BY disclosed_date DESC
-            ) AS rn
-          FROM fins_statements
-          WHERE disclosed_date <= ?
-            AND current_period_end <= ?
-            AND type_of_current_period = 'FY'
-            AND (forecast_operating_profit IS NOT NULL
-                 OR forecast_profit IS NOT NULL
-                 OR forecast_eps IS NOT NULL)
-        )
-        SELECT code, disclosed_date, type_of_current_period,
-               forecast_operating_profit, forecast_profit, forecast_eps,
-               next_year_forecast_operating_profit, next_year_forecast_profit, next_year_forecast_eps
-        FROM ranked
-        WHERE rn = 1
-        """,
+        LATEST_FY_FORECAST_SQL,
         conn,
         params=(asof, asof),
     )
@@ -368,35 +384,7 @@ def _load_latest_forecast(conn, asof: str) -> pd.DataFrame:
     codes_with_fy_forecast = set(df_fy["code"].tolist()) if not df_fy.empty else set()
 
     df_quarter = pd.read_sql_query(
-        """
-        WITH ranked AS (
-          SELECT
-            code, disclosed_date, type_of_current_period,
-            forecast_operating_profit, forecast_profit, forecast_eps,
-            next_year_forecast_operating_profit, next_year_forecast_profit, next_year_forecast_eps,
-            ROW_NUMBER() OVER (
-              PARTITION BY code
-              ORDER BY disclosed_date DESC,
-                       CASE
-                         WHEN type_of_current_period = '3Q' THEN 1
-                         WHEN type_of_current_period = '2Q' THEN 2
-                         WHEN type_of_current_period = '1Q' THEN 3
-                         ELSE 4
-                       END
-            ) AS rn
-          FROM fins_statements
-          WHERE disclosed_date <= ?
-            AND type_of_current_period IN ('3Q', '2Q', '1Q')
-            AND (forecast_operating_profit IS NOT NULL
-                 OR forecast_profit IS NOT NULL
-                 OR forecast_eps IS NOT NULL)
-        )
-        SELECT code, disclosed_date, type_of_current_period,
-               forecast_operating_profit, forecast_profit, forecast_eps,
-               next_year_forecast_operating_profit, next_year_forecast_profit, next_year_forecast_eps
-        FROM ranked
-        WHERE rn = 1
-        """,
+        LATEST_QUARTER_FORECAST_SQL,
         conn,
         params=(asof,),
     )
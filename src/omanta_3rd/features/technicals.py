@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Iterable, Mapping, Sequence
 import sqlite3
 
 import numpy as np
@@ -12,6 +12,10 @@ import pandas as pd
 from ..infra.db import connect_db
 
 
+# entry_score に必要な終値の本数（BB/RSI の最長期間 200 + RSI の差分1本）
+ENTRY_SCORE_LOOKBACK = 201
+
+
 @dataclass
 class EntryScoreParams:
     """entry_score計算のパラメータ（順張り/逆張り両対応）"""
@@ -315,9 +319,31 @@ def _calculate_entry_score_with_params(
         c: g["adj_close"].reset_index(drop=True)
         for c, g in prices_win.groupby("code")
     }
-    feat["entry_score"] = feat["code"].apply(
-        lambda c: _entry_score_with_params(close_map.get(c), params)
-        if c in close_map
-        else np.nan
-    )
+    # code が Categorical の場合に apply の結果が Categorical にならないよう、リストで計算する
+    feat["entry_score"] = [
+        _entry_score_with_params(close_map[c], params) if c in close_map else np.nan
+        for c in feat["code"].tolist()
+    ]
     return feat
+
+
+def _entry_scores_from_closes(
+    codes: Iterable[str],
+    closes: Mapping[str, Sequence[float]],
+    params: Any,
+) -> np.ndarray:
+    """
+    銘柄ごとの終値系列（{code: [adj_close, ...]}、as_of_date まで）から entry_score を計算
+
+    FeatureCache が warm した価格データを使い、trial ごとに prices_daily を読み直さない。
+    系列が無い銘柄は NaN。
+    """
+    scores = []
+    for c in codes:
+        series = closes.get(c)
+        if series is None or len(series) == 0:
+            scores.append(np.nan)
+            continue
+        close = pd.Series(np.asarray(series[-ENTRY_SCORE_LOOKBACK:], dtype=np.float64))
+        scores.append(_entry_score_with_params(close, params))
+    return np.asarray(scores, dtype=np.float64)
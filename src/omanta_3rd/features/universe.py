@@ -58,6 +58,10 @@ def calculate_liquidity_60d(
     """
     60営業日の平均売買代金を計算
     
+    prices_rolling_daily（価格取り込み時に事前計算）に end_date 以前の最新の価格日
+    （prices_daily の銘柄ごとの最新日）の行があればその値を使用し、
+    なければ（未作成・未集計）prices_daily から直接計算する。
+    
     Args:
         conn: データベース接続
         code: 銘柄コード
@@ -66,6 +70,22 @@ def calculate_liquidity_60d(
     Returns:
         平均売買代金（None if 計算不可）
     """
+    try:
+        row = conn.execute(
+            """
+            SELECT liquidity_60d
+            FROM prices_rolling_daily
+            WHERE code = ?
+              AND date = (SELECT MAX(date) FROM prices_daily WHERE code = ? AND date <= ?)
+            """,
+            (code, code, end_date),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # 集計テーブル未作成
+        row = None
+    if row is not None and row["liquidity_60d"] is not None:
+        return row["liquidity_60d"]
+    
     sql = """
         SELECT AVG(turnover_value) as avg_turnover
         FROM (
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import math
-from typing import List
+from typing import List, Optional
 
 import numpy as np
 import pandas as pd
@@ -32,6 +32,46 @@ def _pct_rank(series: pd.Series, ascending: bool = True) -> pd.Series:
     return series.rank(pct=True, ascending=ascending)
 
 
+def _pct_rank_array(
+    values: np.ndarray,
+    ascending: bool = True,
+    groups: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    _pct_rank の numpy 版（平均順位 / 有効件数、欠損は NaN）
+
+    groups を指定した場合はグループごとに順位を付ける（groupby(...).transform(_pct_rank) と同じ）。
+    グループ ID が負の行（未登録・欠損）は NaN。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if groups is None:
+        _fill_pct_rank(values, np.arange(values.size), ascending, out)
+        return out
+    groups = np.asarray(groups)
+    for g in np.unique(groups[groups >= 0]):
+        _fill_pct_rank(values, np.flatnonzero(groups == g), ascending, out)
+    return out
+
+
+def _fill_pct_rank(values: np.ndarray, idx: np.ndarray, ascending: bool, out: np.ndarray) -> None:
+    idx = idx[~np.isnan(values[idx])]
+    n = idx.size
+    if n == 0:
+        return
+    v = values[idx] if ascending else -values[idx]
+    order = np.argsort(v, kind="mergesort")
+    sorted_v = v[order]
+    first = np.r_[True, sorted_v[1:] != sorted_v[:-1]]
+    starts = np.flatnonzero(first)
+    ends = np.r_[starts[1:], n]
+    # 同順位は平均順位（1始まり: start+1 〜 end の平均）
+    avg_rank = (starts + ends + 1) / 2.0
+    ranks = np.empty(n)
+    ranks[order] = avg_rank[np.cumsum(first) - 1]
+    out[idx] = ranks / n
+
+
 def _log_safe(x: float) -> float:
     if x is None or pd.isna(x) or x <= 0:
         return np.nan
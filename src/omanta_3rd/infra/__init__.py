@@ -1,13 +1,45 @@
 """インフラ層（外部I/O: DB/API）"""
 
-from .db import connect_db, init_db, upsert, delete_by_date
-from .jquants import JQuantsClient, JQuantsAPIError
+from .db import (
+    connect_db,
+    init_db,
+    table_exists,
+    upsert,
+    bulk_upsert,
+    bulk_load_session,
+    delete_by_date,
+    ConnectionPool,
+    borrow_db,
+    get_pool,
+    close_pools,
+)
+from .query_plan import HotQuery, HOT_QUERIES, find_plan_regressions
+from .maintenance import run_maintenance, MaintenanceReport
+from .snapshot import create_snapshot, connect_snapshot, read_snapshot_info
+from .jquants import JQuantsClient, JQuantsAPIError, JQuantsCacheMiss, ResponseCache
 
 __all__ = [
     "connect_db",
     "init_db",
+    "table_exists",
     "upsert",
+    "bulk_upsert",
+    "bulk_load_session",
     "delete_by_date",
+    "ConnectionPool",
+    "borrow_db",
+    "get_pool",
+    "close_pools",
+    "HotQuery",
+    "HOT_QUERIES",
+    "find_plan_regressions",
+    "run_maintenance",
+    "MaintenanceReport",
+    "create_snapshot",
+    "connect_snapshot",
+    "read_snapshot_info",
     "JQuantsClient",
     "JQuantsAPIError",
+    "JQuantsCacheMiss",
+    "ResponseCache",
 ]
@@ -1,30 +1,60 @@
 """データベース接続・操作ユーティリティ"""
 
+import os
 import sqlite3
+import threading
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Sequence, Tuple
 from contextlib import contextmanager
 
 from ..config.settings import DB_PATH, SQL_SCHEMA_PATH, SQL_INDEXES_PATH
 
+_DEFAULT_MMAP_SIZE = 268435456  # 256MB
+
+
+def snapshot_uri(path: Path) -> str:
+    """スナップショットを immutable で開く URI（ロック・WALインデックスを使わない）"""
+    return f"{Path(path).resolve().as_uri()}?mode=ro&immutable=1"
+
+
+def _mmap_size_for(path: Path) -> int:
+    """ファイル全体をメモリマップできるサイズ（SQLite のコンパイル時上限で頭打ちになる）"""
+    try:
+        return max(_DEFAULT_MMAP_SIZE, Path(path).stat().st_size)
+    except OSError:
+        return _DEFAULT_MMAP_SIZE
+
 
 @contextmanager
-def connect_db(read_only: bool = False):
+def connect_db(read_only: bool = False, snapshot: Optional[Path] = None):
     """
     SQLiteデータベース接続コンテキストマネージャー
     
+    snapshot を指定した場合はライブDBではなくスナップショット（jobs/snapshot_db.py で作成）を
+    immutable で開く（読み取り専用、ファイル全体をメモリマップ）。
+    スナップショットを読むかどうかはジョブごとに呼び出し側で指定する。
+    
     Args:
         read_only: 読み取り専用モード
+        snapshot: スナップショットのパス（Noneの場合はライブDB）
     """
-    mode = "ro" if read_only else "rwc"
-    uri = f"file:{DB_PATH}?mode={mode}"
+    use_snapshot = snapshot is not None
+    if use_snapshot:
+        uri = snapshot_uri(snapshot)
+    else:
+        mode = "ro" if read_only else "rwc"
+        uri = f"file:{DB_PATH}?mode={mode}"
     
     conn = sqlite3.connect(uri, uri=True, timeout=30.0)  # タイムアウトを30秒に設定
     conn.row_factory = sqlite3.Row
     
     try:
         # WALモードとPRAGMA設定（並列読み取り性能向上）
-        if not read_only:
+        if use_snapshot:
+            # スナップショットは変更されないため journal_mode の設定は不要
+            conn.execute(f"PRAGMA mmap_size={_mmap_size_for(snapshot)}")
+        elif not read_only:
             conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("PRAGMA foreign_keys=ON")
             conn.execute("PRAGMA synchronous=NORMAL")
@@ -35,7 +65,8 @@ def connect_db(read_only: bool = False):
         # 並列読み取り性能向上のための設定
         conn.execute("PRAGMA cache_size=-64000")  # 64MBキャッシュ（負の値はKB単位）
         conn.execute("PRAGMA temp_store=MEMORY")  # 一時データをメモリに保存
-        conn.execute("PRAGMA mmap_size=268435456")  # 256MBのメモリマッピング
+        if not use_snapshot:
+            conn.execute("PRAGMA mmap_size=268435456")  # 256MBのメモリマッピング
         
         yield conn
         conn.commit()
@@ -46,6 +77,154 @@ def connect_db(read_only: bool = False):
         conn.close()
 
 
+class ConnectionPool:
+    """
+    プロセス内の接続プール（スレッドごとに接続を1本保持して再利用）
+
+    connect_db は呼び出しのたびにファイルを開き直して PRAGMA を実行する。
+    最適化の trial ごと・リバランス日ごとの読み取りのように短い処理が繰り返される箇所では、
+    borrow_db でこのプールの接続を借りる。
+
+    - 接続はスレッドに紐づく（sqlite3 の接続はスレッド間で共有しない）
+    - PRAGMA は接続を開いたときに1回だけ実行する（journal_mode は DB ファイルに永続化済みのため設定しない）
+    - query_only=True の場合は書き込みを拒否する（読み取り専用プール）
+    - cached_statements により同じSQLの準備済みステートメントを接続の寿命の間再利用する
+    - fork 後の子プロセスでは親の接続を使わず開き直す（ProcessPoolExecutor 対策）
+    - immutable=True の場合はスナップショットとして開く（ロック無し・ファイル全体をメモリマップ）
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        query_only: bool = True,
+        cached_statements: int = 256,
+        cache_size_kb: int = 64000,
+        immutable: bool = False,
+    ):
+        self.db_path = Path(db_path) if db_path is not None else DB_PATH
+        self.query_only = query_only or immutable
+        self.immutable = immutable
+        self.cached_statements = cached_statements
+        self.cache_size_kb = cache_size_kb
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._pid = os.getpid()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            snapshot_uri(self.db_path) if self.immutable else f"file:{self.db_path}?mode=rw",
+            uri=True,
+            timeout=30.0,
+            check_same_thread=True,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        mmap_size = _mmap_size_for(self.db_path) if self.immutable else _DEFAULT_MMAP_SIZE
+        conn.execute(f"PRAGMA mmap_size={mmap_size}")
+        if self.query_only:
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """呼び出し元スレッドの接続（初回のみ開く）"""
+        pid = os.getpid()
+        if pid != self._pid:
+            # fork で引き継いだ接続は親プロセスのものなので使わない（閉じもしない）
+            self._local = threading.local()
+            self._connections = []
+            self._lock = threading.Lock()
+            self._pid = pid
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self) -> None:
+        """プールの全接続を閉じる（他スレッドの接続も含むため、使用中でないときに呼ぶ）"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # 別スレッドで作成された接続は閉じられない（スレッド終了時に解放される）
+                pass
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+
+_pools: Dict[Tuple[bool, Optional[str]], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(read_only: bool = True, snapshot: Optional[Path] = None) -> ConnectionPool:
+    """
+    プロセス共通の接続プール（読み取り専用 / 書き込み可 / スナップショットごとに別プール）
+
+    Args:
+        read_only: 読み取り専用プールを使うか（snapshot 指定時は常に読み取り専用）
+        snapshot: スナップショットのパス（Noneの場合はライブDB）
+    """
+    key = (True, str(Path(snapshot).resolve())) if snapshot is not None else (read_only, None)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            if snapshot is not None:
+                new_pool = ConnectionPool(snapshot, immutable=True)
+            else:
+                new_pool = ConnectionPool(query_only=read_only)
+            pool = _pools.setdefault(key, new_pool)
+    return pool
+
+
+def close_pools() -> None:
+    """プロセス共通の接続プールをすべて閉じる"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+@contextmanager
+def borrow_db(
+    read_only: bool = True,
+    pool: Optional[ConnectionPool] = None,
+    snapshot: Optional[Path] = None,
+):
+    """
+    プールの接続を借りるコンテキストマネージャー（connect_db の代わりに短い処理で使う）
+
+    接続は閉じずにプールに残す。書き込み可の場合は終了時にコミット（例外時はロールバック）する。
+
+    Args:
+        read_only: 読み取り専用プールを使うか（pool 指定時は無視）
+        pool: 使用するプール（Noneの場合はプロセス共通のプール）
+        snapshot: スナップショットのパス（pool 未指定時、Noneの場合はライブDB）
+    """
+    if pool is None:
+        pool = get_pool(read_only, snapshot)
+    conn = pool.connection()
+    try:
+        yield conn
+        if not pool.query_only:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
 def init_db():
     """データベースを初期化（スキーマとインデックスを作成）"""
     with connect_db() as conn:
@@ -60,6 +239,21 @@ def init_db():
                 conn.executescript(f.read())
 
 
+def table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    """
+    テーブルが存在するか確認
+    
+    Args:
+        conn: データベース接続
+        table: テーブル名
+    """
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table,),
+    ).fetchone()
+    return row is not None
+
+
 def upsert(
     conn: sqlite3.Connection,
     table: str,
@@ -88,8 +282,134 @@ def upsert(
         VALUES ({placeholders})
     """
     
-    values = [tuple(row[col] for col in columns) for row in data]
-    conn.executemany(sql, values)
+    conn.executemany(sql, _row_tuples(data, columns))
+
+
+def _row_tuples(data: List[Dict[str, Any]], columns: List[str]):
+    """dictのリストを列順のタプル列に変換（itemgetterで1行ずつ）"""
+    getter = itemgetter(*columns)
+    if len(columns) == 1:
+        return ((getter(row),) for row in data)
+    return map(getter, data)
+
+
+def bulk_upsert(
+    conn: sqlite3.Connection,
+    table: str,
+    data: List[Dict[str, Any]],
+    conflict_columns: List[str],
+):
+    """
+    一時テーブル経由のバルクUPSERT（INSERT ... ON CONFLICT DO UPDATE）
+    
+    INSERT OR REPLACE は競合行を削除して再挿入するため、行ごとに全インデックスの
+    削除・挿入が発生する。ここでは一時テーブルに executemany で投入した後、
+    1文の INSERT ... SELECT ... ON CONFLICT DO UPDATE で本テーブルに反映する。
+    
+    data に含まれない列は既存行の値を保持する（INSERT OR REPLACE では NULL になる）。
+    
+    Args:
+        conn: データベース接続
+        table: テーブル名
+        data: 挿入データのリスト（全行が同じキーを持つこと）
+        conflict_columns: 競合判定カラム（PRIMARY KEY）
+    """
+    if not data:
+        return
+    
+    columns = list(data[0].keys())
+    column_names = ", ".join(columns)
+    stage = f"_stage_{table}"
+    
+    conn.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {stage} AS SELECT {column_names} FROM {table} WHERE 0"
+    )
+    conn.execute(f"DELETE FROM {stage}")
+    conn.executemany(
+        f"INSERT INTO {stage} ({column_names}) VALUES ({', '.join(['?'] * len(columns))})",
+        _row_tuples(data, columns),
+    )
+    
+    update_columns = [c for c in columns if c not in conflict_columns]
+    if update_columns:
+        on_conflict = "DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in update_columns)
+    else:
+        on_conflict = "DO NOTHING"
+    # WHERE true: INSERT ... SELECT と ON CONFLICT の構文上の曖昧さを避けるため必要
+    conn.execute(
+        f"""
+        INSERT INTO {table} ({column_names})
+        SELECT {column_names} FROM {stage} WHERE true
+        ON CONFLICT ({", ".join(conflict_columns)}) {on_conflict}
+        """
+    )
+    conn.execute(f"DELETE FROM {stage}")
+
+
+def _secondary_indexes(conn: sqlite3.Connection, table: str) -> List[tuple]:
+    """テーブルの明示的に作成されたインデックス（名前, CREATE文）。主キー等の自動インデックスは含まない"""
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,),
+    ).fetchall()
+    return [(r[0], r[1]) for r in rows]
+
+
+@contextmanager
+def bulk_load_session(
+    conn: sqlite3.Connection,
+    defer_indexes_for: Sequence[str] = (),
+    cache_size_kb: int = 512000,
+) -> Iterator[sqlite3.Connection]:
+    """
+    大量取り込み用の接続設定（バックフィル・DB再構築用）
+    
+    - synchronous=OFF（取り込み中のみ。終了時に NORMAL に戻す）
+    - ページキャッシュを拡大（既定 512MB）
+    - defer_indexes_for のテーブルの二次インデックスを削除し、終了時に再作成する
+    
+    正常終了時のみコミットし、例外時は未コミットの取り込みをロールバックする。
+    インデックスの削除は取り込みと同じトランザクションで行い（本体が途中でコミットしない限り
+    ロールバックで元に戻る）、再作成は例外時も必ず行う（idx_prices_code_date 等が欠けたままにならない）。
+    
+    取り込み中にOSがクラッシュした場合はDBが破損し得るため、再取り込み可能なデータにのみ使用する。
+    
+    Args:
+        conn: データベース接続（書き込み可能）
+        defer_indexes_for: 二次インデックスの作成を取り込み後まで遅らせるテーブル
+        cache_size_kb: 取り込み中のページキャッシュ（KB）
+    """
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(f"PRAGMA cache_size=-{int(cache_size_kb)}")
+    
+    deferred: List[tuple] = []
+    try:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        for table in defer_indexes_for:
+            for name, sql in _secondary_indexes(conn, table):
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+                deferred.append((name, sql))
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        try:
+            for name, sql in deferred:
+                # ロールバックで削除が取り消された場合は既に存在する
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+                ).fetchone()
+                if exists is None:
+                    print(f"[bulk_load] rebuilding index {name}")
+                    conn.execute(sql)
+            conn.commit()
+        finally:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-64000")
 
 
 def delete_by_date(
@@ -1,4 +1,11 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
 import time
+from datetime import date as _date
+from pathlib import Path
 import requests
 from typing import Optional, Dict, Any, List
 from functools import wraps
@@ -6,13 +13,24 @@ from functools import wraps
 from ..config.settings import (
     JQUANTS_API_KEY,
     JQUANTS_API_BASE_URL,
+    JQUANTS_CACHE_DIR,
+    JQUANTS_CACHE_MODE,
+    JQUANTS_CACHE_OPEN_TTL_HOURS,
 )
 
+CACHE_MODES = ("off", "readwrite", "replay", "refresh")
+# 値が今日以降ならレスポンスをキャッシュしないパラメータ（当日分は公開途中の可能性がある）
+_OPEN_DATE_PARAMS = ("date", "to")
+
 
 class JQuantsAPIError(Exception):
     pass
 
 
+class JQuantsCacheMiss(JQuantsAPIError):
+    """replay モードでキャッシュに無いリクエストが来た"""
+
+
 def retry(max_attempts: int = 3, delay: float = 1.0):
     def decorator(func):
         @wraps(func)
@@ -32,11 +50,148 @@ def retry(max_attempts: int = 3, delay: float = 1.0):
     return decorator
 
 
+class ResponseCache:
+    """
+    J-Quants APIレスポンスのディスクキャッシュ（圧縮・内容アドレス）
+
+    (endpoint, params, pagination_key) ごとに参照ファイルを置き、
+    レスポンス本体は内容の SHA-256 を名前にした gzip ファイルとして1つだけ保存する
+    （休場日の空レスポンスなど同一内容は共有される）。
+
+        {root}/refs/{kk}/{key}.json      … リクエスト → 本体のハッシュ
+        {root}/objects/{hh}/{hash}.json.gz … レスポンス本体
+
+    書き込みは一時ファイル経由の置き換えのため、複数スレッド・プロセスから使ってよい。
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def request_key(
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        pagination_key: Optional[str] = None,
+    ) -> str:
+        """リクエストのキー（パラメータの順序・型に依存しない）"""
+        canonical = json.dumps(
+            {
+                "endpoint": endpoint,
+                "params": {str(k): str(v) for k, v in (params or {}).items() if v is not None},
+                "pagination_key": pagination_key,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _ref_path(self, key: str) -> Path:
+        return self.root / "refs" / key[:2] / f"{key}.json"
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.json.gz"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        pagination_key: Optional[str] = None,
+        max_age: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュ済みのレスポンス（無い場合はNone）
+
+        max_age（秒）を指定した場合、それより前に取得したレスポンスも None（ミス）として扱う。
+        """
+        ref_path = self._ref_path(self.request_key(endpoint, params, pagination_key))
+        try:
+            with open(ref_path, "r", encoding="utf-8") as f:
+                ref = json.load(f)
+            if max_age is not None:
+                fetched_at = time.mktime(time.strptime(ref["fetched_at"], "%Y-%m-%dT%H:%M:%S"))
+                if time.time() - fetched_at > max_age:
+                    raise ValueError("expired")
+            with open(self._object_path(ref["object"]), "rb") as f:
+                body = json.loads(gzip.decompress(f.read()).decode("utf-8"))
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return body
+
+    def put(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        pagination_key: Optional[str],
+        body: Dict[str, Any],
+    ) -> str:
+        """レスポンスを保存し、本体のハッシュを返す"""
+        raw = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            self._write_atomic(object_path, gzip.compress(raw, compresslevel=6))
+        ref = {
+            "object": digest,
+            "endpoint": endpoint,
+            "params": params or {},
+            "pagination_key": pagination_key,
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        key = self.request_key(endpoint, params, pagination_key)
+        self._write_atomic(self._ref_path(key), json.dumps(ref, ensure_ascii=False, default=str).encode("utf-8"))
+        with self._lock:
+            self.stores += 1
+        return digest
+
+    def summary(self) -> str:
+        return f"[jquants cache] {self.hits} hits, {self.misses} misses, {self.stores} stored ({self.root})"
+
+
+def _is_cacheable(params: Optional[Dict[str, Any]], today: Optional[str] = None) -> bool:
+    """当日以降の日付を指定したリクエストは公開途中の可能性があるためキャッシュしない"""
+    today = today or _date.today().strftime("%Y-%m-%d")
+    for k in _OPEN_DATE_PARAMS:
+        v = (params or {}).get(k)
+        if v is not None and str(v) >= today:
+            return False
+    return True
+
+
+def _has_closed_date_bound(params: Optional[Dict[str, Any]]) -> bool:
+    """
+    日付の上限（date / to）を指定したリクエストか
+
+    上限の無いリクエスト（/fins/summary?code=... など）は後から行が追加されるため、
+    レスポンスは取得時点のものでしかない。
+    """
+    return any((params or {}).get(k) is not None for k in _OPEN_DATE_PARAMS)
+
+
 class JQuantsClient:
     def __init__(
         self,
         api_key: Optional[str] = None,
         requests_per_minute: int = 120,
+        cache_mode: Optional[str] = None,
+        cache_dir: Optional[Path] = None,
+        open_ttl_hours: Optional[float] = None,
     ):
         """
         J-Quants API V2 クライアント
@@ -44,27 +199,45 @@ class JQuantsClient:
         Args:
             api_key: APIキー（未指定の場合は環境変数JQUANTS_API_KEYを使用）
             requests_per_minute: 1分あたりのリクエスト制限（デフォルト: 120）
+            cache_mode: レスポンスキャッシュのモード（off / readwrite / replay / refresh、
+                未指定の場合は環境変数JQUANTS_CACHE_MODE）
+            cache_dir: キャッシュディレクトリ（未指定の場合は環境変数JQUANTS_CACHE_DIR）
+            open_ttl_hours: 日付の上限を指定しないリクエストのキャッシュ有効期間
+                （未指定の場合は環境変数JQUANTS_CACHE_OPEN_TTL_HOURS）
         """
+        self.cache_mode = cache_mode or JQUANTS_CACHE_MODE
+        if self.cache_mode not in CACHE_MODES:
+            raise ValueError(f"cache_mode は {CACHE_MODES} のいずれかを指定してください: {self.cache_mode}")
+        self.cache: Optional[ResponseCache] = (
+            ResponseCache(cache_dir or JQUANTS_CACHE_DIR) if self.cache_mode != "off" else None
+        )
+        self.open_ttl_seconds = (
+            open_ttl_hours if open_ttl_hours is not None else JQUANTS_CACHE_OPEN_TTL_HOURS
+        ) * 3600.0
+
         self.api_key = api_key or JQUANTS_API_KEY
-        if not self.api_key:
+        # replay モードはネットワークに出ないためAPIキー不要
+        if not self.api_key and self.cache_mode != "replay":
             raise ValueError("APIキーが必要です。環境変数JQUANTS_API_KEYを設定するか、api_key引数を指定してください。")
         
         # レート制限管理: 120リクエスト/分 = 0.5秒/リクエスト（60秒 / 120リクエスト）
         self.min_request_interval = 60.0 / requests_per_minute
         self.last_request_time: float = 0.0
+        # 複数スレッドから呼ばれる場合（取り込みパイプライン）もリクエスト間隔を守る
+        self._rate_lock = threading.Lock()
 
     def _wait_for_rate_limit(self):
-        """レート制限を守るために必要な待機時間を確保"""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
-        
-        if elapsed < self.min_request_interval:
-            sleep_time = self.min_request_interval - elapsed
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+        """レート制限を守るために必要な待機時間を確保（スレッドセーフ）"""
+        with self._rate_lock:
+            current_time = time.time()
+            elapsed = current_time - self.last_request_time
+            
+            if elapsed < self.min_request_interval:
+                sleep_time = self.min_request_interval - elapsed
+                time.sleep(sleep_time)
+            
+            self.last_request_time = time.time()
 
-    @retry(max_attempts=3, delay=1.0)
     def get(
         self,
         endpoint: str,
@@ -73,6 +246,12 @@ class JQuantsClient:
     ) -> Dict[str, Any]:
         """
         GETリクエストを実行（V2 API）
+
+        キャッシュが有効な場合、readwrite / replay モードではキャッシュを先に参照する
+        （ヒット時はレート制限の待機もしない）。replay モードでキャッシュに無い場合は
+        JQuantsCacheMiss を送出する。
+        日付の上限（date / to）を指定しないリクエストは、readwrite モードでは
+        open_ttl_hours より古いキャッシュを使わずに取得し直す。
         
         Args:
             endpoint: APIエンドポイント（例: "/equities/master"）
@@ -82,6 +261,31 @@ class JQuantsClient:
         Returns:
             APIレスポンス（JSON）
         """
+        if self.cache is not None and self.cache_mode in ("readwrite", "replay"):
+            max_age = None
+            if self.cache_mode == "readwrite" and not _has_closed_date_bound(params):
+                max_age = self.open_ttl_seconds
+            cached = self.cache.get(endpoint, params, pagination_key, max_age=max_age)
+            if cached is not None:
+                return cached
+            if self.cache_mode == "replay":
+                raise JQuantsCacheMiss(
+                    f"キャッシュにありません（replay）: {endpoint} params={params} pagination_key={pagination_key}"
+                )
+
+        j = self._request(endpoint, params=params, pagination_key=pagination_key)
+        if self.cache is not None and _is_cacheable(params):
+            self.cache.put(endpoint, params, pagination_key, j)
+        return j
+
+    @retry(max_attempts=3, delay=1.0)
+    def _request(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        pagination_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """APIへのGETリクエスト（レート制限・リトライ付き）"""
         # レート制限を守るために待機
         self._wait_for_rate_limit()
         
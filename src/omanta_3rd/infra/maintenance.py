@@ -0,0 +1,350 @@
+"""DBメンテナンス（統計更新・WALチェックポイント・サイズ監視）
+
+長時間の最適化で portfolio_monthly や Optuna ストレージ（optuna_*.db）に書き込み続けると
+WAL が伸び続け、チェックポイントまで読み取りも遅くなる。また統計（sqlite_stat1）が無いと
+プランナーはインデックスの選択性を推定できない。
+
+run_maintenance は次を順に実行し、所要時間とサイズを履歴テーブルに記録する。
+
+1. ANALYZE（統計が無い場合）/ PRAGMA optimize（統計がある場合）
+2. PRAGMA wal_checkpoint(TRUNCATE) で WAL を書き戻して切り詰める
+3. （任意）VACUUM
+4. テーブル・インデックスごとの行数・サイズ・未使用領域（dbstat）の収集
+5. ホットクエリの実行計画チェック（infra/query_plan）
+
+履歴は history_path（既定はメインDB）の db_maintenance_log / db_table_stats に保存する。
+Optuna ストレージのメンテナンス（maintain_optuna_storage）はそのストレージ自身に記録する。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from ..config.settings import DB_PATH
+from .db import table_exists
+from .query_plan import find_plan_regressions
+
+LOG_TABLE = "db_maintenance_log"
+TABLE_STATS_TABLE = "db_table_stats"
+
+
+@dataclass
+class MaintenanceReport:
+    """メンテナンス1回分の結果"""
+
+    db_path: str
+    ran_at: str
+    db_bytes_before: int = 0
+    db_bytes_after: int = 0
+    wal_bytes_before: int = 0
+    wal_bytes_after: int = 0
+    freelist_pages: int = 0
+    analyze_sec: Optional[float] = None
+    checkpoint_sec: Optional[float] = None
+    vacuum_sec: Optional[float] = None
+    stats_sec: Optional[float] = None
+    total_sec: float = 0.0
+    checkpoint_busy: bool = False
+    plan_problems: List[str] = field(default_factory=list)
+    table_stats: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+    def summary(self) -> str:
+        mb = 1024 * 1024
+        lines = [
+            f"[maintenance] {self.db_path}",
+            f"  db: {self.db_bytes_before / mb:,.1f} MB -> {self.db_bytes_after / mb:,.1f} MB"
+            f" (freelist {self.freelist_pages:,} pages)",
+            f"  wal: {self.wal_bytes_before / mb:,.1f} MB -> {self.wal_bytes_after / mb:,.1f} MB"
+            + (" (busy: 読み取り中の接続があり一部のみ書き戻し)" if self.checkpoint_busy else ""),
+        ]
+        steps = [
+            ("analyze", self.analyze_sec),
+            ("checkpoint", self.checkpoint_sec),
+            ("vacuum", self.vacuum_sec),
+            ("stats", self.stats_sec),
+        ]
+        lines.append(
+            "  time: "
+            + ", ".join(f"{name} {sec:.2f}s" for name, sec in steps if sec is not None)
+            + f", total {self.total_sec:.2f}s"
+        )
+        if self.plan_problems:
+            lines.append(f"  query plan: {len(self.plan_problems)} 件の問題")
+            lines.extend(f"    {p}" for p in self.plan_problems)
+        return "\n".join(lines)
+
+
+def ensure_maintenance_tables(conn) -> None:
+    """メンテナンス履歴テーブルを作成（既に存在する場合は何もしない）"""
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {LOG_TABLE} (
+          ran_at TEXT NOT NULL,
+          db_name TEXT NOT NULL,
+          db_bytes_before INTEGER,
+          db_bytes_after INTEGER,
+          wal_bytes_before INTEGER,
+          wal_bytes_after INTEGER,
+          freelist_pages INTEGER,
+          analyze_sec REAL,
+          checkpoint_sec REAL,
+          vacuum_sec REAL,
+          stats_sec REAL,
+          total_sec REAL,
+          plan_problems INTEGER,
+          PRIMARY KEY (ran_at, db_name)
+        )
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_STATS_TABLE} (
+          ran_at TEXT NOT NULL,
+          db_name TEXT NOT NULL,
+          name TEXT NOT NULL,
+          type TEXT NOT NULL,
+          tbl_name TEXT NOT NULL,
+          row_count INTEGER,
+          bytes INTEGER,
+          unused_bytes INTEGER,
+          PRIMARY KEY (ran_at, db_name, name)
+        )
+        """
+    )
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _wal_path(path: Path) -> Path:
+    return path.with_name(path.name + "-wal")
+
+
+def _has_dbstat(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("SELECT 1 FROM dbstat LIMIT 1").fetchall()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _stat1_row_counts(conn: sqlite3.Connection) -> Dict[str, int]:
+    """sqlite_stat1 のテーブルごとの行数（stat 列の先頭の値。統計が無ければ空）"""
+    if not table_exists(conn, "sqlite_stat1"):
+        return {}
+    counts: Dict[str, int] = {}
+    for tbl, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+        head = (stat or "").split(" ", 1)[0]
+        if head.isdigit():
+            counts.setdefault(tbl, int(head))
+    return counts
+
+
+def collect_table_stats(conn: sqlite3.Connection) -> pd.DataFrame:
+    """
+    テーブル・インデックスごとの行数・サイズ・未使用領域
+
+    unused_ratio（未使用バイト / サイズ）が大きいインデックスは削除・更新の繰り返しで
+    断片化している（VACUUM または REINDEX で回復する）。
+    dbstat が使えないビルドでは行数のみ。
+    行数は統計（sqlite_stat1）があればその値（最後に ANALYZE した時点の行数）を使い、
+    統計の無いテーブルだけ COUNT(*) で数える（ETL のたびに全テーブルを走査しない）。
+
+    Returns:
+        name, type, tbl_name, row_count, bytes, unused_bytes, unused_ratio（bytes 降順）
+    """
+    objects = pd.read_sql_query(
+        """
+        SELECT name, type, tbl_name FROM sqlite_master
+        WHERE type IN ('table', 'index') AND name NOT LIKE 'sqlite_%'
+        """,
+        conn,
+    )
+    row_counts = _stat1_row_counts(conn)
+    for table in objects.loc[objects["type"] == "table", "name"]:
+        if table not in row_counts:
+            row_counts[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+    objects["row_count"] = objects["tbl_name"].map(row_counts)
+
+    if _has_dbstat(conn):
+        sizes = pd.read_sql_query(
+            "SELECT name, pgsize AS bytes, unused AS unused_bytes FROM dbstat WHERE aggregate = TRUE",
+            conn,
+        )
+        objects = objects.merge(sizes, on="name", how="left")
+    else:
+        objects["bytes"] = None
+        objects["unused_bytes"] = None
+    objects["unused_ratio"] = objects["unused_bytes"] / objects["bytes"]
+    return objects.sort_values("bytes", ascending=False, na_position="last").reset_index(drop=True)
+
+
+def _analyze(conn: sqlite3.Connection, full: bool) -> None:
+    if full or not table_exists(conn, "sqlite_stat1"):
+        conn.execute("ANALYZE")
+    else:
+        # 統計が古いテーブルだけ再計算（変更が少なければ何もしない）
+        conn.execute("PRAGMA optimize")
+
+
+def _record(history_path: Path, report: MaintenanceReport) -> None:
+    conn = sqlite3.connect(history_path, timeout=30.0)
+    try:
+        ensure_maintenance_tables(conn)
+        db_name = Path(report.db_path).name
+        conn.execute(
+            f"""
+            INSERT OR REPLACE INTO {LOG_TABLE} VALUES
+            (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                report.ran_at, db_name,
+                report.db_bytes_before, report.db_bytes_after,
+                report.wal_bytes_before, report.wal_bytes_after,
+                report.freelist_pages,
+                report.analyze_sec, report.checkpoint_sec, report.vacuum_sec, report.stats_sec,
+                report.total_sec, len(report.plan_problems),
+            ),
+        )
+        if not report.table_stats.empty:
+            stats = report.table_stats
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {TABLE_STATS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        report.ran_at, db_name, r.name, r.type, r.tbl_name,
+                        None if pd.isna(r.row_count) else int(r.row_count),
+                        None if pd.isna(r.bytes) else int(r.bytes),
+                        None if pd.isna(r.unused_bytes) else int(r.unused_bytes),
+                    )
+                    for r in stats.itertuples(index=False)
+                ],
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_maintenance(
+    db_path: Optional[Path] = None,
+    analyze: bool = True,
+    full_analyze: bool = False,
+    checkpoint: bool = True,
+    vacuum: bool = False,
+    collect_stats: bool = True,
+    check_plans: bool = True,
+    record: bool = True,
+    history_path: Optional[Path] = None,
+) -> MaintenanceReport:
+    """
+    DBメンテナンスを実行
+
+    Args:
+        db_path: 対象DB（Noneの場合は DB_PATH。Optuna ストレージ等も指定可）
+        analyze: 統計を更新するか（統計が無ければ ANALYZE、あれば PRAGMA optimize）
+        full_analyze: 常に ANALYZE で全統計を作り直すか
+        checkpoint: WAL をチェックポイントして切り詰めるか
+        vacuum: VACUUM するか（DBサイズ分の一時領域と排他ロックが必要）
+        collect_stats: テーブル・インデックスごとのサイズを収集するか
+        check_plans: ホットクエリの実行計画を検査するか
+        record: 履歴テーブルに記録するか
+        history_path: 履歴を記録するDB（Noneの場合は DB_PATH）
+
+    Returns:
+        MaintenanceReport
+    """
+    db_path = Path(db_path) if db_path is not None else DB_PATH
+    started = time.perf_counter()
+    report = MaintenanceReport(
+        db_path=str(db_path),
+        ran_at=datetime.now().isoformat(timespec="seconds"),
+        db_bytes_before=_file_size(db_path),
+        wal_bytes_before=_file_size(_wal_path(db_path)),
+    )
+
+    # ANALYZE / VACUUM / チェックポイントはトランザクション外で実行する
+    conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+    try:
+        if analyze:
+            t = time.perf_counter()
+            _analyze(conn, full_analyze)
+            report.analyze_sec = time.perf_counter() - t
+
+        if checkpoint:
+            t = time.perf_counter()
+            busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            report.checkpoint_busy = bool(busy)
+            report.checkpoint_sec = time.perf_counter() - t
+
+        if vacuum:
+            t = time.perf_counter()
+            conn.execute("VACUUM")
+            report.vacuum_sec = time.perf_counter() - t
+
+        report.freelist_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        if collect_stats:
+            t = time.perf_counter()
+            report.table_stats = collect_table_stats(conn)
+            report.stats_sec = time.perf_counter() - t
+
+        if check_plans:
+            report.plan_problems = find_plan_regressions(conn)
+    finally:
+        conn.close()
+
+    report.db_bytes_after = _file_size(db_path)
+    report.wal_bytes_after = _file_size(_wal_path(db_path))
+    report.total_sec = time.perf_counter() - started
+
+    if record:
+        _record(Path(history_path) if history_path is not None else DB_PATH, report)
+    return report
+
+
+def maintain_optuna_storage(storage: Optional[str], **kwargs) -> Optional[MaintenanceReport]:
+    """
+    Optuna の SQLite ストレージ（sqlite:///optuna_xxx.db）をメンテナンス
+
+    スタディ完了後に WAL を切り詰めて統計を更新する。SQLite 以外のストレージは何もしない。
+    履歴はメインDBではなくストレージ自身に記録する（history_path で変更可）。
+    """
+    prefix = "sqlite:///"
+    if not storage or not storage.startswith(prefix):
+        return None
+    path = Path(storage[len(prefix):])
+    if not path.exists():
+        return None
+    kwargs.setdefault("collect_stats", False)
+    kwargs.setdefault("check_plans", False)
+    kwargs.setdefault("history_path", path)
+    return run_maintenance(path, **kwargs)
+
+
+def load_maintenance_history(
+    conn,
+    db_name: Optional[str] = None,
+    limit: int = 20,
+) -> pd.DataFrame:
+    """メンテナンス履歴（新しい順）。DBサイズ・WAL・所要時間の推移の確認用"""
+    if not table_exists(conn, LOG_TABLE):
+        return pd.DataFrame()
+    where, params = "", []
+    if db_name is not None:
+        where, params = "WHERE db_name = ?", [db_name]
+    return pd.read_sql_query(
+        f"SELECT * FROM {LOG_TABLE} {where} ORDER BY ran_at DESC LIMIT ?",
+        conn,
+        params=params + [limit],
+    )
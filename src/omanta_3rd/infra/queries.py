@@ -0,0 +1,347 @@
+"""繰り返し実行されるクエリの SQL 定数
+
+特徴量構築・銘柄選定・バックテストの各モジュール（loader / adjustments / regime / select /
+performance / timeseries）が実行する SQL を1か所にまとめる。
+各モジュールはここの定数をそのまま実行し、infra/query_plan の HOT_QUERIES も同じ定数を検査する
+（クエリを変更すれば実行計画チェックの対象も自動的に変わる）。
+
+列名や IN 句のプレースホルダ数が実行時に決まるクエリは str.format 用のテンプレート
+（{price_column} / {codes} / {dates} など）として定義する。
+このモジュールは他のモジュールに依存しない。
+"""
+
+# ---------------------------------------------------------------------------
+# features/loader.py
+# ---------------------------------------------------------------------------
+
+LATEST_PRICE_DATE_SQL = "SELECT MAX(date) AS d FROM prices_daily WHERE date <= ?"
+
+LATEST_LISTED_DATE_SQL = "SELECT MAX(date) AS d FROM listed_info WHERE date <= ?"
+
+UNIVERSE_SEGMENTS_SQL = """
+    SELECT code, company_name, market_name, sector17, sector33
+    FROM listed_segments
+    WHERE segment = 'prime'
+      AND valid_from <= ?
+      AND valid_to >= ?
+"""
+
+LISTED_SNAPSHOT_SQL = """
+    SELECT code, company_name, market_name, sector17, sector33
+    FROM listed_info
+    WHERE date = ?
+"""
+
+PRICES_WINDOW_SQL = """
+    SELECT date, code, close, adj_close, turnover_value
+    FROM prices_daily
+    WHERE date <= ?
+"""
+
+LIQUIDITY_60D_SQL = """
+    SELECT code, liquidity_60d
+    FROM prices_rolling_daily
+    WHERE date = ?
+"""
+
+SPLIT_FACTOR_ON_DATE_SQL = "SELECT code, split_factor_cum FROM prices_rolling_daily WHERE date = ?"
+
+SPLIT_FACTOR_ASOF_SQL = """
+    SELECT code, split_factor_cum
+    FROM prices_rolling_daily
+    WHERE date = (SELECT MAX(date) FROM prices_rolling_daily WHERE date <= ?)
+"""
+
+SPLIT_FACTOR_ASOF_FOR_CODE_SQL = """
+    SELECT split_factor_cum FROM prices_rolling_daily
+    WHERE code = ? AND date <= ?
+    ORDER BY date DESC
+    LIMIT 1
+"""
+
+LATEST_FY_PERIOD_SQL = """
+    WITH ranked AS (
+      SELECT
+        code, current_period_end,
+        ROW_NUMBER() OVER (
+          PARTITION BY code
+          ORDER BY current_period_end DESC, disclosed_date DESC
+        ) AS rn
+      FROM fins_statements
+      WHERE disclosed_date <= ?
+        AND current_period_end <= ?
+        AND type_of_current_period = 'FY'
+    )
+    SELECT code, current_period_end
+    FROM ranked
+    WHERE rn = 1
+"""
+
+LATEST_FY_SQL = """
+    WITH latest AS (
+      SELECT
+        code, current_period_end
+      FROM (
+        SELECT
+          code, current_period_end,
+          ROW_NUMBER() OVER (
+            PARTITION BY code
+            ORDER BY current_period_end DESC, disclosed_date DESC
+          ) AS rn
+        FROM fins_statements
+        WHERE disclosed_date <= ?
+          AND current_period_end <= ?
+          AND type_of_current_period = 'FY'
+      )
+      WHERE rn = 1
+    )
+    SELECT
+      fs.disclosed_date, fs.disclosed_time, fs.code, fs.type_of_current_period, fs.current_period_end,
+      fs.operating_profit, fs.profit, fs.equity, fs.eps, fs.bvps,
+      fs.forecast_operating_profit, fs.forecast_profit, fs.forecast_eps,
+      fs.next_year_forecast_operating_profit, fs.next_year_forecast_profit, fs.next_year_forecast_eps,
+      fs.shares_outstanding, fs.treasury_shares
+    FROM fins_statements fs
+    JOIN latest l
+      ON fs.code = l.code
+     AND fs.current_period_end = l.current_period_end
+    WHERE fs.disclosed_date <= ?
+      AND fs.current_period_end <= ?
+      AND fs.type_of_current_period = 'FY'
+"""
+
+FY_HISTORY_SQL = """
+    SELECT code, disclosed_date, current_period_end,
+           operating_profit, profit, equity, eps, bvps,
+           shares_outstanding, treasury_shares
+    FROM fins_statements
+    WHERE disclosed_date <= ?
+      AND current_period_end <= ?
+      AND type_of_current_period = 'FY'
+      AND (operating_profit IS NOT NULL OR profit IS NOT NULL OR equity IS NOT NULL)
+"""
+
+LATEST_FY_FORECAST_SQL = """
+    WITH ranked AS (
+      SELECT
+        code, disclosed_date, type_of_current_period,
+        forecast_operating_profit, forecast_profit, forecast_eps,
+        next_year_forecast_operating_profit, next_year_forecast_profit, next_year_forecast_eps,
+        ROW_NUMBER() OVER (
+          PARTITION BY code
+          ORDER BY disclosed_date DESC
+        ) AS rn
+      FROM fins_statements
+      WHERE disclosed_date <= ?
+        AND current_period_end <= ?
+        AND type_of_current_period = 'FY'
+        AND (forecast_operating_profit IS NOT NULL
+             OR forecast_profit IS NOT NULL
+             OR forecast_eps IS NOT NULL)
+    )
+    SELECT code, disclosed_date, type_of_current_period,
+           forecast_operating_profit, forecast_profit, forecast_eps,
+           next_year_forecast_operating_profit, next_year_forecast_profit, next_year_forecast_eps
+    FROM ranked
+    WHERE rn = 1
+"""
+
+LATEST_QUARTER_FORECAST_SQL = """
+    WITH ranked AS (
+      SELECT
+        code, disclosed_date, type_of_current_period,
+        forecast_operating_profit, forecast_profit, forecast_eps,
+        next_year_forecast_operating_profit, next_year_forecast_profit, next_year_forecast_eps,
+        ROW_NUMBER() OVER (
+          PARTITION BY code
+          ORDER BY disclosed_date DESC,
+                   CASE
+                     WHEN type_of_current_period = '3Q' THEN 1
+                     WHEN type_of_current_period = '2Q' THEN 2
+                     WHEN type_of_current_period = '1Q' THEN 3
+                     ELSE 4
+                   END
+        ) AS rn
+      FROM fins_statements
+      WHERE disclosed_date <= ?
+        AND type_of_current_period IN ('3Q', '2Q', '1Q')
+        AND (forecast_operating_profit IS NOT NULL
+             OR forecast_profit IS NOT NULL
+             OR forecast_eps IS NOT NULL)
+    )
+    SELECT code, disclosed_date, type_of_current_period,
+           forecast_operating_profit, forecast_profit, forecast_eps,
+           next_year_forecast_operating_profit, next_year_forecast_profit, next_year_forecast_eps
+    FROM ranked
+    WHERE rn = 1
+"""
+
+# ---------------------------------------------------------------------------
+# features/adjustments.py
+# ---------------------------------------------------------------------------
+
+SHARES_ASOF_SQL = """
+    SELECT shares_outstanding, treasury_shares, equity
+    FROM fins_statements
+    WHERE code = ?
+      AND type_of_current_period = 'FY'
+      AND disclosed_date <= ?
+      AND shares_outstanding IS NOT NULL
+    ORDER BY current_period_end DESC, disclosed_date DESC
+    LIMIT 1
+"""
+
+SHARES_FOR_PERIOD_SQL = """
+    SELECT shares_outstanding, treasury_shares, equity, bvps
+    FROM fins_statements
+    WHERE code = ?
+      AND type_of_current_period = 'FY'
+      AND current_period_end = ?
+      AND shares_outstanding IS NOT NULL
+    ORDER BY disclosed_date DESC
+    LIMIT 1
+"""
+
+# ---------------------------------------------------------------------------
+# market/regime.py
+# ---------------------------------------------------------------------------
+
+INDEX_HISTORY_SQL = """
+    SELECT date, close
+    FROM index_daily
+    WHERE index_code = ? AND date <= ?
+    ORDER BY date DESC
+    LIMIT ?
+"""
+
+INDEX_CLOSE_SERIES_SQL = "SELECT date, close FROM index_daily WHERE index_code = ? ORDER BY date"
+
+INDEX_FINGERPRINT_SQL = """
+    SELECT date, close, (SELECT COUNT(*) FROM index_daily WHERE index_code = ?)
+    FROM index_daily
+    WHERE index_code = ?
+    ORDER BY date DESC
+    LIMIT 1
+"""
+
+# ---------------------------------------------------------------------------
+# strategy/select.py（{listed_join} に下の結合句のどちらかを入れる）
+# ---------------------------------------------------------------------------
+
+SELECT_LISTED_SEGMENTS_JOIN = """
+    LEFT JOIN listed_segments li ON fm.code = li.code
+      AND li.valid_from <= ?1
+      AND (li.next_from IS NULL OR li.next_from > ?1)
+"""
+
+SELECT_LISTED_INFO_JOIN = """
+    LEFT JOIN listed_info li ON fm.code = li.code AND li.date = (
+        SELECT MAX(date) FROM listed_info WHERE code = fm.code AND date <= ?1
+    )
+"""
+
+SELECT_CANDIDATES_SQL = """
+    SELECT DISTINCT fm.code, fm.sector33, fm.core_score, fm.entry_score,
+           li.market_name, fm.liquidity_60d, fm.market_cap, fm.per, fm.pbr
+    FROM features_monthly fm
+    {listed_join}
+    WHERE fm.as_of_date = ?1
+      AND fm.liquidity_60d >= ?2
+      AND fm.market_cap >= ?3
+"""
+
+# ---------------------------------------------------------------------------
+# backtest/performance.py
+# ---------------------------------------------------------------------------
+
+NEXT_TRADING_DAYS_SQL = """
+    SELECT DISTINCT date
+    FROM prices_daily
+    WHERE date > ?
+      AND (open IS NOT NULL OR close IS NOT NULL)
+    ORDER BY date
+    LIMIT 7
+"""
+
+NEXT_TRADING_DAYS_UNTIL_SQL = """
+    SELECT DISTINCT date
+    FROM prices_daily
+    WHERE date > ?
+      AND date <= ?
+      AND (open IS NOT NULL OR close IS NOT NULL)
+    ORDER BY date
+    LIMIT 7
+"""
+
+INDEX_PRICE_ASOF_SQL = """
+    SELECT {price_column}
+    FROM index_daily
+    WHERE index_code = ? AND date <= ?
+    ORDER BY date DESC
+    LIMIT 1
+"""
+
+SPLIT_EVENTS_SQL = """
+    SELECT date, adjustment_factor
+    FROM prices_daily
+    WHERE code = ?
+      AND date > ?
+      AND date <= ?
+      AND adjustment_factor IS NOT NULL
+      AND adjustment_factor != 1.0
+    ORDER BY date ASC
+"""
+
+PRICE_ON_DATE_SQL = """
+    SELECT open, close
+    FROM prices_daily
+    WHERE code = ? AND date = ?
+"""
+
+LAST_CLOSE_SQL = """
+    SELECT date, close
+    FROM prices_daily
+    WHERE code = ? AND date <= ?
+    ORDER BY date DESC
+    LIMIT 1
+"""
+
+# ---------------------------------------------------------------------------
+# backtest/timeseries.py
+# ---------------------------------------------------------------------------
+
+PREV_TRADING_DAY_SQL = """
+    SELECT MAX(date) AS prev_date
+    FROM prices_daily
+    WHERE date < ?
+"""
+
+INDEX_PRICE_ON_DATE_SQL = """
+    SELECT {price_column}
+    FROM index_daily
+    WHERE index_code = ? AND date = ?
+"""
+
+STOCK_PRICE_ON_DATE_SQL = """
+    SELECT {price_column}
+    FROM prices_daily
+    WHERE code = ? AND date = ?
+"""
+
+PRICES_MATRIX_SQL = """
+    SELECT code, date, {price_column} AS price
+    FROM prices_daily
+    WHERE code IN ({codes}) AND date IN ({dates})
+"""
+
+INDEX_MATRIX_SQL = """
+    SELECT date, {price_column} AS price
+    FROM index_daily
+    WHERE index_code = ? AND date IN ({dates})
+"""
+
+PORTFOLIO_SQL = """
+    SELECT code, weight
+    FROM monthly_rebalance_portfolio
+    WHERE rebalance_date = ?
+"""
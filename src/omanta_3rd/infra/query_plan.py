@@ -0,0 +1,214 @@
+"""ホットクエリの実行計画チェック（EXPLAIN QUERY PLAN）
+
+特徴量構築・バックテストで繰り返し実行されるクエリ（loader / adjustments / regime /
+performance / timeseries）について、インデックスを使わない全件走査に戻っていないかを検査する。
+
+- 全件走査: 計画に "SCAN <テーブル>" が現れる（サブクエリ・CTE の走査は対象外）
+- expect_index: 指定したインデックスを使う計画になっているか（インデックス定義の回帰検出）
+
+クエリ文は infra/queries の定数で、各モジュールが実行する SQL そのもの
+（テンプレートの列名・IN 句は代表的な値で埋める）。
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from . import queries as q
+from .db import table_exists
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """検査対象のクエリ"""
+
+    name: str
+    sql: str
+    tables: Sequence[str]
+    expect_index: Optional[str] = None
+
+
+HOT_QUERIES: Sequence[HotQuery] = (
+    # features/loader.py
+    HotQuery("loader.latest_price_date", q.LATEST_PRICE_DATE_SQL, ("prices_daily",)),
+    HotQuery(
+        "loader.universe_segments",
+        q.UNIVERSE_SEGMENTS_SQL,
+        ("listed_segments",),
+        expect_index="idx_listed_segments_segment_range",
+    ),
+    HotQuery("loader.listed_snapshot", q.LISTED_SNAPSHOT_SQL, ("listed_info",)),
+    HotQuery("loader.prices_window", q.PRICES_WINDOW_SQL, ("prices_daily",)),
+    HotQuery("loader.liquidity_60d", q.LIQUIDITY_60D_SQL, ("prices_rolling_daily",)),
+    HotQuery("loader.split_factor_on_date", q.SPLIT_FACTOR_ON_DATE_SQL, ("prices_rolling_daily",)),
+    HotQuery("loader.split_factor_asof", q.SPLIT_FACTOR_ASOF_SQL, ("prices_rolling_daily",)),
+    HotQuery(
+        "loader.latest_fy_period",
+        q.LATEST_FY_PERIOD_SQL,
+        ("fins_statements",),
+        expect_index="idx_fins_type_disclosed",
+    ),
+    HotQuery(
+        "loader.latest_fy",
+        q.LATEST_FY_SQL,
+        ("fins_statements",),
+        expect_index="idx_fins_type_disclosed",
+    ),
+    HotQuery(
+        "loader.fy_history",
+        q.FY_HISTORY_SQL,
+        ("fins_statements",),
+        expect_index="idx_fins_type_disclosed",
+    ),
+    HotQuery(
+        "loader.latest_fy_forecast",
+        q.LATEST_FY_FORECAST_SQL,
+        ("fins_statements",),
+        expect_index="idx_fins_type_disclosed",
+    ),
+    HotQuery(
+        "loader.latest_quarter_forecast",
+        q.LATEST_QUARTER_FORECAST_SQL,
+        ("fins_statements",),
+        expect_index="idx_fins_type_disclosed",
+    ),
+    # features/adjustments.py
+    HotQuery(
+        "adjustments.shares_asof",
+        q.SHARES_ASOF_SQL,
+        ("fins_statements",),
+        expect_index="idx_fins_code_type_disclosed",
+    ),
+    HotQuery(
+        "adjustments.shares_for_period",
+        q.SHARES_FOR_PERIOD_SQL,
+        ("fins_statements",),
+        expect_index="idx_fins_code_type_disclosed",
+    ),
+    # market/regime.py
+    HotQuery(
+        "regime.index_history",
+        q.INDEX_HISTORY_SQL,
+        ("index_daily",),
+        expect_index="idx_index_code_date",
+    ),
+    HotQuery(
+        "regime.timeline_fingerprint",
+        q.INDEX_FINGERPRINT_SQL,
+        ("index_daily",),
+        expect_index="idx_index_code_date",
+    ),
+    # strategy/select.py
+    HotQuery(
+        "select.candidates_segments",
+        q.SELECT_CANDIDATES_SQL.format(listed_join=q.SELECT_LISTED_SEGMENTS_JOIN),
+        ("features_monthly", "listed_segments"),
+    ),
+    HotQuery(
+        "select.candidates_listed_info",
+        q.SELECT_CANDIDATES_SQL.format(listed_join=q.SELECT_LISTED_INFO_JOIN),
+        ("features_monthly", "listed_info"),
+    ),
+    # backtest/performance.py
+    HotQuery("performance.next_trading_days", q.NEXT_TRADING_DAYS_SQL, ("prices_daily",)),
+    HotQuery(
+        "performance.index_price_asof",
+        q.INDEX_PRICE_ASOF_SQL.format(price_column="close"),
+        ("index_daily",),
+        expect_index="idx_index_code_date",
+    ),
+    HotQuery(
+        "performance.split_events",
+        q.SPLIT_EVENTS_SQL,
+        ("prices_daily",),
+        expect_index="idx_prices_code_date",
+    ),
+    HotQuery(
+        "performance.last_close",
+        q.LAST_CLOSE_SQL,
+        ("prices_daily",),
+        expect_index="idx_prices_code_date",
+    ),
+    HotQuery("performance.price_on_date", q.PRICE_ON_DATE_SQL, ("prices_daily",)),
+    # backtest/timeseries.py
+    HotQuery("timeseries.prev_trading_day", q.PREV_TRADING_DAY_SQL, ("prices_daily",)),
+    HotQuery(
+        "timeseries.prices_matrix",
+        q.PRICES_MATRIX_SQL.format(price_column="adj_close", codes="?, ?", dates="?, ?"),
+        ("prices_daily",),
+    ),
+    HotQuery(
+        "timeseries.index_matrix",
+        q.INDEX_MATRIX_SQL.format(price_column="close", dates="?, ?"),
+        ("index_daily",),
+    ),
+    HotQuery("timeseries.portfolio", q.PORTFOLIO_SQL, ("monthly_rebalance_portfolio",)),
+)
+
+# "SCAN fins_statements" / "SCAN fs" / "SCAN prices_daily USING INDEX ..."（サブクエリ・CTEは除く）
+_SCAN_RE = re.compile(r"^SCAN (\w+)")
+_PARAM_RE = re.compile(r"\?(\d*)")
+
+
+def _param_count(sql: str) -> int:
+    """プレースホルダの数（"?" は直前までの最大番号 + 1、"?N" は N 番）"""
+    n = 0
+    for m in _PARAM_RE.finditer(sql):
+        n = max(n, int(m.group(1))) if m.group(1) else n + 1
+    return n
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    """EXPLAIN QUERY PLAN の detail 列（パラメータは NULL で束縛）"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * _param_count(sql)).fetchall()
+    return [r[3] for r in rows]
+
+
+def _table_aliases(sql: str, tables: Sequence[str]) -> set:
+    """クエリ中のテーブル名とその別名（"FROM fins_statements fs" の fs）"""
+    names = set(tables)
+    for table in tables:
+        for m in re.finditer(rf"\b{table}\s+(?:AS\s+)?(\w+)", sql, re.IGNORECASE):
+            alias = m.group(1)
+            if alias.upper() not in {"WHERE", "JOIN", "ON", "USING", "ORDER", "GROUP", "LIMIT", "INNER", "LEFT"}:
+                names.add(alias)
+    return names
+
+
+def check_query_plan(conn: sqlite3.Connection, query: HotQuery) -> List[str]:
+    """1クエリの計画を検査し、問題があれば説明文のリストを返す"""
+    plan = explain(conn, query.sql)
+    base_tables = _table_aliases(query.sql, query.tables)
+    problems = []
+    for detail in plan:
+        m = _SCAN_RE.match(detail)
+        if m and m.group(1) in base_tables:
+            problems.append(f"{query.name}: full scan ({detail})")
+    if query.expect_index and not any(query.expect_index in d for d in plan):
+        problems.append(f"{query.name}: {query.expect_index} が使われていません ({' / '.join(plan)})")
+    return problems
+
+
+def find_plan_regressions(
+    conn: sqlite3.Connection,
+    queries: Sequence[HotQuery] = HOT_QUERIES,
+) -> List[str]:
+    """
+    ホットクエリの計画を検査（対象テーブルが無いクエリは飛ばす）
+
+    Returns:
+        問題の説明文のリスト（空なら問題なし）
+    """
+    problems: List[str] = []
+    for query in queries:
+        if not all(table_exists(conn, t) for t in query.tables):
+            continue
+        try:
+            problems.extend(check_query_plan(conn, query))
+        except sqlite3.OperationalError as e:
+            # 列が無い等、スキーマがクエリと合っていない
+            problems.append(f"{query.name}: {e}")
+    return problems
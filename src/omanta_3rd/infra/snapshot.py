@@ -0,0 +1,187 @@
+"""分析用の読み取り専用スナップショットDB
+
+最適化・WFA・分析スクリプトはライブDB（data/db）を読みながら、update_all_data.py や
+保有銘柄ジョブが同じファイルに書き込むことがある。その間は WAL が伸び、チェックポイントで
+読み取りが止まり、読み取り側も WAL インデックスの確認コストを払う。
+
+create_snapshot はライブDBを VACUUM INTO で詰めたコピーを作り、
+分析用インデックスの作成・ANALYZE を行った上で読み取り専用ファイルとして保存する。
+スナップショットは変更されないため、immutable=1 で開けばロックを取らず、
+ファイル全体をメモリマップして読める（infra/db.snapshot_uri）。
+
+スナップショットを読むかどうかはジョブごとに明示する（connect_db(snapshot=...) /
+borrow_db(snapshot=...) / FeatureCache(snapshot_path=...)、最適化・WFA の --snapshot）。
+運用系の処理（取り込み・保有銘柄・決算カレンダー等）は常にライブDBを読む。
+同じスナップショットを指定したスタディは、同じデータを読むため再現可能になる。
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import stat
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from ..config.settings import DB_PATH, SQL_INDEXES_PATH
+from .db import _mmap_size_for, snapshot_uri, table_exists
+
+SNAPSHOT_INFO_TABLE = "snapshot_info"
+# スナップショット情報に最終日を記録するテーブル
+_WATERMARK_COLUMNS = {
+    "prices_daily": "date",
+    "fins_statements": "disclosed_date",
+    "listed_info": "date",
+    "index_daily": "date",
+}
+
+
+def default_snapshot_dir() -> Path:
+    return DB_PATH.parent / "snapshots"
+
+
+def _index_statements(path: Path = SQL_INDEXES_PATH) -> List[str]:
+    """インデックス定義のSQLファイルを文ごとに分割（コメント行は除く）"""
+    if not Path(path).exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        body = "\n".join(line for line in f if not line.lstrip().startswith("--"))
+    return [stmt.strip() for stmt in body.split(";") if stmt.strip()]
+
+
+def _index_table(stmt: str) -> Optional[str]:
+    # "CREATE INDEX IF NOT EXISTS name ON table (cols)" の table
+    parts = stmt.split(" ON ", 1)
+    if len(parts) != 2:
+        return None
+    return parts[1].strip().split("(", 1)[0].strip()
+
+
+def apply_indexes(conn: sqlite3.Connection, path: Path = SQL_INDEXES_PATH) -> List[str]:
+    """
+    インデックス定義を適用（存在しないテーブルのインデックスは飛ばす）
+
+    Returns:
+        実行したCREATE INDEX文のテーブル名
+    """
+    applied = []
+    for stmt in _index_statements(path):
+        table = _index_table(stmt)
+        if table and not table_exists(conn, table):
+            continue
+        conn.execute(stmt)
+        applied.append(table)
+    return applied
+
+
+def _write_snapshot_info(conn: sqlite3.Connection, source: Path) -> Dict[str, str]:
+    info = {
+        "source": str(source),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    for table, column in _WATERMARK_COLUMNS.items():
+        if table_exists(conn, table):
+            row = conn.execute(f"SELECT MAX({column}) FROM {table}").fetchone()
+            if row and row[0]:
+                info[f"max_{column}:{table}"] = row[0]
+    conn.execute(f"DROP TABLE IF EXISTS {SNAPSHOT_INFO_TABLE}")
+    conn.execute(f"CREATE TABLE {SNAPSHOT_INFO_TABLE} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.executemany(f"INSERT INTO {SNAPSHOT_INFO_TABLE} VALUES (?, ?)", list(info.items()))
+    return info
+
+
+def create_snapshot(
+    dest: Optional[Path] = None,
+    source: Optional[Path] = None,
+    analyze: bool = True,
+) -> Path:
+    """
+    ライブDBの読み取り専用スナップショットを作成
+
+    1. VACUUM INTO で詰めたコピーを一時ファイルに書き出す（書き込み中の読み取りと並行可能）
+    2. 分析用インデックスを作成し、ANALYZE / PRAGMA optimize で統計を更新
+    3. ジャーナルを DELETE モードにして（WAL ファイル無しの単一ファイル）読み取り専用属性で保存
+
+    Args:
+        dest: 出力先（Noneの場合は data/db/snapshots/jquants_YYYYmmdd_HHMMSS.sqlite）
+        source: 元のDB（Noneの場合は DB_PATH）
+        analyze: ANALYZE を実行するか
+
+    Returns:
+        スナップショットのパス
+    """
+    source = Path(source) if source is not None else DB_PATH
+    if dest is None:
+        dest = default_snapshot_dir() / f"jquants_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sqlite"
+    dest = Path(dest)
+    if dest.exists():
+        raise FileExistsError(f"スナップショットが既に存在します: {dest}")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True, timeout=30.0)
+    try:
+        src.execute("VACUUM INTO ?", (str(tmp),))
+    finally:
+        src.close()
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("PRAGMA journal_mode=DELETE")
+        apply_indexes(conn)
+        _write_snapshot_info(conn, source)
+        conn.commit()
+        if analyze:
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp, dest)
+    dest.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    return dest
+
+
+@contextmanager
+def connect_snapshot(path: Path) -> Iterator[sqlite3.Connection]:
+    """スナップショットを immutable で開く（ロック無し・ファイル全体をメモリマップ）"""
+    conn = sqlite3.connect(snapshot_uri(path), uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute(f"PRAGMA mmap_size={_mmap_size_for(path)}")
+        conn.execute("PRAGMA cache_size=-64000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        yield conn
+    finally:
+        conn.close()
+
+
+def read_snapshot_info(path: Path) -> Dict[str, str]:
+    """スナップショット作成時の情報（作成日時・元DB・各テーブルの最終日）"""
+    with connect_snapshot(path) as conn:
+        if not table_exists(conn, SNAPSHOT_INFO_TABLE):
+            return {}
+        return {r["key"]: r["value"] for r in conn.execute(f"SELECT key, value FROM {SNAPSHOT_INFO_TABLE}")}
+
+
+def list_snapshots(directory: Optional[Path] = None) -> List[Path]:
+    """スナップショットの一覧（古い順）"""
+    directory = Path(directory) if directory is not None else default_snapshot_dir()
+    if not directory.exists():
+        return []
+    return sorted(directory.glob("*.sqlite"))
+
+
+def prune_snapshots(keep: int, directory: Optional[Path] = None) -> List[Path]:
+    """新しい順に keep 個を残して古いスナップショットを削除し、削除したパスを返す"""
+    snapshots = list_snapshots(directory)
+    removed = snapshots[: max(0, len(snapshots) - keep)]
+    for path in removed:
+        path.chmod(stat.S_IRUSR | stat.S_IWUSR)
+        path.unlink()
+    return removed
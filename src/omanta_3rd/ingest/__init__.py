@@ -2,8 +2,18 @@
 
 from .indices import ingest_index_data, TOPIX_CODE
 from .prices import ingest_prices
+from .price_aggregates import refresh_price_aggregates
+from .rebalance_calendar import (
+    refresh_rebalance_calendar,
+    get_month_end_trading_days,
+    get_month_start_trading_days,
+)
 from .fins import ingest_financial_statements
+from .fins_sync import sync_financial_statements, backfill_financial_statements_by_code
 from .listed import ingest_listed_info
+from .listed_segments import refresh_listed_segments
+from .planner import IngestPlan, plan_ingest_dates, find_gaps
+from .pipeline import run_ingest_pipeline, PipelineStats
 from .earnings_calendar import (
     add_earnings_announcement,
     get_earnings_announcements,
@@ -14,8 +24,20 @@ __all__ = [
     "ingest_index_data",
     "TOPIX_CODE",
     "ingest_prices",
+    "refresh_price_aggregates",
+    "refresh_rebalance_calendar",
+    "get_month_end_trading_days",
+    "get_month_start_trading_days",
     "ingest_financial_statements",
+    "sync_financial_statements",
+    "backfill_financial_statements_by_code",
     "ingest_listed_info",
+    "refresh_listed_segments",
+    "IngestPlan",
+    "plan_ingest_dates",
+    "find_gaps",
+    "run_ingest_pipeline",
+    "PipelineStats",
     "add_earnings_announcement",
     "get_earnings_announcements",
     "check_upcoming_announcements",
@@ -6,7 +6,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import pandas as pd
 
-from ..infra.db import connect_db, upsert
+from ..infra.db import borrow_db, connect_db, upsert
 
 
 def add_earnings_announcement(
@@ -62,7 +62,7 @@ def get_earnings_announcements(
     Returns:
         決算発表予定日のリスト
     """
-    with connect_db() as conn:
+    with borrow_db() as conn:
         query = "SELECT * FROM earnings_calendar WHERE 1=1"
         params = []
         
@@ -96,7 +96,7 @@ def get_next_trading_day(date_str: str) -> Optional[str]:
     """
     from datetime import datetime, timedelta
     
-    with connect_db() as conn:
+    with borrow_db() as conn:
         # 価格データが存在する最初の日付を取得
         next_date_df = pd.read_sql_query(
             """
@@ -133,7 +133,7 @@ def check_upcoming_announcements(as_of_date: Optional[str] = None) -> List[Dict[
     if not next_trading_day:
         return []
     
-    with connect_db() as conn:
+    with borrow_db() as conn:
         # 保有中の銘柄を取得
         holdings_df = pd.read_sql_query(
             """
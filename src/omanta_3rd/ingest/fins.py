@@ -2,24 +2,23 @@
 
 from __future__ import annotations
 
-import time
 from typing import List, Dict, Any, Optional, Iterable
 
 from ..infra.db import connect_db, upsert
 from ..infra.jquants import JQuantsClient
+from .pipeline import run_ingest_pipeline
+from .planner import plan_ingest_dates, record_empty_date
 
-from datetime import date, datetime, timedelta
 
+_FINS_CONFLICT_COLUMNS = [
+    "disclosed_date",
+    "code",
+    "type_of_current_period",
+    "current_period_end",
+]
 
-# ---------- helpers ----------
 
-def _daterange(d1: str, d2: str):
-    start = datetime.strptime(d1, "%Y-%m-%d").date()
-    end = datetime.strptime(d2, "%Y-%m-%d").date()
-    d = start
-    while d <= end:
-        yield d.strftime("%Y-%m-%d")
-        d += timedelta(days=1)
+# ---------- helpers ----------
 
 def fetch_financial_statements_by_date(client: JQuantsClient, disclosed_date: str):
     # /v2/fins/summary は date か code が必須。過去履歴は date で積むのが正解
@@ -227,6 +226,20 @@ def _merge_duplicate_records(mapped_rows: List[Dict[str, Any]]) -> List[Dict[str
     return merged
 
 
+def _transform_fins_date(d: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """開示日1日分の API 行を DB 行に変換してマージ"""
+    # 主キーに開示日を含むため、日付ごとのマージはバッチ単位のマージと同じ結果になる
+    return _merge_duplicate_records([_map_row_to_db(r) for r in rows])
+
+
+def _write_fins_date(conn, d: str, merged: Optional[List[Dict[str, Any]]]):
+    """開示日1日分を書き込み（API の結果が0件の日は空日として記録）"""
+    if merged is None:
+        record_empty_date(conn, "fins", d)
+    elif merged:
+        upsert(conn, "fins_statements", merged, conflict_columns=_FINS_CONFLICT_COLUMNS)
+
+
 def save_financial_statements(mapped_rows: List[Dict[str, Any]]):
     """
     DBに保存（UPSERT）
@@ -239,17 +252,7 @@ def save_financial_statements(mapped_rows: List[Dict[str, Any]]):
     merged_rows = _merge_duplicate_records(mapped_rows)
 
     with connect_db() as conn:
-        upsert(
-            conn,
-            "fins_statements",
-            merged_rows,
-            conflict_columns=[
-                "disclosed_date",
-                "code",
-                "type_of_current_period",
-                "current_period_end",
-            ],
-        )
+        upsert(conn, "fins_statements", merged_rows, conflict_columns=_FINS_CONFLICT_COLUMNS)
 
 
 def ingest_financial_statements(
@@ -258,7 +261,9 @@ def ingest_financial_statements(
     code: Optional[str] = None,
     client: Optional[JQuantsClient] = None,
     sleep_sec: float = 0.0,
-    batch_size: int = 2000,
+    batch_size: int = 20000,
+    skip_loaded: bool = True,
+    fetch_workers: int = 2,
 ):
     if client is None:
         client = JQuantsClient()
@@ -276,23 +281,23 @@ def ingest_financial_statements(
     if not date_from or not date_to:
         raise ValueError("date_from と date_to は必須です（code指定がない場合）")
 
-    total_days = 0
-    for d in _daterange(date_from, date_to):
-        total_days += 1
-
-        # 進捗（文字化けしにくい英数字）
-        print(f"[fins] date: {d}")
-
-        rows = fetch_financial_statements_by_date(client, disclosed_date=d)
-        if rows:
-            buffer.extend([_map_row_to_db(r) for r in rows])
-
-        if len(buffer) >= batch_size:
-            save_financial_statements(buffer)
-            buffer.clear()
-
-        if sleep_sec > 0:
-            time.sleep(sleep_sec)
-
-    if buffer:
-        save_financial_statements(buffer)
\ No newline at end of file
+    # 週末・休場日・既知の空日・取り込み済みの開示日は取得しない
+    with connect_db() as conn:
+        plan = plan_ingest_dates(
+            conn, "fins", date_from, date_to,
+            table="fins_statements", date_column="disclosed_date", skip_loaded=skip_loaded,
+        )
+    print(plan.summary())
+
+    # 取得・変換（マージ）・書き込みを並行実行（書き込みは1本の接続で batch_size 行ごとにコミット）
+    stats = run_ingest_pipeline(
+        plan.dates,
+        fetch=lambda d: fetch_financial_statements_by_date(client, disclosed_date=d),
+        transform=_transform_fins_date,
+        write=_write_fins_date,
+        label="fins",
+        fetch_workers=fetch_workers,
+        commit_every=batch_size,
+        sleep_sec=sleep_sec,
+    )
+    print(stats.summary("fins"))
@@ -0,0 +1,326 @@
+"""fins_statements の差分同期（開示日ウォーターマーク + 銘柄単位の差分バックフィル）
+
+従来の財務更新は「過去90日」などの期間を開示日ごとに毎回取得していた。
+ここでは同期済みの位置をウォーターマークとして fins_sync_state に保持する。
+
+- テーブル単位（scope='table', key='fins_statements'）:
+  開示日ベースの取得が完了している最終日。日次同期はその翌日〜終了日だけを
+  開示日ごとに取得するため、毎日の更新は数回の API 呼び出しで済む。
+- 銘柄単位（scope='code', key=銘柄コード）:
+  銘柄コード指定で取得した全履歴に含まれていた最終開示日（前日より後は前日）。
+  開示日ベースの取り込みに抜けがある場合のバックフィルに使う。/fins/summary の code 指定は
+  全履歴を返すため、ウォーターマーク以前の開示は変換・書き込みせずに捨てる（差分のみ書き込む）。
+  取得日ではなく実際に取得できた開示までを記録するので、後から公開された開示は
+  同じ銘柄の再バックフィルで取り込める。
+
+銘柄単位のバックフィルは run_ingest_pipeline で並列取得し、1銘柄ごとにコミットして
+完了した銘柄をチェックポイントファイルに記録する。中断後に再実行すると未完了の銘柄から再開する。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import date as _date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ..infra.db import connect_db, table_exists, upsert
+from ..infra.jquants import JQuantsClient
+from .fins import (
+    _FINS_CONFLICT_COLUMNS,
+    _filter_by_disclosed_date,
+    _map_row_to_db,
+    _merge_duplicate_records,
+    _transform_fins_date,
+    _write_fins_date,
+    fetch_financial_statements,
+    fetch_financial_statements_by_date,
+)
+from .pipeline import PipelineStats, run_ingest_pipeline
+from .planner import plan_ingest_dates
+
+SYNC_TABLE = "fins_sync_state"
+TABLE_SCOPE = "table"
+CODE_SCOPE = "code"
+FINS_TABLE = "fins_statements"
+DEFAULT_LOOKBACK_DAYS = 90  # ウォーターマークもデータも無い場合の初回取得期間
+DEFAULT_CHECKPOINT_PATH = "cache/fins_backfill_checkpoint.json"
+
+
+def ensure_fins_sync_table(conn) -> None:
+    """fins_sync_state テーブルを作成（既に存在する場合は何もしない）"""
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SYNC_TABLE} (
+          scope TEXT NOT NULL,
+          key TEXT NOT NULL,
+          watermark TEXT NOT NULL,
+          updated_at TEXT NOT NULL,
+          PRIMARY KEY (scope, key)
+        )
+        """
+    )
+
+
+# -----------------------------
+# ウォーターマーク
+# -----------------------------
+
+def get_watermarks(conn, scope: str) -> Dict[str, str]:
+    """指定スコープの {key: watermark}（テーブルが無い場合は空）"""
+    if not table_exists(conn, SYNC_TABLE):
+        return {}
+    rows = conn.execute(
+        f"SELECT key, watermark FROM {SYNC_TABLE} WHERE scope = ?", (scope,)
+    ).fetchall()
+    return {r["key"]: r["watermark"] for r in rows}
+
+
+def set_watermarks(conn, scope: str, watermarks: Dict[str, str]) -> None:
+    """
+    ウォーターマークを更新（既存値より前には戻さない）
+
+    Args:
+        conn: データベース接続
+        scope: "table" / "code"
+        watermarks: {key: YYYY-MM-DD}
+    """
+    if not watermarks:
+        return
+    ensure_fins_sync_table(conn)
+    now = datetime.now().isoformat(timespec="seconds")
+    conn.executemany(
+        f"""
+        INSERT INTO {SYNC_TABLE} (scope, key, watermark, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (scope, key) DO UPDATE SET
+          watermark = MAX(watermark, excluded.watermark),
+          updated_at = excluded.updated_at
+        """,
+        [(scope, k, wm, now) for k, wm in watermarks.items()],
+    )
+
+
+def get_table_watermark(conn) -> Optional[str]:
+    """
+    開示日ベースの取得が完了している最終日
+
+    未記録の場合は fins_statements の最終開示日（その日は部分取得の可能性があるため
+    同期時は翌日ではなく当日から取得し直す）。
+    """
+    wm = get_watermarks(conn, TABLE_SCOPE).get(FINS_TABLE)
+    if wm:
+        return wm
+    if not table_exists(conn, FINS_TABLE):
+        return None
+    row = conn.execute(f"SELECT MAX(disclosed_date) AS d FROM {FINS_TABLE}").fetchone()
+    if not row or not row["d"]:
+        return None
+    # 最終開示日は再取得させるため、その前日を完了済みとみなす
+    return _shift(row["d"], -1)
+
+
+def _shift(d: str, days: int) -> str:
+    return (datetime.strptime(d, "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def _completed_through(end_date: str, today: str) -> str:
+    """end_date までの取得で完了とみなせる日（当日分は公開途中の可能性があるため前日まで）"""
+    return min(end_date, _shift(today, -1))
+
+
+# -----------------------------
+# 日次同期（開示日ウォーターマーク）
+# -----------------------------
+
+def sync_financial_statements(
+    end_date: Optional[str] = None,
+    client: Optional[JQuantsClient] = None,
+    fetch_workers: int = 2,
+    sleep_sec: float = 0.0,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+    today: Optional[str] = None,
+    conn_factory: Callable = connect_db,
+) -> Optional[str]:
+    """
+    テーブルのウォーターマークの翌日〜end_date の開示日だけを取得
+
+    Args:
+        end_date: 終了日（YYYY-MM-DD、Noneの場合は今日）
+        client: J-Quants クライアント
+        fetch_workers: 取得スレッド数
+        sleep_sec: 各取得後の追加待機時間
+        lookback_days: ウォーターマークもデータも無い場合に遡る日数
+        today: 今日の日付（テスト用）
+        conn_factory: 接続のコンテキストマネージャー
+
+    Returns:
+        更新後のテーブルウォーターマーク（取得対象が無かった場合は既存値）
+    """
+    today = today or _date.today().strftime("%Y-%m-%d")
+    end_date = end_date or today
+
+    with conn_factory() as conn:
+        watermark = get_table_watermark(conn)
+        date_from = _shift(watermark, 1) if watermark else _shift(end_date, -lookback_days)
+        if date_from > end_date:
+            print(f"[fins_sync] up to date (watermark={watermark})")
+            return watermark
+        # ウォーターマーク以降は未完了の範囲なので、取り込み済みの日も取得し直す
+        plan = plan_ingest_dates(
+            conn, "fins", date_from, end_date,
+            table=FINS_TABLE, date_column="disclosed_date", skip_loaded=False,
+        )
+    print(plan.summary())
+
+    if client is None:
+        client = JQuantsClient()
+    stats = run_ingest_pipeline(
+        plan.dates,
+        fetch=lambda d: fetch_financial_statements_by_date(client, disclosed_date=d),
+        transform=_transform_fins_date,
+        write=_write_fins_date,
+        label="fins_sync",
+        fetch_workers=fetch_workers,
+        sleep_sec=sleep_sec,
+        conn_factory=conn_factory,
+    )
+    print(stats.summary("fins_sync"))
+
+    new_watermark = _completed_through(end_date, today)
+    if watermark is None or new_watermark > watermark:
+        with conn_factory() as conn:
+            set_watermarks(conn, TABLE_SCOPE, {FINS_TABLE: new_watermark})
+        return new_watermark
+    return watermark
+
+
+# -----------------------------
+# 銘柄単位のバックフィル（再開可能）
+# -----------------------------
+
+def load_checkpoint(path: Path) -> Dict[str, Any]:
+    """チェックポイント（{"codes": [...], "done": [...]}）を読み込む（無い場合は空）"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path: Path, state: Dict[str, Any]) -> None:
+    # 書き込み途中で中断しても壊れないよう、一時ファイルに書いてから置き換える
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def codes_missing_watermark(conn) -> List[str]:
+    """最新の listed_info の銘柄のうち、銘柄単位のウォーターマークが無いもの"""
+    if not table_exists(conn, "listed_info"):
+        return []
+    max_date = conn.execute("SELECT MAX(date) AS d FROM listed_info").fetchone()["d"]
+    if not max_date:
+        return []
+    done = get_watermarks(conn, CODE_SCOPE)
+    rows = conn.execute(
+        "SELECT code FROM listed_info WHERE date = ? ORDER BY code", (max_date,)
+    ).fetchall()
+    return [r["code"] for r in rows if r["code"] not in done]
+
+
+def backfill_financial_statements_by_code(
+    codes: Optional[Sequence[str]] = None,
+    client: Optional[JQuantsClient] = None,
+    workers: int = 4,
+    checkpoint_path: Path = Path(DEFAULT_CHECKPOINT_PATH),
+    restart: bool = False,
+    today: Optional[str] = None,
+    conn_factory: Callable = connect_db,
+) -> PipelineStats:
+    """
+    銘柄コード指定で財務履歴を取得し、銘柄単位のウォーターマークより後の開示だけを書き込む
+
+    チェックポイントがある場合はその銘柄リストで再開する。codes を指定してチェックポイントと
+    異なる銘柄リストになる場合は ValueError（restart=True で最初からやり直す）。
+
+    Args:
+        codes: 対象銘柄（Noneの場合は最新 listed_info のうちウォーターマークが無い銘柄）
+        client: J-Quants クライアント
+        workers: 取得スレッド数（レート制限はスレッド間で共有される）
+        checkpoint_path: チェックポイントファイル
+        restart: チェックポイントを無視して最初からやり直すか
+        today: 今日の日付（テスト用）
+        conn_factory: 接続のコンテキストマネージャー
+
+    Returns:
+        PipelineStats
+    """
+    today = today or _date.today().strftime("%Y-%m-%d")
+    checkpoint_path = Path(checkpoint_path)
+
+    state = {} if restart else load_checkpoint(checkpoint_path)
+    if state and codes is not None and set(codes) != set(state["codes"]):
+        raise ValueError(
+            f"チェックポイント（{checkpoint_path}）の銘柄リストと codes が異なります。"
+            "再開する場合は codes を省略し、指定した銘柄でやり直す場合は restart=True を指定してください"
+        )
+    if state:
+        print(f"[fins_backfill] resume from checkpoint: {len(state['done'])}/{len(state['codes'])} done")
+    else:
+        if codes is None:
+            with conn_factory() as conn:
+                codes = codes_missing_watermark(conn)
+        state = {"codes": list(codes), "done": [], "started_at": today}
+        _save_checkpoint(checkpoint_path, state)
+
+    done = set(state["done"])
+    pending = [c for c in state["codes"] if c not in done]
+    with conn_factory() as conn:
+        code_watermarks = get_watermarks(conn, CODE_SCOPE)
+    print(f"[fins_backfill] {len(pending)} codes to fetch ({workers} workers)")
+
+    completed_through = _completed_through(today, today)
+    # 銘柄ごとの取得済みの最終開示日（transform で記録し、同じ銘柄の write で参照する）
+    covered_through: Dict[str, str] = {}
+
+    def _transform(code: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        disclosed = [r["DiscDate"] for r in rows if r.get("DiscDate")]
+        if disclosed:
+            covered_through[code] = min(max(disclosed), completed_through)
+        # 全履歴のうち、ウォーターマークより後の開示だけを変換する
+        wm = code_watermarks.get(code)
+        if wm:
+            rows = _filter_by_disclosed_date(rows, _shift(wm, 1), None)
+        return _merge_duplicate_records([_map_row_to_db(r) for r in rows])
+
+    def _write(conn, code: str, merged: Optional[List[Dict[str, Any]]]) -> None:
+        if merged:
+            upsert(conn, FINS_TABLE, merged, conflict_columns=_FINS_CONFLICT_COLUMNS)
+        if code in covered_through:
+            set_watermarks(conn, CODE_SCOPE, {code: covered_through[code]})
+        # 1銘柄ごとにコミットしてからチェックポイントを進める（中断時は未コミットの銘柄から再開）
+        conn.commit()
+        state["done"].append(code)
+        _save_checkpoint(checkpoint_path, state)
+
+    if client is None and pending:
+        client = JQuantsClient()
+    stats = run_ingest_pipeline(
+        pending,
+        fetch=lambda code: fetch_financial_statements(client, code=code),
+        transform=_transform,
+        write=_write,
+        label="fins_backfill",
+        fetch_workers=workers,
+        conn_factory=conn_factory,
+    )
+    print(stats.summary("fins_backfill"))
+
+    # 全銘柄が完了したらチェックポイントを削除
+    if checkpoint_path.exists():
+        checkpoint_path.unlink()
+    return stats
@@ -2,32 +2,18 @@
 
 from __future__ import annotations
 
-import time
-from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 
 from ..infra.db import connect_db, upsert
 from ..infra.jquants import JQuantsClient
+from .pipeline import run_ingest_pipeline
+from .planner import plan_ingest_dates
 
 
 # TOPIX指数のコード定数
 TOPIX_CODE = "0000"
 
 
-def _daterange(date_from: str, date_to: str) -> List[str]:
-    """
-    date_from〜date_to（YYYY-MM-DD）の全日付を返す（週末含む）
-    """
-    start = datetime.strptime(date_from, "%Y-%m-%d").date()
-    end = datetime.strptime(date_to, "%Y-%m-%d").date()
-    out = []
-    d = start
-    while d <= end:
-        out.append(d.strftime("%Y-%m-%d"))
-        d += timedelta(days=1)
-    return out
-
-
 def fetch_index_by_date(client: JQuantsClient, index_code: str, date: str) -> List[Dict[str, Any]]:
     """
     指数データを取得
@@ -150,29 +136,33 @@ def ingest_index_data(
         # 一括取得が失敗した場合は日付ごとに取得
         print(f"[indices] Bulk fetch failed, falling back to daily fetch: {e}")
     
-    # 日付ごとに取得（フォールバック）
-    dates = _daterange(start_date, end_date)
-    buf: List[Dict[str, Any]] = []
-    
-    for i, d in enumerate(dates, start=1):
-        print(f"[indices] date {i}/{len(dates)}: {d}")
-        
+    # 日付ごとに取得（フォールバック、週末・休場日・取り込み済みの日は取得しない）
+    with connect_db() as conn:
+        plan = plan_ingest_dates(
+            conn, f"indices:{index_code}", start_date, end_date,
+            table="index_daily", where="index_code = ?", params=(index_code,),
+            use_learned_holidays=index_code != TOPIX_CODE,
+        )
+    print(plan.summary())
+
+    def _fetch(d: str) -> List[Dict[str, Any]]:
         try:
-            rows = fetch_index_by_date(client, index_code, d)
-            if rows:
-                mapped = [_map_index_row(r, index_code) for r in rows]
-                buf.extend(mapped)
+            return fetch_index_by_date(client, index_code, d)
         except Exception as e:
             print(f"[indices] Error fetching {index_code} for {d}: {e}")
-            continue
-        
-        if len(buf) >= batch_size:
-            save_index_data(buf)
-            buf.clear()
-        
-        if sleep_sec > 0:
-            time.sleep(sleep_sec)
-    
-    if buf:
-        save_index_data(buf)
-
+            return []
+
+    def _write(conn, d: str, mapped: Optional[List[Dict[str, Any]]]):
+        if mapped:
+            upsert(conn, "index_daily", mapped, conflict_columns=["date", "index_code"])
+
+    stats = run_ingest_pipeline(
+        plan.dates,
+        fetch=_fetch,
+        transform=lambda d, rows: [_map_index_row(r, index_code) for r in rows],
+        write=_write,
+        label="indices",
+        commit_every=batch_size,
+        sleep_sec=sleep_sec,
+    )
+    print(stats.summary("indices"))
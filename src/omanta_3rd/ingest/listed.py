@@ -6,6 +6,7 @@ from typing import List, Dict, Any, Optional
 
 from ..infra.db import connect_db, upsert
 from ..infra.jquants import JQuantsClient
+from .listed_segments import refresh_listed_segments
 
 
 def _normalize_code(code: Any) -> str:
@@ -48,12 +49,22 @@ def fetch_listed_info(client: JQuantsClient, date: str) -> List[Dict[str, Any]]:
     return result
 
 
-def save_listed_info(data: List[Dict[str, Any]]):
-    """銘柄情報をDBに保存（UPSERT）"""
+def save_listed_info(data: List[Dict[str, Any]], refresh_segments: bool = True):
+    """
+    銘柄情報をDBに保存（UPSERT）し、市場区分の期間テーブルを更新
+
+    Args:
+        data: listed_info の行
+        refresh_segments: listed_segments を更新するか（複数日付をまとめて取り込む場合は
+                          False にして最後に refresh_listed_segments を1回呼ぶ）
+    """
     if not data:
         return
     with connect_db() as conn:
         upsert(conn, "listed_info", data, conflict_columns=["date", "code"])
+        if refresh_segments:
+            # 保存したスナップショットのうち最も古い日付から反映（集計済み範囲内なら全再構築）
+            refresh_listed_segments(conn, changed_date=min(row["date"] for row in data))
 
 
 def ingest_listed_info(date: str, client: Optional[JQuantsClient] = None):
@@ -0,0 +1,233 @@
+"""listed_info から市場区分の期間テーブル（listed_segments）を構築
+
+listed_info は (date, code) ごとのスナップショットで、属性が変わらない限り同じ行が繰り返される。
+連続するスナップショットで属性（社名・市場名・業種）が同じ区間を1行にまとめ、
+市場区分を正規化した segment（prime / standard / growth / other）を付与する。
+
+- valid_from / valid_to: 区間の最初 / 最後のスナップショット日（両端含む）
+- next_from: 同一銘柄の次の区間の開始日（最新区間はNULL）
+
+スナップショット日 d の構成銘柄は valid_from <= d <= valid_to、
+任意の日付 asof 時点の最新属性は valid_from <= asof < COALESCE(next_from, ∞) の範囲検索で求まる。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import pandas as pd
+
+from ..infra.db import table_exists, upsert
+
+SEGMENTS_TABLE = "listed_segments"
+_ATTR_COLUMNS = ["company_name", "market_name", "sector17", "sector33"]
+
+# 市場区分の変遷（旧区分 → 新区分）
+# - 2022年4月以前: 「東証一部」「東証二部」「マザーズ」など
+# - 2022年4月以降: 「プライム」「スタンダード」「グロース」など
+_SEGMENT_PATTERNS = {
+    "prime": ("プライム", "prime", "東証一部"),
+    "standard": ("スタンダード", "standard", "東証二部"),
+    "growth": ("グロース", "growth", "マザーズ"),
+}
+
+
+def normalize_market_segment(market_name: Any) -> str:
+    """
+    市場名を正規化した市場区分に変換
+
+    プライム市場 = 「プライム」「Prime」「東証一部」（_load_universe と同じ部分一致判定）
+
+    Returns:
+        "prime" / "standard" / "growth" / "other"
+    """
+    if market_name is None or (isinstance(market_name, float) and pd.isna(market_name)):
+        return "other"
+    name = str(market_name).strip().lower()
+    for segment, patterns in _SEGMENT_PATTERNS.items():
+        if any(p.lower() in name for p in patterns):
+            return segment
+    return "other"
+
+
+def ensure_listed_segments_table(conn) -> None:
+    """listed_segments テーブルを作成（既に存在する場合は何もしない）"""
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SEGMENTS_TABLE} (
+          code TEXT NOT NULL,
+          valid_from TEXT NOT NULL,
+          valid_to TEXT NOT NULL,
+          next_from TEXT,
+          segment TEXT NOT NULL,
+          company_name TEXT,
+          market_name TEXT,
+          sector17 TEXT,
+          sector33 TEXT,
+          PRIMARY KEY (code, valid_from)
+        )
+        """
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_listed_segments_segment_range "
+        f"ON {SEGMENTS_TABLE} (segment, valid_from, valid_to)"
+    )
+
+
+def build_segment_intervals(listed: pd.DataFrame) -> pd.DataFrame:
+    """
+    listed_info のスナップショット行から区間テーブルを構築（DB不要な純粋関数）
+
+    銘柄がスナップショットから消えた場合や属性が変わった場合に区間を区切る。
+
+    Args:
+        listed: date, code, company_name, market_name, sector17, sector33 を持つDataFrame
+
+    Returns:
+        listed_segments の行（code, valid_from, valid_to, next_from, segment, 属性列）
+    """
+    cols = ["code", "valid_from", "valid_to", "next_from", "segment"] + _ATTR_COLUMNS
+    if listed.empty:
+        return pd.DataFrame(columns=cols)
+
+    snapshot_dates = sorted(listed["date"].unique())
+    snapshot_index = {d: i for i, d in enumerate(snapshot_dates)}
+
+    df = listed.sort_values(["code", "date"], kind="mergesort").reset_index(drop=True)
+    snap = df["date"].map(snapshot_index)
+
+    continues = df["code"].eq(df["code"].shift()) & snap.eq(snap.shift() + 1)
+    for col in _ATTR_COLUMNS:
+        values = df[col].fillna("")
+        continues &= values.eq(values.shift())
+    run_id = (~continues).cumsum()
+
+    grouped = df.groupby(run_id, sort=False)
+    out = grouped[["code"] + _ATTR_COLUMNS].first()
+    out["valid_from"] = grouped["date"].min()
+    out["valid_to"] = grouped["date"].max()
+    out = out.reset_index(drop=True)
+    out["next_from"] = out.groupby("code")["valid_from"].shift(-1)
+    out["segment"] = out["market_name"].map(normalize_market_segment)
+    return out[cols]
+
+
+def _get_high_water_mark(conn) -> Optional[str]:
+    row = conn.execute(f"SELECT MAX(valid_to) AS d FROM {SEGMENTS_TABLE}").fetchone()
+    return row[0] if row else None
+
+
+def listed_segments_ready(conn) -> bool:
+    """
+    listed_segments を参照してよいか（空でなく、listed_info の最終スナップショットまで集計済み）
+
+    空・未更新のテーブルで結合すると market_name が NULL になり市場フィルタで全銘柄が落ちるため、
+    False の場合は呼び出し側で listed_info を直接参照する。
+    """
+    if not table_exists(conn, SEGMENTS_TABLE):
+        return False
+    hwm = _get_high_water_mark(conn)
+    if hwm is None:
+        return False
+    row = conn.execute("SELECT MAX(date) FROM listed_info").fetchone()
+    latest = row[0] if row else None
+    return latest is None or hwm >= latest
+
+
+def _write_intervals(conn, intervals: pd.DataFrame) -> None:
+    if intervals.empty:
+        return
+    intervals = intervals.astype(object).where(intervals.notna(), None)
+    upsert(conn, SEGMENTS_TABLE, intervals.to_dict("records"), conflict_columns=["code", "valid_from"])
+
+
+def _append_snapshot(conn, snapshot_date: str, prev_snapshot_date: str) -> None:
+    """
+    新しいスナップショット1日分で区間を延長・追加
+
+    直前のスナップショットまで続いていた区間と属性が同じ銘柄は valid_to を延長し、
+    それ以外（属性変更・再出現・新規上場）は新しい区間を追加する。
+    """
+    snap = pd.read_sql_query(
+        """
+        SELECT code, company_name, market_name, sector17, sector33
+        FROM listed_info
+        WHERE date = ?
+        """,
+        conn,
+        params=(snapshot_date,),
+    )
+    if snap.empty:
+        return
+    open_intervals = pd.read_sql_query(
+        f"""
+        SELECT code, valid_from, company_name, market_name, sector17, sector33
+        FROM {SEGMENTS_TABLE}
+        WHERE valid_to = ? AND next_from IS NULL
+        """,
+        conn,
+        params=(prev_snapshot_date,),
+    )
+    merged = snap.merge(open_intervals, on="code", how="left", suffixes=("", "_open"))
+    same = merged["valid_from"].notna()
+    for col in _ATTR_COLUMNS:
+        same &= merged[col].fillna("").eq(merged[f"{col}_open"].fillna(""))
+
+    extend = merged[same]
+    if not extend.empty:
+        conn.executemany(
+            f"UPDATE {SEGMENTS_TABLE} SET valid_to = ? WHERE code = ? AND valid_from = ?",
+            [(snapshot_date, c, vf) for c, vf in zip(extend["code"], extend["valid_from"])],
+        )
+
+    new = merged[~same][["code"] + _ATTR_COLUMNS].copy()
+    if new.empty:
+        return
+    conn.executemany(
+        f"UPDATE {SEGMENTS_TABLE} SET next_from = ? WHERE code = ? AND next_from IS NULL",
+        [(snapshot_date, c) for c in new["code"]],
+    )
+    new["valid_from"] = snapshot_date
+    new["valid_to"] = snapshot_date
+    new["next_from"] = None
+    new["segment"] = new["market_name"].map(normalize_market_segment)
+    _write_intervals(conn, new)
+
+
+def refresh_listed_segments(conn, changed_date: Optional[str] = None) -> None:
+    """
+    listed_segments を更新
+
+    集計済みの最終スナップショットより後の日付だけを順に追加する。
+    未構築の場合や、集計済み範囲内の日付（changed_date）が再取り込みされた場合は全再構築する。
+
+    Args:
+        conn: データベース接続
+        changed_date: 取り込んだ listed_info の日付（YYYY-MM-DD）
+    """
+    ensure_listed_segments_table(conn)
+
+    hwm = _get_high_water_mark(conn)
+    if hwm is None or (changed_date is not None and changed_date <= hwm):
+        listed = pd.read_sql_query(
+            "SELECT date, code, company_name, market_name, sector17, sector33 FROM listed_info",
+            conn,
+        )
+        conn.execute(f"DELETE FROM {SEGMENTS_TABLE}")
+        intervals = build_segment_intervals(listed)
+        _write_intervals(conn, intervals)
+        print(f"[listed_segments] rebuilt: {len(intervals)} intervals")
+        return
+
+    new_dates = [
+        r["date"]
+        for r in conn.execute(
+            "SELECT DISTINCT date FROM listed_info WHERE date > ? ORDER BY date", (hwm,)
+        ).fetchall()
+    ]
+    prev = hwm
+    for d in new_dates:
+        _append_snapshot(conn, d, prev)
+        prev = d
+    if new_dates:
+        print(f"[listed_segments] appended {len(new_dates)} snapshot(s) up to {prev}")
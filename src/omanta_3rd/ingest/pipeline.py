@@ -0,0 +1,200 @@
+"""ストリーミング取り込みパイプライン（取得・変換・書き込みの並行実行）
+
+日付ごとの取り込みは「API取得（レート制限待ち）→ Python での行変換 → upsert」を
+1日ずつ直列に行っていた。ここでは3段をスレッドで並行させ、有界キューでつなぐ。
+
+    [fetch workers] --(fetched_q)--> [transform] --(write_q)--> [writer]
+
+- fetch: 複数スレッドで API を呼ぶ（JQuantsClient のレート制限はスレッド間で共有される）
+- transform: 1スレッドで API の行を DB 行に変換
+- writer: 1スレッドが1本の接続を保持し、commit_every 行ごとにコミットする
+- キューが満杯になると上流が待つ（バックプレッシャー）ため、メモリ使用量は queue_size で抑えられる
+
+いずれかの段で例外が起きると全段を停止し、呼び出し元で例外を再送出する。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence
+
+from ..infra.db import connect_db
+
+_DONE = object()
+_POLL_SEC = 0.1
+
+
+@dataclass
+class PipelineStats:
+    """パイプラインの実行結果"""
+
+    items: int = 0
+    rows: int = 0
+    empty_items: int = 0
+    commits: int = 0
+    elapsed_sec: float = 0.0
+
+    def summary(self, label: str) -> str:
+        rate = self.rows / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+        return (
+            f"[{label}] pipeline done: {self.items} items, {self.rows} rows "
+            f"({self.empty_items} empty), {self.commits} commits, "
+            f"{self.elapsed_sec:.1f}s ({rate:,.0f} rows/s)"
+        )
+
+
+def _put(q: queue.Queue, obj: Any, stop: threading.Event) -> bool:
+    """停止要求を確認しながら put（停止した場合は False）"""
+    while not stop.is_set():
+        try:
+            q.put(obj, timeout=_POLL_SEC)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Any:
+    """停止要求を確認しながら get（停止した場合は _DONE）"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_SEC)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_ingest_pipeline(
+    items: Sequence[Any],
+    fetch: Callable[[Any], List[Any]],
+    transform: Callable[[Any, List[Any]], List[Any]],
+    write: Callable[[Any, Any, Optional[List[Any]]], None],
+    label: str = "ingest",
+    fetch_workers: int = 2,
+    queue_size: int = 8,
+    commit_every: int = 50000,
+    sleep_sec: float = 0.0,
+    conn_factory: Callable = connect_db,
+) -> PipelineStats:
+    """
+    取得・変換・書き込みを並行実行する
+
+    Args:
+        items: 取得単位（日付など）のリスト
+        fetch: item → API の行リスト（fetch_workers 本のスレッドから呼ばれる）
+        transform: (item, API の行) → DB 行リスト
+        write: (conn, item, DB 行) → None（writer スレッドのみから呼ばれる。
+            API の結果が0件だった item は DB 行に None が渡される）
+        label: 進捗表示のラベル
+        fetch_workers: 取得スレッド数
+        queue_size: 段間キューの最大長（item 単位）
+        commit_every: この行数を書き込むごとにコミット
+        sleep_sec: 各取得後の追加待機時間
+        conn_factory: writer が使う接続のコンテキストマネージャー
+
+    Returns:
+        PipelineStats
+    """
+    stats = PipelineStats()
+    if not items:
+        return stats
+
+    started = time.time()
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    work_q: queue.Queue = queue.Queue()
+    fetched_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    write_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    n_workers = max(1, min(fetch_workers, len(items)))
+
+    for item in items:
+        work_q.put(item)
+
+    def _fail(e: BaseException) -> None:
+        errors.append(e)
+        stop.set()
+
+    def _fetch_worker() -> None:
+        try:
+            while not stop.is_set():
+                try:
+                    item = work_q.get_nowait()
+                except queue.Empty:
+                    break
+                rows = fetch(item)
+                if not _put(fetched_q, (item, rows), stop):
+                    return
+                if sleep_sec > 0:
+                    time.sleep(sleep_sec)
+        except BaseException as e:
+            _fail(e)
+        finally:
+            _put(fetched_q, _DONE, stop)
+
+    def _transformer() -> None:
+        try:
+            finished = 0
+            while finished < n_workers:
+                msg = _get(fetched_q, stop)
+                if msg is _DONE:
+                    if stop.is_set():
+                        return
+                    finished += 1
+                    continue
+                item, rows = msg
+                # API の結果が0件の item は None として writer に渡す（変換後0行とは区別する）
+                mapped = transform(item, rows) if rows else None
+                if not _put(write_q, (item, mapped), stop):
+                    return
+        except BaseException as e:
+            _fail(e)
+        finally:
+            _put(write_q, _DONE, stop)
+
+    def _writer() -> None:
+        try:
+            with conn_factory() as conn:
+                pending = 0
+                while True:
+                    msg = _get(write_q, stop)
+                    if msg is _DONE:
+                        break
+                    item, mapped = msg
+                    write(conn, item, mapped)
+                    n_rows = len(mapped) if mapped is not None else 0
+                    stats.items += 1
+                    stats.rows += n_rows
+                    if mapped is None:
+                        stats.empty_items += 1
+                    pending += n_rows
+                    print(f"[{label}] {stats.items}/{len(items)}: {item} ({n_rows} rows)")
+                    if pending >= commit_every:
+                        conn.commit()
+                        stats.commits += 1
+                        pending = 0
+                if stop.is_set():
+                    raise RuntimeError(f"[{label}] pipeline aborted")
+                stats.commits += 1  # connect_db の終了時にコミットされる
+        except BaseException as e:
+            if not errors:
+                _fail(e)
+            stop.set()
+
+    threads = [
+        threading.Thread(target=_fetch_worker, name=f"{label}-fetch-{i}", daemon=True)
+        for i in range(n_workers)
+    ]
+    threads.append(threading.Thread(target=_transformer, name=f"{label}-transform", daemon=True))
+    threads.append(threading.Thread(target=_writer, name=f"{label}-writer", daemon=True))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats.elapsed_sec = time.time() - started
+    if errors:
+        raise errors[0]
+    return stats
@@ -0,0 +1,244 @@
+"""取り込み計画（API呼び出しが必要な日付の最小集合を求める）
+
+日付ごとに API を呼ぶ取り込み（prices / fins / 指数の日次フォールバック）は、
+従来は期間内の全暦日を順に取得していた。ここでは以下の日付を除外する。
+
+- 週末
+- JPXの年末年始休業日（12/31, 1/1〜1/3）
+- 既知の休場日: 取り込み済み TOPIX（index_daily）の期間内で TOPIX の行が無い平日
+- 既知の空日: 過去に取得して0件だった日（ingest_skip_dates に記録）
+- 取り込み済みの日: 対象テーブルに行がある日（ただし最終日は部分取り込みの可能性があるため再取得）
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date as _date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Set
+
+from ..infra.db import table_exists
+
+SKIP_TABLE = "ingest_skip_dates"
+CALENDAR_INDEX_CODE = "0000"  # 休場日の推定に使う指数（TOPIX）
+
+
+def ensure_skip_table(conn) -> None:
+    """ingest_skip_dates テーブルを作成（既に存在する場合は何もしない）"""
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SKIP_TABLE} (
+          dataset TEXT NOT NULL,
+          date TEXT NOT NULL,
+          reason TEXT NOT NULL,
+          recorded_at TEXT NOT NULL,
+          PRIMARY KEY (dataset, date)
+        )
+        """
+    )
+
+
+@dataclass
+class IngestPlan:
+    """取り込み計画"""
+
+    dataset: str
+    date_from: str
+    date_to: str
+    dates: List[str]
+    # 除外理由ごとの日数（weekend / jpx_year_end / holiday / known_empty / loaded）
+    skipped: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def calendar_days(self) -> int:
+        return len(self.dates) + sum(self.skipped.values())
+
+    def summary(self) -> str:
+        skipped = ", ".join(f"{k}={v}" for k, v in self.skipped.items() if v)
+        return (
+            f"[plan:{self.dataset}] {self.date_from}..{self.date_to}: "
+            f"{len(self.dates)}/{self.calendar_days} days to fetch"
+            + (f" (skipped: {skipped})" if skipped else "")
+        )
+
+
+def _calendar_days(date_from: str, date_to: str) -> List[_date]:
+    start = datetime.strptime(date_from, "%Y-%m-%d").date()
+    end = datetime.strptime(date_to, "%Y-%m-%d").date()
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def is_jpx_year_end_holiday(d: _date) -> bool:
+    """JPXの年末年始休業日（12/31, 1/1〜1/3）"""
+    return (d.month == 12 and d.day == 31) or (d.month == 1 and d.day <= 3)
+
+
+def _distinct_dates(
+    conn,
+    table: str,
+    date_column: str,
+    date_from: str,
+    date_to: str,
+    where: str = "",
+    params: Sequence = (),
+) -> Set[str]:
+    if not table_exists(conn, table):
+        return set()
+    sql = (
+        f"SELECT DISTINCT {date_column} AS d FROM {table} "
+        f"WHERE {date_column} >= ? AND {date_column} <= ?"
+    )
+    if where:
+        sql += f" AND {where}"
+    return {r["d"] for r in conn.execute(sql, (date_from, date_to, *params)).fetchall()}
+
+
+def learned_holidays(conn, date_from: str, date_to: str) -> Set[str]:
+    """
+    取り込み済み TOPIX の期間内で、TOPIX の行が無い平日（= 休場日）
+
+    TOPIX は期間一括取得のため日付の抜けが無い前提。期間外の日付は判定しない。
+    """
+    if not table_exists(conn, "index_daily"):
+        return set()
+    row = conn.execute(
+        "SELECT MIN(date) AS lo, MAX(date) AS hi FROM index_daily WHERE index_code = ?",
+        (CALENDAR_INDEX_CODE,),
+    ).fetchone()
+    if not row or not row["lo"]:
+        return set()
+    lo, hi = max(date_from, row["lo"]), min(date_to, row["hi"])
+    if lo > hi:
+        return set()
+    trading = _distinct_dates(
+        conn, "index_daily", "date", lo, hi, where="index_code = ?", params=(CALENDAR_INDEX_CODE,)
+    )
+    return {
+        d.strftime("%Y-%m-%d")
+        for d in _calendar_days(lo, hi)
+        if d.weekday() < 5 and d.strftime("%Y-%m-%d") not in trading
+    }
+
+
+def known_empty_dates(conn, dataset: str, date_from: str, date_to: str) -> Set[str]:
+    """過去に取得して0件だった日（ingest_skip_dates）"""
+    return _distinct_dates(
+        conn, SKIP_TABLE, "date", date_from, date_to, where="dataset = ?", params=(dataset,)
+    )
+
+
+def plan_ingest_dates(
+    conn,
+    dataset: str,
+    date_from: str,
+    date_to: str,
+    table: Optional[str] = None,
+    date_column: str = "date",
+    where: str = "",
+    params: Sequence = (),
+    skip_loaded: bool = True,
+    use_learned_holidays: bool = True,
+) -> IngestPlan:
+    """
+    API呼び出しが必要な日付を求める
+
+    Args:
+        conn: データベース接続
+        dataset: ingest_skip_dates 上のデータセット名（例: "prices", "fins"）
+        date_from: 開始日（YYYY-MM-DD）
+        date_to: 終了日（YYYY-MM-DD）
+        table: 取り込み先テーブル（取り込み済みの日の判定に使用、Noneで判定しない）
+        date_column: table の日付列
+        where: table の追加条件（例: "index_code = ?"）
+        params: where のパラメータ
+        skip_loaded: 取り込み済みの日を除外するか（Falseで再取得）
+        use_learned_holidays: TOPIX から推定した休場日を除外するか（TOPIX 自身の取り込みでは False）
+
+    Returns:
+        IngestPlan（dates は昇順）
+    """
+    holidays = learned_holidays(conn, date_from, date_to) if use_learned_holidays else set()
+    empty = known_empty_dates(conn, dataset, date_from, date_to)
+
+    loaded: Set[str] = set()
+    if skip_loaded and table is not None:
+        loaded = _distinct_dates(conn, table, date_column, date_from, date_to, where, params)
+        # 最終日は部分取り込み（当日分の途中取得など）の可能性があるため再取得する
+        if loaded:
+            loaded.discard(max(loaded))
+
+    skipped = {"weekend": 0, "jpx_year_end": 0, "holiday": 0, "known_empty": 0, "loaded": 0}
+    dates: List[str] = []
+    for d in _calendar_days(date_from, date_to):
+        ds = d.strftime("%Y-%m-%d")
+        if d.weekday() >= 5:
+            skipped["weekend"] += 1
+        elif is_jpx_year_end_holiday(d):
+            skipped["jpx_year_end"] += 1
+        elif ds in holidays:
+            skipped["holiday"] += 1
+        elif ds in empty:
+            skipped["known_empty"] += 1
+        elif ds in loaded:
+            skipped["loaded"] += 1
+        else:
+            dates.append(ds)
+
+    return IngestPlan(dataset=dataset, date_from=date_from, date_to=date_to, dates=dates, skipped=skipped)
+
+
+def record_empty_date(conn, dataset: str, date: str, today: Optional[str] = None) -> bool:
+    """
+    取得結果が0件だった日を記録（次回以降は再取得しない）
+
+    当日以降の日付はデータ未公開の可能性があるため記録しない。
+
+    Returns:
+        記録したか
+    """
+    today = today or _date.today().strftime("%Y-%m-%d")
+    if date >= today:
+        return False
+    ensure_skip_table(conn)
+    conn.execute(
+        f"INSERT OR REPLACE INTO {SKIP_TABLE} (dataset, date, reason, recorded_at) VALUES (?, ?, ?, ?)",
+        (dataset, date, "empty_response", datetime.now().isoformat(timespec="seconds")),
+    )
+    return True
+
+
+def find_gaps(
+    conn,
+    dataset: str,
+    table: str,
+    date_column: str = "date",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    where: str = "",
+    params: Sequence = (),
+    use_learned_holidays: bool = True,
+) -> List[str]:
+    """
+    取り込み済み範囲内の欠損日（取得が必要なのに行が無い日）
+
+    期間未指定の場合は table の最小日〜最大日。
+    plan_ingest_dates と同じ規則で休場日・既知の空日を除外した上で、行が無い日を返す。
+    """
+    if not table_exists(conn, table):
+        return []
+    if date_from is None or date_to is None:
+        sql = f"SELECT MIN({date_column}) AS lo, MAX({date_column}) AS hi FROM {table}"
+        if where:
+            sql += f" WHERE {where}"
+        row = conn.execute(sql, tuple(params)).fetchone()
+        if not row or not row["lo"]:
+            return []
+        date_from = date_from or row["lo"]
+        date_to = date_to or row["hi"]
+
+    plan = plan_ingest_dates(
+        conn, dataset, date_from, date_to, table=table, date_column=date_column,
+        where=where, params=params, use_learned_holidays=use_learned_holidays,
+    )
+    # plan は最終日を常に再取得対象にするため、行がある最終日は欠損から除く
+    loaded = _distinct_dates(conn, table, date_column, date_from, date_to, where, params)
+    return [d for d in plan.dates if d not in loaded]
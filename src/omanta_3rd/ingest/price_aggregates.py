@@ -0,0 +1,234 @@
+"""prices_daily から派生する日次集計（prices_rolling_daily）を増分更新
+
+build_features や universe フィルタが毎回 prices_daily 全体を走査して
+計算していた値を、価格取り込み時に (date, code) 単位で事前計算して保存する。
+
+- liquidity_60d: 直近60営業日行の売買代金平均（build_features と同一定義）
+- split_factor_cum: 株数倍率の累積積 ∏(1 / adjustment_factor)
+  期間 (a, b] の分割倍率は split_factor_cum(b) / split_factor_cum(a) で求まる
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..infra.db import upsert
+
+ROLLING_TABLE = "prices_rolling_daily"
+LIQUIDITY_WINDOW = 60
+
+
+def ensure_price_aggregates_table(conn) -> None:
+    """prices_rolling_daily テーブルを作成（既に存在する場合は何もしない）"""
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {ROLLING_TABLE} (
+          date TEXT NOT NULL,
+          code TEXT NOT NULL,
+          liquidity_60d REAL,
+          split_factor_cum REAL NOT NULL,
+          PRIMARY KEY (date, code)
+        )
+        """
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_prices_rolling_code_date ON {ROLLING_TABLE} (code, date)"
+    )
+
+
+def _split_factor(adjustment_factor: pd.Series) -> pd.Series:
+    """
+    adjustment_factor を株数倍率（1 / adjustment_factor）に変換
+
+    _split_multiplier_between と同じく、NULL と 0 以下の不正値は無視（倍率1.0）する。
+    """
+    af = pd.to_numeric(adjustment_factor, errors="coerce")
+    valid = af.notna() & (af > 0)
+    return pd.Series(np.where(valid, 1.0 / af.where(valid, 1.0), 1.0), index=adjustment_factor.index)
+
+
+def compute_rolling_aggregates(
+    new_rows: pd.DataFrame,
+    seed_rows: Optional[pd.DataFrame] = None,
+    seed_split_cum: Optional[Dict[str, float]] = None,
+    window: int = LIQUIDITY_WINDOW,
+) -> pd.DataFrame:
+    """
+    新規日付分のローリング集計を計算（DB不要な純粋関数）
+
+    Args:
+        new_rows: 新規日付の prices_daily 行（date, code, turnover_value, adjustment_factor）
+        seed_rows: 新規日付より前の直近行（date, code, turnover_value）。窓の先頭を埋めるために使用
+        seed_split_cum: 新規日付より前の最終 split_factor_cum（{code: 値}、無い銘柄は1.0）
+        window: ローリング窓の行数
+
+    Returns:
+        new_rows と同じ (date, code) の集計結果（date, code, liquidity_60d, split_factor_cum）
+    """
+    cols = ["date", "code", "liquidity_60d", "split_factor_cum"]
+    if new_rows.empty:
+        return pd.DataFrame(columns=cols)
+
+    new = new_rows[["date", "code", "turnover_value", "adjustment_factor"]].copy()
+    new["_is_new"] = True
+    if seed_rows is not None and not seed_rows.empty:
+        seed = seed_rows[["date", "code", "turnover_value"]].copy()
+        seed["adjustment_factor"] = np.nan
+        seed["_is_new"] = False
+        combined = pd.concat([seed, new], ignore_index=True)
+    else:
+        combined = new
+
+    combined["turnover_value"] = pd.to_numeric(combined["turnover_value"], errors="coerce")
+    combined = combined.sort_values(["code", "date"], kind="mergesort").reset_index(drop=True)
+
+    # 直近window行の平均（NaNは除外、全てNaNならNaN）: tail(window).mean() と同値
+    combined["liquidity_60d"] = (
+        combined.groupby("code", sort=False)["turnover_value"]
+        .rolling(window, min_periods=1)
+        .mean()
+        .reset_index(level=0, drop=True)
+    )
+
+    out = combined[combined["_is_new"]].copy()
+    out["split_factor_cum"] = (
+        _split_factor(out["adjustment_factor"]).groupby(out["code"], sort=False).cumprod()
+    )
+    if seed_split_cum:
+        out["split_factor_cum"] *= out["code"].map(seed_split_cum).fillna(1.0)
+
+    return out[cols].reset_index(drop=True)
+
+
+def _get_high_water_mark(conn) -> Optional[str]:
+    row = conn.execute(f"SELECT MAX(date) AS d FROM {ROLLING_TABLE}").fetchone()
+    return row["d"] if row else None
+
+
+def _seed_cutoff_date(conn, date_from: str, window: int) -> Optional[str]:
+    """窓の先頭を埋めるために読む最古の営業日（余裕を見て window*2 営業日前）"""
+    row = conn.execute(
+        """
+        SELECT MIN(date) AS d FROM (
+          SELECT DISTINCT date FROM prices_daily
+          WHERE date < ?
+          ORDER BY date DESC
+          LIMIT ?
+        )
+        """,
+        (date_from, window * 2),
+    ).fetchone()
+    return row["d"] if row else None
+
+
+def _load_seed_split_cum(conn, codes: List[str], cutoff: Optional[str], date_from: str) -> Dict[str, float]:
+    """date_from より前の最終 split_factor_cum を銘柄ごとに取得"""
+    seed: Dict[str, float] = {}
+    if cutoff is not None:
+        df = pd.read_sql_query(
+            f"""
+            SELECT code, date, split_factor_cum
+            FROM {ROLLING_TABLE}
+            WHERE date >= ? AND date < ?
+            """,
+            conn,
+            params=(cutoff, date_from),
+        )
+        if not df.empty:
+            last = df.sort_values(["code", "date"]).groupby("code").tail(1)
+            seed = dict(zip(last["code"], last["split_factor_cum"]))
+
+    # 窓内に行が無い銘柄（長期売買停止など）は個別に遡る
+    for code in codes:
+        if code in seed:
+            continue
+        row = conn.execute(
+            f"""
+            SELECT split_factor_cum FROM {ROLLING_TABLE}
+            WHERE code = ? AND date < ?
+            ORDER BY date DESC
+            LIMIT 1
+            """,
+            (code, date_from),
+        ).fetchone()
+        if row is not None:
+            seed[code] = row["split_factor_cum"]
+    return seed
+
+
+def refresh_price_aggregates(
+    conn,
+    date_from: Optional[str] = None,
+    window: int = LIQUIDITY_WINDOW,
+) -> int:
+    """
+    prices_rolling_daily を増分更新（計算量は新規日数 × 銘柄数）
+
+    date_from 以降（未指定時は既存集計の翌日以降）を再計算する。
+    集計がまだ無い場合は prices_daily の全期間から構築する。
+
+    Args:
+        conn: データベース接続
+        date_from: 再計算の開始日（YYYY-MM-DD）。取り込み直後は取り込み開始日を渡す
+        window: 流動性のローリング窓（営業日行数）
+
+    Returns:
+        書き込んだ行数
+    """
+    ensure_price_aggregates_table(conn)
+
+    hwm = _get_high_water_mark(conn)
+    if hwm is None:
+        # 未構築: 全期間を計算
+        date_from = "0000-00-00"
+    elif date_from is None or date_from > hwm:
+        # 集計済みの最終日より後のみ（間に空白を作らない）
+        date_from = hwm if date_from is None else min(date_from, hwm)
+        if date_from == hwm:
+            row = conn.execute(
+                "SELECT MIN(date) AS d FROM prices_daily WHERE date > ?", (hwm,)
+            ).fetchone()
+            if not row or not row["d"]:
+                return 0
+            date_from = row["d"]
+
+    new_rows = pd.read_sql_query(
+        """
+        SELECT date, code, turnover_value, adjustment_factor
+        FROM prices_daily
+        WHERE date >= ?
+        """,
+        conn,
+        params=(date_from,),
+    )
+    if new_rows.empty:
+        return 0
+
+    cutoff = _seed_cutoff_date(conn, date_from, window)
+    seed_rows = None
+    seed_split_cum: Dict[str, float] = {}
+    if cutoff is not None:
+        seed_rows = pd.read_sql_query(
+            """
+            SELECT date, code, turnover_value
+            FROM prices_daily
+            WHERE date >= ? AND date < ?
+            """,
+            conn,
+            params=(cutoff, date_from),
+        )
+        seed_rows = seed_rows.sort_values(["code", "date"]).groupby("code").tail(window - 1)
+        seed_split_cum = _load_seed_split_cum(
+            conn, new_rows["code"].unique().tolist(), cutoff, date_from
+        )
+
+    agg = compute_rolling_aggregates(new_rows, seed_rows, seed_split_cum, window=window)
+
+    conn.execute(f"DELETE FROM {ROLLING_TABLE} WHERE date >= ?", (date_from,))
+    agg = agg.astype(object).where(agg.notna(), None)
+    upsert(conn, ROLLING_TABLE, agg.to_dict("records"), conflict_columns=["date", "code"])
+    print(f"[prices_rolling] {len(agg)} rows updated (from {date_from})")
+    return len(agg)
@@ -2,12 +2,22 @@
 
 from __future__ import annotations
 
-import time
-from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 
-from ..infra.db import connect_db, upsert
+from contextlib import contextmanager
+
+from ..infra.db import bulk_load_session, bulk_upsert, connect_db, upsert
 from ..infra.jquants import JQuantsClient
+from .pipeline import run_ingest_pipeline
+from .planner import plan_ingest_dates, record_empty_date
+from .price_aggregates import refresh_price_aggregates
+from .rebalance_calendar import refresh_rebalance_calendar
+
+
+# バルクロード時に二次インデックスを削除・再作成する最小日数（これ未満は索引を維持したまま書き込む）
+BULK_DEFER_INDEX_MIN_DAYS = 60
+# バルクロード時の1トランザクションあたりの行数（約250営業日分）
+BULK_COMMIT_ROWS = 1_000_000
 
 
 def _normalize_code(code: Any) -> str:
@@ -26,20 +36,6 @@ def _normalize_code(code: Any) -> str:
     return s
 
 
-def _daterange(date_from: str, date_to: str) -> List[str]:
-    """
-    date_from〜date_to（YYYY-MM-DD）の全日付を返す（週末含む）
-    """
-    start = datetime.strptime(date_from, "%Y-%m-%d").date()
-    end = datetime.strptime(date_to, "%Y-%m-%d").date()
-    out = []
-    d = start
-    while d <= end:
-        out.append(d.strftime("%Y-%m-%d"))
-        d += timedelta(days=1)
-    return out
-
-
 def fetch_prices_by_date(client: JQuantsClient, date: str) -> List[Dict[str, Any]]:
     """
     /v2/equities/bars/daily は date か code が必須。
@@ -98,7 +94,10 @@ def ingest_prices(
     end_date: str,
     client: Optional[JQuantsClient] = None,
     sleep_sec: float = 0.0,
-    batch_size: int = 5000,
+    batch_size: int = 50000,
+    skip_loaded: bool = True,
+    fetch_workers: int = 2,
+    bulk: bool = False,
 ):
     """
     価格データを取り込み（start_date〜end_date）
@@ -108,30 +107,61 @@ def ingest_prices(
         end_date: 終了日（YYYY-MM-DD）
         client: J-Quants APIクライアント
         sleep_sec: 追加の待機時間（デフォルト: 0.0。JQuantsClientでレート制限管理済みのため通常は不要）
-        batch_size: 一括保存する件数
+        batch_size: 1トランザクションでコミットする件数
+        skip_loaded: prices_daily に取り込み済みの日を再取得しないか（Falseで全営業日を再取得）
+        fetch_workers: API取得の並列スレッド数（レート制限は JQuantsClient がスレッド間で共有）
+        bulk: バルクロードモード（複数年のバックフィル・DB再構築用）。
+            一時テーブル経由の ON CONFLICT DO UPDATE、synchronous=OFF、大きなトランザクションで書き込み、
+            BULK_DEFER_INDEX_MIN_DAYS 日以上の場合は idx_prices_code_date を取り込み後に再作成する
+
+    週末・休場日・既知の空日は取得しない（ingest.planner）。
+    取り込み後、prices_rolling_daily（60日流動性・累積分割倍率）を取得した最初の日以降だけ再計算し、
+    rebalance_calendar（月初・月末営業日）を取得した最初の月以降だけ再集計する。
     """
     if client is None:
         client = JQuantsClient()
 
-    dates = _daterange(start_date, end_date)
-
-    buf: List[Dict[str, Any]] = []
-    for i, d in enumerate(dates, start=1):
-        print(f"[prices] date {i}/{len(dates)}: {d}")
-
-        rows = fetch_prices_by_date(client, d)
-        if rows:
-            mapped = [_map_price_row(r) for r in rows]
-            # code が空の行（末尾0でない5桁など）を除外
-            mapped = [m for m in mapped if m.get("code")]
-            buf.extend(mapped)
-
-        if len(buf) >= batch_size:
-            save_prices(buf)
-            buf.clear()
-
-        if sleep_sec > 0:
-            time.sleep(sleep_sec)
-
-    if buf:
-        save_prices(buf)
+    with connect_db() as conn:
+        plan = plan_ingest_dates(
+            conn, "prices", start_date, end_date, table="prices_daily", skip_loaded=skip_loaded
+        )
+    print(plan.summary())
+    dates = plan.dates
+
+    def _transform(d: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        mapped = [_map_price_row(r) for r in rows]
+        # code が空の行（末尾0でない5桁など）を除外
+        return [m for m in mapped if m.get("code")]
+
+    write_rows = bulk_upsert if bulk else upsert
+
+    def _write(conn, d: str, mapped: Optional[List[Dict[str, Any]]]):
+        if mapped is None:
+            record_empty_date(conn, "prices", d)
+        elif mapped:
+            write_rows(conn, "prices_daily", mapped, conflict_columns=["date", "code"])
+
+    @contextmanager
+    def _bulk_conn():
+        defer = ("prices_daily",) if len(dates) >= BULK_DEFER_INDEX_MIN_DAYS else ()
+        with connect_db() as conn, bulk_load_session(conn, defer_indexes_for=defer):
+            yield conn
+
+    # 取得・変換・書き込みを並行実行（書き込みは1本の接続で batch_size 行ごとにコミット）
+    stats = run_ingest_pipeline(
+        dates,
+        fetch=lambda d: fetch_prices_by_date(client, d),
+        transform=_transform,
+        write=_write,
+        label="prices",
+        fetch_workers=fetch_workers,
+        commit_every=max(batch_size, BULK_COMMIT_ROWS) if bulk else batch_size,
+        sleep_sec=sleep_sec,
+        conn_factory=_bulk_conn if bulk else connect_db,
+    )
+    print(stats.summary("prices"))
+
+    # 派生集計（流動性・分割倍率・月次カレンダー）を取り込んだ日以降だけ更新
+    with connect_db() as conn:
+        refresh_price_aggregates(conn, date_from=dates[0] if dates else None)
+        refresh_rebalance_calendar(conn, date_from=dates[0] if dates else None)
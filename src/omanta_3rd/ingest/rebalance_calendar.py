@@ -0,0 +1,139 @@
+"""月次リバランス日のカレンダー（rebalance_calendar）
+
+get_monthly_rebalance_dates は月ごとに接続を開いて
+MAX(date) FROM prices_daily WHERE date <= 月末 を実行していた。
+ほぼ全てのジョブ（optimize_longterm / WFA / compare_* / run_strategy）が呼ぶため、
+月ごとの最初・最後の営業日を価格取り込み時に事前計算して保存する。
+
+- first_trading_day: 月初営業日（月次リバランス型で月末に決定したポートフォリオを執行する日）
+- last_trading_day: 月末営業日（リバランス日）
+- n_trading_days: その月の営業日数
+
+当月の行は取り込み済みの最終日までを表す（月が終わるまで last_trading_day は伸びる）。
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import pandas as pd
+
+from ..infra.db import table_exists
+
+CALENDAR_TABLE = "rebalance_calendar"
+
+_CALENDAR_COLUMNS = ["month", "first_trading_day", "last_trading_day", "n_trading_days"]
+
+
+def ensure_rebalance_calendar_table(conn) -> None:
+    """rebalance_calendar テーブルを作成（既に存在する場合は何もしない）"""
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {CALENDAR_TABLE} (
+          month TEXT PRIMARY KEY,
+          first_trading_day TEXT NOT NULL,
+          last_trading_day TEXT NOT NULL,
+          n_trading_days INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _aggregate_months(conn, date_from: Optional[str] = None) -> pd.DataFrame:
+    """prices_daily から月ごとの最初・最後の営業日を集計（date_from の月以降）"""
+    month_from = (date_from or "0000-00-00")[:7] + "-01"
+    return pd.read_sql_query(
+        """
+        SELECT substr(date, 1, 7) AS month,
+               MIN(date) AS first_trading_day,
+               MAX(date) AS last_trading_day,
+               COUNT(DISTINCT date) AS n_trading_days
+        FROM prices_daily
+        WHERE date >= ?
+        GROUP BY substr(date, 1, 7)
+        ORDER BY month
+        """,
+        conn,
+        params=(month_from,),
+    )
+
+
+def refresh_rebalance_calendar(conn, date_from: Optional[str] = None) -> int:
+    """
+    rebalance_calendar を更新（date_from の月以降を再集計）
+
+    Args:
+        conn: データベース接続
+        date_from: 再集計の開始日（YYYY-MM-DD）。未指定時は既存カレンダーの最終月から
+            （カレンダーが空の場合は全期間）
+
+    Returns:
+        書き込んだ月数
+    """
+    ensure_rebalance_calendar_table(conn)
+    if date_from is None:
+        row = conn.execute(f"SELECT MAX(month) AS m FROM {CALENDAR_TABLE}").fetchone()
+        date_from = row[0] if row and row[0] else None
+
+    months = _aggregate_months(conn, date_from)
+    if date_from is not None:
+        conn.execute(f"DELETE FROM {CALENDAR_TABLE} WHERE month >= ?", (date_from[:7],))
+    else:
+        conn.execute(f"DELETE FROM {CALENDAR_TABLE}")
+    conn.executemany(
+        f"INSERT INTO {CALENDAR_TABLE} ({', '.join(_CALENDAR_COLUMNS)}) VALUES (?, ?, ?, ?)",
+        [tuple(r) for r in months[_CALENDAR_COLUMNS].itertuples(index=False)],
+    )
+    print(f"[rebalance_calendar] {len(months)} months updated")
+    return len(months)
+
+
+def _calendar_is_current(conn) -> bool:
+    """カレンダーが prices_daily の最終日まで集計済みか"""
+    if not table_exists(conn, CALENDAR_TABLE):
+        return False
+    cal = conn.execute(f"SELECT MAX(last_trading_day) FROM {CALENDAR_TABLE}").fetchone()[0]
+    latest = conn.execute("SELECT MAX(date) FROM prices_daily").fetchone()[0]
+    return cal is not None and cal == latest
+
+
+def load_rebalance_calendar(
+    conn,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    月ごとの営業日カレンダーを取得（start_date〜end_date の月）
+
+    カレンダーが無い・古い場合は prices_daily から1クエリで集計する（書き込みはしない）。
+
+    Returns:
+        month, first_trading_day, last_trading_day, n_trading_days（month 昇順）
+    """
+    if _calendar_is_current(conn):
+        cal = pd.read_sql_query(
+            f"SELECT {', '.join(_CALENDAR_COLUMNS)} FROM {CALENDAR_TABLE} ORDER BY month", conn
+        )
+    else:
+        cal = _aggregate_months(conn)
+    if start_date is not None:
+        cal = cal[cal["month"] >= start_date[:7]]
+    if end_date is not None:
+        cal = cal[cal["month"] <= end_date[:7]]
+    return cal.reset_index(drop=True)
+
+
+def _dates_in_range(dates: pd.Series, start_date: str, end_date: str) -> List[str]:
+    return [str(d) for d in dates if start_date <= d <= end_date]
+
+
+def get_month_end_trading_days(conn, start_date: str, end_date: str) -> List[str]:
+    """各月の最終営業日のうち start_date〜end_date に入るもの（昇順）"""
+    cal = load_rebalance_calendar(conn, start_date, end_date)
+    return _dates_in_range(cal["last_trading_day"], start_date, end_date)
+
+
+def get_month_start_trading_days(conn, start_date: str, end_date: str) -> List[str]:
+    """各月の最初の営業日のうち start_date〜end_date に入るもの（昇順）"""
+    cal = load_rebalance_calendar(conn, start_date, end_date)
+    return _dates_in_range(cal["first_trading_day"], start_date, end_date)
@@ -16,7 +16,8 @@ from datetime import datetime, timedelta
 from typing import List, Optional
 import pandas as pd
 
-from ..infra.db import connect_db
+from ..infra.db import borrow_db, connect_db
+from ..ingest.rebalance_calendar import get_month_end_trading_days
 from ..jobs.longterm_run import build_features, save_features, save_portfolio
 from ..backtest.performance import calculate_portfolio_performance, save_performance_to_db
 
@@ -56,41 +57,27 @@ def get_last_trading_day_of_month(year: int, month: int) -> Optional[str]:
         return str(last_trading_day_df["last_date"].iloc[0])
 
 
-def get_monthly_rebalance_dates(start_date: str, end_date: str) -> List[str]:
+def get_monthly_rebalance_dates(
+    start_date: str,
+    end_date: str,
+    snapshot_path: Optional[str] = None,
+) -> List[str]:
     """
     指定期間内の各月の最終営業日を取得
     
+    rebalance_calendar（価格取り込み時に更新）から1クエリで取得する。
+    カレンダーが無い・古い場合は prices_daily から集計する。
+    
     Args:
         start_date: 開始日（YYYY-MM-DD）
         end_date: 終了日（YYYY-MM-DD）
+        snapshot_path: 読み取るスナップショットDB（Noneの場合はライブDB）
     
     Returns:
         各月の最終営業日のリスト（YYYY-MM-DD形式）
     """
-    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-    
-    rebalance_dates = []
-    current_dt = start_dt.replace(day=1)  # 月の最初の日
-    
-    while current_dt <= end_dt:
-        year = current_dt.year
-        month = current_dt.month
-        
-        last_trading_day = get_last_trading_day_of_month(year, month)
-        if last_trading_day:
-            # 開始日以降、終了日以前の日付のみ追加
-            last_trading_dt = datetime.strptime(last_trading_day, "%Y-%m-%d")
-            if start_dt <= last_trading_dt <= end_dt:
-                rebalance_dates.append(last_trading_day)
-        
-        # 次の月へ
-        if month == 12:
-            current_dt = current_dt.replace(year=year + 1, month=1)
-        else:
-            current_dt = current_dt.replace(month=month + 1)
-    
-    return sorted(rebalance_dates)
+    with borrow_db(snapshot=snapshot_path) as conn:
+        return get_month_end_trading_days(conn, start_date, end_date)
 
 
 def run_monthly_portfolio_and_performance(
@@ -0,0 +1,108 @@
+"""prices_daily 書き込みのベンチマーク（通常 upsert とバルクロードの比較）
+
+一時ディレクトリに schema.sql / indexes.sql から空のDBを作り、合成した価格行を
+日付ごとに書き込んで rows/sec を計測する。既存DBには触れない。
+
+- upsert: INSERT OR REPLACE、batch_rows 行ごとにコミット（従来の ingest_prices 相当）
+- bulk: 一時テーブル + ON CONFLICT DO UPDATE、synchronous=OFF、1トランザクション
+- bulk+defer: bulk に加えて二次インデックスを取り込み後に再作成
+
+Usage:
+  python -m omanta_3rd.jobs.benchmark_bulk_load --days 250 --codes 4000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ..config.settings import SQL_INDEXES_PATH, SQL_SCHEMA_PATH
+from ..infra.db import bulk_load_session, bulk_upsert, upsert
+
+
+def _make_rows(days: int, codes: int, seed: int = 0) -> List[List[Dict[str, Any]]]:
+    """日付ごとの合成価格行（ingest_prices が1日分ずつ書き込むのと同じ単位）"""
+    rng = random.Random(seed)
+    out = []
+    for i in range(days):
+        date = f"{2000 + i // 250:04d}-{1 + (i // 20) % 12:02d}-{1 + i % 20:02d}"
+        out.append([
+            {
+                "date": date,
+                "code": f"{1000 + c}",
+                "open": rng.uniform(100, 10000),
+                "close": rng.uniform(100, 10000),
+                "adj_close": rng.uniform(100, 10000),
+                "adj_volume": rng.uniform(1e3, 1e7),
+                "turnover_value": rng.uniform(1e6, 1e10),
+                "adjustment_factor": 1.0,
+            }
+            for c in range(codes)
+        ])
+    return out
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    """connect_db と同じ PRAGMA で接続"""
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.executescript(SQL_SCHEMA_PATH.read_text(encoding="utf-8"))
+    conn.executescript(SQL_INDEXES_PATH.read_text(encoding="utf-8"))
+    return conn
+
+
+def _run(mode: str, path: Path, batches: List[List[Dict[str, Any]]], batch_rows: int) -> float:
+    conn = _connect(path)
+    n_rows = sum(len(b) for b in batches)
+    started = time.perf_counter()
+    if mode == "upsert":
+        pending = 0
+        for rows in batches:
+            upsert(conn, "prices_daily", rows, conflict_columns=["date", "code"])
+            pending += len(rows)
+            if pending >= batch_rows:
+                conn.commit()
+                pending = 0
+        conn.commit()
+    else:
+        defer = ("prices_daily",) if mode == "bulk+defer" else ()
+        with bulk_load_session(conn, defer_indexes_for=defer):
+            for rows in batches:
+                bulk_upsert(conn, "prices_daily", rows, conflict_columns=["date", "code"])
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return n_rows / elapsed
+
+
+def main(days: int = 250, codes: int = 4000, batch_rows: int = 5000, repeat_load: bool = True):
+    batches = _make_rows(days, codes)
+    n_rows = days * codes
+    print(f"[benchmark] {days} days x {codes} codes = {n_rows:,} rows")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ["upsert", "bulk", "bulk+defer"]:
+            path = Path(tmp) / f"{mode.replace('+', '_')}.sqlite"
+            rate = _run(mode, path, batches, batch_rows)
+            line = f"[benchmark] {mode:<11} new rows:  {rate:>12,.0f} rows/s"
+            if repeat_load:
+                # 同じ行の再取り込み（全行が競合する更新）
+                rate_again = _run(mode, path, batches, batch_rows)
+                line += f" | reload (conflicts): {rate_again:>12,.0f} rows/s"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="prices_daily 書き込みのベンチマーク")
+    parser.add_argument("--days", type=int, default=250, help="日数")
+    parser.add_argument("--codes", type=int, default=4000, help="1日あたりの銘柄数")
+    parser.add_argument("--batch-rows", type=int, default=5000, help="upsert モードのコミット間隔（行）")
+    parser.add_argument("--no-reload", action="store_true", help="再取り込み（競合更新）の計測を省略")
+    args = parser.parse_args()
+    main(days=args.days, codes=args.codes, batch_rows=args.batch_rows, repeat_load=not args.no_reload)
@@ -0,0 +1,51 @@
+"""ホットクエリの実行計画を検査（全件走査・インデックス不使用の回帰検出）
+
+Usage:
+  python -m omanta_3rd.jobs.check_query_plans
+  python -m omanta_3rd.jobs.check_query_plans --db data/db/snapshots/study_2025q1.sqlite
+  python -m omanta_3rd.jobs.check_query_plans --verbose
+
+問題があれば終了コード 1 で終了する。
+インデックスが無い場合は sql/migration_add_analytics_indexes.sql を適用する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional
+
+from ..infra.db import connect_db
+from ..infra.query_plan import HOT_QUERIES, explain, find_plan_regressions
+from ..infra.snapshot import connect_snapshot
+
+
+def main(db: Optional[str] = None, verbose: bool = False) -> int:
+    with (connect_snapshot(Path(db)) if db else connect_db(read_only=True)) as conn:
+        if verbose:
+            for query in HOT_QUERIES:
+                try:
+                    plan = explain(conn, query.sql)
+                except Exception as e:
+                    plan = [f"(skip: {e})"]
+                print(f"{query.name}:")
+                for detail in plan:
+                    print(f"  {detail}")
+        problems = find_plan_regressions(conn)
+
+    if problems:
+        print(f"[query_plan] {len(problems)} 件の問題:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print(f"[query_plan] OK ({len(HOT_QUERIES)} queries)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ホットクエリの実行計画を検査")
+    parser.add_argument("--db", type=str, help="検査するDB（スナップショット等。省略時はライブDB）")
+    parser.add_argument("--verbose", action="store_true", help="全クエリの計画を表示")
+    args = parser.parse_args()
+    sys.exit(main(db=args.db, verbose=args.verbose))
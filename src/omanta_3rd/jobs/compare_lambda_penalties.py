@@ -12,6 +12,12 @@
 
 使用方法:
     python -m omanta_3rd.jobs.compare_lambda_penalties --start 2020-01-01 --end 2025-12-31 --params-id operational_24M --n-trials 200
+
+λ ごとの最適化をやり直さずに比較する場合:
+    - 既存 study の再採点: trial ごとに保存されたリバランス日単位の年率超過リターン
+      （user_attr: per_date_excess）から、rescore_trials.py で任意の λ・集計方法に再採点できる
+    - 多目的 study: optimize_longterm の --objective-variants mean:0,mean:0.03,mean:0.05,mean:0.08
+      で各 λ を1つの study で同時に最適化できる
 """
 
 from __future__ import annotations
@@ -612,7 +618,7 @@ def compare_lambda_penalties(
                 results[f"λ={lambda_val:.2f}"] = {
                     "lambda_penalty": lambda_val,
                     "best_objective_value": best_value,  # train期間での目的関数値
-                    "train_mean_excess_return_pct": train_perf.get("mean_annual_excess_return_pct", 0.0),
+                    "train_mean_excess_return_pct": train_perf.get("mean_annual_excess_return_pct") or 0.0,
                     "test_mean_excess_return_pct": test_perf.get("mean_annual_excess_return_pct", 0.0),
                     "avg_annualized_excess_return_pct": backtest_result["avg_annualized_excess_return_pct"],  # test期間での平均超過（test_dates統一後）
                     "p10_excess_return_pct": backtest_result["p10_excess_return_pct"],
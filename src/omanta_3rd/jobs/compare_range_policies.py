@@ -24,20 +24,48 @@ import json
 import sys
 from pathlib import Path
 from datetime import datetime
+from functools import partial
 from typing import Dict, Any, List, Optional, Literal
 import pandas as pd
 import numpy as np
 
-from ..infra.db import connect_db
 from ..jobs.batch_longterm_run import get_monthly_rebalance_dates
-from ..jobs.batch_longterm_run_with_regime import run_monthly_portfolio_with_regime
-from ..backtest.performance_from_dataframe import calculate_portfolio_performance_from_dataframe
+from ..backtest.regime_simulator import (
+    HOLD,
+    ParamsOutcomeTable,
+    RegimePolicy,
+    build_portfolio_for_params,
+    simulate_policy,
+)
 from ..config.settings import PROJECT_ROOT
-from ..config.params_registry import get_registry_entry
-from ..features.loader import _snap_price_date
-from ..market.regime import get_market_regime
 from dateutil.relativedelta import relativedelta
-from ..backtest.metrics import calculate_annualized_return_from_period, calculate_percentile
+from ..backtest.metrics import calculate_percentile
+
+
+# rangeレジームのポリシー → params_id（HOLD は前回params_id維持）
+RANGE_POLICY_PARAMS_IDS = {
+    "12M_momentum": "12M_momentum",
+    "hysteresis": HOLD,
+    "24M": "operational_24M",
+}
+
+
+def build_range_policy(
+    range_policy: Literal["12M_momentum", "hysteresis", "24M"],
+    name: Optional[str] = None,
+) -> RegimePolicy:
+    """rangeレジームのポリシーから RegimePolicy を作成（up/down は 12M_momentum）"""
+    if range_policy not in RANGE_POLICY_PARAMS_IDS:
+        raise ValueError(f"Unknown range_policy: {range_policy}")
+    return RegimePolicy.from_mapping(
+        name or f"range → {range_policy}",
+        {
+            "up": "12M_momentum",
+            "down": "12M_momentum",  # 12M_reversalを除外したため
+            "range": RANGE_POLICY_PARAMS_IDS[range_policy],
+        },
+        initial_params_id="12M_momentum",  # ヒステリシスの初回
+    )
 
 
 def run_regime_switching_with_hysteresis(
@@ -46,6 +74,7 @@ def run_regime_switching_with_hysteresis(
     range_policy: Literal["12M_momentum", "hysteresis", "24M"],
     require_full_horizon: bool = True,
     save_to_db: bool = False,
+    outcomes: Optional[ParamsOutcomeTable] = None,
 ) -> Dict[str, Any]:
     """
     ヒステリシス対応のレジーム切替を実行
@@ -58,146 +87,33 @@ def run_regime_switching_with_hysteresis(
             - "hysteresis": range → 前回params_id維持
             - "24M": range → operational_24M（現状）
         require_full_horizon: 満了窓のみ集計するか
-        save_to_db: データベースに保存するか
+        save_to_db: データベースに保存するか（outcomes を渡した場合は無視）
+        outcomes: 共有する ParamsOutcomeTable（ポリシー間でポートフォリオ・評価を再利用）
     
     Returns:
         結果辞書（portfolios, portfolio_metadata, performances）
     """
-    portfolios = {}  # {rebalance_date: portfolio_df}
-    portfolio_metadata = {}  # {rebalance_date: {params_id, horizon_months, regime}}
-    last_params_id = None  # 前回のparams_id（ヒステリシス用）
-    
-    # レジームポリシーの基本マッピング（range以外）
-    base_policy = {
-        "up": "12M_momentum",
-        "down": "12M_momentum",  # 12M_reversalを除外したため
-    }
-    
-    for rebalance_date in rebalance_dates:
-        with connect_db() as conn:
-            # レジーム判定
-            regime_info = get_market_regime(conn, rebalance_date)
-            regime = regime_info["regime"]
-            
-            # params_idを決定
-            if regime == "range":
-                if range_policy == "12M_momentum":
-                    params_id = "12M_momentum"
-                elif range_policy == "hysteresis":
-                    # ヒステリシス: 前回のparams_idを維持（初回は12M_momentum）
-                    params_id = last_params_id if last_params_id else "12M_momentum"
-                elif range_policy == "24M":
-                    params_id = "operational_24M"
-                else:
-                    raise ValueError(f"Unknown range_policy: {range_policy}")
-            else:
-                params_id = base_policy.get(regime, "12M_momentum")
-            
-            # ポートフォリオを作成（固定モードで実行）
-            result = run_monthly_portfolio_with_regime(
-                rebalance_date,
-                fixed_params_id=params_id,  # 固定モードで実行
-                calculate_performance=False,
-                as_of_date=as_of_date,
-                save_log=False,
-                save_to_db=save_to_db,
-                allowed_params_ids=None,
-            )
-            
-            if result.get("portfolio_created") and "portfolio" in result:
-                # 満了窓チェック
-                horizon_months = result.get("horizon_months")
-                if horizon_months and require_full_horizon:
-                    rebalance_dt = datetime.strptime(rebalance_date, "%Y-%m-%d")
-                    as_of_dt = datetime.strptime(as_of_date, "%Y-%m-%d")
-                    horizon_end_dt = rebalance_dt + relativedelta(months=horizon_months)
-                    if horizon_end_dt > as_of_dt:
-                        # ホライズン未達のためスキップ（ヒステリシスは更新しない）
-                        continue
-                
-                portfolios[rebalance_date] = result["portfolio"]
-                # 固定モードではregimeが"fixed"になるため、手動でレジーム情報を保存
-                portfolio_metadata[rebalance_date] = {
-                    "params_id": params_id,
-                    "horizon_months": horizon_months,
-                    "regime": regime,  # 手動で保存したレジーム情報
-                }
-                
-                # ヒステリシス用に前回params_idを更新
-                last_params_id = params_id
-    
-    # パフォーマンスを計算
-    performances = []
-    for rebalance_date in portfolios.keys():
-        metadata = portfolio_metadata[rebalance_date]
-        horizon_months = metadata.get("horizon_months")
-        
-        if not horizon_months:
-            continue
-        
-        # eval_end = rebalance_date + horizon_months（ホライズン固定）
-        rebalance_dt = datetime.strptime(rebalance_date, "%Y-%m-%d")
-        eval_end_raw = rebalance_dt + relativedelta(months=horizon_months)
-        eval_end_raw_str = eval_end_raw.strftime("%Y-%m-%d")
-        
-        # require_full_horizonがTrueの場合、eval_end <= as_of_dateを満たすかチェック
-        if require_full_horizon:
-            as_of_dt = datetime.strptime(as_of_date, "%Y-%m-%d")
-            if eval_end_raw > as_of_dt:
-                continue
-        
-        # eval_endを営業日にスナップ
-        with connect_db() as conn:
-            eval_end_snapped = _snap_price_date(conn, min(eval_end_raw_str, as_of_date))
-        
-        portfolio = portfolios[rebalance_date]
-        perf = calculate_portfolio_performance_from_dataframe(
-            portfolio,
-            rebalance_date,
-            eval_end_snapped,
+    if outcomes is None:
+        outcomes = ParamsOutcomeTable(
+            as_of_date,
+            build_portfolio=partial(build_portfolio_for_params, save_to_db=save_to_db),
         )
-        
-        if "error" not in perf:
-            total_return_pct = perf.get("total_return_pct", 0.0)
-            topix_comp = perf.get("topix_comparison", {})
-            topix_return_pct = topix_comp.get("topix_return_pct", 0.0)
-            excess_return_pct = topix_comp.get("excess_return_pct", 0.0)
-            
-            total_return = total_return_pct / 100.0
-            topix_return = topix_return_pct / 100.0
-            excess_return = excess_return_pct / 100.0
-            
-            eval_end_used = perf.get("as_of_date", eval_end_snapped)
-            annualized_ret = calculate_annualized_return_from_period(
-                total_return,
-                rebalance_date,
-                eval_end_used,
-            )
-            annualized_topix_ret = calculate_annualized_return_from_period(
-                topix_return,
-                rebalance_date,
-                eval_end_used,
-            )
-            annualized_excess_ret = annualized_ret - annualized_topix_ret
-            
-            performances.append({
-                "rebalance_date": rebalance_date,
-                "params_id": metadata.get("params_id"),
-                "horizon_months": metadata.get("horizon_months"),
-                "regime": metadata.get("regime"),
-                "eval_end_date": eval_end_used,
-                "total_return_pct": total_return_pct,
-                "topix_return_pct": topix_return_pct,
-                "excess_return_pct": excess_return_pct,
-                "annualized_return_pct": annualized_ret * 100.0,
-                "annualized_topix_return_pct": annualized_topix_ret * 100.0,
-                "annualized_excess_return_pct": annualized_excess_ret * 100.0,
-            })
+    
+    simulation = simulate_policy(
+        outcomes,
+        build_range_policy(range_policy),
+        rebalance_dates,
+        require_full_horizon=require_full_horizon,
+    )
+    portfolios = {
+        d: outcomes.outcome(d, meta["params_id"]).portfolio
+        for d, meta in simulation.portfolio_metadata.items()
+    }
     
     return {
         "portfolios": portfolios,
-        "portfolio_metadata": portfolio_metadata,
-        "performances": performances,
+        "portfolio_metadata": simulation.portfolio_metadata,
+        "performances": simulation.performances,
     }
 
 
@@ -361,6 +277,10 @@ def compare_range_policies(
     
     results = {}
     
+    # 3案で (rebalance_date, params_id) ごとのポートフォリオ・評価を共有
+    # （up/down は3案とも12M_momentumのため、作成はほぼ12M + 24Mの2系列で済む）
+    outcomes = ParamsOutcomeTable(as_of_date)
+    
     for policy_info in policies:
         policy_name = policy_info["name"]
         range_policy = policy_info["policy"]
@@ -373,7 +293,7 @@ def compare_range_policies(
             as_of_date,
             range_policy,
             require_full_horizon=require_full_horizon,
-            save_to_db=False,
+            outcomes=outcomes,
         )
         
         performances = result_data["performances"]
@@ -30,11 +30,9 @@ import numpy as np
 
 from ..infra.db import connect_db
 from ..jobs.batch_longterm_run import get_monthly_rebalance_dates
-from ..jobs.batch_longterm_run_with_regime import run_monthly_portfolio_with_regime
-from ..backtest.performance_from_dataframe import calculate_portfolio_performance_from_dataframe
+from ..backtest.regime_simulator import ParamsOutcomeTable, RegimePolicy, simulate_policy
 from ..config.settings import PROJECT_ROOT
 from ..config.params_registry import get_registry_entry
-from ..features.loader import _snap_price_date
 from ..backtest.metrics import calculate_annualized_return_from_period, calculate_percentile
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
@@ -206,15 +204,20 @@ def compare_regime_switching(
     output_format: Literal["json", "csv", "markdown"] = "json",
     require_full_horizon: bool = True,
     comparison_type: Literal["all", "12m_only"] = "all",
+    outcomes: Optional[ParamsOutcomeTable] = None,
 ) -> Dict[str, Any]:
     """
     切替あり vs なしの比較バックテスト
     
+    各戦略のポートフォリオは (rebalance_date, params_id) ごとに1回だけ作成・評価し、
+    戦略間で共有する（backtest/regime_simulator）。
+    
     Args:
         start_date: 開始日（YYYY-MM-DD）
         end_date: 終了日（YYYY-MM-DD）
         as_of_date: 評価日（YYYY-MM-DD、Noneの場合は最新）
         output_path: 出力パス（Noneの場合は標準出力）
+        outcomes: 共有する ParamsOutcomeTable（同じ as_of_date の比較を続けて実行する場合）
     
     Returns:
         比較結果の辞書
@@ -357,179 +360,55 @@ def compare_regime_switching(
     # 共通のrebalance_date集合を使用
     rebalance_dates = common_dates
     
+    # (rebalance_date, params_id) ごとのポートフォリオ・評価は1回だけ計算し、各戦略はそこから選ぶ
+    if outcomes is None:
+        outcomes = ParamsOutcomeTable(as_of_date)
+    
     for strategy in strategies:
         strategy_name = strategy["name"]
-        print(f"[{strategy_name}] ポートフォリオ作成中...")
+        print(f"[{strategy_name}] ポートフォリオ選択・パフォーマンス集計中...")
         
-        # allowed_params_idsを設定（comparison_typeに応じて）
-        allowed_params_ids = None
-        if comparison_type == "12m_only" and strategy["fixed_params_id"] is None:
+        if strategy["fixed_params_id"]:
+            policy = RegimePolicy.fixed(strategy["fixed_params_id"], name=strategy_name)
+        elif comparison_type == "12m_only":
             # 12Mだけの比較の場合、レジーム切替戦略でも12Mのみに制限
             allowed_params_ids = {"12M_momentum", "12M_reversal"}
             print(f"  [12Mのみ制限] allowed_params_ids: {allowed_params_ids}")
+            policy = RegimePolicy.from_policy_file(strategy_name, allowed_params_ids=allowed_params_ids)
+        else:
+            policy = RegimePolicy.from_policy_file(strategy_name)
         
-        # 各リバランス日でポートフォリオを作成
-        portfolios = {}  # {rebalance_date: portfolio_df}
-        portfolio_metadata = {}  # {rebalance_date: {params_id, horizon_months}}
-        for rebalance_date in rebalance_dates:
-            result = run_monthly_portfolio_with_regime(
-                rebalance_date,
-                fixed_params_id=strategy["fixed_params_id"],
-                calculate_performance=False,  # 後で一括計算
-                as_of_date=as_of_date,
-                save_log=False,
-                save_to_db=False,  # DBに保存しない（メモリ内で完結）
-                allowed_params_ids=allowed_params_ids,
-            )
-            
-            if result.get("portfolio_created") and "portfolio" in result:
-                # params_idとhorizon_monthsを記録
-                params_id = result.get("params_id")
-                if not params_id and strategy["fixed_params_id"]:
-                    # 固定戦略の場合、resultにparams_idが含まれていない可能性がある
-                    params_id = strategy["fixed_params_id"]
-                
-                horizon_months = result.get("horizon_months")
-                if not horizon_months and params_id:
-                    try:
-                        registry_entry = get_registry_entry(params_id)
-                        horizon_months = registry_entry.get("horizon_months")
-                    except Exception as e:
-                        # エラーが発生した場合はスキップ
-                        print(f"警告: {rebalance_date}のhorizon_months取得に失敗: {e}")
-                
-                # レジーム切替戦略の場合、可変ホライズンなので評価可能かチェック
-                # ただし、comparison_type="12m_only"の場合、12Mのみに制限されているため、このチェックは不要
-                if (strategy["fixed_params_id"] is None 
-                    and horizon_months 
-                    and require_full_horizon
-                    and comparison_type != "12m_only"):  # 12Mだけの比較の場合はスキップ（既に12Mのみに制限されている）
-                    # このrebalance_dateで使用されるhorizon_monthsで評価可能かチェック
-                    rebalance_dt = datetime.strptime(rebalance_date, "%Y-%m-%d")
-                    as_of_dt = datetime.strptime(as_of_date, "%Y-%m-%d")
-                    horizon_end_dt = rebalance_dt + relativedelta(months=horizon_months)
-                    if horizon_end_dt > as_of_dt:
-                        # ホライズン未達のためスキップ
-                        continue
-                
-                portfolios[rebalance_date] = result["portfolio"]
-                portfolio_metadata[rebalance_date] = {
-                    "params_id": params_id,
-                    "horizon_months": horizon_months,
-                }
+        # ホライズン未達・スナップ差分が大きい（1週間超、データ欠損）評価終点は除外
+        simulation = simulate_policy(
+            outcomes,
+            policy,
+            rebalance_dates,
+            require_full_horizon=require_full_horizon,
+            max_snap_diff_days=7,
+        )
         
-        # パフォーマンスを計算（メモリ内で完結）
-        print(f"[{strategy_name}] パフォーマンス計算中...")
         performances = []
         annualized_returns = []  # 各ポートフォリオの年率リターン
         annualized_excess_returns = []  # 各ポートフォリオの年率超過リターン
         returns = []  # 総リターン（表示用）
         excess_returns = []  # 超過リターン（表示用）
         
-        for rebalance_date in rebalance_dates:
-            if rebalance_date not in portfolios:
-                continue
-            
-            # 満了窓チェックと評価終点の決定（ホライズン固定評価）
-            metadata = portfolio_metadata.get(rebalance_date, {})
-            horizon_months = metadata.get("horizon_months")
-            
-            if not horizon_months:
-                # horizon_monthsが取得できない場合はスキップ
-                continue
-            
-            # eval_end = rebalance_date + horizon_months（ホライズン固定）
-            rebalance_dt = datetime.strptime(rebalance_date, "%Y-%m-%d")
-            eval_end_raw = rebalance_dt + relativedelta(months=horizon_months)
-            eval_end_raw_str = eval_end_raw.strftime("%Y-%m-%d")
-            
-            # require_full_horizonがTrueの場合、eval_end <= as_of_dateを満たすかチェック
-            as_of_dt = datetime.strptime(as_of_date, "%Y-%m-%d")
-            if require_full_horizon:
-                if eval_end_raw > as_of_dt:
-                    # ホライズン未達のためスキップ
-                    continue
-            
-            # eval_endを営業日にスナップ（価格データが存在する最新の日付を取得）
-            # ただし、as_of_dateを超えないようにする（未来遮断）
-            # 重要: スナップ関数の引数はeval_end_raw_strである必要がある（固定ホライズンを守るため）
-            with connect_db() as conn:
-                eval_end_snapped = _snap_price_date(conn, min(eval_end_raw_str, as_of_date))
-                
-                # スナップ差分が大きい場合（データ欠損で数週間〜数ヶ月戻るケース）は除外（ChatGPT推奨）
-                eval_end_raw_dt = datetime.strptime(eval_end_raw_str, "%Y-%m-%d")
-                eval_end_snapped_dt = datetime.strptime(eval_end_snapped, "%Y-%m-%d")
-                snap_diff_days = (eval_end_raw_dt - eval_end_snapped_dt).days
-                
-                if snap_diff_days > 7:  # 1週間以上のズレは除外
-                    print(f"      [compare_regime_switching] ⚠️  {rebalance_date}のeval_endスナップ差分が大きい（{snap_diff_days}日）のため除外: {eval_end_raw_str} → {eval_end_snapped}")
-                    continue
-                
-                # require_full_horizon=Trueの場合は、固定ホライズン評価を保証するためのアサーション
-                if require_full_horizon:
-                    # require_full_horizon=Trueなら、eval_end_raw <= as_of_dateが保証されている
-                    # また、スナップ差分が小さい（7日以内）ことも確認済み
-                    assert eval_end_raw <= as_of_dt, (
-                        f"require_full_horizon=True but eval_end_raw({eval_end_raw_str}) > as_of_date({as_of_date}). "
-                        f"This should not happen if require_full_horizon check passed."
-                    )
-                    if snap_diff_days > 0:
-                        print(f"      [compare_regime_switching] eval_endを営業日にスナップ: {eval_end_raw_str} → {eval_end_snapped} (差分: {snap_diff_days}日)")
-            
-            # 評価終点はeval_end_snapped（ホライズン固定）を使用
-            # as_of_dateは未来遮断のための上限としてのみ機能
-            portfolio = portfolios[rebalance_date]
-            perf = calculate_portfolio_performance_from_dataframe(
-                portfolio,
-                rebalance_date,
-                eval_end_snapped,  # ホライズン固定の評価終点
-            )
-            
-            if "error" not in perf:
-                total_return_pct = perf.get("total_return_pct", 0.0)
-                topix_comp = perf.get("topix_comparison", {})
-                topix_return_pct = topix_comp.get("topix_return_pct", 0.0)
-                excess_return_pct = topix_comp.get("excess_return_pct", 0.0)
-                
-                total_return = total_return_pct / 100.0  # 小数に変換
-                excess_return = excess_return_pct / 100.0  # 小数に変換
-                
-                returns.append(total_return)
-                excess_returns.append(excess_return)
-                
-                # 各ポートフォリオのリターンを期間で年率化（eval_end_snappedを使用）
-                # perfのas_of_dateにはeval_end_snappedが入っている
-                eval_end_used = perf.get("as_of_date", eval_end_snapped)
-                annualized_ret = calculate_annualized_return_from_period(
-                    total_return,
-                    rebalance_date,
-                    eval_end_used,
-                )
-                annualized_returns.append(annualized_ret)
-                
-                # TOPIXの年率リターンも計算（eval_end_snappedを使用）
-                topix_return = topix_return_pct / 100.0
-                annualized_topix_ret = calculate_annualized_return_from_period(
-                    topix_return,
-                    rebalance_date,
-                    eval_end_used,
-                )
-                annualized_excess_ret = annualized_ret - annualized_topix_ret
-                annualized_excess_returns.append(annualized_excess_ret)
-                
-                # params_idとhorizon_monthsを追加
-                metadata = portfolio_metadata.get(rebalance_date, {})
-                performances.append({
-                    "rebalance_date": rebalance_date,
-                    "params_id": metadata.get("params_id"),
-                    "horizon_months": metadata.get("horizon_months"),
-                    "eval_end_date": eval_end_used,  # 使用した評価終点を記録
-                    "total_return_pct": total_return_pct,
-                    "topix_return_pct": topix_return_pct,
-                    "excess_return_pct": excess_return_pct,
-                    "annualized_return_pct": annualized_ret * 100.0,
-                    "annualized_excess_return_pct": annualized_excess_ret * 100.0,
-                })
+        for perf in simulation.performances:
+            returns.append(perf["total_return_pct"] / 100.0)
+            excess_returns.append(perf["excess_return_pct"] / 100.0)
+            annualized_returns.append(perf["annualized_return_pct"] / 100.0)
+            annualized_excess_returns.append(perf["annualized_excess_return_pct"] / 100.0)
+            performances.append({
+                "rebalance_date": perf["rebalance_date"],
+                "params_id": perf["params_id"],
+                "horizon_months": perf["horizon_months"],
+                "eval_end_date": perf["eval_end_date"],  # 使用した評価終点を記録
+                "total_return_pct": perf["total_return_pct"],
+                "topix_return_pct": perf["topix_return_pct"],
+                "excess_return_pct": perf["excess_return_pct"],
+                "annualized_return_pct": perf["annualized_return_pct"],
+                "annualized_excess_return_pct": perf["annualized_excess_return_pct"],
+            })
         
         # 指標を計算
         if annualized_returns:
@@ -724,6 +603,9 @@ def run_both_comparisons(
     print("=" * 80)
     print()
     
+    # 2つの比較で (rebalance_date, params_id) ごとのポートフォリオ・評価を共有
+    outcomes = ParamsOutcomeTable(as_of_date or end_date)
+    
     # 1. 24Mを含める比較
     print("【比較1: 24Mを含める比較（全戦略の積集合）】")
     print("=" * 80)
@@ -735,6 +617,7 @@ def run_both_comparisons(
         output_format="markdown",
         require_full_horizon=require_full_horizon,
         comparison_type="all",
+        outcomes=outcomes,
     )
     print()
     
@@ -749,6 +632,7 @@ def run_both_comparisons(
         output_format="markdown",
         require_full_horizon=require_full_horizon,
         comparison_type="12m_only",
+        outcomes=outcomes,
     )
     print()
     
@@ -5,9 +5,11 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from ..infra.jquants import JQuantsClient
+from ..infra.maintenance import run_maintenance
 from ..ingest.listed import ingest_listed_info
 from ..ingest.prices import ingest_prices
 from ..ingest.fins import ingest_financial_statements
+from ..ingest.fins_sync import sync_financial_statements
 from ..config.settings import EXECUTION_DATE
 
 
@@ -18,6 +20,10 @@ def main(
     update_financials: bool = True,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    bulk: bool = False,
+    cache_mode: Optional[str] = None,
+    refetch: bool = False,
+    maintenance: bool = True,
 ):
     """
     ETL更新を実行
@@ -29,13 +35,18 @@ def main(
         update_financials: 財務データを更新するか
         start_date: 開始日（YYYY-MM-DD、価格データ取得時に使用）
         end_date: 終了日（YYYY-MM-DD、価格データ取得時に使用）
+        bulk: 価格データをバルクロードモードで書き込むか（複数年のバックフィル用）
+        cache_mode: APIレスポンスキャッシュのモード（off / readwrite / replay / refresh、
+            Noneの場合は環境変数JQUANTS_CACHE_MODE）
+        refetch: 指定期間の取り込み済みの日も取得し直すか（スキーマ変更後の再マッピング用）
+        maintenance: 取り込み後に統計更新・WALチェックポイントを実行するか
     """
     if date is None:
         date = EXECUTION_DATE or datetime.now().strftime("%Y-%m-%d")
     
     print(f"ETL更新を開始します（日付: {date}）")
     
-    client = JQuantsClient()
+    client = JQuantsClient(cache_mode=cache_mode)
     
     if update_listed:
         print("銘柄情報を取得中...")
@@ -46,7 +57,7 @@ def main(
         print("価格データを取得中...")
         if start_date and end_date:
             # 指定された日付範囲を使用
-            ingest_prices(start_date, end_date, client=client)
+            ingest_prices(start_date, end_date, client=client, bulk=bulk, skip_loaded=not refetch)
         else:
             # 過去30日分を取得
             prices_start = (datetime.strptime(date, "%Y-%m-%d") - timedelta(days=30)).strftime("%Y-%m-%d")
@@ -58,14 +69,22 @@ def main(
 
         if start_date and end_date:
             # 指定された日付範囲を使用（財務にも適用）
-            ingest_financial_statements(date_from=start_date, date_to=end_date, client=client)
+            ingest_financial_statements(
+                date_from=start_date, date_to=end_date, client=client, skip_loaded=not refetch
+            )
         else:
-            # デフォルト: 過去90日分を取得
-            date_from = (datetime.strptime(date, "%Y-%m-%d") - timedelta(days=90)).strftime("%Y-%m-%d")
-            ingest_financial_statements(date_from=date_from, date_to=date, client=client)
+            # デフォルト: 前回同期した開示日（ウォーターマーク）の翌日以降だけを取得
+            # （初回は過去90日分）
+            sync_financial_statements(end_date=date, client=client)
 
         print("財務データの取得が完了しました。")
     
+    if client.cache is not None:
+        print(client.cache.summary())
+
+    if maintenance:
+        # 取り込み後の統計更新・WAL切り詰め（VACUUMはしない）
+        print(run_maintenance().summary())
     print("ETL更新が完了しました。")
 
 
@@ -85,6 +104,30 @@ if __name__ == "__main__":
     )
     parser.add_argument("--start", type=str, help="開始日（YYYY-MM-DD、prices/fins 取得時に使用）")
     parser.add_argument("--end", type=str, help="終了日（YYYY-MM-DD、prices/fins 取得時に使用）")
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="価格データをバルクロードモードで書き込む（--start/--end の複数年バックフィル用）",
+    )
+    
+    parser.add_argument(
+        "--cache-mode",
+        type=str,
+        choices=["off", "readwrite", "replay", "refresh"],
+        help="APIレスポンスキャッシュ（replay: キャッシュ済みのレスポンスだけで再取り込み、ネットワーク不使用）",
+    )
+    
+    parser.add_argument(
+        "--refetch",
+        action="store_true",
+        help="--start/--end の期間の取り込み済みの日も取得し直す（--cache-mode replay と組み合わせて再マッピング）",
+    )
+    
+    parser.add_argument(
+        "--no-maintenance",
+        action="store_true",
+        help="取り込み後のDBメンテナンス（ANALYZE / WALチェックポイント）を実行しない",
+    )
     
     args = parser.parse_args()
     
@@ -99,5 +142,9 @@ if __name__ == "__main__":
         update_financials=update_financials,
         start_date=args.start,
         end_date=args.end,
+        bulk=args.bulk,
+        cache_mode=args.cache_mode,
+        refetch=args.refetch,
+        maintenance=not args.no_maintenance,
     )
 
@@ -8,6 +8,8 @@ Train期間で最適化→Holdout期間で固定評価を行い、過学習の
 
 【注意】このスクリプトは月次リバランス型専用です。
 長期保有型の評価には optimize_longterm.py や walk_forward_longterm.py を使用してください。
+
+上位N trial を同じ特徴量キャッシュで一括評価する場合は holdout_pipeline.py を使用してください。
 """
 
 from __future__ import annotations
@@ -0,0 +1,395 @@
+"""
+ホールドアウト評価パイプライン（時系列版）【月次リバランス型用】
+
+holdout_eval_timeseries.py・evaluate_candidates_holdout.py は、Train 期間の最適化と
+Holdout 期間の評価で別々に特徴量・価格データを読み込んでいる。
+
+本パイプラインは Train + Holdout の全リバランス日について FeatureCache を1回だけ構築し
+（HoldoutPlane）、同じデータから次の2つを実行する。
+
+1. 最適化: Optuna には LeakageBarrier で Train 期間に制限したビューだけを渡す
+   （Holdout 日付のキーを含まない辞書なので、誤って参照してもキャッシュミスになる）
+2. Holdout 評価: 上位 N trial のパラメータを同じデータで一括評価し、
+   指標は calculate_metrics_from_timeseries_batch でまとめて計算する
+
+使用方法:
+    python -m omanta_3rd.jobs.holdout_pipeline \\
+        --train-start 2018-01-01 --train-end 2022-12-31 \\
+        --holdout-start 2023-01-01 --holdout-end 2024-12-31 \\
+        --n-trials 200 --top-n 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import optuna
+import pandas as pd
+from optuna.trial import TrialState
+
+from ..backtest.bootstrap import bootstrap_metric_cis
+from ..backtest.eval_common import calculate_metrics_from_timeseries_batch, get_git_commit_hash
+from ..backtest.feature_cache import FeatureCache
+from ..backtest.timeseries import calculate_timeseries_returns_from_portfolios
+from ..jobs.batch_longterm_run import get_monthly_rebalance_dates
+from ..jobs.longterm_run import StrategyParams
+from ..jobs.optimize import EntryScoreParams
+
+
+@dataclass(frozen=True)
+class LeakageBarrier:
+    """
+    Train / Holdout の境界
+
+    train_end_date 以前の日付だけを最適化に使い、Holdout は holdout_start_date 以降、
+    かつ先頭の embargo_months 個のリバランス日を除いた日付で評価する。
+    """
+
+    train_end_date: str
+    holdout_start_date: str
+    embargo_months: int = 0
+
+    def __post_init__(self):
+        if self.holdout_start_date <= self.train_end_date:
+            raise ValueError(
+                f"Holdout開始日({self.holdout_start_date})はTrain終了日({self.train_end_date})より後である必要があります"
+            )
+        if self.embargo_months < 0:
+            raise ValueError("embargo_months は0以上である必要があります")
+
+    def train_dates(self, dates: Sequence[str]) -> List[str]:
+        return [d for d in dates if d <= self.train_end_date]
+
+    def holdout_dates(self, dates: Sequence[str]) -> List[str]:
+        return [d for d in dates if d >= self.holdout_start_date][self.embargo_months:]
+
+    def check_train_dates(self, dates: Sequence[str]) -> None:
+        """Train 期間外の日付が含まれていれば ValueError"""
+        leaked = [d for d in dates if d > self.train_end_date]
+        if leaked:
+            raise ValueError(
+                f"Train期間外の日付が最適化に渡されました（{len(leaked)}件、先頭: {leaked[0]}）"
+            )
+
+
+@dataclass
+class HoldoutPlane:
+    """Train + Holdout の全リバランス日の特徴量・価格データ（1回だけ構築）"""
+
+    barrier: LeakageBarrier
+    train_dates: List[str]
+    holdout_dates: List[str]
+    features_dict: Dict[str, pd.DataFrame]
+    prices_dict: Dict[str, Dict[str, List[float]]]
+    snapshot_path: Optional[str] = None  # 時系列P/Lの価格・TOPIXもここから読む
+
+    @classmethod
+    def build(
+        cls,
+        barrier: LeakageBarrier,
+        train_dates: Sequence[str],
+        holdout_dates: Sequence[str],
+        cache_dir: str = "cache/features",
+        n_jobs: int = -1,
+        snapshot_path: Optional[str] = None,
+    ) -> "HoldoutPlane":
+        train_dates = barrier.train_dates(train_dates)
+        holdout_dates = barrier.holdout_dates(holdout_dates)
+        feature_cache = FeatureCache(cache_dir=cache_dir, snapshot_path=snapshot_path)
+        features_dict, prices_dict = feature_cache.warm(sorted(set(train_dates) | set(holdout_dates)), n_jobs=n_jobs)
+        return cls(barrier, list(train_dates), list(holdout_dates), features_dict, prices_dict, snapshot_path)
+
+    def view(self, dates: Sequence[str]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, List[float]]]]:
+        """指定した日付だけを含む (features_dict, prices_dict)"""
+        dates = set(dates)
+        return (
+            {d: f for d, f in self.features_dict.items() if d in dates},
+            {d: p for d, p in self.prices_dict.items() if d in dates},
+        )
+
+    def train_view(self) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, List[float]]]]:
+        """最適化用のビュー（Train 期間のみ）"""
+        self.barrier.check_train_dates(self.train_dates)
+        return self.view(self.train_dates)
+
+
+def params_from_trial(params: Dict[str, Any]) -> Tuple[StrategyParams, EntryScoreParams]:
+    """objective_timeseries の trial.params（正規化前）から StrategyParams・EntryScoreParams を構築"""
+    from ..jobs.optimize_timeseries import params_from_trial as _params_from_trial
+
+    return _params_from_trial(params)
+
+
+def evaluate_params_batch(
+    params_list: Sequence[Dict[str, Any]],
+    rebalance_dates: Sequence[str],
+    plane: HoldoutPlane,
+    buy_cost_bps: float = 0.0,
+    sell_cost_bps: float = 0.0,
+) -> List[Dict[str, Any]]:
+    """
+    複数パラメータを同じ期間・同じデータで評価
+
+    Returns:
+        timeseries_data のリスト（params_list と同じ順序、ポートフォリオが無い場合は空の系列）
+    """
+    from ..jobs.optimize_timeseries import _select_portfolio_for_rebalance_date
+
+    rebalance_dates = list(rebalance_dates)
+    features_dict, prices_dict = plane.view(rebalance_dates)
+    cost_bps = (buy_cost_bps + sell_cost_bps) / 2.0
+
+    timeseries_list = []
+    for params in params_list:
+        strategy_params, entry_params = params_from_trial(params)
+        strategy_params_dict = asdict(strategy_params)
+        entry_params_dict = asdict(entry_params)
+        portfolios = {}
+        for rebalance_date in rebalance_dates:
+            portfolio = _select_portfolio_for_rebalance_date(
+                rebalance_date,
+                strategy_params_dict,
+                entry_params_dict,
+                features_dict.get(rebalance_date),
+                prices_dict.get(rebalance_date),
+            )
+            if portfolio is not None and not portfolio.empty:
+                portfolios[rebalance_date] = portfolio
+        if not portfolios:
+            timeseries_list.append({"monthly_returns": [], "monthly_excess_returns": [], "equity_curve": [1.0]})
+            continue
+        timeseries_list.append(
+            calculate_timeseries_returns_from_portfolios(
+                portfolios=portfolios,
+                start_date=rebalance_dates[0],
+                end_date=rebalance_dates[-1],
+                rebalance_dates=rebalance_dates,
+                cost_bps=cost_bps,
+                buy_cost_bps=buy_cost_bps,
+                sell_cost_bps=sell_cost_bps,
+                snapshot_path=plane.snapshot_path,
+            )
+        )
+    return timeseries_list
+
+
+def top_trials(study: optuna.Study, top_n: int) -> List[optuna.trial.FrozenTrial]:
+    """完了した trial を目的関数値の降順に上位 top_n 件"""
+    trials = [t for t in study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,)) if t.value is not None]
+    trials.sort(key=lambda t: t.value, reverse=True)
+    return trials[:top_n]
+
+
+def run_holdout_pipeline(
+    train_start_date: str,
+    train_end_date: str,
+    holdout_start_date: str,
+    holdout_end_date: str,
+    n_trials: int = 50,
+    top_n: int = 10,
+    buy_cost_bps: float = 0.0,
+    sell_cost_bps: float = 0.0,
+    seed: Optional[int] = None,
+    embargo_months: int = 0,
+    cache_dir: str = "cache/features",
+    n_jobs: int = -1,
+    n_boot: int = 2000,
+    snapshot_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Train で最適化し、上位 top_n trial を Holdout で一括評価
+
+    Returns:
+        holdout_eval_timeseries.run_holdout_evaluation と同じ形式（最良 trial）に
+        candidates（上位 trial ごとの Train/Holdout 指標）を加えた辞書
+    """
+    from ..jobs.optimize_timeseries import objective_timeseries
+
+    print("=" * 80)
+    print("ホールドアウト評価パイプライン（時系列版）")
+    print("=" * 80)
+
+    barrier = LeakageBarrier(train_end_date, holdout_start_date, embargo_months)
+    plane = HoldoutPlane.build(
+        barrier,
+        get_monthly_rebalance_dates(train_start_date, train_end_date, snapshot_path=snapshot_path),
+        get_monthly_rebalance_dates(holdout_start_date, holdout_end_date, snapshot_path=snapshot_path),
+        cache_dir=cache_dir,
+        n_jobs=n_jobs,
+        snapshot_path=snapshot_path,
+    )
+    print(f"Train期間: {train_start_date} ～ {train_end_date}（リバランス日 {len(plane.train_dates)}件）")
+    print(f"Holdout期間: {holdout_start_date} ～ {holdout_end_date}（リバランス日 {len(plane.holdout_dates)}件、embargo={embargo_months}）")
+    print(f"特徴量: {len(plane.features_dict)}日分、価格データ: {len(plane.prices_dict)}日分")
+    print()
+
+    if not plane.train_dates:
+        return {"error": "Train期間のリバランス日が見つかりませんでした"}
+    if not plane.holdout_dates:
+        return {"error": "Holdout期間のリバランス日が見つかりませんでした"}
+
+    # 1. Train 期間で最適化（Train のビューのみ）
+    train_features, train_prices = plane.train_view()
+    sampler = optuna.samplers.TPESampler(seed=seed) if seed is not None else None
+    study = optuna.create_study(direction="maximize", sampler=sampler)
+    study.optimize(
+        lambda trial: objective_timeseries(
+            trial,
+            plane.train_dates,
+            cost_bps=(buy_cost_bps + sell_cost_bps) / 2.0,
+            n_jobs=1,
+            features_dict=train_features,
+            prices_dict=train_prices,
+            save_to_db=False,
+            snapshot_path=plane.snapshot_path,
+        ),
+        n_trials=n_trials,
+        show_progress_bar=True,
+    )
+
+    trials = top_trials(study, top_n)
+    if not trials:
+        return {"error": "完了したtrialがありません"}
+    params_list = [t.params for t in trials]
+    print(f"最適化完了: best_value={study.best_value:.4f}、上位{len(trials)}件をHoldoutで評価します")
+    print()
+
+    # 2. 上位 trial を Train / Holdout で一括評価（同じデータ）
+    train_metrics = calculate_metrics_from_timeseries_batch(
+        evaluate_params_batch(params_list, plane.train_dates, plane, buy_cost_bps, sell_cost_bps)
+    )
+    holdout_timeseries = evaluate_params_batch(params_list, plane.holdout_dates, plane, buy_cost_bps, sell_cost_bps)
+    holdout_metrics = calculate_metrics_from_timeseries_batch(holdout_timeseries)
+
+    cis = {}
+    if n_boot > 0:
+        cis = bootstrap_metric_cis(
+            {
+                t.number: (ts["monthly_returns"], ts["monthly_excess_returns"])
+                for t, ts in zip(trials, holdout_timeseries)
+                if ts["monthly_returns"]
+            },
+            n_boot=n_boot,
+        )
+
+    candidates = []
+    for t, train_m, holdout_m in zip(trials, train_metrics, holdout_metrics):
+        candidates.append({
+            "trial_number": t.number,
+            "train_value": t.value,
+            "params_raw": t.params,
+            "train_metrics": train_m,
+            "holdout_metrics": holdout_m,
+            "holdout_metrics_ci": cis.get(t.number),
+        })
+        holdout_sharpe = holdout_m.get("sharpe_ratio")
+        print(
+            f"  Trial #{t.number}: Train={t.value:.4f} → Holdout Sharpe="
+            + (f"{holdout_sharpe:.4f}" if holdout_sharpe is not None else "N/A")
+        )
+
+    best = candidates[0]
+    best_strategy, best_entry = params_from_trial(best["params_raw"])
+    config = {
+        "train_start_date": train_start_date,
+        "train_end_date": train_end_date,
+        "holdout_start_date": holdout_start_date,
+        "holdout_end_date": holdout_end_date,
+        "embargo_months": embargo_months,
+        "n_trials": n_trials,
+        "top_n": top_n,
+        "buy_cost_bps": buy_cost_bps,
+        "sell_cost_bps": sell_cost_bps,
+        "seed": seed,
+        "timing": "open-close",
+        "missing_policy": "drop_and_renormalize",
+        "commit_hash": get_git_commit_hash(),
+    }
+    return {
+        "config": config,
+        "optimization": {
+            "best_value": study.best_value,
+            "best_params": {
+                **best["params_raw"],
+                "w_quality": best_strategy.w_quality,
+                "w_value": best_strategy.w_value,
+                "w_growth": best_strategy.w_growth,
+                "w_record_high": best_strategy.w_record_high,
+                "w_size": best_strategy.w_size,
+                "w_pbr": best_strategy.w_pbr,
+                "rsi_weight": best_entry.rsi_weight,
+            },
+            "best_params_raw": best["params_raw"],
+            "n_trials": n_trials,
+        },
+        "train_metrics": best["train_metrics"],
+        "holdout_metrics": best["holdout_metrics"],
+        "candidates": candidates,
+    }
+
+
+def main():
+    """メイン関数"""
+    from ..jobs.holdout_eval_timeseries import generate_markdown_report
+
+    parser = argparse.ArgumentParser(description="ホールドアウト評価パイプライン（時系列版、特徴量共有）")
+    parser.add_argument("--train-start", type=str, required=True, help="Train期間の開始日（YYYY-MM-DD）")
+    parser.add_argument("--train-end", type=str, required=True, help="Train期間の終了日（YYYY-MM-DD）")
+    parser.add_argument("--holdout-start", type=str, required=True, help="Holdout期間の開始日（YYYY-MM-DD）")
+    parser.add_argument("--holdout-end", type=str, required=True, help="Holdout期間の終了日（YYYY-MM-DD）")
+    parser.add_argument("--n-trials", type=int, default=50, help="最適化の試行回数（デフォルト: 50）")
+    parser.add_argument("--top-n", type=int, default=10, help="Holdoutで評価する上位trial数（デフォルト: 10）")
+    parser.add_argument("--embargo-months", type=int, default=0, help="Holdout先頭で除外するリバランス日数（デフォルト: 0）")
+    parser.add_argument("--buy-cost", type=float, default=0.0, help="購入コスト（bps、デフォルト: 0.0）")
+    parser.add_argument("--sell-cost", type=float, default=0.0, help="売却コスト（bps、デフォルト: 0.0）")
+    parser.add_argument("--seed", type=int, help="乱数シード")
+    parser.add_argument("--cache-dir", type=str, default="cache/features", help="キャッシュディレクトリ（デフォルト: cache/features）")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="特徴量キャッシュ構築の並列数（デフォルト: -1）")
+    parser.add_argument("--n-boot", type=int, default=2000, help="Holdout指標の信頼区間のブートストラップ回数（0で無効）")
+    parser.add_argument("--snapshot", type=str, default=None, help="読み取りに使うDBスナップショット（デフォルト: 本番DB）")
+    parser.add_argument("--output-dir", type=str, default="reports", help="出力ディレクトリ（デフォルト: reports）")
+    args = parser.parse_args()
+
+    result = run_holdout_pipeline(
+        train_start_date=args.train_start,
+        train_end_date=args.train_end,
+        holdout_start_date=args.holdout_start,
+        holdout_end_date=args.holdout_end,
+        n_trials=args.n_trials,
+        top_n=args.top_n,
+        buy_cost_bps=args.buy_cost,
+        sell_cost_bps=args.sell_cost,
+        seed=args.seed,
+        embargo_months=args.embargo_months,
+        cache_dir=args.cache_dir,
+        n_jobs=args.n_jobs,
+        n_boot=args.n_boot,
+        snapshot_path=args.snapshot,
+    )
+    if "error" in result:
+        print(f"❌ エラー: {result['error']}")
+        raise SystemExit(1)
+
+    output_dir = Path(args.output_dir)
+    artifacts_dir = Path("artifacts")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = output_dir / f"holdout_pipeline_{timestamp}.md"
+    report_path.write_text(generate_markdown_report(result), encoding="utf-8")
+    print(f"レポートを {report_path} に保存しました")
+
+    artifacts_path = artifacts_dir / f"holdout_pipeline_{timestamp}.json"
+    with open(artifacts_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False, default=str)
+    print(f"生データを {artifacts_path} に保存しました")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""取り込み状況のレポート（欠損日・取り込み計画）
+
+各テーブルの取り込み済み範囲内で、取得が必要なのに行が無い日（欠損日）を表示する。
+--from/--to を指定した場合は、その期間を取り込む際の API 呼び出し日数も表示する。
+
+Usage:
+  python -m omanta_3rd.jobs.ingest_gaps_report
+  python -m omanta_3rd.jobs.ingest_gaps_report --from 2020-01-01 --to 2024-12-31
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import Optional
+
+from ..infra.db import connect_db
+from ..ingest.indices import TOPIX_CODE
+from ..ingest.planner import find_gaps, plan_ingest_dates
+
+# (dataset, table, date_column, where, params, use_learned_holidays)
+_DATASETS = [
+    ("prices", "prices_daily", "date", "", (), True),
+    ("fins", "fins_statements", "disclosed_date", "", (), True),
+    (f"indices:{TOPIX_CODE}", "index_daily", "date", "index_code = ?", (TOPIX_CODE,), False),
+]
+
+
+def main(date_from: Optional[str] = None, date_to: Optional[str] = None, max_dates: int = 20):
+    with connect_db(read_only=True) as conn:
+        for dataset, table, date_column, where, params, use_holidays in _DATASETS:
+            gaps = find_gaps(
+                conn, dataset, table, date_column,
+                date_from=date_from, date_to=date_to, where=where, params=params,
+                use_learned_holidays=use_holidays,
+            )
+            shown = ", ".join(gaps[:max_dates]) + (" ..." if len(gaps) > max_dates else "")
+            print(f"[gaps:{dataset}] {len(gaps)} missing day(s)" + (f": {shown}" if gaps else ""))
+
+            if date_from and date_to:
+                plan = plan_ingest_dates(
+                    conn, dataset, date_from, date_to,
+                    table=table, date_column=date_column, where=where, params=params,
+                    use_learned_holidays=use_holidays,
+                )
+                print(plan.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="取り込み状況のレポート（欠損日・取り込み計画）")
+    parser.add_argument("--from", dest="date_from", type=str, help="開始日（YYYY-MM-DD）")
+    parser.add_argument("--to", dest="date_to", type=str, help="終了日（YYYY-MM-DD）")
+    parser.add_argument("--max-dates", type=int, default=20, help="表示する欠損日の最大数")
+    args = parser.parse_args()
+    main(date_from=args.date_from, date_to=args.date_to, max_dates=args.max_dates)
@@ -30,6 +30,7 @@ from ..backtest.performance import _split_multiplier_between
 from ..features.loader import (
     _snap_price_date, _snap_listed_date, _load_universe, _load_prices_window,
     _save_fy_to_statements, _load_latest_fy, _load_fy_history, _load_latest_forecast,
+    _load_liquidity_60d, _load_split_multipliers,
 )
 
 # -----------------------------
@@ -175,12 +176,15 @@ def build_features(
     px_today = px_today.rename(columns={"close": "price"})
     print(f"[count] prices today codes: {len(px_today)}")
 
-    # Liquidity (60d avg turnover_value) - fixed (no Series groupby(as_index=False))
-    tmp = prices_win[["code", "date", "turnover_value"]].copy()
-    tmp = tmp.sort_values(["code", "date"])
-    tmp = tmp.groupby("code", group_keys=False).tail(60)
-    liq = tmp.groupby("code", as_index=False)["turnover_value"].mean()
-    liq = liq.rename(columns={"turnover_value": "liquidity_60d"})
+    # Liquidity (60d avg turnover_value)
+    # 取り込み時に事前計算した prices_rolling_daily を優先し、未集計なら価格窓から計算
+    liq = _load_liquidity_60d(conn, price_date)
+    if liq is None:
+        tmp = prices_win[["code", "date", "turnover_value"]].copy()
+        tmp = tmp.sort_values(["code", "date"])
+        tmp = tmp.groupby("code", group_keys=False).tail(60)
+        liq = tmp.groupby("code", as_index=False)["turnover_value"].mean()
+        liq = liq.rename(columns={"turnover_value": "liquidity_60d"})
 
     fy_latest = _load_latest_fy(conn, price_date)
     print(f"[count] latest FY rows: {len(fy_latest)}")
@@ -305,6 +309,7 @@ def build_features(
     price_dt = pd.to_datetime(price_date).date()
     
     split_mult_dict = {}
+    fy_end_str_by_code = {}
     for code, fy_end in fy_end_by_code.items():
         if pd.isna(fy_end):
             split_mult_dict[code] = 1.0
@@ -323,9 +328,15 @@ def build_features(
             split_mult_dict[code] = 1.0
             continue
         
-        # 文字列に変換して_split_multiplier_betweenに渡す
-        fy_end_str = fy_end_date.strftime("%Y-%m-%d")
-        split_mult_dict[code] = _split_multiplier_between(conn, code, fy_end_str, price_date)
+        fy_end_str_by_code[code] = fy_end_date.strftime("%Y-%m-%d")
+    
+    # 事前計算済みの累積分割倍率があれば一括計算、なければ銘柄ごとに_split_multiplier_between
+    precomputed_mult = _load_split_multipliers(conn, fy_end_str_by_code, price_date)
+    if precomputed_mult is not None:
+        split_mult_dict.update(precomputed_mult)
+    else:
+        for code, fy_end_str in fy_end_str_by_code.items():
+            split_mult_dict[code] = _split_multiplier_between(conn, code, fy_end_str, price_date)
     
     # dictからmapで流し込む
     df["split_mult_fy_to_price"] = df["code"].map(split_mult_dict).fillna(1.0)
@@ -622,8 +633,8 @@ def build_features(
         df["entry_score"] = np.nan
 
     # Industry-relative valuation scores
-    df["forward_per_pct"] = df.groupby("sector33")["forward_per"].transform(lambda s: _pct_rank(s, ascending=True))
-    df["pbr_pct"] = df.groupby("sector33")["pbr"].transform(lambda s: _pct_rank(s, ascending=True))
+    df["forward_per_pct"] = df.groupby("sector33", observed=True)["forward_per"].transform(lambda s: _pct_rank(s, ascending=True))
+    df["pbr_pct"] = df.groupby("sector33", observed=True)["pbr"].transform(lambda s: _pct_rank(s, ascending=True))
     # パラメータが渡された場合はそれを使用、そうでない場合は既存のPARAMSを使用
     w_forward_per = (strategy_params.w_forward_per if strategy_params else PARAMS.w_forward_per)
     w_pbr = (strategy_params.w_pbr if strategy_params else PARAMS.w_pbr)
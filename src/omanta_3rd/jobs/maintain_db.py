@@ -0,0 +1,69 @@
+"""DBメンテナンスジョブ（統計更新・WALチェックポイント・サイズ監視）
+
+etl_update / update_all_data は取り込み後に、optimize_longterm はスタディ完了後に
+Optuna ストレージに対して自動で実行する。手動で VACUUM する場合や履歴を確認する場合に使用する。
+
+Usage:
+  python -m omanta_3rd.jobs.maintain_db
+  python -m omanta_3rd.jobs.maintain_db --vacuum --full-analyze
+  python -m omanta_3rd.jobs.maintain_db --db optuna_optimization_longterm_studyA.db
+  python -m omanta_3rd.jobs.maintain_db --history
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from ..infra.db import connect_db
+from ..infra.maintenance import load_maintenance_history, run_maintenance
+
+
+def main(
+    db: Optional[str] = None,
+    vacuum: bool = False,
+    full_analyze: bool = False,
+    top: int = 15,
+):
+    report = run_maintenance(Path(db) if db else None, vacuum=vacuum, full_analyze=full_analyze)
+    print(report.summary())
+
+    stats = report.table_stats
+    if not stats.empty:
+        print()
+        print(f"テーブル・インデックス（サイズ上位{top}）:")
+        view = stats.head(top).copy()
+        view["MB"] = view["bytes"] / 1024 / 1024
+        with pd.option_context("display.width", 160, "display.max_columns", None):
+            print(
+                view[["name", "type", "tbl_name", "row_count", "MB", "unused_ratio"]]
+                .to_string(index=False, float_format=lambda v: f"{v:,.2f}")
+            )
+
+
+def show_history(limit: int = 20):
+    with connect_db(read_only=True) as conn:
+        history = load_maintenance_history(conn, limit=limit)
+    if history.empty:
+        print("メンテナンス履歴はありません")
+        return
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(history.to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DBメンテナンス（ANALYZE / WALチェックポイント / サイズ監視）")
+    parser.add_argument("--db", type=str, help="対象DB（省略時はメインDB。Optuna ストレージも指定可）")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM を実行（DBサイズ分の空き容量が必要）")
+    parser.add_argument("--full-analyze", action="store_true", help="PRAGMA optimize ではなく ANALYZE で全統計を作り直す")
+    parser.add_argument("--top", type=int, default=15, help="表示するテーブル・インデックス数")
+    parser.add_argument("--history", action="store_true", help="実行せず、過去のメンテナンス履歴を表示")
+    args = parser.parse_args()
+
+    if args.history:
+        show_history()
+    else:
+        main(db=args.db, vacuum=args.vacuum, full_analyze=args.full_analyze, top=args.top)
@@ -0,0 +1,154 @@
+"""
+長期保有型最適化の multi-fidelity（リバランス日数に対する successive halving）
+
+objective_longterm は1 trial ごとに train の全リバランス日（48〜96日）を評価する。
+固定ホライズン評価では各リバランス日の評価は独立しているため、日付を間引いた評価は
+全日付評価の（ノイズの大きい）近似になる。
+
+- fidelity_date_subsets: 期間全体に均等に散らばる入れ子の日付サブセット
+  （例: 3段階・削減率2 → 4ヶ月ごと → 2ヶ月ごと → 全日付）
+- RungPruner / make_fidelity_pruner: 各段階で、その段階を評価した全 trial の上位 1/reduction_factor
+  だけを次の段階に進める pruner
+- evaluate_multi_fidelity: 段階ごとに評価 → trial.report → 足切り、を行う objective 本体
+
+サブセットは入れ子なので、EvaluationCache を使えば次の段階では追加された日付だけを評価する。
+足切りされた trial は PRUNED になり、study.best_trial などの最終的な順位付けは
+全日付で評価された（COMPLETE の）trial だけで行われる。
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List, Sequence
+
+import optuna
+from optuna.study import StudyDirection
+from optuna.trial import FrozenTrial, TrialState
+
+FIDELITY_PRUNED_ATTR = "fidelity_pruned_n_dates"
+_RUNG_STATES = (TrialState.COMPLETE, TrialState.PRUNED, TrialState.RUNNING)
+
+
+def fidelity_date_subsets(
+    dates: Sequence[str],
+    n_rungs: int = 3,
+    reduction_factor: int = 2,
+    min_dates: int = 6,
+) -> List[List[str]]:
+    """
+    段階ごとの評価日付（入れ子、最後は全日付）
+
+    段階 r（0始まり）は reduction_factor ** (n_rungs - 1 - r) ヶ月ごとの日付。
+    最初の段階が min_dates 日未満になる場合は段階数を減らす。
+
+    Args:
+        dates: 全リバランス日（昇順）
+        n_rungs: 段階数（1の場合は全日付のみ）
+        reduction_factor: 段階ごとの日付数・trial 数の削減率
+        min_dates: 最初の段階の最小日付数
+
+    Returns:
+        [[段階0の日付], ..., [全日付]]
+    """
+    if reduction_factor < 2:
+        raise ValueError(f"reduction_factor は2以上です: {reduction_factor}")
+    dates = list(dates)
+    subsets: List[List[str]] = []
+    for r in range(max(1, n_rungs)):
+        stride = reduction_factor ** (n_rungs - 1 - r)
+        subset = dates[::stride]
+        if stride > 1 and len(subset) < min_dates:
+            continue
+        subsets.append(subset)
+    return subsets
+
+
+class RungPruner(optuna.pruners.BasePruner):
+    """
+    段階（step）ごとの successive halving
+
+    同じ段階の値を報告した全 trial（COMPLETE / PRUNED / RUNNING）の中で
+    上位 ceil(n / reduction_factor) 件に入らない trial を足切りする。
+    COMPLETE の trial は全段階を通過した trial なので、それだけを基準にすると
+    閾値が「生き残りの上位」になり、study が進むほど通過率が下がってしまう。
+    """
+
+    def __init__(self, reduction_factor: int = 2, min_trials_per_rung: int = 10):
+        """
+        Args:
+            reduction_factor: 次の段階に進める割合の逆数
+            min_trials_per_rung: 足切りを始めるまでに、その段階で値を報告した trial 数
+        """
+        if reduction_factor < 2:
+            raise ValueError(f"reduction_factor は2以上です: {reduction_factor}")
+        self.reduction_factor = reduction_factor
+        self.min_trials_per_rung = min_trials_per_rung
+
+    def prune(self, study: optuna.Study, trial: FrozenTrial) -> bool:
+        step = trial.last_step
+        if step is None:
+            return False
+        value = trial.intermediate_values[step]
+        if math.isnan(value):
+            return True
+
+        others = [
+            t.intermediate_values[step]
+            for t in study.get_trials(deepcopy=False, states=_RUNG_STATES)
+            if t.number != trial.number and step in t.intermediate_values
+        ]
+        others = [v for v in others if not math.isnan(v)]
+        n = len(others) + 1
+        if n < self.min_trials_per_rung:
+            return False
+
+        if study.direction == StudyDirection.MAXIMIZE:
+            better = sum(1 for v in others if v > value)
+        else:
+            better = sum(1 for v in others if v < value)
+        return better >= math.ceil(n / self.reduction_factor)
+
+
+def make_fidelity_pruner(
+    reduction_factor: int = 2,
+    min_trials_per_rung: int = 10,
+) -> optuna.pruners.BasePruner:
+    """
+    各段階で上位 1/reduction_factor の trial だけを次の段階に進める pruner
+
+    Args:
+        reduction_factor: 次の段階に進める割合の逆数
+        min_trials_per_rung: 足切りを始めるまでに、その段階で値を報告した trial 数
+    """
+    return RungPruner(reduction_factor, min_trials_per_rung)
+
+
+def evaluate_multi_fidelity(
+    trial: optuna.Trial,
+    date_subsets: Sequence[Sequence[str]],
+    evaluate: Callable[[List[str]], Dict[str, Any]],
+    score: Callable[[Dict[str, Any]], float],
+) -> float:
+    """
+    段階ごとに評価し、最後の段階（全日付）の目的関数値を返す
+
+    途中の段階では score の値を trial.report(value, step=段階) で報告し、
+    pruner が足切りした場合は optuna.TrialPruned を送出する。
+
+    Args:
+        trial: OptunaのTrialオブジェクト
+        date_subsets: fidelity_date_subsets の結果
+        evaluate: 日付リスト → performance
+        score: performance → 目的関数値
+    """
+    value = float("nan")
+    for step, dates in enumerate(date_subsets):
+        value = score(evaluate(list(dates)))
+        if step == len(date_subsets) - 1:
+            break
+        trial.report(value, step)
+        if trial.should_prune():
+            trial.set_user_attr(FIDELITY_PRUNED_ATTR, len(dates))
+            print(f"    [multi_fidelity] Trial {trial.number}: {len(dates)}日の評価で足切り（value={value:.4f}）")
+            raise optuna.TrialPruned(f"multi-fidelity: {len(dates)}日の評価で足切り")
+    return value
@@ -0,0 +1,117 @@
+"""
+長期保有型の目的関数バリアント（集計方法 × 下振れ罰λ）
+
+objective_longterm の目的関数値は、各リバランス日の年率超過リターンから
+「集計値（mean / median / trimmed_mean）+ λ × min(0, P10)」で決まる。
+trial ごとにリバランス日単位の結果を user_attr（per_date_excess）に保存しておけば、
+λ や集計方法を変えた比較は study を再実行せずに再採点（rescore_trials.py）できる。
+
+- ObjectiveVariant: 1つの目的関数（score_longterm_trial と同じ定義）
+- encode_per_date / decode_per_date: リバランス日・年率超過リターンのコンパクトな文字列表現
+  （YYYYMMDD の uint32 + float64 を zlib 圧縮して base64、Optuna の user_attr に保存可能）
+- trial_mean_excess: trial の年率超過リターンの平均（目的関数値とは別）
+"""
+
+from __future__ import annotations
+
+import base64
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from optuna.trial import FrozenTrial
+
+OBJECTIVE_TYPES = ("mean", "median", "trimmed_mean")
+EVALUATION_FAILED_VALUE = -1e9  # 評価不能な trial の目的関数値（score_longterm_trial と同じ）
+PER_DATE_ATTR = "per_date_excess"
+
+
+@dataclass(frozen=True)
+class ObjectiveVariant:
+    """目的関数 = 集計値(objective_type) + lambda_penalty × min(0, P10)"""
+
+    objective_type: str = "mean"
+    lambda_penalty: float = 0.0
+    trim_proportion: float = 0.1
+
+    def __post_init__(self):
+        if self.objective_type not in OBJECTIVE_TYPES:
+            raise ValueError(f"objective_type は {OBJECTIVE_TYPES} のいずれかです: {self.objective_type}")
+
+    @property
+    def name(self) -> str:
+        return f"{self.objective_type}_l{self.lambda_penalty:g}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "ObjectiveVariant":
+        """"median:0.05" 形式（λ省略時は0.0）"""
+        objective_type, _, lam = spec.strip().partition(":")
+        return cls(objective_type.strip(), float(lam) if lam else 0.0)
+
+    def base_excess(self, annual_excess_returns: Sequence[float]) -> float:
+        """集計値（%）。空の場合は0.0"""
+        values = np.asarray(annual_excess_returns, dtype=float)
+        if values.size == 0:
+            return 0.0
+        if self.objective_type == "median":
+            return float(np.median(values))
+        if self.objective_type == "trimmed_mean":
+            # scipy.stats.trim_mean と同じ（上下 int(proportion * n) 件を除外）
+            cut = int(self.trim_proportion * values.size)
+            return float(np.mean(np.sort(values)[cut:values.size - cut]))
+        return float(np.mean(values))
+
+    def downside_penalty(self, p10_excess: float) -> float:
+        """下振れ罰（P10が負の場合のみ）"""
+        return self.lambda_penalty * min(0.0, p10_excess)
+
+    def score(self, annual_excess_returns: Sequence[float]) -> float:
+        """目的関数値（評価不能は EVALUATION_FAILED_VALUE）"""
+        values = np.asarray(annual_excess_returns, dtype=float)
+        if values.size == 0:
+            return EVALUATION_FAILED_VALUE
+        p10 = float(np.percentile(values, 10.0))
+        return self.base_excess(values) + self.downside_penalty(p10)
+
+
+def parse_variants(specs: Optional[Sequence[str] | str]) -> List[ObjectiveVariant]:
+    """"mean:0,mean:0.05,median:0" またはそのリストを ObjectiveVariant のリストに変換"""
+    if not specs:
+        return []
+    if isinstance(specs, str):
+        specs = [s for s in specs.split(",") if s.strip()]
+    return [ObjectiveVariant.parse(s) for s in specs]
+
+
+def encode_per_date(annual_excess_by_rebalance: Sequence[Tuple[str, float]]) -> str:
+    """[(rebalance_date, annual_excess_pct), ...] をコンパクトな文字列に変換"""
+    dates = np.array([int(d.replace("-", "")) for d, _ in annual_excess_by_rebalance], dtype="<u4")
+    values = np.array([v for _, v in annual_excess_by_rebalance], dtype="<f8")
+    payload = np.array([len(dates)], dtype="<u4").tobytes() + dates.tobytes() + values.tobytes()
+    return base64.b64encode(zlib.compress(payload, 9)).decode("ascii")
+
+
+def decode_per_date(encoded: str) -> Tuple[List[str], np.ndarray]:
+    """encode_per_date の逆変換（リバランス日のリスト、年率超過リターン%の配列）"""
+    payload = zlib.decompress(base64.b64decode(encoded))
+    n = int(np.frombuffer(payload[:4], dtype="<u4")[0])
+    dates = np.frombuffer(payload[4:4 + 4 * n], dtype="<u4")
+    values = np.frombuffer(payload[4 + 4 * n:4 + 12 * n], dtype="<f8").copy()
+    return [f"{d // 10000:04d}-{d // 100 % 100:02d}-{d % 100:02d}" for d in dates.tolist()], values
+
+
+def trial_mean_excess(trial: FrozenTrial) -> Optional[float]:
+    """
+    trial の年率超過リターン（リバランス日単位）の平均（%）
+
+    目的関数値は集計方法・λ（多目的ではバリアントごと）で変わるため、平均は
+    user_attr の mean_excess、無ければ per_date_excess から求める（どちらも無ければ None）。
+    """
+    if "mean_excess" in trial.user_attrs:
+        return float(trial.user_attrs["mean_excess"])
+    if PER_DATE_ATTR in trial.user_attrs:
+        _, values = decode_per_date(trial.user_attrs[PER_DATE_ATTR])
+        if values.size:
+            return float(np.mean(values))
+    return None
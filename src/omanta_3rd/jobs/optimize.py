@@ -7,7 +7,7 @@ import json
 import sys
 from dataclasses import replace, fields
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 import numpy as np
 import pandas as pd
 import optuna
@@ -15,7 +15,7 @@ from optuna.visualization import plot_optimization_history, plot_param_importanc
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import multiprocessing as mp
 import sqlite3
-from ..infra.db import connect_db
+from ..infra.db import borrow_db, connect_db
 from ..jobs.longterm_run import (
     StrategyParams,
     build_features,
@@ -27,36 +27,205 @@ from ..backtest.performance import (
     calculate_portfolio_performance,
     save_performance_to_db,
 )
+from ..backtest.feature_matrix import FeatureMatrix
 from ..jobs.batch_longterm_run import get_monthly_rebalance_dates
 
 # ---------------------------------------------------------------------------
 # Re-exports from features/technicals.py（後方互換性維持）
 # ---------------------------------------------------------------------------
 from ..features.technicals import (  # noqa: F401
+    ENTRY_SCORE_LOOKBACK,
     EntryScoreParams,
     _entry_score_with_params,
+    _entry_scores_from_closes,
     _calculate_entry_score_with_params,
 )
+from ..features.utils import _pct_rank_array
 from .progress_window import ProgressWindow, TKINTER_AVAILABLE  # noqa: F401
 from .optimize_timeseries import _select_portfolio_for_rebalance_date  # noqa: F401
 
 
+def _load_entry_closes(price_date: str, codes: List[str]) -> Dict[str, List[float]]:
+    """指定銘柄の price_date までの終値（直近 ENTRY_SCORE_LOOKBACK 本、warm 済み価格データが無い場合用）"""
+    if not codes:
+        return {}
+    placeholders = ",".join("?" * len(codes))
+    # trial ごとに呼ばれるため、接続を開き直さずプールの読み取り専用接続を借りる
+    with borrow_db() as conn:
+        prices_win = pd.read_sql_query(
+            f"""
+            SELECT code, date, adj_close
+            FROM prices_daily
+            WHERE date <= ? AND code IN ({placeholders})
+            ORDER BY code, date
+            """,
+            conn,
+            params=(price_date, *codes),
+        )
+    return {
+        code: g["adj_close"].iloc[-ENTRY_SCORE_LOOKBACK:].tolist()
+        for code, g in prices_win.groupby("code")
+    }
+
+
+def _select_portfolio_from_matrix(
+    feat: FeatureMatrix,
+    strategy_params: StrategyParams,
+    entry_params: EntryScoreParams,
+    prices_data: Optional[Dict[str, List[float]]] = None,
+) -> pd.DataFrame:
+    """
+    FeatureMatrix の列（numpy 配列）に対して直接フィルタ・ランキングを行うポートフォリオ選択
+    
+    手順は _select_portfolio_with_params（DataFrame 版）と同じで、DataFrame には展開しない。
+    entry_score はプール内の銘柄だけ計算する（プール外の entry_score は選定に使われない）。
+    
+    Args:
+        feat: FeatureMatrix
+        strategy_params: StrategyParams
+        entry_params: EntryScoreParams
+        prices_data: warm 済みの価格データ（{code: [adj_close, ...]}、Noneの場合はプール内の銘柄だけDBから取得）
+    
+    Returns:
+        選択されたポートフォリオ
+    """
+    if feat.empty:
+        return pd.DataFrame()
+    
+    def column(name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        values = feat.column(name)
+        return (values if rows is None else values[rows]).astype(np.float64)
+    
+    # フィルタリング（NaN は比較で False になり除外される）
+    keep = np.ones(len(feat), dtype=bool)
+    if strategy_params.liquidity_quantile_cut > 0:
+        liquidity = column("liquidity_60d")
+        valid = liquidity[~np.isnan(liquidity)]
+        if valid.size == 0:
+            return pd.DataFrame()
+        keep &= liquidity >= np.quantile(valid, strategy_params.liquidity_quantile_cut)
+    keep &= column("roe") >= strategy_params.roe_min
+    rows = np.flatnonzero(keep)
+    if rows.size == 0:
+        return pd.DataFrame()
+    sectors = feat.sector_ids[rows]
+    
+    def filled(values: np.ndarray, fill: float) -> np.ndarray:
+        return np.where(np.isnan(values), fill, values)
+    
+    # Value score（業種内の順位）
+    value_score = (
+        strategy_params.w_forward_per * (1.0 - _pct_rank_array(column("forward_per", rows), groups=sectors))
+        + strategy_params.w_pbr * (1.0 - _pct_rank_array(column("pbr", rows), groups=sectors))
+    )
+    
+    # Size score
+    market_cap = column("market_cap", rows)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_mcap = np.where(market_cap > 0, np.log(market_cap), np.nan)
+    size_score = _pct_rank_array(log_mcap)
+    
+    # Quality score
+    quality_score = _pct_rank_array(column("roe", rows))
+    
+    # Growth score
+    growth_score = (
+        0.4 * filled(_pct_rank_array(column("op_growth", rows)), 0.5)
+        + 0.4 * filled(_pct_rank_array(column("profit_growth", rows)), 0.5)
+        + 0.2 * filled(_pct_rank_array(column("op_trend", rows)), 0.5)
+    )
+    
+    # Core score
+    core_score = filled(
+        strategy_params.w_quality * filled(quality_score, 0.0)
+        + strategy_params.w_value * filled(value_score, 0.5)
+        + strategy_params.w_growth * filled(growth_score, 0.5)
+        + strategy_params.w_record_high * filled(column("record_high_forecast_flag", rows), 0.0)
+        + strategy_params.w_size * filled(size_score, 0.5),
+        0.0,
+    )
+    
+    # Pool selection（nlargest と同じく同点は元の順序）
+    pool = np.argsort(-core_score, kind="stable")[: strategy_params.pool_size]
+    pool_rows = rows[pool]
+    pool_core = core_score[pool]
+    pool_sectors = sectors[pool]
+    pool_codes = feat.registry.decode_codes(feat.code_ids[pool_rows])
+    
+    # entry_score（プール内の銘柄だけ）
+    codes = [str(c) for c in pool_codes]
+    if prices_data is None:
+        prices_data = _load_entry_closes(feat.as_of_date, codes)
+    pool_entry = _entry_scores_from_closes(codes, prices_data, entry_params)
+    
+    # Final selection with entry_score（欠損は最後）
+    if strategy_params.use_entry_score:
+        entry_key = np.where(np.isnan(pool_entry), np.inf, -pool_entry)
+        order = np.lexsort((-pool_core, entry_key))
+    else:
+        order = np.arange(len(pool))
+    
+    # Sector cap
+    selected: List[int] = []
+    sector_counts: Dict[int, int] = {}
+    for i in order:
+        sector = int(pool_sectors[i])
+        if sector_counts.get(sector, 0) < strategy_params.sector_cap:
+            selected.append(i)
+            sector_counts[sector] = sector_counts.get(sector, 0) + 1
+            if len(selected) >= strategy_params.target_max:
+                break
+    
+    if len(selected) < strategy_params.target_min:
+        # セクター制限を緩和
+        chosen = set(selected)
+        for i in order:
+            if i in chosen:
+                continue
+            selected.append(i)
+            if len(selected) >= strategy_params.target_min:
+                break
+    
+    if not selected:
+        return pd.DataFrame()
+    
+    selected_idx = np.asarray(selected, dtype=np.int64)
+    return pd.DataFrame(
+        {
+            "rebalance_date": feat.as_of_date,
+            "code": pool_codes[selected_idx],
+            # 等ウェイト
+            "weight": 1.0 / len(selected_idx),
+            "core_score": pool_core[selected_idx],
+            "entry_score": pool_entry[selected_idx],
+            "reason": "",
+        },
+        index=pool_rows[selected_idx],
+    )
+
+
 def _select_portfolio_with_params(
-    feat: pd.DataFrame,
+    feat: Union[pd.DataFrame, FeatureMatrix],
     strategy_params: StrategyParams,
     entry_params: EntryScoreParams,
+    prices_data: Optional[Dict[str, List[float]]] = None,
 ) -> pd.DataFrame:
     """
     パラメータ化されたポートフォリオ選択
     
     Args:
-        feat: 特徴量DataFrame
+        feat: 特徴量DataFrame、または FeatureMatrix（_select_portfolio_from_matrix で列を直接扱う）
         strategy_params: StrategyParams
         entry_params: EntryScoreParams
+        prices_data: warm 済みの価格データ（{code: [adj_close, ...]}、as_of_date まで）。
+            Noneの場合は prices_daily から取得
     
     Returns:
         選択されたポートフォリオ
     """
+    if isinstance(feat, FeatureMatrix):
+        return _select_portfolio_from_matrix(feat, strategy_params, entry_params, prices_data)
+    
     from ..jobs.longterm_run import (
         _pct_rank,
         _log_safe,
@@ -71,21 +240,25 @@ def _select_portfolio_with_params(
     import sys
     sys.stdout.flush()
     
-    # 価格データを取得
-    price_date = feat["as_of_date"].iloc[0]
-    with connect_db() as conn:
-        prices_win = pd.read_sql_query(
-            """
-            SELECT code, date, adj_close
-            FROM prices_daily
-            WHERE date <= ?
-            ORDER BY code, date
-            """,
-            conn,
-            params=(price_date,),
-        )
-    
-    feat = _calculate_entry_score_with_params(feat, prices_win, entry_params)
+    if prices_data is not None:
+        # warm 済みの価格データを使う（trial ごとに prices_daily を読み直さない）
+        feat["entry_score"] = _entry_scores_from_closes(feat["code"].tolist(), prices_data, entry_params)
+    else:
+        # 価格データを取得
+        price_date = feat["as_of_date"].iloc[0]
+        # trial ごとに呼ばれるため、接続を開き直さずプールの読み取り専用接続を借りる
+        with borrow_db() as conn:
+            prices_win = pd.read_sql_query(
+                """
+                SELECT code, date, adj_close
+                FROM prices_daily
+                WHERE date <= ?
+                ORDER BY code, date
+                """,
+                conn,
+                params=(price_date,),
+            )
+        feat = _calculate_entry_score_with_params(feat, prices_win, entry_params)
     
     # フィルタリング
     # 重要: featを破壊的に変更しないため、必ずcopyを作成
@@ -104,10 +277,10 @@ def _select_portfolio_with_params(
         return pd.DataFrame()
     
     # Value score
-    df["forward_per_pct"] = df.groupby("sector33")["forward_per"].transform(
+    df["forward_per_pct"] = df.groupby("sector33", observed=True)["forward_per"].transform(
         lambda s: _pct_rank(s, ascending=True)
     )
-    df["pbr_pct"] = df.groupby("sector33")["pbr"].transform(
+    df["pbr_pct"] = df.groupby("sector33", observed=True)["pbr"].transform(
         lambda s: _pct_rank(s, ascending=True)
     )
     df["value_score"] = (
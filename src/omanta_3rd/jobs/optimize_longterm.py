@@ -25,7 +25,7 @@ import hashlib
 from dataclasses import dataclass, replace, fields
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from typing import Dict, List, Optional, Tuple, Any, Literal
+from typing import Dict, List, Optional, Sequence, Tuple, Any, Literal, Union
 import numpy as np
 import pandas as pd
 import optuna
@@ -42,8 +42,23 @@ from ..jobs.longterm_run import (
 )
 from ..features.loader import _snap_price_date
 from ..jobs.batch_longterm_run import get_monthly_rebalance_dates
+from ..infra.maintenance import maintain_optuna_storage
 from ..backtest.feature_cache import FeatureCache
+from ..backtest.eval_cache import EvaluationCache
 from ..backtest.performance import calculate_portfolio_performance
+from .objective_variants import (
+    ObjectiveVariant,
+    PER_DATE_ATTR,
+    encode_per_date,
+    parse_variants,
+    trial_mean_excess,
+)
+from .multi_fidelity import (
+    FIDELITY_PRUNED_ATTR,
+    evaluate_multi_fidelity,
+    fidelity_date_subsets,
+    make_fidelity_pruner,
+)
 from ..jobs.optimize import (
     EntryScoreParams,
 )
@@ -60,6 +75,7 @@ def _calculate_performance_single_longterm(
     eval_date: str,
     portfolio_df_dict: dict,
     cost_bps: float = 0.0,
+    snapshot_path: Optional[str] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     単一のリバランス日に対するパフォーマンス計算のみ（並列化用）
@@ -69,6 +85,7 @@ def _calculate_performance_single_longterm(
         eval_date: 評価日
         portfolio_df_dict: ポートフォリオDataFrameを辞書化したもの（{'index': [...], 'data': {...}}形式）
         cost_bps: 取引コスト（bps、デフォルト: 0.0）
+        snapshot_path: 価格・TOPIXの読み取りに使うDBスナップショット（ポートフォリオの保存先は本番DB）
     
     Returns:
         パフォーマンス指標の辞書、エラー時はNone
@@ -94,7 +111,9 @@ def _calculate_performance_single_longterm(
             conn.commit()
             
             # パフォーマンスを計算（コストを適用）
-            perf = calculate_portfolio_performance(rebalance_date, eval_date, cost_bps=cost_bps)
+            perf = calculate_portfolio_performance(
+                rebalance_date, eval_date, cost_bps=cost_bps, snapshot_path=snapshot_path
+            )
             if "error" not in perf:
                 return perf
             else:
@@ -257,6 +276,8 @@ def calculate_longterm_performance(
     debug_rebalance_dates: Optional[set] = None,
     return_per_portfolio_details: bool = False,
     return_raw_performances: bool = False,
+    result_cache: Optional[EvaluationCache] = None,
+    snapshot_path: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     長期保有型のパフォーマンスを計算（固定ホライズン評価）
@@ -267,7 +288,7 @@ def calculate_longterm_performance(
         entry_params: EntryScoreParams
         cost_bps: 取引コスト（bps、デフォルト: 0.0）
         n_jobs: 並列実行数（-1でCPU数）
-        features_dict: 特徴量辞書（{rebalance_date: features_df}）
+        features_dict: 特徴量辞書（{rebalance_date: features_df または FeatureMatrix}）
         prices_dict: 価格データ辞書（{rebalance_date: {code: [adj_close, ...]}}）
         horizon_months: 投資ホライズン（月数、必須）
         require_full_horizon: ホライズン未達の期間を除外するか（デフォルト: True）
@@ -277,6 +298,10 @@ def calculate_longterm_performance(
         debug_rebalance_dates: デバッグ出力するリバランス日のセット（Noneの場合は出力なし）
         return_per_portfolio_details: Trueの場合、per_portfolio_details（gross/net/cost情報）を返す（コスト検証用）
         return_raw_performances: Trueの場合、raw_performances（銘柄別寄与分解用）を返す
+        result_cache: パラメータ × リバランス日の評価キャッシュ（EvaluationCache）
+                      require_full_horizon=True の場合のみ使用し、評価済みの日付はポートフォリオ選定・
+                      パフォーマンス計算を省略する
+        snapshot_path: 評価日のスナップ・価格・TOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
     
     Returns:
         パフォーマンス指標の辞書
@@ -305,14 +330,32 @@ def calculate_longterm_performance(
     }
     
     portfolios = {}  # {rebalance_date: portfolio_df}
-    
-    print(f"      [calculate_longterm_performance] ポートフォリオ選定開始 (n_jobs={n_jobs}, リバランス日数={len(rebalance_dates)})")
+
+    # 評価キャッシュ: 固定ホライズン評価の結果はas_of_dateに依存しないため、
+    # eval_end <= as_of_date の日付のみ前回（前fold）の評価結果を再利用する
+    cached_performances = {}  # {rebalance_date: perf}
+    cache_params_key = None
+    if result_cache is not None and require_full_horizon and horizon_months is not None and as_of_date is not None:
+        cache_params_key = result_cache.params_key(strategy_params_dict, entry_params_dict)
+        cache_as_of_dt = datetime.strptime(as_of_date, "%Y-%m-%d")
+        for rebalance_date in rebalance_dates:
+            eval_end_dt = datetime.strptime(rebalance_date, "%Y-%m-%d") + relativedelta(months=horizon_months)
+            if eval_end_dt > cache_as_of_dt:
+                continue
+            perf = result_cache.get(cache_params_key, rebalance_date, horizon_months, cost_bps)
+            if perf is not None:
+                cached_performances[rebalance_date] = perf
+        if cached_performances:
+            print(f"      [calculate_longterm_performance] 評価キャッシュを使用: {len(cached_performances)}/{len(rebalance_dates)}日")
+    select_dates = [d for d in rebalance_dates if d not in cached_performances]
+
+    print(f"      [calculate_longterm_performance] ポートフォリオ選定開始 (n_jobs={n_jobs}, リバランス日数={len(select_dates)})")
     sys.stdout.flush()
     
     # 並列実行: ポートフォリオ選定のみ
     # ProcessPoolExecutorを優先使用（CPU集約的なタスクのため）
     # Windowsで失敗した場合はThreadPoolExecutorにフォールバック
-    if n_jobs > 1 and len(rebalance_dates) > 1:
+    if n_jobs > 1 and len(select_dates) > 1:
         from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
         try:
             print(f"      [calculate_longterm_performance] 並列実行モード (max_workers={n_jobs}, ProcessPoolExecutor)")
@@ -327,7 +370,7 @@ def calculate_longterm_performance(
                         features_dict.get(rebalance_date) if features_dict else None,
                         prices_dict.get(rebalance_date) if prices_dict else None,
                     ): rebalance_date
-                    for rebalance_date in rebalance_dates
+                    for rebalance_date in select_dates
                 }
                 
                 for future in as_completed(futures):
@@ -366,7 +409,7 @@ def calculate_longterm_performance(
                             features_dict.get(rebalance_date) if features_dict else None,
                             prices_dict.get(rebalance_date) if prices_dict else None,
                         ): rebalance_date
-                        for rebalance_date in rebalance_dates
+                        for rebalance_date in select_dates
                     }
                     
                     for future in as_completed(futures):
@@ -394,8 +437,8 @@ def calculate_longterm_performance(
                 # ProcessPoolExecutorとThreadPoolExecutorの両方が失敗した場合は逐次実行
                 print(f"      [calculate_longterm_performance] ⚠️  並列実行に完全に失敗、逐次実行に切り替え: {e2}")
                 sys.stdout.flush()
-                for i, rebalance_date in enumerate(rebalance_dates, 1):
-                    print(f"      [calculate_longterm_performance] 処理中 ({i}/{len(rebalance_dates)}): {rebalance_date}")
+                for i, rebalance_date in enumerate(select_dates, 1):
+                    print(f"      [calculate_longterm_performance] 処理中 ({i}/{len(select_dates)}): {rebalance_date}")
                     sys.stdout.flush()
                     portfolio = _select_portfolio_for_rebalance_date(
                         rebalance_date,
@@ -414,8 +457,8 @@ def calculate_longterm_performance(
         # 逐次実行
         print(f"      [calculate_longterm_performance] 逐次実行モード")
         sys.stdout.flush()
-        for i, rebalance_date in enumerate(rebalance_dates, 1):
-            print(f"      [calculate_longterm_performance] 処理中 ({i}/{len(rebalance_dates)}): {rebalance_date}")
+        for i, rebalance_date in enumerate(select_dates, 1):
+            print(f"      [calculate_longterm_performance] 処理中 ({i}/{len(select_dates)}): {rebalance_date}")
             sys.stdout.flush()
             portfolio = _select_portfolio_for_rebalance_date(
                 rebalance_date,
@@ -431,7 +474,7 @@ def calculate_longterm_performance(
                 print(f"      [calculate_longterm_performance] ⚠️  {rebalance_date}は空ポートフォリオ")
             sys.stdout.flush()
     
-    if not portfolios:
+    if not portfolios and not cached_performances:
         raise RuntimeError("No portfolios were generated")
     
     print(f"      [calculate_longterm_performance] ポートフォリオ選定完了: {len(portfolios)}個")
@@ -462,7 +505,7 @@ def calculate_longterm_performance(
     # まず、評価日の計算とスナップ処理を実行（並列化前の前処理）
     portfolio_tasks = []  # [(rebalance_date, portfolio_df, eval_date), ...]
     
-    with connect_db() as conn:
+    with connect_db(snapshot=snapshot_path) as conn:
         for rebalance_date in sorted(portfolios.keys()):
             portfolio_df = portfolios[rebalance_date]
             
@@ -548,6 +591,7 @@ def calculate_longterm_performance(
                             eval_date,
                             portfolio_df_dict,
                             cost_bps,
+                            snapshot_path,
                         ): rebalance_date
                         for rebalance_date, portfolio_df_dict, eval_date, cost_bps in portfolio_tasks
                     }
@@ -568,7 +612,7 @@ def calculate_longterm_performance(
                 sys.stdout.flush()
                 for rebalance_date, portfolio_df_dict, eval_date, cost_bps_task in portfolio_tasks:
                     try:
-                        perf = _calculate_performance_single_longterm(rebalance_date, eval_date, portfolio_df_dict, cost_bps_task)
+                        perf = _calculate_performance_single_longterm(rebalance_date, eval_date, portfolio_df_dict, cost_bps_task, snapshot_path)
                         if perf is not None:
                             performances.append(perf)
                     except Exception as e2:
@@ -581,14 +625,20 @@ def calculate_longterm_performance(
             sys.stdout.flush()
             for rebalance_date, portfolio_df_dict, eval_date, cost_bps_task in portfolio_tasks:
                 try:
-                    perf = _calculate_performance_single_longterm(rebalance_date, eval_date, portfolio_df_dict, cost_bps_task)
+                    perf = _calculate_performance_single_longterm(rebalance_date, eval_date, portfolio_df_dict, cost_bps_task, snapshot_path)
                     if perf is not None:
                         performances.append(perf)
                 except Exception as e:
                     print(f"      [calculate_longterm_performance] ⚠️  {rebalance_date}のパフォーマンス計算でエラー: {e}")
                     skipped_count += 1
                     skipped_reasons["パフォーマンス計算エラー"] = skipped_reasons.get("パフォーマンス計算エラー", 0) + 1
-    
+
+    # 新たに評価した日付をキャッシュに保存し、キャッシュ済みの評価結果と合わせる
+    if cache_params_key is not None:
+        result_cache.put_many(cache_params_key, horizon_months, cost_bps, performances)
+        performances.extend(cached_performances.values())
+        performances.sort(key=lambda p: p.get("rebalance_date", ""))
+
     # デバッグ出力（指定されたrebalance_dateのみ）
     if debug_rebalance_dates and len(performances) > 0:
         # rebalance_dateからeval_dateを取得するためのマッピングを作成
@@ -694,7 +744,7 @@ def calculate_longterm_performance(
             conn.commit()
     
     # 集計情報を出力
-    total_portfolios = len(portfolios)
+    total_portfolios = len(portfolios) + len(cached_performances)
     evaluated_portfolios = len(performances)
     
     # 使用されたポートフォリオの最大eval_endを計算（確認用）
@@ -728,6 +778,7 @@ def calculate_longterm_performance(
     print(f"        rebalance_date | eval_end_date | holding_years | 備考")
     print(f"        " + "-" * 70)
     rebalance_to_eval = {rd: ed for rd, _, ed, _ in portfolio_tasks}
+    rebalance_to_eval.update({rd: p.get("as_of_date") for rd, p in cached_performances.items()})
     for perf in sorted(performances, key=lambda p: p.get("rebalance_date", "")):
         rebalance_date = perf.get("rebalance_date")
         eval_date_used = perf.get("as_of_date")  # 実際に使用されたeval_date
@@ -793,7 +844,7 @@ def calculate_longterm_performance(
     if not performances:
         raise RuntimeError(
             f"No performances were calculated. "
-            f"Total portfolios: {len(portfolios)}, Skipped: {skipped_count}, "
+            f"Total portfolios: {len(portfolios) + len(cached_performances)}, Skipped: {skipped_count}, "
             f"Reasons: {skipped_reasons}"
         )
     
@@ -900,7 +951,7 @@ def calculate_longterm_performance(
     cumulative_return = np.mean(total_returns) if total_returns else 0.0
     
     # 全体期間での年率化（従来の方法、参考用）
-    first_rebalance = min(portfolios.keys())
+    first_rebalance = min(list(portfolios) + list(cached_performances))
     start_dt = dt.strptime(first_rebalance, "%Y-%m-%d")
     end_dt = as_of_dt
     total_years = (end_dt - start_dt).days / 365.25
@@ -963,8 +1014,9 @@ def calculate_longterm_performance(
         # その他の指標
         "mean_excess_return_pct": mean_excess_return,  # 累積超過リターン（参考用）
         "win_rate": win_rate,
-        "num_portfolios": len(portfolios),
+        "num_portfolios": len(portfolios) + len(cached_performances),
         "num_performances": len(performances),
+        "num_cached_performances": len(cached_performances),  # 評価キャッシュから再利用した件数
         "n_periods": len(annual_excess_returns),  # P10算出に使ったサンプル数（ChatGPT推奨）
         "mean_holding_years": mean_holding_years,
         "total_years": total_years,
@@ -1023,44 +1075,21 @@ def calculate_longterm_performance(
     return result
 
 
-def objective_longterm(
+def suggest_longterm_params(
     trial: optuna.Trial,
-    train_dates: List[str],
     study_type: Literal["A", "B", "C", "A_local"],
-    cost_bps: float = 0.0,
-    n_jobs: int = -1,
-    features_dict: Optional[Dict[str, pd.DataFrame]] = None,
-    prices_dict: Optional[Dict[str, Dict[str, List[float]]]] = None,
-    horizon_months: int = 24,
-    require_full_horizon: bool = True,
-    as_of_date: Optional[str] = None,
-    lambda_penalty: float = 0.0,
-    objective_type: str = "mean",  # "mean", "median", "trimmed_mean"
-    pool_size_override: Optional[int] = None,  # CLIシナリオ用（Noneの場合はStrategyParamsデフォルト）
-    sector_cap_override: Optional[int] = None,  # CLIシナリオ用（Noneの場合はStrategyParamsデフォルト）
-) -> float:
+    pool_size_override: Optional[int] = None,
+    sector_cap_override: Optional[int] = None,
+) -> Tuple[StrategyParams, EntryScoreParams]:
     """
-    Optunaの目的関数（長期保有型）
+    trial からパラメータを提案して StrategyParams / EntryScoreParams を構築（objective_longterm の前半）
     
-    Args:
-        trial: OptunaのTrialオブジェクト
-        train_dates: 学習用リバランス日のリスト
-        study_type: "A"（BB寄り・低ROE閾値）、"B"（Value寄り・ROE閾値やや高め）、
-                    "C"（Study A/B統合・広範囲探索）
-        cost_bps: 取引コスト（bps、デフォルト: 0.0）
-        n_jobs: 並列実行数（-1でCPU数）
-        features_dict: 特徴量辞書（事前計算済み）
-        prices_dict: 価格データ辞書（事前計算済み）
-        horizon_months: 投資ホライズン（月数、デフォルト: 24）
-        require_full_horizon: ホライズン未達の期間を除外するか（デフォルト: True）
-        as_of_date: 評価の打ち切り日（YYYY-MM-DD、Noneの場合はend_dateを使用）
+    study.ask() で得た trial にも使えるため、提案（親プロセス）と評価（ワーカー）を分けて実行できる。
     
-    Returns:
-        最適化対象の値（年率超過リターン、TOPIXに対する超過リターン）
+    Raises:
+        optuna.TrialPruned: RSI / BB Z-score の制約を満たす範囲が無い場合
     """
-    print(f"    [objective_longterm] 関数開始 (Trial {trial.number})")
     import sys
-    sys.stdout.flush()
     
     # StrategyParamsのパラメータ
     # 意味のある範囲で自由に探索（Study C用に拡張）
@@ -1303,24 +1332,27 @@ def objective_longterm(
     print(f"    [objective_longterm] RSI方向: {rsi_direction} ({rsi_direction_str}), BB方向: {bb_direction} ({bb_direction_str})")
     sys.stdout.flush()
     
-    # バックテスト実行（長期保有型）
-    print(f"    [objective_longterm] calculate_longterm_performance呼び出し...")
+    return strategy_params, entry_params
+
+
+def score_longterm_trial(
+    trial: optuna.Trial,
+    perf: Dict[str, Any],
+    strategy_params: StrategyParams,
+    entry_params: EntryScoreParams,
+    horizon_months: int = 24,
+    lambda_penalty: float = 0.0,
+    objective_type: str = "mean",
+    objective_variants: Optional[Sequence[ObjectiveVariant]] = None,
+) -> Union[float, Tuple[float, ...]]:
+    """
+    calculate_longterm_performance の結果から目的関数値を計算し、指標を trial に記録（objective_longterm の後半）
+    
+    objective_variants を指定した場合は多目的 study 用に各バリアントの値のタプルを返す。
+    リバランス日ごとの年率超過リターンは user_attr（per_date_excess）に保存し、
+    rescore_trials.py で任意のバリアントに再採点できるようにする。
+    """
     import sys
-    sys.stdout.flush()
-    perf = calculate_longterm_performance(
-        train_dates,
-        strategy_params,
-        entry_params,
-        cost_bps=cost_bps,
-        n_jobs=n_jobs,
-        features_dict=features_dict,
-        prices_dict=prices_dict,
-        horizon_months=horizon_months,
-        require_full_horizon=require_full_horizon,
-        as_of_date=as_of_date,
-    )
-    print(f"    [objective_longterm] calculate_longterm_performance完了")
-    sys.stdout.flush()
     
     # 目的関数: 各ポートフォリオの年率超過リターンの集計値 - 下振れ罰
     # objective_typeに応じて集計方法を変更（過学習対策）
@@ -1348,29 +1380,20 @@ def objective_longterm(
         sys.stdout.flush()
         trial.set_user_attr("evaluation_failed", True)
         trial.set_user_attr("evaluation_failed_reason", "empty_annual_excess_returns")
+        if objective_variants:
+            return tuple(objective_value for _ in objective_variants)
         return objective_value
     
+    # リバランス日ごとの年率超過リターン（λ・集計方法の再採点用）
+    trial.set_user_attr(PER_DATE_ATTR, encode_per_date(perf.get("annual_excess_by_rebalance") or []))
+    
     # objective_typeに応じて集計値を選択（過学習対策）
-    if objective_type == "median":
-        # median目的（外れ値に強い）
-        base_excess = median_excess
-    elif objective_type == "trimmed_mean":
-        # trimmed mean（上下10%をカット、外れ値に強い）
-        try:
-            from scipy.stats import trim_mean
-            if annual_excess_returns_list and len(annual_excess_returns_list) > 0:
-                base_excess = trim_mean(annual_excess_returns_list, 0.1) * 100  # パーセントに変換
-            else:
-                base_excess = mean_excess  # フォールバック（通常は到達しない）
-        except ImportError:
-            print(f"      [objective_longterm] ⚠️  scipyが利用できないため、trimmed_meanをmeanにフォールバック")
-            base_excess = mean_excess
-    else:  # "mean" (デフォルト)
-        # mean目的（従来通り）
-        base_excess = mean_excess
+    # median: 外れ値に強い、trimmed_mean: 上下10%をカット、mean: 従来通り
+    variant = ObjectiveVariant(objective_type, lambda_penalty)
+    base_excess = variant.base_excess(annual_excess_returns_list)
     
     # 下振れ罰: P10が負の場合はペナルティ、正の場合はボーナス（係数λ）
-    downside_penalty = lambda_penalty * min(0.0, p10_excess)  # P10が負の場合のみペナルティ
+    downside_penalty = variant.downside_penalty(p10_excess)  # P10が負の場合のみペナルティ
     
     # 目的関数: 集計超過 - 下振れ罰
     objective_value = base_excess + downside_penalty
@@ -1430,9 +1453,118 @@ def objective_longterm(
     )
     print(log_msg)
     
+    if objective_variants:
+        values = tuple(v.score(annual_excess_returns_list) for v in objective_variants)
+        trial.set_user_attr("objective_variants", [v.name for v in objective_variants])
+        return values
     return objective_value
 
 
+def objective_longterm(
+    trial: optuna.Trial,
+    train_dates: List[str],
+    study_type: Literal["A", "B", "C", "A_local"],
+    cost_bps: float = 0.0,
+    n_jobs: int = -1,
+    features_dict: Optional[Dict[str, pd.DataFrame]] = None,
+    prices_dict: Optional[Dict[str, Dict[str, List[float]]]] = None,
+    horizon_months: int = 24,
+    require_full_horizon: bool = True,
+    as_of_date: Optional[str] = None,
+    lambda_penalty: float = 0.0,
+    objective_type: str = "mean",  # "mean", "median", "trimmed_mean"
+    pool_size_override: Optional[int] = None,  # CLIシナリオ用（Noneの場合はStrategyParamsデフォルト）
+    sector_cap_override: Optional[int] = None,  # CLIシナリオ用（Noneの場合はStrategyParamsデフォルト）
+    result_cache: Optional[EvaluationCache] = None,
+    objective_variants: Optional[Sequence[ObjectiveVariant]] = None,
+    fidelity_rungs: int = 1,
+    fidelity_reduction_factor: int = 2,
+    snapshot_path: Optional[str] = None,
+) -> Union[float, Tuple[float, ...]]:
+    """
+    Optunaの目的関数（長期保有型）
+    
+    Args:
+        trial: OptunaのTrialオブジェクト
+        train_dates: 学習用リバランス日のリスト
+        study_type: "A"（BB寄り・低ROE閾値）、"B"（Value寄り・ROE閾値やや高め）、
+                    "C"（Study A/B統合・広範囲探索）
+        cost_bps: 取引コスト（bps、デフォルト: 0.0）
+        n_jobs: 並列実行数（-1でCPU数）
+        features_dict: 特徴量辞書（事前計算済み）
+        prices_dict: 価格データ辞書（事前計算済み）
+        horizon_months: 投資ホライズン（月数、デフォルト: 24）
+        require_full_horizon: ホライズン未達の期間を除外するか（デフォルト: True）
+        as_of_date: 評価の打ち切り日（YYYY-MM-DD、Noneの場合はend_dateを使用）
+        result_cache: パラメータ × リバランス日の評価キャッシュ（WFAのfold間で共有）
+        objective_variants: 多目的 study で同時に最適化する目的関数バリアント
+        fidelity_rungs: multi-fidelity の段階数（1の場合は全日付のみで評価）
+                        2以上の場合は間引いた日付から段階的に評価し、study の pruner で足切りする
+        fidelity_reduction_factor: 段階ごとの日付数の削減率
+        snapshot_path: 評価日のスナップ・価格・TOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
+    
+    Returns:
+        最適化対象の値（年率超過リターン、TOPIXに対する超過リターン）
+        （objective_variants 指定時は各バリアントの値のタプル）
+    """
+    print(f"    [objective_longterm] 関数開始 (Trial {trial.number})")
+    import sys
+    sys.stdout.flush()
+    
+    strategy_params, entry_params = suggest_longterm_params(
+        trial,
+        study_type,
+        pool_size_override=pool_size_override,
+        sector_cap_override=sector_cap_override,
+    )
+    
+    date_subsets = fidelity_date_subsets(train_dates, fidelity_rungs, fidelity_reduction_factor)
+    if len(date_subsets) > 1:
+        if objective_variants:
+            raise ValueError("multi-fidelity（fidelity_rungs>1）は多目的 study（objective_variants）と併用できません")
+        if result_cache is None:
+            # 段階間で評価済みの日付を再利用する（サブセットは入れ子）
+            result_cache = EvaluationCache()
+    
+    def evaluate(dates: List[str]) -> Dict[str, Any]:
+        # バックテスト実行（長期保有型）
+        print(f"    [objective_longterm] calculate_longterm_performance呼び出し（{len(dates)}日）...")
+        sys.stdout.flush()
+        perf = calculate_longterm_performance(
+            dates,
+            strategy_params,
+            entry_params,
+            cost_bps=cost_bps,
+            n_jobs=n_jobs,
+            features_dict=features_dict,
+            prices_dict=prices_dict,
+            horizon_months=horizon_months,
+            require_full_horizon=require_full_horizon,
+            as_of_date=as_of_date,
+            result_cache=result_cache,
+            snapshot_path=snapshot_path,
+        )
+        print(f"    [objective_longterm] calculate_longterm_performance完了")
+        sys.stdout.flush()
+        return perf
+    
+    def score(perf: Dict[str, Any]) -> Union[float, Tuple[float, ...]]:
+        return score_longterm_trial(
+            trial,
+            perf,
+            strategy_params,
+            entry_params,
+            horizon_months=horizon_months,
+            lambda_penalty=lambda_penalty,
+            objective_type=objective_type,
+            objective_variants=objective_variants,
+        )
+    
+    if len(date_subsets) > 1:
+        return evaluate_multi_fidelity(trial, date_subsets, evaluate, score)
+    return score(evaluate(train_dates))
+
+
 def _make_trials_log_callback(random_seed: int, log_path: str):
     """Stage0/Stage1 coarse gate 用: trial 完了ごとに scenario_id, seed, median_2022 等を JSONL に追記する。"""
     def callback(study: optuna.Study, trial: optuna.Trial) -> None:
@@ -1487,6 +1619,10 @@ def main(
         local_search_params_json: Optional[str] = None,  # 局所探索の中心となる最適化結果JSONファイルのパス
         pool_size: Optional[int] = None,  # 銘柄プールサイズ（Noneの場合はStrategyParamsのデフォルト80）
         sector_cap_max: Optional[int] = None,  # 1業種あたりの最大銘柄数（Noneの場合はデフォルト4）
+        objective_variants: Optional[Sequence[str] | str] = None,  # 多目的モード（例: "mean:0,mean:0.05,median:0"）
+        fidelity_rungs: int = 1,  # multi-fidelity の段階数（1で無効）
+        fidelity_reduction_factor: int = 2,  # 段階ごとの日付数・trial 数の削減率
+        snapshot_path: Optional[str] = None,  # 読み取りに使うDBスナップショット（Noneの場合は本番DB）
 ):
     """
     長期保有型の最適化を実行
@@ -1514,10 +1650,25 @@ def main(
                     **重要**: 未来参照リークを防ぐため、end_dateをデフォルトとして使用
         train_end_date: 学習期間の終了日（YYYY-MM-DD、Noneの場合はtrain_ratioを使用）
                        **重要**: 時系列リーク対策のため、明示的に指定することを推奨
+        objective_variants: 同時に最適化する目的関数バリアント（"集計方法:λ" のリストまたはカンマ区切り）
+                            指定した場合は多目的 study となり、lambda_penalty/objective_type は無視される。
+                            最良試行はパレート解のうち先頭バリアントの値が最大の trial
+        fidelity_rungs: multi-fidelity の段階数（2以上で有効）。trial はまず間引いた日付
+                        （例: 3段階・削減率2なら4ヶ月ごと）で評価し、各段階で上位 1/削減率 に
+                        入った trial だけを次の段階（最後は全日付）に進める。
+                        最良試行は全日付で評価した trial から選ぶ。n_trials は足切りされた trial を含む試行数
+        fidelity_reduction_factor: 段階ごとの日付数・trial 数の削減率
+        snapshot_path: リバランス日・特徴量・価格の読み取りに使うDBスナップショット
+                       （python -m omanta_3rd.jobs.snapshot_db で作成、Noneの場合は本番DB）
     """
     # BLASスレッドを1に設定
     _setup_blas_threads()
     
+    variants = parse_variants(objective_variants)
+    multi_fidelity = fidelity_rungs > 1
+    if multi_fidelity and variants:
+        raise ValueError("multi-fidelity（--fidelity-rungs>1）は多目的モード（--objective-variants）と併用できません")
+    
     # as_of_dateが指定されていない場合、end_dateを使用（DB MAX(date)は使わない）
     if as_of_date is None:
         as_of_date = end_date
@@ -1543,6 +1694,10 @@ def main(
     print(f"試行回数: {n_trials}")
     print(f"取引コスト: {cost_bps} bps")
     print(f"ランダムシード: {random_seed}")
+    if variants:
+        print(f"目的関数（多目的）: {', '.join(v.name for v in variants)}")
+    if multi_fidelity:
+        print(f"multi-fidelity: {fidelity_rungs}段階、削減率{fidelity_reduction_factor}")
     if pool_size is not None or sector_cap_max is not None:
         print(f"銘柄集合レバー: pool_size={pool_size or 80}, sector_cap={sector_cap_max or 4}")
     print("=" * 80)
@@ -1553,7 +1708,7 @@ def main(
     # test_datesの決定にはas_of_date（または元のend_date）を使用する必要がある
     # そうしないと、train_end_date以降にtest_datesが存在しない可能性がある
     evaluation_end_date = as_of_date if as_of_date else end_date
-    rebalance_dates = get_monthly_rebalance_dates(start_date, evaluation_end_date)
+    rebalance_dates = get_monthly_rebalance_dates(start_date, evaluation_end_date, snapshot_path=snapshot_path)
     print(f"リバランス日数: {len(rebalance_dates)}")
     print(f"最初: {rebalance_dates[0] if rebalance_dates else 'N/A'}")
     print(f"最後: {rebalance_dates[-1] if rebalance_dates else 'N/A'}")
@@ -1657,13 +1812,15 @@ def main(
     print("=" * 80)
     print("特徴量キャッシュを構築します...")
     print("=" * 80)
-    feature_cache = FeatureCache(cache_dir=cache_dir)
-    features_dict, prices_dict = feature_cache.warm(
+    feature_cache = FeatureCache(cache_dir=cache_dir, snapshot_path=snapshot_path)
+    # 特徴量は FeatureMatrix（float32行列 + int ID）で保持し、ワーカーへの受け渡しを軽くする
+    features_dict, prices_dict = feature_cache.warm_matrices(
         rebalance_dates, 
         n_jobs=bt_workers if bt_workers > 0 else -1,
-        force_rebuild=force_rebuild_cache
+        force_rebuild=force_rebuild_cache,
     )
-    print(f"[FeatureCache] 特徴量: {len(features_dict)}日分、価格データ: {len(prices_dict)}日分")
+    matrix_mb = sum(m.nbytes for m in features_dict.values()) / 1024 / 1024
+    print(f"[FeatureCache] 特徴量: {len(features_dict)}日分（{matrix_mb:.1f}MB）、価格データ: {len(prices_dict)}日分")
     print()
     
     # Optunaスタディを作成
@@ -1678,11 +1835,12 @@ def main(
     sampler = optuna.samplers.TPESampler(seed=random_seed)
     
     study = optuna.create_study(
-        direction="maximize",
+        **({"directions": ["maximize"] * len(variants)} if variants else {"direction": "maximize"}),
         study_name=study_name,
         storage=storage,
         load_if_exists=True,
         sampler=sampler,
+        pruner=make_fidelity_pruner(fidelity_reduction_factor) if multi_fidelity else None,
     )
     
     # 初期点として投入するパラメータを読み込む（指定されている場合）
@@ -1741,9 +1899,17 @@ def main(
                     print(f"   初期点の投入をスキップします。")
             print()
     
+    def _count_finished() -> int:
+        # multi-fidelity では間引いた日付で足切りされた trial も評価済みとして数える
+        return len([
+            t for t in study.trials
+            if t.state == TrialState.COMPLETE
+            or (multi_fidelity and t.state == TrialState.PRUNED and FIDELITY_PRUNED_ATTR in t.user_attrs)
+        ])
+    
     # 既存のtrial数を確認（load_if_exists=Trueの場合）
     existing_trials = len(study.trials)
-    existing_completed = len([t for t in study.trials if t.state == TrialState.COMPLETE])
+    existing_completed = _count_finished()
     if existing_trials > 0:
         print(f"既存のstudyを読み込みました（既存trial数: {existing_trials}, 完了: {existing_completed}）")
         print(f"新規に{n_trials}回の正常計算を追加します（合計目標: {existing_completed + n_trials}回の完了trial）")
@@ -1804,7 +1970,14 @@ def main(
         objective_type=objective_type,
         pool_size_override=pool_size,
         sector_cap_override=sector_cap_max,
+        objective_variants=variants or None,
+        fidelity_rungs=fidelity_rungs,
+        fidelity_reduction_factor=fidelity_reduction_factor,
+        snapshot_path=snapshot_path,
     )
+    if multi_fidelity:
+        subsets = fidelity_date_subsets(train_dates, fidelity_rungs, fidelity_reduction_factor)
+        print(f"multi-fidelity の評価日数: {' → '.join(str(len(d)) for d in subsets)}")
     
     # 既存の完了trial数を考慮
     initial_completed = existing_completed
@@ -1848,10 +2021,7 @@ def main(
         )
         
         # 完了したtrial数をカウント（COMPLETE状態のみ = 正常に計算が完了したtrial）
-        completed_trials = len([
-            t for t in study.trials 
-            if t.state == TrialState.COMPLETE
-        ])
+        completed_trials = _count_finished()
         
         complete_count = completed_trials
         pruned_count = len([t for t in study.trials if t.state == TrialState.PRUNED])
@@ -1871,18 +2041,50 @@ def main(
     pruned_count = len([t for t in study.trials if t.state == TrialState.PRUNED])
     total_trials = len(study.trials)
     print(f"✓ 最適化完了（完了trial数: {completed_trials}/{target_completed}, 新規完了: {new_completed}/{n_trials}, 総試行数: {total_trials}, pruned: {pruned_count}）")
+    if multi_fidelity:
+        full_count = len([t for t in study.trials if t.state == TrialState.COMPLETE])
+        print(f"  multi-fidelity: 全日付で評価したtrial {full_count}件（足切り {completed_trials - full_count}件）")
+    
+    # スタディ中に伸びた Optuna ストレージの WAL を切り詰める
+    try:
+        report = maintain_optuna_storage(storage)
+        if report is not None:
+            print(report.summary())
+    except Exception as e:
+        print(f"⚠️  Optunaストレージのメンテナンスに失敗しました: {e}")
     
     # 結果表示
     print()
     print("=" * 80)
     print(f"【最適化結果 - Study {study_type}】")
     print("=" * 80)
-    print(f"最良試行: {study.best_trial.number}")
-    print(f"最良値（年率超過リターン・平均）: {study.best_value:.4f}%")
+    if variants:
+        # 多目的: パレート解のうち先頭バリアントの値が最大の trial
+        pareto_trials = study.best_trials
+        best_trial = max(pareto_trials, key=lambda t: t.values[0])
+        best_value = best_trial.values[0]
+        print(f"パレート解: {len(pareto_trials)}件")
+        for t in sorted(pareto_trials, key=lambda t: t.values[0], reverse=True):
+            values_str = ", ".join(f"{v.name}={x:.4f}%" for v, x in zip(variants, t.values))
+            print(f"  Trial {t.number}: {values_str}")
+    else:
+        pareto_trials = []
+        best_trial = study.best_trial
+        best_value = study.best_value
+    # 目的関数値は集計方法・λ込みの値なので、年率超過リターンの平均とは分けて記録する
+    if variants:
+        objective_values = dict(zip((v.name for v in variants), best_trial.values))
+    else:
+        objective_values = {ObjectiveVariant(objective_type, lambda_penalty).name: best_value}
+    train_mean_excess = trial_mean_excess(best_trial)
+    print(f"最良試行: {best_trial.number}")
+    for name, value in objective_values.items():
+        print(f"最良値（目的関数 {name}）: {value:.4f}%")
+    if train_mean_excess is not None:
+        print(f"年率超過リターン・平均（train）: {train_mean_excess:.4f}%")
     print()
     
     # 順張り/逆張りの方向と幅を表示
-    best_trial = study.best_trial
     rsi_direction = best_trial.user_attrs.get("rsi_direction", "不明")
     bb_direction = best_trial.user_attrs.get("bb_direction", "不明")
     rsi_width = best_trial.user_attrs.get("rsi_width", None)
@@ -1907,7 +2109,7 @@ def main(
     print()
     
     print("最良パラメータ:")
-    for key, value in study.best_params.items():
+    for key, value in best_trial.params.items():
         # categoricalパラメータ（文字列）の場合はフォーマットしない
         if isinstance(value, str):
             print(f"  {key}: {value}")
@@ -1923,7 +2125,7 @@ def main(
     print("=" * 80)
     
     # 最良パラメータを取得
-    best_params = study.best_params
+    best_params = best_trial.params
     
     # StrategyParamsを構築
     w_quality = best_params["w_quality"]
@@ -2018,6 +2220,7 @@ def main(
                 require_full_horizon=True,  # ホライズン未達の期間を除外
                 as_of_date=as_of_date,
                 debug_rebalance_dates={"2023-01-31"} if "2023-01-31" in test_dates else None,  # デバッグ出力
+                snapshot_path=snapshot_path,
             )
         except RuntimeError as e:
             # test期間の評価が失敗した場合（例：すべてホライズン未達）、
@@ -2084,11 +2287,14 @@ def main(
     
     # 可視化
     try:
-        fig1 = plot_optimization_history(study)
+        # 多目的の場合は先頭バリアントの値で描画
+        target = (lambda t: t.values[0]) if variants else None
+        target_name = variants[0].name if variants else "Objective Value"
+        fig1 = plot_optimization_history(study, target=target, target_name=target_name)
         fig1.write_image(f"optimization_history_{study_name}.png")
         print(f"最適化履歴を保存: optimization_history_{study_name}.png")
         
-        fig2 = plot_param_importances(study)
+        fig2 = plot_param_importances(study, target=target, target_name=target_name)
         fig2.write_image(f"param_importances_{study_name}.png")
         print(f"パラメータ重要度を保存: param_importances_{study_name}.png")
     except Exception as e:
@@ -2106,9 +2312,9 @@ def main(
         "random_seed": random_seed,
         "cost_bps": cost_bps,
         "best_trial": {
-            "number": study.best_trial.number,
-            "value": study.best_value,
-            "params": study.best_params,
+            "number": best_trial.number,
+            "value": best_value,
+            "params": best_trial.params,
         },
         # 重要: test_datesとtrain_datesを保存（compare_lambda_penaltiesで使用）
         "train_dates": train_dates,
@@ -2120,7 +2326,8 @@ def main(
         "num_train_periods": len(train_dates),
         "num_test_periods": len(test_dates),
         "train_performance": {
-            "mean_annual_excess_return_pct": study.best_value,
+            "mean_annual_excess_return_pct": train_mean_excess,
+            **objective_values,
         },
         "test_performance": {
             "mean_annual_excess_return_pct": test_perf["mean_annual_excess_return_pct"],
@@ -2161,6 +2368,12 @@ def main(
         "sector_cap": strategy_params.sector_cap,
         "scenario_id": f"S{strategy_params.pool_size}_{strategy_params.sector_cap}",
     }
+    if variants:
+        result_data["objective_variants"] = [v.name for v in variants]
+        result_data["pareto_front"] = [
+            {"number": t.number, "values": dict(zip(result_data["objective_variants"], t.values)), "params": t.params}
+            for t in pareto_trials
+        ]
     
     with open(result_file, "w", encoding="utf-8") as f:
         json.dump(result_data, f, indent=2, ensure_ascii=False)
@@ -2204,6 +2417,14 @@ if __name__ == "__main__":
                        help="銘柄プールサイズ（Noneの場合はStrategyParamsのデフォルト80、シナリオ実行用）")
     parser.add_argument("--sector-cap-max", type=int, default=None,
                        help="1業種あたりの最大銘柄数（Noneの場合はデフォルト4、シナリオ実行用）")
+    parser.add_argument("--fidelity-rungs", type=int, default=1,
+                       help="multi-fidelityの段階数（2以上で有効、間引いた日付で評価し上位のtrialだけ全日付で評価、デフォルト: 1）")
+    parser.add_argument("--fidelity-reduction-factor", type=int, default=2,
+                       help="multi-fidelityの段階ごとの日付数・trial数の削減率（デフォルト: 2）")
+    parser.add_argument("--objective-variants", type=str, default=None,
+                       help="多目的モードで同時に最適化する目的関数（例: mean:0,mean:0.05,median:0、指定時は--lambda-penalty/--objective-typeを無視）")
+    parser.add_argument("--snapshot", type=str, default=None,
+                       help="読み取りに使うDBスナップショット（python -m omanta_3rd.jobs.snapshot_db で作成、Noneの場合は本番DB）")
 
     args = parser.parse_args()
     
@@ -2234,5 +2455,9 @@ if __name__ == "__main__":
         initial_params_json=args.initial_params_json,
         pool_size=args.pool_size,
         sector_cap_max=args.sector_cap_max,
+        objective_variants=args.objective_variants,
+        fidelity_rungs=args.fidelity_rungs,
+        fidelity_reduction_factor=args.fidelity_reduction_factor,
+        snapshot_path=args.snapshot,
     )
 
@@ -53,6 +53,43 @@ from ..backtest.feature_cache import FeatureCache
 from ..features.technicals import EntryScoreParams  # noqa: F401
 from .progress_window import ProgressWindow, TKINTER_AVAILABLE
 
+# エントリースコアの base と max の最小幅（objective_timeseries の探索制約）
+RSI_MIN_WIDTH = 10.0  # 緩和: 20.0 → 10.0
+BB_Z_MIN_WIDTH = 0.5  # 緩和: 1.0 → 0.5
+_CORE_WEIGHT_KEYS = ("w_quality", "w_value", "w_growth", "w_record_high", "w_size")
+
+
+def params_from_trial(params: Dict[str, Any]) -> Tuple[StrategyParams, EntryScoreParams]:
+    """
+    objective_timeseries の trial.params（正規化前）から StrategyParams・EntryScoreParams を構築
+
+    Core Score 重みは合計=1に正規化し、w_pbr=1-w_forward_per、rsi_weight=1-bb_weight とする。
+    objective_timeseries もこの関数でパラメータを組み立てる（保存済み trial の再評価と同じ定義）。
+    """
+    total = sum(params[k] for k in _CORE_WEIGHT_KEYS)
+    weights = {k: params[k] / total for k in _CORE_WEIGHT_KEYS}
+    strategy_params = replace(
+        StrategyParams(),
+        target_min=12,
+        target_max=12,
+        w_forward_per=params["w_forward_per"],
+        w_pbr=1.0 - params["w_forward_per"],
+        roe_min=params["roe_min"],
+        liquidity_quantile_cut=params["liquidity_quantile_cut"],
+        **weights,
+    )
+    entry_params = EntryScoreParams(
+        rsi_base=params["rsi_base"],
+        rsi_max=params["rsi_max"],
+        bb_z_base=params["bb_z_base"],
+        bb_z_max=params["bb_z_max"],
+        bb_weight=params["bb_weight"],
+        rsi_weight=1.0 - params["bb_weight"],
+        rsi_min_width=RSI_MIN_WIDTH,
+        bb_z_min_width=BB_Z_MIN_WIDTH,
+    )
+    return strategy_params, entry_params
+
 
 def run_backtest_for_optimization_timeseries(
     rebalance_dates: List[str],
@@ -65,6 +102,7 @@ def run_backtest_for_optimization_timeseries(
     features_dict: Optional[Dict[str, pd.DataFrame]] = None,
     prices_dict: Optional[Dict[str, Dict[str, List[float]]]] = None,
     save_to_db: bool = True,
+    snapshot_path: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     最適化用のバックテスト実行（時系列版、並列計算対応、キャッシュ対応）
@@ -83,6 +121,7 @@ def run_backtest_for_optimization_timeseries(
         features_dict: 特徴量辞書（{rebalance_date: features_df}、Noneの場合はDBから取得）
         prices_dict: 価格データ辞書（{rebalance_date: {code: [adj_close, ...]}}、Noneの場合はDBから取得）
         save_to_db: ポートフォリオをDBに保存するか（デフォルト: True）
+        snapshot_path: 時系列P/Lの価格・TOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
     
     Returns:
         パフォーマンス指標の辞書（時系列指標）とタイミング情報
@@ -181,6 +220,7 @@ def run_backtest_for_optimization_timeseries(
         end_date=end_date,
         rebalance_dates=rebalance_dates,
         cost_bps=cost_bps,
+        snapshot_path=snapshot_path,
     )
     timeseries_end_time = time.time()
     timing_info["timeseries_calc_time"] = timeseries_end_time - timeseries_start_time
@@ -259,7 +299,7 @@ def _select_portfolio_for_rebalance_date(
         rebalance_date: リバランス日
         strategy_params_dict: StrategyParamsを辞書化したもの
         entry_params_dict: EntryScoreParamsを辞書化したもの
-        feat: 特徴量DataFrame（Noneの場合はDBから取得）
+        feat: 特徴量DataFrame または FeatureMatrix（Noneの場合はDBから取得）
         prices_data: 価格データ（{code: [adj_close, ...]}、Noneの場合はDBから取得）
     
     Returns:
@@ -301,7 +341,7 @@ def _select_portfolio_for_rebalance_date(
         print(f"        [_select_portfolio] ポートフォリオ選択開始: {rebalance_date}")
         sys.stdout.flush()
         from ..jobs.optimize import _select_portfolio_with_params
-        portfolio = _select_portfolio_with_params(feat, strategy_params, entry_params)
+        portfolio = _select_portfolio_with_params(feat, strategy_params, entry_params, prices_data=prices_data)
         
         if portfolio is None or portfolio.empty:
             print(f"        [_select_portfolio] ⚠️  ポートフォリオが空: {rebalance_date}")
@@ -328,6 +368,7 @@ def objective_timeseries(
     prices_dict: Optional[Dict[str, Dict[str, List[float]]]] = None,
     save_to_db: bool = True,
     entry_mode: str = "free",
+    snapshot_path: Optional[str] = None,
 ) -> float:
     """
     Optunaの目的関数（時系列版）
@@ -338,6 +379,7 @@ def objective_timeseries(
         cost_bps: 取引コスト（bps、デフォルト: 0.0）
         n_jobs: 並列実行数（-1でCPU数）
         enable_timing: 時間計測を有効にするか
+        snapshot_path: 時系列P/Lの価格・TOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
     
     Returns:
         最適化対象の値（時系列指標ベース）
@@ -355,47 +397,19 @@ def objective_timeseries(
     Returns:
         最適化対象の値（時系列指標ベース）
     """
-    # StrategyParamsのパラメータ（既存版と同じ範囲）
-    w_quality = trial.suggest_float("w_quality", 0.15, 0.35)
-    w_value = trial.suggest_float("w_value", 0.20, 0.40)
-    w_growth = trial.suggest_float("w_growth", 0.05, 0.20)
-    w_record_high = trial.suggest_float("w_record_high", 0.03, 0.15)
-    w_size = trial.suggest_float("w_size", 0.10, 0.25)
-    
-    # 正規化（合計が1になるように）
-    total = w_quality + w_value + w_growth + w_record_high + w_size
-    w_quality /= total
-    w_value /= total
-    w_growth /= total
-    w_record_high /= total
-    w_size /= total
-    
-    w_forward_per = trial.suggest_float("w_forward_per", 0.35, 0.65)
-    w_pbr = 1.0 - w_forward_per
-    
-    roe_min = trial.suggest_float("roe_min", 0.05, 0.12)
-    liquidity_quantile_cut = trial.suggest_float("liquidity_quantile_cut", 0.15, 0.35)
-    
-    # StrategyParamsはfrozenなので、replaceを使用
-    default_params = StrategyParams()
-    strategy_params = replace(
-        default_params,
-        target_min=12,
-        target_max=12,
-        w_quality=w_quality,
-        w_value=w_value,
-        w_growth=w_growth,
-        w_record_high=w_record_high,
-        w_size=w_size,
-        w_forward_per=w_forward_per,
-        w_pbr=w_pbr,
-        roe_min=roe_min,
-        liquidity_quantile_cut=liquidity_quantile_cut,
-    )
+    # StrategyParamsのパラメータ（既存版と同じ範囲、正規化は params_from_trial）
+    trial.suggest_float("w_quality", 0.15, 0.35)
+    trial.suggest_float("w_value", 0.20, 0.40)
+    trial.suggest_float("w_growth", 0.05, 0.20)
+    trial.suggest_float("w_record_high", 0.03, 0.15)
+    trial.suggest_float("w_size", 0.10, 0.25)
+    trial.suggest_float("w_forward_per", 0.35, 0.65)
+    trial.suggest_float("roe_min", 0.05, 0.12)
+    trial.suggest_float("liquidity_quantile_cut", 0.15, 0.35)
     
     # EntryScoreParamsのパラメータ（順張り/逆張りを対称に探索）
     RSI_LOW, RSI_HIGH = 15.0, 85.0
-    rsi_min_width = 10.0  # 最小幅制約（緩和: 20.0 → 10.0）
+    rsi_min_width = RSI_MIN_WIDTH  # 最小幅制約
     
     # baseを先にサンプリング
     rsi_base = trial.suggest_float("rsi_base", RSI_LOW, RSI_HIGH)
@@ -446,7 +460,7 @@ def objective_timeseries(
     
     # BB Z-scoreパラメータ（順張り/逆張りを対称に探索）
     BB_LOW, BB_HIGH = -3.5, 3.5
-    bb_z_min_width = 0.5  # 最小幅制約（緩和: 1.0 → 0.5）
+    bb_z_min_width = BB_Z_MIN_WIDTH  # 最小幅制約
     
     # baseを先にサンプリング
     bb_z_base = trial.suggest_float("bb_z_base", BB_LOW, BB_HIGH)
@@ -495,19 +509,9 @@ def objective_timeseries(
             trial.set_user_attr("prune_reason", "bb_no_valid_range")
             raise optuna.TrialPruned(f"BB Z-score: base={bb_z_base:.2f}に対して制約を満たすmaxの範囲が存在しません")
     
-    bb_weight = trial.suggest_float("bb_weight", 0.45, 0.75)
-    rsi_weight = 1.0 - bb_weight
+    trial.suggest_float("bb_weight", 0.45, 0.75)
     
-    entry_params = EntryScoreParams(
-        rsi_base=rsi_base,
-        rsi_max=rsi_max,
-        bb_z_base=bb_z_base,
-        bb_z_max=bb_z_max,
-        bb_weight=bb_weight,
-        rsi_weight=rsi_weight,
-        rsi_min_width=rsi_min_width,
-        bb_z_min_width=bb_z_min_width,
-    )
+    strategy_params, entry_params = params_from_trial(trial.params)
     
     # 順張り/逆張りの方向と幅をログに記録
     rsi_direction = "順張り" if rsi_max > rsi_base else "逆張り"
@@ -529,6 +533,7 @@ def objective_timeseries(
         features_dict=features_dict,
         prices_dict=prices_dict,
         save_to_db=save_to_db,
+        snapshot_path=snapshot_path,
     )
     
     # 目的関数: 超過リターン系列のIR（=Sharpe_excess）を主軸に
@@ -590,6 +595,7 @@ def main(
     no_db_write: bool = False,
     cache_dir: str = "cache/features",
     entry_mode: str = "free",
+    snapshot_path: Optional[str] = None,
 ):
     """
     最適化を実行（時系列版、特徴量キャッシュ対応）
@@ -607,6 +613,7 @@ def main(
         storage: Optunaストレージ（Noneの場合はSQLite、例: 'postgresql://...'）
         no_db_write: 最適化中にDBに書き込まない（デフォルト: False）
         cache_dir: キャッシュディレクトリ（デフォルト: "cache/features"）
+        snapshot_path: リバランス日・特徴量・価格の読み取りに使うDBスナップショット（Noneの場合は本番DB）
     """
     # BLASスレッドを1に設定
     _setup_blas_threads()
@@ -623,7 +630,7 @@ def main(
     print()
     
     # リバランス日を取得
-    rebalance_dates = get_monthly_rebalance_dates(start_date, end_date)
+    rebalance_dates = get_monthly_rebalance_dates(start_date, end_date, snapshot_path=snapshot_path)
     print(f"リバランス日数: {len(rebalance_dates)}")
     print(f"最初: {rebalance_dates[0] if rebalance_dates else 'N/A'}")
     print(f"最後: {rebalance_dates[-1] if rebalance_dates else 'N/A'}")
@@ -637,7 +644,7 @@ def main(
     print("=" * 80)
     print("特徴量キャッシュを構築します...")
     print("=" * 80)
-    feature_cache = FeatureCache(cache_dir=cache_dir)
+    feature_cache = FeatureCache(cache_dir=cache_dir, snapshot_path=snapshot_path)
     features_dict, prices_dict = feature_cache.warm(rebalance_dates, n_jobs=bt_workers if bt_workers > 0 else -1)
     print(f"[FeatureCache] 特徴量: {len(features_dict)}日分、価格データ: {len(prices_dict)}日分")
     print()
@@ -812,6 +819,7 @@ def main(
             prices_dict=prices_dict,
             save_to_db=not no_db_write,
             entry_mode=entry_mode,
+            snapshot_path=snapshot_path,
         ),
         n_trials=n_trials,
         show_progress_bar=True,
@@ -860,32 +868,10 @@ def main(
     # 結果をJSONに保存
     best_params_raw = study.best_params.copy()
     
-    # Core Score重みの正規化
-    w_quality = best_params_raw.get("w_quality", 0.0)
-    w_value = best_params_raw.get("w_value", 0.0)
-    w_growth = best_params_raw.get("w_growth", 0.0)
-    w_record_high = best_params_raw.get("w_record_high", 0.0)
-    w_size = best_params_raw.get("w_size", 0.0)
-    total = w_quality + w_value + w_growth + w_record_high + w_size
-    if total > 0:
-        w_quality_norm = w_quality / total
-        w_value_norm = w_value / total
-        w_growth_norm = w_growth / total
-        w_record_high_norm = w_record_high / total
-        w_size_norm = w_size / total
-    else:
-        w_quality_norm = w_quality
-        w_value_norm = w_value
-        w_growth_norm = w_growth
-        w_record_high_norm = w_record_high
-        w_size_norm = w_size
-    
+    # Core Score重みの正規化（objective_timeseries と同じ params_from_trial）
+    best_strategy, _ = params_from_trial(best_params_raw)
     normalized_best_params = best_params_raw.copy()
-    normalized_best_params["w_quality"] = w_quality_norm
-    normalized_best_params["w_value"] = w_value_norm
-    normalized_best_params["w_growth"] = w_growth_norm
-    normalized_best_params["w_record_high"] = w_record_high_norm
-    normalized_best_params["w_size"] = w_size_norm
+    normalized_best_params.update({k: getattr(best_strategy, k) for k in _CORE_WEIGHT_KEYS})
     
     # 結果ファイル名をentry_modeに応じて決定
     if entry_mode == "mom":
@@ -1047,6 +1033,7 @@ if __name__ == "__main__":
     parser.add_argument("--cache-dir", type=str, default="cache/features", help="キャッシュディレクトリ（デフォルト: cache/features）")
     parser.add_argument("--entry-mode", type=str, default="free", choices=["free", "mom", "rev"],
                         help="entry_mode: free（両方向探索）、mom（順張り強制）、rev（逆張り強制）")
+    parser.add_argument("--snapshot", type=str, default=None, help="読み取りに使うDBスナップショット（デフォルト: 本番DB）")
     
     args = parser.parse_args()
     
@@ -1064,5 +1051,6 @@ if __name__ == "__main__":
         no_db_write=args.no_db_write,
         cache_dir=args.cache_dir,
         entry_mode=args.entry_mode,
+        snapshot_path=args.snapshot,
     )
 
@@ -0,0 +1,35 @@
+"""prices_rolling_daily（60日流動性・累積分割倍率）の構築ジョブ
+
+通常は ingest_prices が取り込み範囲だけ増分更新するため、
+初回構築時や prices_daily を直接修正した場合にのみ使用する。
+
+Usage:
+  python -m omanta_3rd.jobs.rebuild_price_aggregates            # 未集計の日付のみ
+  python -m omanta_3rd.jobs.rebuild_price_aggregates --full     # 全期間を再構築
+  python -m omanta_3rd.jobs.rebuild_price_aggregates --from 2024-01-01
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import Optional
+
+from ..infra.db import connect_db
+from ..ingest.price_aggregates import ROLLING_TABLE, ensure_price_aggregates_table, refresh_price_aggregates
+
+
+def main(date_from: Optional[str] = None, full: bool = False):
+    with connect_db() as conn:
+        ensure_price_aggregates_table(conn)
+        if full:
+            conn.execute(f"DELETE FROM {ROLLING_TABLE}")
+        n = refresh_price_aggregates(conn, date_from=date_from)
+    print(f"[prices_rolling] done: {n} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="prices_rolling_daily の構築")
+    parser.add_argument("--from", dest="date_from", type=str, help="再計算の開始日（YYYY-MM-DD）")
+    parser.add_argument("--full", action="store_true", help="全期間を再構築")
+    args = parser.parse_args()
+    main(date_from=args.date_from, full=args.full)
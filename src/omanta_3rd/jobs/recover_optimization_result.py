@@ -13,6 +13,7 @@ from datetime import datetime
 from typing import Dict, Any
 
 from ..config.settings import PROJECT_ROOT
+from .objective_variants import trial_mean_excess
 
 
 def recover_result_from_study(
@@ -96,7 +97,7 @@ def recover_result_from_study(
             "params": best_params,
         },
         "train_performance": {
-            "mean_annual_excess_return_pct": study.best_value,
+            "mean_annual_excess_return_pct": trial_mean_excess(best_trial),
         },
         "test_performance": {
             # テストデータでの評価は実行していないため、空にする
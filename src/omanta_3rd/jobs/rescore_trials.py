@@ -0,0 +1,155 @@
+"""
+既存の長期保有型 study の trial を任意の目的関数バリアントで再採点
+
+objective_longterm は trial ごとにリバランス日単位の年率超過リターンを
+user_attr（per_date_excess）に保存している。これを復元して
+「集計方法 × λ」の各バリアントで目的関数値を計算し直し、trial を並べ替える。
+λ比較（compare_lambda_penalties.py）のように λ ごとに最適化をやり直す必要はない。
+
+注意: TPE の探索経路は最適化時の目的関数に依存するため、再採点は
+「同じ trial 集合の中での順位付け」の比較になる（探索そのものは変わらない）。
+
+使用方法:
+    python -m omanta_3rd.jobs.rescore_trials --storage sqlite:///optuna_xxx.db --study-name xxx \\
+        --variants mean:0,mean:0.03,mean:0.05,mean:0.08,median:0 --top 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import optuna
+from optuna.trial import FrozenTrial, TrialState
+
+from .objective_variants import (
+    PER_DATE_ATTR,
+    ObjectiveVariant,
+    decode_per_date,
+    parse_variants,
+)
+
+
+def rescore_trials(
+    trials: Sequence[FrozenTrial],
+    variants: Sequence[ObjectiveVariant],
+) -> List[Dict[str, Any]]:
+    """
+    per_date_excess を持つ完了 trial を各バリアントで再採点
+
+    Returns:
+        [{"number", "params", "n_periods", "scores": {バリアント名: 値}}, ...]
+        （per_date_excess を持たない trial は含めない）
+    """
+    rows: List[Dict[str, Any]] = []
+    for t in trials:
+        if t.state != TrialState.COMPLETE or PER_DATE_ATTR not in t.user_attrs:
+            continue
+        _, values = decode_per_date(t.user_attrs[PER_DATE_ATTR])
+        rows.append({
+            "number": t.number,
+            "params": dict(t.params),
+            "n_periods": int(values.size),
+            "scores": {v.name: v.score(values) for v in variants},
+        })
+    return rows
+
+
+def rank_by_variant(
+    rows: Sequence[Dict[str, Any]],
+    variants: Sequence[ObjectiveVariant],
+    top: Optional[int] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    バリアントごとの順位表（目的関数値の降順）
+
+    Returns:
+        {バリアント名: [{"rank", "number", "score"}, ...]}
+    """
+    rankings: Dict[str, List[Dict[str, Any]]] = {}
+    for v in variants:
+        ordered = sorted(rows, key=lambda r: r["scores"][v.name], reverse=True)
+        if top is not None:
+            ordered = ordered[:top]
+        rankings[v.name] = [
+            {"rank": i + 1, "number": r["number"], "score": r["scores"][v.name]}
+            for i, r in enumerate(ordered)
+        ]
+    return rankings
+
+
+def rank_correlation(
+    rows: Sequence[Dict[str, Any]],
+    variants: Sequence[ObjectiveVariant],
+) -> Dict[str, Dict[str, float]]:
+    """バリアント間の順位相関（Spearman、trial 全件）"""
+    if len(rows) < 2:
+        return {}
+    ranks = {
+        v.name: np.argsort(np.argsort([r["scores"][v.name] for r in rows])).astype(float)
+        for v in variants
+    }
+    return {
+        a.name: {b.name: float(np.corrcoef(ranks[a.name], ranks[b.name])[0, 1]) for b in variants}
+        for a in variants
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="長期保有型 study の trial を目的関数バリアントで再採点",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--storage", type=str, required=True, help="Optunaストレージ（例: sqlite:///optuna_xxx.db）")
+    parser.add_argument("--study-name", type=str, required=True, help="スタディ名")
+    parser.add_argument("--variants", type=str, default="mean:0,mean:0.03,mean:0.05,mean:0.08,median:0,trimmed_mean:0",
+                        help="再採点する目的関数（集計方法:λ のカンマ区切り）")
+    parser.add_argument("--top", type=int, default=10, help="バリアントごとに表示する上位件数（デフォルト: 10）")
+    parser.add_argument("--output", type=str, default=None, help="結果JSONの出力先（Noneの場合は保存しない）")
+    args = parser.parse_args()
+
+    variants = parse_variants(args.variants)
+    study = optuna.load_study(study_name=args.study_name, storage=args.storage)
+    trials = study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,))
+    rows = rescore_trials(trials, variants)
+
+    print("=" * 80)
+    print(f"再採点: {args.study_name}（完了trial: {len(trials)}, 再採点可能: {len(rows)}）")
+    print("=" * 80)
+    if not rows:
+        print(f"⚠️  {PER_DATE_ATTR} を持つ trial がありません（この機能より前に実行された study の可能性があります）")
+        return
+
+    rankings = rank_by_variant(rows, variants, top=args.top)
+    for name, ranking in rankings.items():
+        print(f"\n[{name}]")
+        for r in ranking:
+            print(f"  {r['rank']:>3}. Trial {r['number']:>5}: {r['score']:.4f}%")
+
+    correlations = rank_correlation(rows, variants)
+    if correlations:
+        print("\n順位相関（Spearman）:")
+        for a, row in correlations.items():
+            print(f"  {a:>20}: " + ", ".join(f"{b}={c:.3f}" for b, c in row.items() if b != a))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "study_name": args.study_name,
+                    "variants": [v.name for v in variants],
+                    "trials": rows,
+                    "rankings": rankings,
+                    "rank_correlation": correlations,
+                },
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+        print(f"\n結果を保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
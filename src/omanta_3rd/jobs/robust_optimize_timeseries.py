@@ -31,7 +31,7 @@ from ..jobs.optimize_timeseries import (
 from ..jobs.longterm_run import StrategyParams
 from ..jobs.optimize import EntryScoreParams
 from ..backtest.timeseries import calculate_timeseries_returns
-from ..backtest.eval_common import calculate_metrics_from_timeseries_data
+from ..backtest.eval_common import calculate_metrics_from_timeseries_batch
 from ..jobs.walk_forward_timeseries import (
     split_dates_into_folds,
     run_optimization_for_fold,
@@ -146,7 +146,7 @@ def objective_robust_timeseries(
         return -999.0  # エラー時は低い値を返す
     
     # 各foldでtest期間のパフォーマンスを評価
-    test_sharpes = []
+    fold_timeseries = []
     
     for fold_info in folds:
         test_dates = fold_info["test_dates"]
@@ -173,17 +173,18 @@ def objective_robust_timeseries(
                 buy_cost_bps=buy_cost_bps,
                 sell_cost_bps=sell_cost_bps,
             )
-            
-            # メトリクスを計算
-            metrics = calculate_metrics_from_timeseries_data(timeseries_data)
-            sharpe = metrics.get("sharpe_ratio")
-            
-            if sharpe is not None:
-                test_sharpes.append(sharpe)
+            fold_timeseries.append(timeseries_data)
         except Exception as e:
             print(f"  Fold {fold_info['fold']} でエラー: {e}")
             continue
     
+    # メトリクスを計算（全foldを一括）
+    test_sharpes = [
+        metrics["sharpe_ratio"]
+        for metrics in calculate_metrics_from_timeseries_batch(fold_timeseries)
+        if metrics.get("sharpe_ratio") is not None
+    ]
+    
     if not test_sharpes:
         return -999.0  # エラー時は低い値を返す
     
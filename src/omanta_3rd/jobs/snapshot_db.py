@@ -0,0 +1,53 @@
+"""分析用の読み取り専用スナップショットDBを作成
+
+Usage:
+  python -m omanta_3rd.jobs.snapshot_db
+  python -m omanta_3rd.jobs.snapshot_db --out data/db/snapshots/study_2025q1.sqlite
+  python -m omanta_3rd.jobs.snapshot_db --keep 3
+  python -m omanta_3rd.jobs.snapshot_db --info data/db/snapshots/study_2025q1.sqlite
+
+作成後、最適化・WFA・holdout のジョブに --snapshot で指定するとスナップショットから読み取る:
+  python -m omanta_3rd.jobs.optimize_longterm ... --snapshot data/db/snapshots/study_2025q1.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Optional
+
+from ..infra.snapshot import create_snapshot, prune_snapshots, read_snapshot_info
+
+
+def main(
+    out: Optional[str] = None,
+    keep: Optional[int] = None,
+    analyze: bool = True,
+):
+    started = time.time()
+    path = create_snapshot(Path(out) if out else None, analyze=analyze)
+    size_mb = path.stat().st_size / 1024 / 1024
+    print(f"[snapshot] created {path} ({size_mb:,.1f} MB, {time.time() - started:.1f}s)")
+    for key, value in read_snapshot_info(path).items():
+        print(f"  {key}: {value}")
+    print(f"[snapshot] 使用するには: --snapshot {path}")
+
+    if keep is not None:
+        for removed in prune_snapshots(keep, directory=path.parent):
+            print(f"[snapshot] removed {removed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="分析用の読み取り専用スナップショットDBを作成")
+    parser.add_argument("--out", type=str, help="出力先（省略時は data/db/snapshots/jquants_YYYYmmdd_HHMMSS.sqlite）")
+    parser.add_argument("--keep", type=int, help="出力先ディレクトリに残すスナップショット数（古いものから削除）")
+    parser.add_argument("--no-analyze", action="store_true", help="ANALYZE を実行しない")
+    parser.add_argument("--info", type=str, help="作成せず、指定したスナップショットの情報を表示")
+    args = parser.parse_args()
+
+    if args.info:
+        for key, value in read_snapshot_info(Path(args.info)).items():
+            print(f"{key}: {value}")
+    else:
+        main(out=args.out, keep=args.keep, analyze=not args.no_analyze)
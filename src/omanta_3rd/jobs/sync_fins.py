@@ -0,0 +1,62 @@
+"""財務データの差分同期ジョブ
+
+通常は前回同期した開示日（ウォーターマーク）の翌日以降だけを取得する。
+--backfill を指定すると、銘柄コード指定で履歴を取得して抜けを埋める（中断後は同じコマンドで再開）。
+
+Usage:
+  python -m omanta_3rd.jobs.sync_fins
+  python -m omanta_3rd.jobs.sync_fins --end 2024-12-31
+  python -m omanta_3rd.jobs.sync_fins --backfill --workers 4
+  python -m omanta_3rd.jobs.sync_fins --backfill --codes 7203 6758 --restart
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from ..infra.jquants import JQuantsClient
+from ..ingest.fins_sync import (
+    DEFAULT_CHECKPOINT_PATH,
+    backfill_financial_statements_by_code,
+    sync_financial_statements,
+)
+
+
+def main(
+    end_date: Optional[str] = None,
+    backfill: bool = False,
+    codes: Optional[List[str]] = None,
+    workers: int = 4,
+    checkpoint: str = DEFAULT_CHECKPOINT_PATH,
+    restart: bool = False,
+):
+    client = JQuantsClient()
+    if backfill:
+        backfill_financial_statements_by_code(
+            codes=codes, client=client, workers=workers,
+            checkpoint_path=Path(checkpoint), restart=restart,
+        )
+    else:
+        watermark = sync_financial_statements(end_date=end_date, client=client, fetch_workers=workers)
+        print(f"[fins_sync] watermark: {watermark}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="財務データの差分同期")
+    parser.add_argument("--end", type=str, help="終了日（YYYY-MM-DD、デフォルトは今日）")
+    parser.add_argument("--backfill", action="store_true", help="銘柄コード指定で履歴をバックフィルする")
+    parser.add_argument("--codes", nargs="+", help="バックフィル対象の銘柄（省略時はウォーターマークが無い銘柄）")
+    parser.add_argument("--workers", type=int, default=4, help="取得スレッド数")
+    parser.add_argument("--checkpoint", type=str, default=DEFAULT_CHECKPOINT_PATH, help="チェックポイントファイル")
+    parser.add_argument("--restart", action="store_true", help="チェックポイントを無視して最初からやり直す")
+    args = parser.parse_args()
+    main(
+        end_date=args.end,
+        backfill=args.backfill,
+        codes=args.codes,
+        workers=args.workers,
+        checkpoint=args.checkpoint,
+        restart=args.restart,
+    )
@@ -29,6 +29,7 @@ from ..jobs.longterm_run import StrategyParams
 from ..jobs.optimize import EntryScoreParams
 from ..backtest.timeseries import calculate_timeseries_returns
 from ..backtest.eval_common import calculate_metrics_from_timeseries_data, get_git_commit_hash
+from .wfa_warm_start import enqueue_warm_start, top_trial_params
 from dataclasses import replace
 
 
@@ -99,6 +100,8 @@ def run_optimization_for_fold(
     buy_cost_bps: float,
     sell_cost_bps: float,
     seed: Optional[int] = None,
+    warm_start_params: Optional[List[Dict[str, Any]]] = None,
+    warm_start_top_k: int = 0,
 ) -> Dict[str, Any]:
     """
     foldのtrain期間で最適化を実行
@@ -109,6 +112,8 @@ def run_optimization_for_fold(
         buy_cost_bps: 購入コスト（bps）
         sell_cost_bps: 売却コスト（bps）
         seed: 乱数シード
+        warm_start_params: 最初に評価するパラメータ（前foldの上位trial、n_trialsに含める）
+        warm_start_top_k: 次のfold用に返す上位trial数（結果の"top_params"）
     
     Returns:
         最適化結果の辞書（best_params含む）
@@ -127,6 +132,9 @@ def run_optimization_for_fold(
     if seed is not None:
         study.sampler = optuna.samplers.TPESampler(seed=seed)
     
+    # 前foldの上位trialを最初に評価
+    enqueue_warm_start(study, warm_start_params)
+    
     # 最適化実行
     study.optimize(
         lambda trial: objective_timeseries(
@@ -174,6 +182,8 @@ def run_optimization_for_fold(
         "best_params": normalized_best_params,
         "best_params_raw": best_params_raw,
         "n_trials": n_trials,
+        "n_warm_start": len(warm_start_params or []),
+        "top_params": top_trial_params(study, warm_start_top_k),
     }
 
 
@@ -261,6 +271,7 @@ def run_walk_forward_analysis(
     buy_cost_bps: float = 0.0,
     sell_cost_bps: float = 0.0,
     seed: Optional[int] = None,
+    warm_start_top_k: int = 0,
 ) -> Dict[str, Any]:
     """
     Walk-Forward Analysisを実行
@@ -274,6 +285,7 @@ def run_walk_forward_analysis(
         buy_cost_bps: 購入コスト（bps）
         sell_cost_bps: 売却コスト（bps）
         seed: 乱数シード
+        warm_start_top_k: 前foldの上位K件のtrialを次のfoldのstudyに最初に投入する（0で無効）
     
     Returns:
         WFA結果の辞書
@@ -304,6 +316,7 @@ def run_walk_forward_analysis(
     
     # foldごとに実行
     fold_results = []
+    prev_top_params: List[Dict[str, Any]] = []  # 前foldの上位trial（ウォームスタート用）
     
     for fold_info in folds:
         fold_num = fold_info["fold"]
@@ -321,7 +334,10 @@ def run_walk_forward_analysis(
             buy_cost_bps,
             sell_cost_bps,
             seed,
+            warm_start_params=prev_top_params,
+            warm_start_top_k=warm_start_top_k,
         )
+        prev_top_params = opt_result.pop("top_params")
         
         # バックテスト
         test_metrics = run_backtest_with_fixed_params(
@@ -386,6 +402,7 @@ def run_walk_forward_analysis(
         "buy_cost_bps": buy_cost_bps,
         "sell_cost_bps": sell_cost_bps,
         "seed": seed,
+        "warm_start_top_k": warm_start_top_k,
         "timing": "open-close",
         "missing_policy": "drop_and_renormalize",
         "commit_hash": get_git_commit_hash(),
@@ -504,6 +521,7 @@ def main():
     parser.add_argument("--buy-cost", type=float, default=0.0, help="購入コスト（bps、デフォルト: 0.0）")
     parser.add_argument("--sell-cost", type=float, default=0.0, help="売却コスト（bps、デフォルト: 0.0）")
     parser.add_argument("--seed", type=int, help="乱数シード")
+    parser.add_argument("--warm-start-top-k", type=int, default=0, help="前foldの上位K件のtrialを次のfoldにenqueue（デフォルト: 0=無効）")
     parser.add_argument("--output-dir", type=str, default="reports", help="出力ディレクトリ（デフォルト: reports）")
     
     args = parser.parse_args()
@@ -518,6 +536,7 @@ def main():
         buy_cost_bps=args.buy_cost,
         sell_cost_bps=args.sell_cost,
         seed=args.seed,
+        warm_start_top_k=args.warm_start_top_k,
     )
     
     if "error" in wfa_result:
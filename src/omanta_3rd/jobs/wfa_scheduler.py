@@ -0,0 +1,336 @@
+"""Walk-Forward Analysis のグローバルワーカープール（fold × trial 単位のスケジューリング）
+
+walk_forward_longterm.py の fold 並列は fold ごとに1プロセスを割り当て、各プロセスが
+FeatureCache を個別に warm し、Optuna 並列は無効化していた。fold の train 期間の長さが
+違うため、短い fold のプロセスが先に終わるとそのコアは遊ぶ。
+
+このモジュールは次の順に実行する。
+
+1. 親プロセスで SharedDataPlane（特徴量行列・価格・リバランス日の memmap）を一度だけ作成
+2. 全 fold 共通の ProcessPoolExecutor を作成し、各ワーカーはプレーンを memmap で開く
+3. 親プロセスが fold ごとの Optuna スタディで ask → パラメータ提案（suggest_longterm_params）し、
+   (fold, trial) の評価だけをプールに投入。完了したものから score_longterm_trial → tell
+4. fold の trial が揃ったら、その fold の test 評価も同じプールに投入
+
+空いたワーカーには常に「残り trial が最も多い fold」の trial を割り当てるため、
+fold 間でコアが動的に融通される。同じ fold の trial が同時に複数走るため、
+TPE は constant_liar（評価中の trial を悪い値と仮定）を有効にする。
+
+Usage:
+    python walk_forward_longterm.py --start 2018-01-01 --end 2024-12-31 --horizon 12 \\
+        --scheduler global --n-workers 8
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import optuna
+from optuna.trial import TrialState
+
+from ..backtest.data_plane import SharedDataPlane
+from .longterm_run import StrategyParams
+from .optimize import EntryScoreParams
+from .optimize_longterm import (
+    calculate_longterm_performance,
+    score_longterm_trial,
+    suggest_longterm_params,
+)
+
+# ワーカープロセスで開いたデータプレーン（_init_worker で設定）
+_PLANE: Optional[SharedDataPlane] = None
+
+# test 評価結果として保持する指標（リスト類は除く）
+TEST_METRIC_KEYS = (
+    "mean_annual_excess_return_pct",
+    "median_annual_excess_return_pct",
+    "p10_annual_excess_return_pct",
+    "min_annual_excess_return_pct",
+    "mean_annual_return_pct",
+    "median_annual_return_pct",
+    "win_rate",
+    "num_portfolios",
+    "n_periods",
+)
+
+
+def _init_worker(plane_root: str) -> None:
+    global _PLANE
+    _PLANE = SharedDataPlane.open(Path(plane_root))
+
+
+def evaluate_params_on_plane(
+    rebalance_dates: List[str],
+    strategy_params_dict: Dict[str, Any],
+    entry_params_dict: Dict[str, Any],
+    horizon_months: int,
+    as_of_date: str,
+    cost_bps: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    ワーカーで1つのパラメータを評価（calculate_longterm_performance、プロセス内は逐次）
+
+    特徴量・価格は _init_worker で開いたデータプレーンから読む。
+    """
+    if _PLANE is None:
+        raise RuntimeError("データプレーンが開かれていません（_init_worker が未実行）")
+    return calculate_longterm_performance(
+        rebalance_dates,
+        StrategyParams(**strategy_params_dict),
+        EntryScoreParams(**entry_params_dict),
+        cost_bps=cost_bps,
+        n_jobs=1,
+        features_dict=_PLANE.features,
+        prices_dict=_PLANE.prices,
+        horizon_months=horizon_months,
+        require_full_horizon=True,
+        as_of_date=as_of_date,
+    )
+
+
+def _params_to_dicts(
+    strategy_params: StrategyParams, entry_params: EntryScoreParams
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return (
+        {f.name: getattr(strategy_params, f.name) for f in fields(StrategyParams)},
+        {f.name: getattr(entry_params, f.name) for f in fields(EntryScoreParams)},
+    )
+
+
+def normalized_best_params(
+    strategy_params_dict: Dict[str, Any], entry_params_dict: Dict[str, Any]
+) -> Dict[str, Any]:
+    """best_params（正規化済みの重み・閾値・エントリーパラメータ。build_params_from_json と同じキー）"""
+    strategy_keys = (
+        "w_quality", "w_value", "w_growth", "w_record_high", "w_size",
+        "w_forward_per", "w_pbr", "roe_min", "liquidity_quantile_cut",
+    )
+    entry_keys = ("rsi_base", "rsi_max", "bb_z_base", "bb_z_max", "bb_weight", "rsi_weight")
+    params = {k: strategy_params_dict[k] for k in strategy_keys}
+    params.update({k: entry_params_dict[k] for k in entry_keys})
+    return params
+
+
+@dataclass
+class _FoldRun:
+    """1 fold 分のスタディと進捗"""
+
+    fold: Dict[str, Any]
+    study: optuna.Study
+    train_as_of_date: str
+    completed: int = 0
+    attempts: int = 0
+    inflight: int = 0
+    params: Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]] = field(default_factory=dict)
+    test_submitted: bool = False
+
+    @property
+    def number(self) -> int:
+        return self.fold["fold"]
+
+
+def _pick_fold(runs: List[_FoldRun], n_trials: int, max_attempts: int) -> Optional[_FoldRun]:
+    """次に trial を投入する fold（未投入の trial が最も多い fold）"""
+    candidates = [
+        r for r in runs
+        if r.completed + r.inflight < n_trials and r.attempts < max_attempts
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda r: (n_trials - r.completed - r.inflight, -r.number))
+
+
+def run_walk_forward_global_pool(
+    folds: List[Dict[str, Any]],
+    plane: SharedDataPlane,
+    horizon_months: int,
+    as_of_date: str,
+    n_trials: int = 50,
+    study_type: str = "C",
+    seed: Optional[int] = None,
+    n_workers: int = -1,
+    cost_bps: float = 0.0,
+    lambda_penalty: float = 0.0,
+    objective_type: str = "mean",
+    evaluate_fn: Callable[..., Dict[str, Any]] = evaluate_params_on_plane,
+) -> List[Dict[str, Any]]:
+    """
+    全 fold の trial と test 評価を1つのワーカープールで実行
+
+    Args:
+        folds: split_dates_into_folds の出力（fold, train_dates, test_dates, train_start, ...）
+        plane: 全リバランス日のデータプレーン（SharedDataPlane.warm）
+        horizon_months: 投資ホライズン（月数）
+        as_of_date: test 評価の打ち切り日
+        n_trials: fold ごとの完了 trial 数
+        study_type: スタディタイプ（A/B/C）
+        seed: TPESampler の乱数シード（全 fold 共通）
+        n_workers: ワーカー数（-1でCPU数）
+        cost_bps: 取引コスト（bps）
+        lambda_penalty: 下振れ罰の係数
+        objective_type: 目的関数の集計方法（mean / median / trimmed_mean）
+        evaluate_fn: ワーカーで実行する評価関数（テスト用に差し替え可能、pickle 可能であること）
+
+    Returns:
+        fold ごとの結果（fold 番号順）。train の評価打ち切り日は fold の test_start
+        （fold の fold_info に train_as_of_date があればそれ）を使う。
+    """
+    if n_workers == -1:
+        n_workers = mp.cpu_count()
+    n_workers = max(1, n_workers)
+    max_attempts = n_trials * 3  # 無限ループ防止（最大3倍まで試行）
+
+    runs = [
+        _FoldRun(
+            fold=fold,
+            study=optuna.create_study(
+                direction="maximize",
+                sampler=optuna.samplers.TPESampler(seed=seed, constant_liar=True),
+            ),
+            train_as_of_date=fold.get("train_as_of_date") or fold["test_start"],
+        )
+        for fold in folds
+    ]
+    results: Dict[int, Dict[str, Any]] = {}
+    # future → ("trial", run, trial) / ("test", run, None)
+    pending: Dict[Future, Tuple[str, _FoldRun, Optional[optuna.Trial]]] = {}
+
+    print(f"[wfa_scheduler] {len(runs)} folds × {n_trials} trials, ワーカー数: {n_workers}")
+    sys.stdout.flush()
+
+    def submit_test(run: _FoldRun) -> None:
+        run.test_submitted = True
+        if run.completed == 0:
+            results[run.number] = {"fold": run.number, "error": "完了したtrialがありません"}
+            return
+        best = run.study.best_trial
+        sp_dict, ep_dict = run.params[best.number]
+        fut = executor.submit(
+            evaluate_fn, run.fold["test_dates"], sp_dict, ep_dict, horizon_months, as_of_date, cost_bps
+        )
+        pending[fut] = ("test", run, None)
+
+    with ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(str(plane.root),)
+    ) as executor:
+        while True:
+            # 空いているワーカーに trial を投入
+            while len(pending) < n_workers:
+                run = _pick_fold(runs, n_trials, max_attempts)
+                if run is None:
+                    break
+                trial = run.study.ask()
+                run.attempts += 1
+                try:
+                    strategy_params, entry_params = suggest_longterm_params(trial, study_type)
+                except optuna.TrialPruned:
+                    run.study.tell(trial, state=TrialState.PRUNED)
+                    continue
+                sp_dict, ep_dict = _params_to_dicts(strategy_params, entry_params)
+                run.params[trial.number] = (sp_dict, ep_dict)
+                run.inflight += 1
+                fut = executor.submit(
+                    evaluate_fn,
+                    run.fold["train_dates"],
+                    sp_dict,
+                    ep_dict,
+                    horizon_months,
+                    run.train_as_of_date,
+                    cost_bps,
+                )
+                pending[fut] = ("trial", run, trial)
+
+            # trial が揃った（または試行上限に達した）fold の test 評価を投入
+            for run in runs:
+                finished = run.completed >= n_trials or run.attempts >= max_attempts
+                if finished and run.inflight == 0 and not run.test_submitted:
+                    submit_test(run)
+
+            if not pending:
+                break
+
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, run, trial = pending.pop(fut)
+                if kind == "test":
+                    results[run.number] = _fold_result(run, n_trials, fut)
+                    continue
+
+                run.inflight -= 1
+                try:
+                    perf = fut.result()
+                    sp_dict, ep_dict = run.params[trial.number]
+                    value = score_longterm_trial(
+                        trial,
+                        perf,
+                        StrategyParams(**sp_dict),
+                        EntryScoreParams(**ep_dict),
+                        horizon_months=horizon_months,
+                        lambda_penalty=lambda_penalty,
+                        objective_type=objective_type,
+                    )
+                except Exception as e:
+                    print(f"  [Fold {run.number}] [Trial {trial.number}] ❌ エラー: {e}")
+                    run.study.tell(trial, state=TrialState.FAIL)
+                    continue
+                run.study.tell(trial, value)
+                run.completed += 1
+                if run.completed % 10 == 0 or run.completed == n_trials:
+                    print(
+                        f"  [Fold {run.number}] 完了trial: {run.completed}/{n_trials}"
+                        f"（best={run.study.best_value:.4f}）"
+                    )
+                    sys.stdout.flush()
+
+    return [results[r.number] for r in runs if r.number in results]
+
+
+def _fold_result(run: _FoldRun, n_trials: int, fut: Future) -> Dict[str, Any]:
+    fold = run.fold
+    try:
+        test_perf = fut.result()
+    except Exception as e:
+        print(f"  ❌ Fold {run.number}のtest評価中にエラー: {e}")
+        return {"fold": run.number, "error": str(e)}
+
+    best = run.study.best_trial
+    sp_dict, ep_dict = run.params[best.number]
+    test_performance = {k: test_perf.get(k) for k in TEST_METRIC_KEYS}
+    test_performance.update({
+        "ann_excess_mean": float(test_perf.get("mean_annual_excess_return_pct", 0)),
+        "ann_excess_median": float(test_perf.get("median_annual_excess_return_pct", 0)),
+        "n_portfolios": int(test_perf.get("num_portfolios", 0)),
+    })
+    result = {
+        "fold": run.number,
+        "train_start": fold["train_start"],
+        "train_end": fold["train_end"],
+        "test_start": fold["test_start"],
+        "test_end": fold["test_end"],
+        "train_dates_count": len(fold["train_dates"]),
+        "test_dates_count": len(fold["test_dates"]),
+        "train_as_of_date": run.train_as_of_date,
+        "is_holdout": fold.get("is_holdout", False),
+        "optimization": {
+            "best_value": float(best.value),
+            "best_params": normalized_best_params(sp_dict, ep_dict),
+            "best_params_raw": dict(best.params),
+            "n_trials": n_trials,
+            "n_completed": run.completed,
+            "n_attempts": run.attempts,
+            "best_trial_number": best.number,
+        },
+        "test_performance": test_performance,
+    }
+    if fold.get("validate_dates"):
+        result["validate_start"] = fold.get("validate_start")
+        result["validate_end"] = fold.get("validate_end")
+        result["validate_dates_count"] = len(fold["validate_dates"])
+    if "holdout_eval_year" in fold:
+        result["holdout_eval_year"] = fold["holdout_eval_year"]
+    return result
@@ -0,0 +1,59 @@
+"""WFA の fold 間ウォームスタート
+
+roll 方式の隣接 fold は train 期間の大部分が重なるため、前 fold の上位 trial は
+次の fold でも良い初期点になる。前 fold の上位K件のパラメータを次の fold の study に
+enqueue_trial で投入し、TPE の立ち上がり（ランダム探索の区間）を短縮する。
+
+長期保有型では EvaluationCache（backtest/eval_cache.py）と組み合わせると、
+enqueue した trial は重なるリバランス日の評価結果を再利用し、新しい日付だけを計算する。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import optuna
+from optuna.study import StudyDirection
+from optuna.trial import TrialState
+
+
+def top_trial_params(study: optuna.Study, k: int) -> List[Dict[str, Any]]:
+    """
+    完了した trial のうち目的関数値の上位K件のパラメータ（trial.params、正規化前）を返す
+
+    同じパラメータの trial は1件にまとめる。
+    """
+    if k <= 0:
+        return []
+    trials = [t for t in study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,)) if t.value is not None]
+    reverse = study.direction == StudyDirection.MAXIMIZE
+    trials.sort(key=lambda t: t.value, reverse=reverse)
+
+    params_list: List[Dict[str, Any]] = []
+    seen = set()
+    for t in trials:
+        key = tuple(sorted(t.params.items()))
+        if key in seen:
+            continue
+        seen.add(key)
+        params_list.append(dict(t.params))
+        if len(params_list) >= k:
+            break
+    return params_list
+
+
+def enqueue_warm_start(
+    study: optuna.Study,
+    params_list: Optional[Sequence[Dict[str, Any]]],
+) -> int:
+    """
+    前 fold の上位パラメータを study に enqueue し、投入件数を返す
+
+    study_type の探索範囲外の値は Optuna が警告を出したうえでそのまま評価する。
+    """
+    if not params_list:
+        return 0
+    for params in params_list:
+        study.enqueue_trial(dict(params), skip_if_exists=True)
+    print(f"  ウォームスタート: 前foldの上位{len(params_list)}件のパラメータをenqueueしました")
+    return len(params_list)
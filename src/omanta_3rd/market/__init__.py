@@ -1,8 +1,21 @@
 """市場レジーム判定"""
 
-from .regime import get_market_regime, get_topix_close_series
+from .regime import (
+    get_market_regime,
+    get_topix_close_series,
+    get_regime_timeline,
+    clear_regime_cache,
+    MARegimeRule,
+    RegimeTimeline,
+    DEFAULT_REGIME_RULE,
+)
 
 __all__ = [
     "get_market_regime",
     "get_topix_close_series",
+    "get_regime_timeline",
+    "clear_regime_cache",
+    "MARegimeRule",
+    "RegimeTimeline",
+    "DEFAULT_REGIME_RULE",
 ]
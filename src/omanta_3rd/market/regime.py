@@ -2,14 +2,21 @@
 市場レジーム判定モジュール
 
 TOPIXの移動平均（MA）を使用して市場レジームを判定します。
+
+全営業日のMA・傾き・レジームを index_daily から一度だけベクトル計算した
+レジームタイムライン（RegimeTimeline）をプロセス内にキャッシュし、日付で引く。
+判定ルール（MARegimeRule）は差し替え可能で、複数のMA定義を1回の計算で比較できる。
 """
 
-from typing import Dict, Any, Optional
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import pandas as pd
 import numpy as np
 import sqlite3
 
 from ..infra.db import connect_db
+from ..infra.queries import INDEX_CLOSE_SERIES_SQL, INDEX_FINGERPRINT_SQL, INDEX_HISTORY_SQL
 from ..ingest.indices import TOPIX_CODE
 
 
@@ -26,13 +33,7 @@ def get_topix_close_series(conn: sqlite3.Connection, end_date: str, lookback_day
         TOPIX終値のSeries（DatetimeIndex、昇順）
     """
     df = pd.read_sql_query(
-        """
-        SELECT date, close
-        FROM index_daily
-        WHERE index_code = ? AND date <= ?
-        ORDER BY date DESC
-        LIMIT ?
-        """,
+        INDEX_HISTORY_SQL,
         conn,
         params=(TOPIX_CODE, end_date, lookback_days),
     )
@@ -48,37 +49,211 @@ def get_topix_close_series(conn: sqlite3.Connection, end_date: str, lookback_day
     return df['close']
 
 
-def get_market_regime(
+
+@dataclass(frozen=True)
+class MARegimeRule:
+    """
+    移動平均によるレジーム判定ルール
+
+    - up: MA(short) > MA(mid) > MA(long) and slope > 0
+    - down: MA(short) < MA(mid) < MA(long) and slope < 0
+    - range: else（MA(long) が計算できない初期期間を含む）
+
+    slope は MA(long) の slope_lag 営業日前との差（履歴が足りない場合は0）。
+    """
+
+    name: str = "ma20_60_200"
+    short: int = 20
+    mid: int = 60
+    long: int = 200
+    slope_lag: int = 20
+
+    @property
+    def keys(self) -> Tuple[str, str, str, str]:
+        """結果の辞書のキー（デフォルトでは ma20, ma60, ma200, slope200_20）"""
+        return (
+            f"ma{self.short}",
+            f"ma{self.mid}",
+            f"ma{self.long}",
+            f"slope{self.long}_{self.slope_lag}",
+        )
+
+    def compute(self, close: pd.Series, rolling: Optional[Dict[int, pd.Series]] = None) -> pd.DataFrame:
+        """
+        全営業日のMA・傾き・レジームを計算
+
+        Args:
+            close: 終値（昇順）
+            rolling: {窓: 移動平均} の共有キャッシュ（同じ窓を複数ルールで再計算しない）
+
+        Returns:
+            close と同じインデックスの DataFrame（keys の4列 + regime）
+        """
+        rolling = {} if rolling is None else rolling
+        for window in (self.short, self.mid, self.long):
+            if window not in rolling:
+                rolling[window] = close.rolling(window).mean()
+        ma_s, ma_m, ma_l = rolling[self.short], rolling[self.mid], rolling[self.long]
+
+        n_rows = np.arange(1, len(close) + 1)
+        slope = (ma_l - ma_l.shift(self.slope_lag)).where(n_rows >= self.long + self.slope_lag, 0.0)
+
+        up = (ma_s > ma_m) & (ma_m > ma_l) & (slope > 0)
+        down = (ma_s < ma_m) & (ma_m < ma_l) & (slope < 0)
+        regime = np.where(up, "up", np.where(down, "down", "range"))
+
+        k_s, k_m, k_l, k_slope = self.keys
+        out = pd.DataFrame(
+            {k_s: ma_s, k_m: ma_m, k_l: ma_l, k_slope: slope, "regime": regime},
+            index=close.index,
+        )
+        # MA(long) の履歴が無い期間は値も返さない（get_market_regime と同じ）
+        short_history = n_rows < self.long
+        out.loc[short_history, [k_s, k_m, k_l, k_slope]] = np.nan
+        return out
+
+
+DEFAULT_REGIME_RULE = MARegimeRule()
+
+
+def _none_if_nan(value) -> Optional[float]:
+    return None if pd.isna(value) else float(value)
+
+
+class RegimeTimeline:
+    """
+    全営業日のレジーム判定結果（ルールごと）
+
+    lookup(date) は date 以前の最終営業日の結果を返す（営業日なら辞書引き）。
+    """
+
+    def __init__(self, close: pd.Series, rules: Sequence[MARegimeRule] = (DEFAULT_REGIME_RULE,)):
+        if not rules:
+            raise ValueError("rules が空です")
+        names = [r.name for r in rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"ルール名が重複しています: {names}")
+        close = close.sort_index()
+        self.rules: Dict[str, MARegimeRule] = {r.name: r for r in rules}
+        self.default_rule = rules[0].name
+        self.dates: List[str] = [d.strftime("%Y-%m-%d") for d in close.index]
+        self._positions = {d: i for i, d in enumerate(self.dates)}
+
+        rolling: Dict[int, pd.Series] = {}
+        self.frames: Dict[str, pd.DataFrame] = {
+            r.name: r.compute(close, rolling) for r in rules
+        }
+        # 辞書の作成を lookup ごとにしないよう、列を Python のリストで保持
+        self._columns = {
+            name: {col: frame[col].tolist() for col in frame.columns}
+            for name, frame in self.frames.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def _position(self, date: str) -> Optional[int]:
+        pos = self._positions.get(date)
+        if pos is None:
+            pos = bisect_right(self.dates, date) - 1
+        return pos if pos >= 0 else None
+
+    def lookup(self, date: str, rule: Optional[str] = None) -> Dict[str, Any]:
+        """
+        date（この日を含む）時点のレジーム（get_market_regime と同じ形式の辞書）
+        """
+        rule_obj = self.rules[rule or self.default_rule]
+        keys = rule_obj.keys
+        pos = self._position(date)
+        if pos is None:
+            return {"regime": "range", **{k: None for k in keys}}
+        cols = self._columns[rule_obj.name]
+        result = {"regime": cols["regime"][pos], **{k: _none_if_nan(cols[k][pos]) for k in keys}}
+        if all(result[k] is not None for k in keys[:3]):
+            # MAが揃っている場合、傾きは NaN でも float のまま返す（get_market_regime と同じ）
+            result[keys[3]] = float(cols[keys[3]][pos])
+        return result
+
+    def regimes(self, dates: Sequence[str]) -> pd.DataFrame:
+        """
+        複数日付・全ルールのレジームを一覧（ルール比較用）
+
+        Returns:
+            index=date、列=ルール名（値は up / down / range）
+        """
+        data = {}
+        for name in self.rules:
+            data[name] = [self.lookup(d, name)["regime"] for d in dates]
+        return pd.DataFrame(data, index=list(dates))
+
+    def to_frame(self, rule: Optional[str] = None) -> pd.DataFrame:
+        """指定ルールの全営業日の結果（index=date）"""
+        frame = self.frames[rule or self.default_rule].copy()
+        frame.index = self.dates
+        return frame
+
+
+def load_index_close_series(conn: sqlite3.Connection, index_code: str = TOPIX_CODE) -> pd.Series:
+    """指数の全期間の終値（DatetimeIndex、昇順）"""
+    df = pd.read_sql_query(
+        INDEX_CLOSE_SERIES_SQL,
+        conn,
+        params=(index_code,),
+    )
+    if df.empty:
+        return pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+    return pd.Series(df["close"].astype(float).values, index=pd.to_datetime(df["date"]))
+
+
+# {(DBファイル, 指数コード, ルール): (データの指紋, タイムライン)}
+_TIMELINE_CACHE: Dict[tuple, Tuple[tuple, RegimeTimeline]] = {}
+
+
+def _cache_key(conn: sqlite3.Connection, index_code: str, rules: Sequence[MARegimeRule]) -> tuple:
+    db_file = next((r[2] for r in conn.execute("PRAGMA database_list") if r[1] == "main"), "")
+    # インメモリDBはファイル名が無いため接続ごとに区別する
+    return (db_file or id(conn), index_code, tuple(rules))
+
+
+def _fingerprint(conn: sqlite3.Connection, index_code: str) -> tuple:
+    """データの指紋（最終日・最終日の終値・行数）。idx_index_code_date だけで求まる"""
+    row = conn.execute(
+        INDEX_FINGERPRINT_SQL,
+        (index_code, index_code),
+    ).fetchone()
+    return tuple(row) if row is not None else ()
+
+
+def get_regime_timeline(
     conn: sqlite3.Connection,
-    rebalance_date: str,
-    lookback_days: int = 250,
-) -> Dict[str, Any]:
+    rules: Sequence[MARegimeRule] = (DEFAULT_REGIME_RULE,),
+    index_code: str = TOPIX_CODE,
+) -> RegimeTimeline:
     """
-    市場レジームを判定
-    
-    判定ロジック:
-    - up: MA20 > MA60 > MA200 and slope200_20 > 0
-    - down: MA20 < MA60 < MA200 and slope200_20 < 0
-    - range: else
-    
+    レジームタイムラインを取得（プロセス内キャッシュ、index_daily が更新されたら作り直す）
+
     Args:
         conn: データベース接続
-        rebalance_date: リバランス日（YYYY-MM-DD、この日を含む）
-        lookback_days: 過去データの取得日数（デフォルト: 250日）
-    
-    Returns:
-        レジーム情報の辞書:
-        {
-            "regime": "up" | "down" | "range",
-            "ma20": float,
-            "ma60": float,
-            "ma200": float,
-            "slope200_20": float,
-        }
+        rules: 判定ルール（先頭がデフォルト）
+        index_code: 指数コード（デフォルト: TOPIX）
     """
-    # TOPIX終値時系列を取得
-    topix_close = get_topix_close_series(conn, rebalance_date, lookback_days)
-    
+    key = _cache_key(conn, index_code, rules)
+    fingerprint = _fingerprint(conn, index_code)
+    cached = _TIMELINE_CACHE.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    timeline = RegimeTimeline(load_index_close_series(conn, index_code), rules)
+    _TIMELINE_CACHE[key] = (fingerprint, timeline)
+    return timeline
+
+
+def clear_regime_cache() -> None:
+    """レジームタイムラインのキャッシュを破棄"""
+    _TIMELINE_CACHE.clear()
+
+
+def _regime_from_close(topix_close: pd.Series) -> Dict[str, Any]:
+    """直近の終値系列からレジームを判定（旧来の1日分の計算）"""
     if len(topix_close) < 200:
         # MA200が計算できない場合はrange扱い
         return {
@@ -89,16 +264,14 @@ def get_market_regime(
             "slope200_20": None,
         }
     
-    # 移動平均を計算
+    ma200_series = topix_close.rolling(200).mean()
     ma20 = topix_close.rolling(20).mean().iloc[-1]
     ma60 = topix_close.rolling(60).mean().iloc[-1]
-    ma200 = topix_close.rolling(200).mean().iloc[-1]
+    ma200 = ma200_series.iloc[-1]
     
     # MA200の傾きを計算（20日前との差）
     if len(topix_close) >= 220:
-        ma200_today = topix_close.rolling(200).mean().iloc[-1]
-        ma200_20days_ago = topix_close.rolling(200).mean().iloc[-21]
-        slope200_20 = ma200_today - ma200_20days_ago
+        slope200_20 = ma200 - ma200_series.iloc[-21]
     else:
         # 20日前のデータがない場合は0とする
         slope200_20 = 0.0
@@ -107,10 +280,10 @@ def get_market_regime(
     if pd.isna(ma20) or pd.isna(ma60) or pd.isna(ma200):
         return {
             "regime": "range",
-            "ma20": float(ma20) if not pd.isna(ma20) else None,
-            "ma60": float(ma60) if not pd.isna(ma60) else None,
-            "ma200": float(ma200) if not pd.isna(ma200) else None,
-            "slope200_20": float(slope200_20) if not pd.isna(slope200_20) else None,
+            "ma20": _none_if_nan(ma20),
+            "ma60": _none_if_nan(ma60),
+            "ma200": _none_if_nan(ma200),
+            "slope200_20": _none_if_nan(slope200_20),
         }
     
     # レジーム判定
@@ -130,14 +303,41 @@ def get_market_regime(
     }
 
 
-
-
-
-
-
-
-
-
-
-
-
+def get_market_regime(
+    conn: sqlite3.Connection,
+    rebalance_date: str,
+    lookback_days: int = 250,
+) -> Dict[str, Any]:
+    """
+    市場レジームを判定
+    
+    判定ロジック:
+    - up: MA20 > MA60 > MA200 and slope200_20 > 0
+    - down: MA20 < MA60 < MA200 and slope200_20 < 0
+    - range: else
+    
+    lookback_days が220日以上の場合（デフォルト）、結果は過去の取得日数に依存しないため
+    レジームタイムライン（get_regime_timeline）から引く。
+    
+    Args:
+        conn: データベース接続
+        rebalance_date: リバランス日（YYYY-MM-DD、この日を含む）
+        lookback_days: 過去データの取得日数（デフォルト: 250日）
+    
+    Returns:
+        レジーム情報の辞書:
+        {
+            "regime": "up" | "down" | "range",
+            "ma20": float,
+            "ma60": float,
+            "ma200": float,
+            "slope200_20": float,
+        }
+    """
+    rule = DEFAULT_REGIME_RULE
+    if lookback_days >= rule.long + rule.slope_lag:
+        return get_regime_timeline(conn).lookup(rebalance_date)
+    
+    # 取得日数が短い場合は傾きの扱いが変わるため、直近の系列から計算
+    topix_close = get_topix_close_series(conn, rebalance_date, lookback_days)
+    return _regime_from_close(topix_close)
@@ -7,7 +7,7 @@ from datetime import datetime
 import sqlite3
 import pandas as pd
 
-from ..infra.db import connect_db, upsert
+from ..infra.db import borrow_db, connect_db, upsert
 from ..ingest.indices import TOPIX_CODE
 from ..backtest.performance import _split_multiplier_between
 
@@ -511,18 +511,19 @@ def get_holdings(
     Returns:
         保有銘柄のリスト（社名を含む）
     """
-    with connect_db() as conn:
-        # パフォーマンスを更新（保有中のみ）
-        if active_only:
-            update_holding_performance(as_of_date=as_of_date)
-            # サマリーも更新
-            update_holdings_summary(as_of_date=as_of_date)
-            # 翌営業日の決算発表予定日をチェック
-            _check_and_show_earnings_announcements(as_of_date)
-        else:
-            # すべての銘柄を取得する場合でも、サマリーは最新の状態に更新
-            update_holdings_summary(as_of_date=as_of_date)
-        
+    # パフォーマンスを更新（保有中のみ）
+    # 更新処理はそれぞれ書き込み用の接続を開くため、読み取り用の接続を借りる前に済ませる
+    if active_only:
+        update_holding_performance(as_of_date=as_of_date)
+        # サマリーも更新
+        update_holdings_summary(as_of_date=as_of_date)
+        # 翌営業日の決算発表予定日をチェック
+        _check_and_show_earnings_announcements(as_of_date)
+    else:
+        # すべての銘柄を取得する場合でも、サマリーは最新の状態に更新
+        update_holdings_summary(as_of_date=as_of_date)
+    
+    with borrow_db() as conn:
         # 保有銘柄を取得（社名はテーブルに保存されている）
         if active_only:
             query = "SELECT * FROM holdings WHERE sell_date IS NULL ORDER BY purchase_date DESC, code"
@@ -5,6 +5,12 @@ import sqlite3
 import json
 
 from ..infra.db import connect_db
+from ..infra.queries import (
+    SELECT_CANDIDATES_SQL,
+    SELECT_LISTED_INFO_JOIN,
+    SELECT_LISTED_SEGMENTS_JOIN,
+)
+from ..ingest.listed_segments import listed_segments_ready
 from ..config.strategy import StrategyConfig, default_strategy
 from .scoring import calculate_core_score, calculate_entry_score
 
@@ -25,19 +31,17 @@ def select_portfolio(
     Returns:
         選定銘柄のリスト（code, weight, core_score, entry_score, reason）
     """
+    # 基準日時点の銘柄属性
+    # listed_segments（市場区分の期間テーブル）が listed_info の最新日まで集計済みなら範囲検索で結合し、
+    # なければ（未作成・空・未更新）listed_info の銘柄ごとの最新日を相関サブクエリで求める
+    if listed_segments_ready(conn):
+        listed_join = SELECT_LISTED_SEGMENTS_JOIN
+    else:
+        listed_join = SELECT_LISTED_INFO_JOIN
+
     # フィルタリング条件を適用
-    sql = """
-        SELECT DISTINCT fm.code, fm.sector33, fm.core_score, fm.entry_score,
-               li.market_name, fm.liquidity_60d, fm.market_cap, fm.per, fm.pbr
-        FROM features_monthly fm
-        LEFT JOIN listed_info li ON fm.code = li.code AND li.date = (
-            SELECT MAX(date) FROM listed_info WHERE code = fm.code AND date <= ?
-        )
-        WHERE fm.as_of_date = ?
-          AND fm.liquidity_60d >= ?
-          AND fm.market_cap >= ?
-    """
-    params = [as_of_date, as_of_date, config.min_liquidity_60d, config.min_market_cap]
+    sql = SELECT_CANDIDATES_SQL.format(listed_join=listed_join)
+    params = [as_of_date, config.min_liquidity_60d, config.min_market_cap]
     
     if config.max_per:
         sql += " AND (fm.per IS NULL OR fm.per <= ?)"
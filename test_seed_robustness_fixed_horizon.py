@@ -12,6 +12,9 @@ Usage:
         --horizon 12 \
         --n-seeds 20 \
         --train-ratio 0.8
+
+各リバランス日の評価は1回だけ行い、seedごとのtest期間の成績はその集計として求める
+（omanta_3rd.backtest.seed_robustness）。seed数を増やしても評価時間はほぼ変わらない。
 """
 
 import argparse
@@ -19,7 +22,7 @@ import json
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 from datetime import datetime as dt
 from dateutil.relativedelta import relativedelta
 from dataclasses import replace
@@ -31,78 +34,18 @@ from omanta_3rd.jobs.optimize_longterm import (
 )
 from omanta_3rd.jobs.longterm_run import StrategyParams
 from omanta_3rd.backtest.feature_cache import FeatureCache
+from omanta_3rd.backtest.seed_robustness import (
+    PerDateResults,
+    aggregate_splits,
+    bootstrap_mean_excess,
+    sign_flip_pvalues,
+)
 from omanta_3rd.backtest.performance import calculate_portfolio_performance
 from omanta_3rd.infra.db import connect_db
 from omanta_3rd.jobs.optimize import _select_portfolio_with_params
 from omanta_3rd.jobs.longterm_run import save_portfolio
 
 
-# 並列化用のグローバル関数（pickle可能にするため）
-def _process_single_seed_wrapper(
-    seed: int,
-    rebalance_dates: List[str],
-    train_ratio: float,
-    horizon_months: int,
-    cost_bps: float,
-    strategy_params_dict: Dict[str, Any],
-    entry_params_dict: Dict[str, Any],
-    features_dict: Dict[str, pd.DataFrame],
-    prices_dict: Dict[str, Dict[str, List[float]]],
-) -> tuple[int, Optional[float], Optional[dict]]:
-    """単一seedの処理（並列化用ラッパー）"""
-    from omanta_3rd.jobs.optimize_longterm import split_rebalance_dates
-    from omanta_3rd.jobs.longterm_run import StrategyParams
-    from omanta_3rd.jobs.optimize import EntryScoreParams
-    from dataclasses import fields, replace
-    
-    # dataclassを復元
-    default_strategy = StrategyParams()
-    strategy_params = replace(
-        default_strategy,
-        **{k: v for k, v in strategy_params_dict.items() if hasattr(default_strategy, k)}
-    )
-    entry_params = EntryScoreParams(**entry_params_dict)
-    
-    # データ分割
-    train_dates, test_dates = split_rebalance_dates(
-        rebalance_dates,
-        train_ratio=train_ratio,
-        random_seed=seed,
-    )
-    
-    # テストデータでパフォーマンスを計算（固定ホライズン）
-    try:
-        test_perf = calculate_fixed_horizon_performance(
-            test_dates,
-            strategy_params,
-            entry_params,
-            horizon_months=horizon_months,
-            cost_bps=cost_bps,
-            features_dict=features_dict,
-            prices_dict=prices_dict,
-        )
-        
-        test_mean_excess_ann = test_perf["mean_annual_excess_return_pct"]
-        
-        seed_detail = {
-            "seed": seed,
-            "train_dates": train_dates,
-            "test_dates": test_dates,
-            "test_mean_annual_excess_return_pct": test_mean_excess_ann,
-            "test_median_annual_excess_return_pct": test_perf.get("median_annual_excess_return_pct", None),
-            "test_mean_annual_return_pct": test_perf.get("mean_annual_return_pct", None),
-            "test_win_rate": test_perf.get("win_rate", None),
-            "test_num_portfolios": test_perf.get("num_portfolios", None),
-        }
-        
-        return seed, test_mean_excess_ann, seed_detail
-    except Exception as e:
-        import traceback
-        print(f"  [Seed {seed}] エラー: {e}")
-        traceback.print_exc()
-        return seed, None, None
-
-
 def load_best_params(json_file: str) -> Dict[str, Any]:
     """JSONファイルから最良パラメータを読み込む"""
     with open(json_file, "r", encoding="utf-8") as f:
@@ -162,7 +105,7 @@ def build_params_from_json(params_dict: Dict[str, float]) -> tuple[StrategyParam
     return strategy_params, entry_params
 
 
-def calculate_fixed_horizon_performance(
+def calculate_fixed_horizon_per_date(
     rebalance_dates: List[str],
     strategy_params: StrategyParams,
     entry_params: EntryScoreParams,
@@ -170,9 +113,10 @@ def calculate_fixed_horizon_performance(
     cost_bps: float = 0.0,
     features_dict: Optional[Dict[str, pd.DataFrame]] = None,
     prices_dict: Optional[Dict[str, Dict[str, List[float]]]] = None,
-) -> Dict[str, Any]:
+    snapshot_path: Optional[str] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], str]:
     """
-    固定ホライズン版のパフォーマンスを計算
+    固定ホライズン版のパフォーマンスをリバランス日ごとに計算
     
     Args:
         rebalance_dates: リバランス日のリスト
@@ -182,16 +126,18 @@ def calculate_fixed_horizon_performance(
         cost_bps: 取引コスト（bps、デフォルト: 0.0）
         features_dict: 特徴量辞書（{rebalance_date: features_df}）
         prices_dict: 価格データ辞書（{rebalance_date: {code: [adj_close, ...]}}）
+        snapshot_path: データ終端日・価格・TOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
     
     Returns:
-        パフォーマンス指標の辞書
+        ({rebalance_date: performance}, データ終端日) のタプル
+        （ポートフォリオが空・評価日がデータ終端を超える・計算エラーの日は含まない）
     """
     from omanta_3rd.jobs.optimize_timeseries import _run_single_backtest_portfolio_only
     from concurrent.futures import ProcessPoolExecutor, as_completed
     from dataclasses import fields
     
     # 最新の評価日を取得
-    with connect_db() as conn:
+    with connect_db(snapshot=snapshot_path) as conn:
         latest_date_df = pd.read_sql_query(
             "SELECT MAX(date) as max_date FROM prices_daily",
             conn
@@ -233,10 +179,7 @@ def calculate_fixed_horizon_performance(
         raise RuntimeError("No portfolios were generated")
     
     # 各ポートフォリオのパフォーマンスを計算（固定ホライズン）
-    performances = []
-    annual_returns = []
-    annual_excess_returns = []
-    holding_periods = []
+    performances = {}  # {rebalance_date: perf}
     
     with connect_db() as conn:
         for rebalance_date in sorted(portfolios.keys()):
@@ -260,6 +203,7 @@ def calculate_fixed_horizon_performance(
                 rebalance_date=rebalance_date,
                 as_of_date=evaluation_date,
                 portfolio_table="portfolio_monthly",
+                snapshot_path=snapshot_path,
             )
             
             # 一時的に保存したポートフォリオを削除
@@ -270,53 +214,63 @@ def calculate_fixed_horizon_performance(
             conn.commit()
             
             if "error" not in perf:
-                total_return_pct = perf.get("total_return_pct")
-                topix_comparison = perf.get("topix_comparison", {})
-                excess_return_pct = topix_comparison.get("excess_return_pct")
-                
-                # 保有期間を計算（固定ホライズン）
-                holding_years = horizon_months / 12.0
-                
-                # 年率化
-                if total_return_pct is not None and not pd.isna(total_return_pct):
-                    return_factor = 1 + total_return_pct / 100
-                    if return_factor > 0:
-                        annual_return = return_factor ** (1 / holding_years) - 1
-                        annual_return_pct = annual_return * 100
-                        if not isinstance(annual_return_pct, complex):
-                            annual_returns.append(annual_return_pct)
-                            holding_periods.append(holding_years)
-                
-                if excess_return_pct is not None and not pd.isna(excess_return_pct):
-                    excess_factor = 1 + excess_return_pct / 100
-                    if excess_factor > 0:
-                        annual_excess_return = excess_factor ** (1 / holding_years) - 1
-                        annual_excess_return_pct = annual_excess_return * 100
-                        if not isinstance(annual_excess_return_pct, complex):
-                            annual_excess_returns.append(annual_excess_return_pct)
-                
-                performances.append(perf)
+                performances[rebalance_date] = perf
+    
+    return performances, latest_date
+
+
+def calculate_fixed_horizon_performance(
+    rebalance_dates: List[str],
+    strategy_params: StrategyParams,
+    entry_params: EntryScoreParams,
+    horizon_months: int,
+    cost_bps: float = 0.0,
+    features_dict: Optional[Dict[str, pd.DataFrame]] = None,
+    prices_dict: Optional[Dict[str, Dict[str, List[float]]]] = None,
+    snapshot_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    固定ホライズン版のパフォーマンスを計算
+    
+    Args:
+        rebalance_dates: リバランス日のリスト
+        strategy_params: StrategyParams
+        entry_params: EntryScoreParams
+        horizon_months: ホライズン（月数、例：12, 24, 36）
+        cost_bps: 取引コスト（bps、デフォルト: 0.0）
+        features_dict: 特徴量辞書（{rebalance_date: features_df}）
+        prices_dict: 価格データ辞書（{rebalance_date: {code: [adj_close, ...]}}）
+        snapshot_path: データ終端日・価格・TOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
+    
+    Returns:
+        パフォーマンス指標の辞書
+    """
+    performances, latest_date = calculate_fixed_horizon_per_date(
+        rebalance_dates,
+        strategy_params,
+        entry_params,
+        horizon_months=horizon_months,
+        cost_bps=cost_bps,
+        features_dict=features_dict,
+        prices_dict=prices_dict,
+        snapshot_path=snapshot_path,
+    )
     
     if not performances:
         raise RuntimeError("No performances were calculated")
     
-    # 集計指標を計算
-    mean_annual_excess_return = np.mean(annual_excess_returns) if annual_excess_returns else 0.0
-    median_annual_excess_return = np.median(annual_excess_returns) if annual_excess_returns else 0.0
-    mean_annual_return = np.mean(annual_returns) if annual_returns else 0.0
-    median_annual_return = np.median(annual_returns) if annual_returns else 0.0
-    
-    # 勝率
-    win_rate = sum(1 for r in annual_excess_returns if r > 0) / len(annual_excess_returns) if annual_excess_returns else 0.0
+    # 集計指標を計算（年率化はリバランス日ごと、年率化できない日は除外）
+    per_date = PerDateResults.from_performances(sorted(performances), performances, horizon_months)
+    stats = aggregate_splits(per_date, np.ones((1, len(per_date.dates)), dtype=bool))
     
     result = {
-        "mean_annual_excess_return_pct": mean_annual_excess_return,
-        "median_annual_excess_return_pct": median_annual_excess_return,
-        "mean_annual_return_pct": mean_annual_return,
-        "median_annual_return_pct": median_annual_return,
-        "win_rate": win_rate,
+        "mean_annual_excess_return_pct": float(stats["mean_annual_excess_return_pct"][0]),
+        "median_annual_excess_return_pct": float(stats["median_annual_excess_return_pct"][0]),
+        "mean_annual_return_pct": float(stats["mean_annual_return_pct"][0]),
+        "median_annual_return_pct": float(stats["median_annual_return_pct"][0]),
+        "win_rate": float(stats["win_rate"][0]),
         "num_portfolios": len(performances),
-        "mean_holding_years": np.mean(holding_periods) if holding_periods else 0.0,
+        "mean_holding_years": float(stats["mean_holding_years"][0]),
         "horizon_months": horizon_months,
         "last_date": latest_date,
     }
@@ -324,6 +278,80 @@ def calculate_fixed_horizon_performance(
     return result
 
 
+def evaluate_seed_splits(
+    rebalance_dates: List[str],
+    seeds: Sequence[int],
+    train_ratio: float,
+    horizon_months: int,
+    strategy_params: StrategyParams,
+    entry_params: EntryScoreParams,
+    cost_bps: float = 0.0,
+    features_dict: Optional[Dict[str, pd.DataFrame]] = None,
+    prices_dict: Optional[Dict[str, Dict[str, List[float]]]] = None,
+    time_series_split: bool = True,
+    n_boot: int = 2000,
+    n_perm: int = 2000,
+    ci: float = 0.95,
+) -> Dict[str, Any]:
+    """
+    全リバランス日を1回だけ評価し、各seedのtrain/test分割をマスク集計で求める
+    
+    seedごとの指標は、そのseedのtest期間でcalculate_fixed_horizon_performanceを
+    呼んだ場合と同じ（test期間にポートフォリオが無いseedは除外）。
+    
+    Returns:
+        {"seed_details": [...], "per_date": PerDateResults}
+    """
+    performances, _ = calculate_fixed_horizon_per_date(
+        rebalance_dates,
+        strategy_params,
+        entry_params,
+        horizon_months=horizon_months,
+        cost_bps=cost_bps,
+        features_dict=features_dict,
+        prices_dict=prices_dict,
+    )
+    per_date = PerDateResults.from_performances(rebalance_dates, performances, horizon_months)
+    print(f"✓ リバランス日ごとの評価完了: {len(performances)}/{len(rebalance_dates)}日")
+    
+    seeds = list(seeds)
+    split_dates = [
+        split_rebalance_dates(
+            rebalance_dates,
+            train_ratio=train_ratio,
+            random_seed=seed,
+            time_series_split=time_series_split,
+        )
+        for seed in seeds
+    ]
+    masks = per_date.masks(test_dates for _, test_dates in split_dates)
+    stats = aggregate_splits(per_date, masks)
+    boot = bootstrap_mean_excess(per_date, masks, n_boot=n_boot, ci=ci)
+    pvalues = sign_flip_pvalues(per_date, masks, n_perm=n_perm)
+    
+    seed_details = []
+    for i, (seed, (train_dates, test_dates)) in enumerate(zip(seeds, split_dates)):
+        if stats["num_portfolios"][i] == 0:
+            print(f"  [Seed {seed}] テスト期間に評価できるポートフォリオがありません")
+            continue
+        seed_details.append({
+            "seed": int(seed),
+            "train_dates": train_dates,
+            "test_dates": test_dates,
+            "test_mean_annual_excess_return_pct": float(stats["mean_annual_excess_return_pct"][i]),
+            "test_median_annual_excess_return_pct": float(stats["median_annual_excess_return_pct"][i]),
+            "test_mean_annual_return_pct": float(stats["mean_annual_return_pct"][i]),
+            "test_win_rate": float(stats["win_rate"][i]),
+            "test_num_portfolios": int(stats["num_portfolios"][i]),
+            "bootstrap_ci_level": float(ci),
+            "bootstrap_ci_low": float(boot["ci_low"][i]),
+            "bootstrap_ci_high": float(boot["ci_high"][i]),
+            "bootstrap_prob_le_zero": float(boot["prob_le_zero"][i]),
+            "sign_flip_pvalue": float(pvalues[i]),
+        })
+    return {"seed_details": seed_details, "per_date": per_date}
+
+
 def test_seed_robustness_fixed_horizon(
     json_file: str,
     start_date: str,
@@ -334,10 +362,16 @@ def test_seed_robustness_fixed_horizon(
     cost_bps: float = 0.0,
     cache_dir: str = "cache/features",
     n_jobs: int = -1,
+    time_series_split: bool = True,
+    n_boot: int = 2000,
+    n_perm: int = 2000,
 ) -> Dict[str, Any]:
     """
     固定ホライズン版 seed耐性テストを実行
     
+    各リバランス日の評価は1回だけ行い、seedごとのtest期間はその集計として求める
+    （evaluate_seed_splits）。seed数を増やしても評価時間はほぼ変わらない。
+    
     Args:
         json_file: 最良パラメータを含むJSONファイル
         start_date: 開始日（YYYY-MM-DD）
@@ -347,6 +381,10 @@ def test_seed_robustness_fixed_horizon(
         train_ratio: 学習データの割合
         cost_bps: 取引コスト（bps）
         cache_dir: キャッシュディレクトリ
+        n_jobs: 互換性のため残している（seedごとの並列実行は不要になった）
+        time_series_split: split_rebalance_datesの分割方式（Falseでseedごとのランダム分割）
+        n_boot: seedごとのブートストラップ回数
+        n_perm: seedごとの符号反転検定の回数
     
     Returns:
         テスト結果の辞書
@@ -384,67 +422,36 @@ def test_seed_robustness_fixed_horizon(
     print(f"✓ 特徴量: {len(features_dict)}日分、価格データ: {len(prices_dict)}日分")
     print()
     
-    # 各seedでテスト（並列化対応）
+    # 各seedでテスト（リバランス日ごとの評価は1回、seedごとの分割はマスク集計）
     print("=" * 80)
     print("各seedでテストデータのパフォーマンスを計算します...")
     print("=" * 80)
     
-    # 並列化実行
-    from concurrent.futures import ProcessPoolExecutor, as_completed
-    import multiprocessing as mp
-    from dataclasses import fields
-    
-    # 並列数（デフォルト: CPU数、SQLite環境では制限）
-    if n_jobs == -1:
-        n_jobs = min(mp.cpu_count(), 4)  # SQLite環境では4並列まで推奨
-    else:
-        n_jobs = min(n_jobs, mp.cpu_count())
-    
-    # dataclassを辞書に変換（pickle可能にするため）
-    strategy_params_dict = {
-        field.name: getattr(strategy_params, field.name)
-        for field in fields(StrategyParams)
-    }
-    entry_params_dict = {
-        field.name: getattr(entry_params, field.name)
-        for field in fields(EntryScoreParams)
-    }
-    
-    test_results = []
-    seed_details = []
-    
-    print(f"並列実行: {n_jobs}プロセス")
-    
-    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
-        # 全seedのタスクを投入
-        future_to_seed = {
-            executor.submit(
-                _process_single_seed_wrapper,
-                seed,
-                rebalance_dates,
-                train_ratio,
-                horizon_months,
-                cost_bps,
-                strategy_params_dict,
-                entry_params_dict,
-                features_dict,
-                prices_dict,
-            ): seed
-            for seed in range(1, n_seeds + 1)
-        }
-        
-        # 完了したタスクから順に処理
-        for future in as_completed(future_to_seed):
-            seed, test_mean_excess_ann, seed_detail = future.result()
-            
-            if test_mean_excess_ann is not None and seed_detail is not None:
-                test_results.append(test_mean_excess_ann)
-                seed_details.append(seed_detail)
-                
-                print(f"\n[Seed {seed}/{n_seeds}]")
-                print(f"  学習データ: {len(seed_detail['train_dates'])}日, テストデータ: {len(seed_detail['test_dates'])}日")
-                print(f"  テストデータ年率超過リターン（平均）: {test_mean_excess_ann:.4f}%")
-                print(f"  評価対象ポートフォリオ数: {seed_detail.get('test_num_portfolios', 0)}")
+    splits = evaluate_seed_splits(
+        rebalance_dates,
+        seeds=range(1, n_seeds + 1),
+        train_ratio=train_ratio,
+        horizon_months=horizon_months,
+        strategy_params=strategy_params,
+        entry_params=entry_params,
+        cost_bps=cost_bps,
+        features_dict=features_dict,
+        prices_dict=prices_dict,
+        time_series_split=time_series_split,
+        n_boot=n_boot,
+        n_perm=n_perm,
+    )
+    seed_details = splits["seed_details"]
+    test_results = [d["test_mean_annual_excess_return_pct"] for d in seed_details]
+    
+    for seed_detail in seed_details:
+        print(f"\n[Seed {seed_detail['seed']}/{n_seeds}]")
+        print(f"  学習データ: {len(seed_detail['train_dates'])}日, テストデータ: {len(seed_detail['test_dates'])}日")
+        print(f"  テストデータ年率超過リターン（平均）: {seed_detail['test_mean_annual_excess_return_pct']:.4f}%")
+        print(f"  評価対象ポートフォリオ数: {seed_detail.get('test_num_portfolios', 0)}")
+        print(f"  ブートストラップ{seed_detail['bootstrap_ci_level']:.0%}区間: "
+              f"[{seed_detail['bootstrap_ci_low']:.4f}%, {seed_detail['bootstrap_ci_high']:.4f}%], "
+              f"符号反転検定 p={seed_detail['sign_flip_pvalue']:.4f}")
     
     if not test_results:
         raise RuntimeError("No test results were calculated")
@@ -489,6 +496,15 @@ def test_seed_robustness_fixed_horizon(
     print(f"正の値の割合: {positive_ratio:.1%} ({np.sum(test_results_array > 0)}/{n_seeds})")
     print()
     
+    # seedごとの有意性（ブートストラップ・符号反転検定）
+    pvalues = np.array([d["sign_flip_pvalue"] for d in seed_details])
+    ci_low_positive_ratio = float(np.mean([d["bootstrap_ci_low"] > 0 for d in seed_details]))
+    print("seedごとの有意性:")
+    print(f"  符号反転検定 p値（中央値）: {np.median(pvalues):.4f}")
+    print(f"  p < 0.05 のseedの割合: {np.mean(pvalues < 0.05):.1%}")
+    print(f"  ブートストラップ区間の下限 > 0 のseedの割合: {ci_low_positive_ratio:.1%}")
+    print()
+    
     # 合格判定（事前に固定）
     print("【合格判定】")
     if horizon_months == 12:
@@ -518,6 +534,7 @@ def test_seed_robustness_fixed_horizon(
         "horizon_months": int(horizon_months),
         "n_seeds": int(n_seeds),
         "train_ratio": float(train_ratio),
+        "time_series_split": bool(time_series_split),
         "test_results": [float(x) for x in test_results],
         "statistics": {
             "mean": float(mean_val),
@@ -531,19 +548,14 @@ def test_seed_robustness_fixed_horizon(
             "percentile_90": float(percentile_90),
             "positive_ratio": float(positive_ratio),
         },
-        "seed_details": [
-            {
-                "seed": int(detail["seed"]),
-                "train_dates": detail["train_dates"],
-                "test_dates": detail["test_dates"],
-                "test_mean_annual_excess_return_pct": float(detail["test_mean_annual_excess_return_pct"]) if detail["test_mean_annual_excess_return_pct"] is not None else None,
-                "test_median_annual_excess_return_pct": float(detail["test_median_annual_excess_return_pct"]) if detail["test_median_annual_excess_return_pct"] is not None else None,
-                "test_mean_annual_return_pct": float(detail["test_mean_annual_return_pct"]) if detail["test_mean_annual_return_pct"] is not None else None,
-                "test_win_rate": float(detail["test_win_rate"]) if detail["test_win_rate"] is not None else None,
-                "test_num_portfolios": int(detail["test_num_portfolios"]) if detail["test_num_portfolios"] is not None else None,
-            }
-            for detail in seed_details
-        ],
+        "significance": {
+            "median_sign_flip_pvalue": float(np.median(pvalues)),
+            "share_pvalue_below_005": float(np.mean(pvalues < 0.05)),
+            "share_bootstrap_ci_low_positive": ci_low_positive_ratio,
+            "n_boot": int(n_boot),
+            "n_perm": int(n_perm),
+        },
+        "seed_details": seed_details,
         "passed": bool(passed),
         "criteria": str(criteria),
     }
@@ -610,6 +622,23 @@ if __name__ == "__main__":
         default=-1,
         help="並列数（-1で自動、デフォルト: -1）",
     )
+    parser.add_argument(
+        "--random-split",
+        action="store_true",
+        help="seedごとにランダム分割する（デフォルトは時系列分割のため、全seedで同じ分割になる）",
+    )
+    parser.add_argument(
+        "--n-boot",
+        type=int,
+        default=2000,
+        help="seedごとのブートストラップ回数（デフォルト: 2000）",
+    )
+    parser.add_argument(
+        "--n-perm",
+        type=int,
+        default=2000,
+        help="seedごとの符号反転検定の回数（デフォルト: 2000）",
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -630,6 +659,9 @@ if __name__ == "__main__":
             cost_bps=args.cost_bps,
             cache_dir=args.cache_dir,
             n_jobs=args.n_jobs,
+            time_series_split=not args.random_split,
+            n_boot=args.n_boot,
+            n_perm=args.n_perm,
         )
         
         # 結果をJSONファイルに保存
@@ -26,7 +26,7 @@ from dateutil.relativedelta import relativedelta
 from test_seed_robustness_fixed_horizon import (
     load_best_params,
     build_params_from_json,
-    calculate_fixed_horizon_performance,
+    evaluate_seed_splits,
     get_monthly_rebalance_dates,
 )
 from omanta_3rd.backtest.feature_cache import FeatureCache
@@ -43,6 +43,7 @@ def test_seed_robustness_fixed_horizon_extended(
     cost_bps: float = 0.0,
     cache_dir: str = "cache/features",
     n_jobs: int = -1,
+    time_series_split: bool = True,
 ) -> Dict[str, Any]:
     """
     固定ホライズン版 seed耐性テスト（拡張版：より長い期間）
@@ -56,7 +57,8 @@ def test_seed_robustness_fixed_horizon_extended(
         train_ratio: 学習データの割合
         cost_bps: 取引コスト（bps）
         cache_dir: キャッシュディレクトリ
-        n_jobs: 並列数
+        n_jobs: 互換性のため残している（seedごとの並列実行は不要になった）
+        time_series_split: split_rebalance_datesの分割方式（Falseでseedごとのランダム分割）
     
     Returns:
         テスト結果の辞書
@@ -94,69 +96,32 @@ def test_seed_robustness_fixed_horizon_extended(
     print(f"✓ 特徴量: {len(features_dict)}日分、価格データ: {len(prices_dict)}日分")
     print()
     
-    # 各seedでテスト（並列化対応）
+    # 各seedでテスト（リバランス日ごとの評価は1回、seedごとの分割はマスク集計）
     print("=" * 80)
     print("各seedでテストデータのパフォーマンスを計算します...")
     print("=" * 80)
     
-    # 並列化実行
-    from concurrent.futures import ProcessPoolExecutor, as_completed
-    import multiprocessing as mp
-    from dataclasses import fields
-    from omanta_3rd.jobs.longterm_run import StrategyParams
-    from omanta_3rd.jobs.optimize import EntryScoreParams
-    
-    # 並列数（デフォルト: CPU数、SQLite環境では制限）
-    if n_jobs == -1:
-        n_jobs = min(mp.cpu_count(), 4)  # SQLite環境では4並列まで推奨
-    else:
-        n_jobs = min(n_jobs, mp.cpu_count())
-    
-    # dataclassを辞書に変換（pickle可能にするため）
-    strategy_params_dict = {
-        field.name: getattr(strategy_params, field.name)
-        for field in fields(StrategyParams)
-    }
-    entry_params_dict = {
-        field.name: getattr(entry_params, field.name)
-        for field in fields(EntryScoreParams)
-    }
-    
-    test_results = []
-    seed_details = []
-    
-    print(f"並列実行: {n_jobs}プロセス")
+    splits = evaluate_seed_splits(
+        rebalance_dates,
+        seeds=range(1, n_seeds + 1),
+        train_ratio=train_ratio,
+        horizon_months=horizon_months,
+        strategy_params=strategy_params,
+        entry_params=entry_params,
+        cost_bps=cost_bps,
+        features_dict=features_dict,
+        prices_dict=prices_dict,
+        time_series_split=time_series_split,
+    )
+    seed_details = splits["seed_details"]
+    test_results = [d["test_mean_annual_excess_return_pct"] for d in seed_details]
     
-    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
-        # 全seedのタスクを投入
-        future_to_seed = {
-            executor.submit(
-                _process_single_seed_wrapper,
-                seed,
-                rebalance_dates,
-                train_ratio,
-                horizon_months,
-                cost_bps,
-                strategy_params_dict,
-                entry_params_dict,
-                features_dict,
-                prices_dict,
-            ): seed
-            for seed in range(1, n_seeds + 1)
-        }
-        
-        # 完了したタスクから順に処理
-        for future in as_completed(future_to_seed):
-            seed, test_mean_excess_ann, seed_detail = future.result()
-            
-            if test_mean_excess_ann is not None and seed_detail is not None:
-                test_results.append(test_mean_excess_ann)
-                seed_details.append(seed_detail)
-                
-                print(f"\n[Seed {seed}/{n_seeds}]")
-                print(f"  学習データ: {len(seed_detail['train_dates'])}日, テストデータ: {len(seed_detail['test_dates'])}日")
-                print(f"  テストポートフォリオ数: {seed_detail.get('test_num_portfolios', 0)}")
-                print(f"  テストデータ年率超過リターン（平均）: {test_mean_excess_ann:.4f}%")
+    for seed_detail in seed_details:
+        print(f"\n[Seed {seed_detail['seed']}/{n_seeds}]")
+        print(f"  学習データ: {len(seed_detail['train_dates'])}日, テストデータ: {len(seed_detail['test_dates'])}日")
+        print(f"  テストポートフォリオ数: {seed_detail.get('test_num_portfolios', 0)}")
+        print(f"  テストデータ年率超過リターン（平均）: {seed_detail['test_mean_annual_excess_return_pct']:.4f}%")
+        print(f"  符号反転検定 p={seed_detail['sign_flip_pvalue']:.4f}")
     
     if not test_results:
         raise RuntimeError("No test results were calculated")
@@ -242,6 +207,7 @@ def test_seed_robustness_fixed_horizon_extended(
         "horizon_months": int(horizon_months),
         "n_seeds": int(n_seeds),
         "train_ratio": float(train_ratio),
+        "time_series_split": bool(time_series_split),
         "test_results": [float(x) for x in test_results],
         "statistics": {
             "mean": float(mean_val),
@@ -260,19 +226,7 @@ def test_seed_robustness_fixed_horizon_extended(
             "min_num_portfolios": int(min_num_portfolios),
             "max_num_portfolios": int(max_num_portfolios),
         },
-        "seed_details": [
-            {
-                "seed": int(detail["seed"]),
-                "train_dates": detail["train_dates"],
-                "test_dates": detail["test_dates"],
-                "test_mean_annual_excess_return_pct": float(detail["test_mean_annual_excess_return_pct"]) if detail["test_mean_annual_excess_return_pct"] is not None else None,
-                "test_median_annual_excess_return_pct": float(detail["test_median_annual_excess_return_pct"]) if detail["test_median_annual_excess_return_pct"] is not None else None,
-                "test_mean_annual_return_pct": float(detail["test_mean_annual_return_pct"]) if detail["test_mean_annual_return_pct"] is not None else None,
-                "test_win_rate": float(detail["test_win_rate"]) if detail["test_win_rate"] is not None else None,
-                "test_num_portfolios": int(detail["test_num_portfolios"]) if detail["test_num_portfolios"] is not None else None,
-            }
-            for detail in seed_details
-        ],
+        "seed_details": seed_details,
         "passed": bool(passed),
         "criteria": str(criteria),
     }
@@ -280,68 +234,6 @@ def test_seed_robustness_fixed_horizon_extended(
     return result
 
 
-# 並列化用のグローバル関数（test_seed_robustness_fixed_horizon.pyから再利用）
-# 注意: _process_single_seed_wrapperはグローバル関数として定義されているため、
-# 直接インポートできない可能性があるため、同じ定義をここに含める
-def _process_single_seed_wrapper(
-    seed: int,
-    rebalance_dates: List[str],
-    train_ratio: float,
-    horizon_months: int,
-    cost_bps: float,
-    strategy_params_dict: Dict[str, Any],
-    entry_params_dict: Dict[str, Any],
-    features_dict: Dict[str, pd.DataFrame],
-    prices_dict: Dict[str, Dict[str, List[float]]],
-) -> tuple[int, Optional[float], Optional[Dict[str, Any]]]:
-    """単一seedの処理をラップ（並列化用）"""
-    try:
-        from omanta_3rd.jobs.longterm_run import StrategyParams
-        from omanta_3rd.jobs.optimize import EntryScoreParams
-        
-        # dataclassを再構築
-        strategy_params = StrategyParams(**strategy_params_dict)
-        entry_params = EntryScoreParams(**entry_params_dict)
-
-        # データ分割
-        train_dates, test_dates = split_rebalance_dates(
-            rebalance_dates,
-            train_ratio=train_ratio,
-            random_seed=seed,
-        )
-
-        # テストデータでパフォーマンスを計算（固定ホライズン）
-        test_perf = calculate_fixed_horizon_performance(
-            test_dates,
-            strategy_params,
-            entry_params,
-            horizon_months=horizon_months,
-            cost_bps=cost_bps,
-            features_dict=features_dict,
-            prices_dict=prices_dict,
-        )
-
-        test_mean_excess_ann = float(test_perf["mean_annual_excess_return_pct"])
-
-        seed_detail = {
-            "seed": int(seed),
-            "train_dates": train_dates,
-            "test_dates": test_dates,
-            "test_mean_annual_excess_return_pct": test_mean_excess_ann,
-            "test_median_annual_excess_return_pct": float(test_perf.get("median_annual_excess_return_pct", 0.0)),
-            "test_mean_annual_return_pct": float(test_perf.get("mean_annual_return_pct", 0.0)),
-            "test_win_rate": float(test_perf.get("win_rate", 0.0)),
-            "test_num_portfolios": int(test_perf.get("num_portfolios", 0)),
-        }
-
-        return seed, test_mean_excess_ann, seed_detail
-    except Exception as e:
-        import traceback
-        print(f"  [Seed {seed}] エラー: {e}")
-        traceback.print_exc()
-        return seed, None, None
-
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="固定ホライズン版 seed耐性テスト（拡張版：より長い期間）"
@@ -401,6 +293,11 @@ if __name__ == "__main__":
         default=-1,
         help="並列数（-1で自動、デフォルト: -1）",
     )
+    parser.add_argument(
+        "--random-split",
+        action="store_true",
+        help="seedごとにランダム分割する（デフォルトは時系列分割のため、全seedで同じ分割になる）",
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -421,6 +318,7 @@ if __name__ == "__main__":
             cost_bps=args.cost_bps,
             cache_dir=args.cache_dir,
             n_jobs=args.n_jobs,
+            time_series_split=not args.random_split,
         )
         
         # 結果をJSONファイルに保存
@@ -0,0 +1,305 @@
+"""infra/db の接続プールのユニットテスト（一時ファイルのSQLite）"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from omanta_3rd.config.settings import SQL_INDEXES_PATH, SQL_SCHEMA_PATH
+from omanta_3rd.infra import db as db_module
+from omanta_3rd.infra.db import ConnectionPool, borrow_db, close_pools, connect_db
+from omanta_3rd.infra import maintenance as maintenance_module
+from omanta_3rd.infra.maintenance import (
+    collect_table_stats,
+    load_maintenance_history,
+    maintain_optuna_storage,
+    run_maintenance,
+)
+from omanta_3rd.infra.query_plan import HOT_QUERIES, find_plan_regressions
+from omanta_3rd.infra.snapshot import (
+    connect_snapshot,
+    create_snapshot,
+    prune_snapshots,
+    read_snapshot_info,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "test.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE prices_daily (date TEXT, code TEXT, PRIMARY KEY (date, code))")
+    conn.execute("INSERT INTO prices_daily VALUES ('2024-01-04', '7203')")
+    conn.commit()
+    conn.close()
+    return path
+
+
+# ----------------------------------------------------------------
+# ConnectionPool / borrow_db
+# ----------------------------------------------------------------
+
+class TestConnectionPool:
+    def test_reuses_connection_per_thread(self, db_path):
+        pool = ConnectionPool(db_path)
+        with borrow_db(pool=pool) as a:
+            assert a.execute("SELECT COUNT(*) FROM prices_daily").fetchone()[0] == 1
+        with borrow_db(pool=pool) as b:
+            assert b is a
+        assert len(pool) == 1
+
+        others = []
+        t = threading.Thread(target=lambda: others.append(pool.connection()))
+        t.start()
+        t.join()
+        assert others[0] is not a
+        assert len(pool) == 2
+        pool.close_all()
+        assert len(pool) == 0
+
+    def test_query_only_rejects_writes(self, db_path):
+        pool = ConnectionPool(db_path)
+        with pytest.raises(sqlite3.OperationalError):
+            with borrow_db(pool=pool) as conn:
+                conn.execute("INSERT INTO prices_daily VALUES ('2024-01-05', '7203')")
+        # 例外後も同じ接続を引き続き使える
+        with borrow_db(pool=pool) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM prices_daily").fetchone()[0] == 1
+        pool.close_all()
+
+    def test_writable_pool_commits_on_exit(self, db_path):
+        pool = ConnectionPool(db_path, query_only=False)
+        with borrow_db(pool=pool) as conn:
+            conn.execute("INSERT INTO prices_daily VALUES ('2024-01-05', '7203')")
+        with pytest.raises(ValueError):
+            with borrow_db(pool=pool) as conn:
+                conn.execute("INSERT INTO prices_daily VALUES ('2024-01-09', '7203')")
+                raise ValueError("rollback")
+        pool.close_all()
+
+        check = sqlite3.connect(db_path)
+        assert [r[0] for r in check.execute("SELECT date FROM prices_daily ORDER BY date")] == [
+            "2024-01-04", "2024-01-05",
+        ]
+        check.close()
+
+
+# ----------------------------------------------------------------
+# スナップショット
+# ----------------------------------------------------------------
+
+class TestSnapshot:
+    def test_create_and_read_immutable(self, db_path, tmp_path):
+        dest = create_snapshot(tmp_path / "snapshots" / "snap.sqlite", source=db_path)
+        assert not (tmp_path / "snapshots" / "snap.sqlite-wal").exists()
+
+        with connect_snapshot(dest) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+            assert conn.execute("SELECT COUNT(*) FROM prices_daily").fetchone()[0] == 1
+            # sql/indexes.sql のうち存在するテーブルのインデックスだけが作成される
+            names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            assert "idx_prices_code_date" in names
+            assert "idx_fins_code_date" not in names
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO prices_daily VALUES ('2024-01-05', '7203')")
+
+        info = read_snapshot_info(dest)
+        assert info["max_date:prices_daily"] == "2024-01-04"
+        assert info["source"] == str(db_path)
+
+    def test_snapshot_is_isolated_from_live_writes(self, db_path, tmp_path):
+        dest = create_snapshot(tmp_path / "snap.sqlite", source=db_path)
+        live = sqlite3.connect(db_path)
+        live.execute("INSERT INTO prices_daily VALUES ('2024-01-05', '7203')")
+        live.commit()
+        live.close()
+
+        pool = ConnectionPool(dest, immutable=True)
+        with borrow_db(pool=pool) as conn:
+            assert conn.execute("SELECT MAX(date) FROM prices_daily").fetchone()[0] == "2024-01-04"
+        pool.close_all()
+
+    def test_snapshot_is_opt_in_per_call(self, db_path, tmp_path, monkeypatch):
+        dest = create_snapshot(tmp_path / "snap.sqlite", source=db_path)
+        live = sqlite3.connect(db_path)
+        live.execute("INSERT INTO prices_daily VALUES ('2024-01-05', '7203')")
+        live.commit()
+        live.close()
+        monkeypatch.setattr(db_module, "DB_PATH", db_path)
+
+        query = "SELECT MAX(date) FROM prices_daily"
+        try:
+            # 指定しない限りライブDBを読む（運用系の読み取りはスナップショットに向かない）
+            with connect_db(read_only=True) as conn:
+                assert conn.execute(query).fetchone()[0] == "2024-01-05"
+            with borrow_db() as conn:
+                assert conn.execute(query).fetchone()[0] == "2024-01-05"
+            with connect_db(read_only=True, snapshot=dest) as conn:
+                assert conn.execute(query).fetchone()[0] == "2024-01-04"
+            with borrow_db(snapshot=dest) as conn:
+                assert conn.execute(query).fetchone()[0] == "2024-01-04"
+            with borrow_db() as conn:
+                assert conn.execute(query).fetchone()[0] == "2024-01-05"
+        finally:
+            close_pools()
+
+    def test_performance_reads_prices_from_snapshot(self, tmp_path, monkeypatch):
+        from omanta_3rd.backtest.performance import calculate_portfolio_performance
+
+        live_path = tmp_path / "live.sqlite"
+        live = sqlite3.connect(live_path)
+        live.executescript(SQL_SCHEMA_PATH.read_text(encoding="utf-8"))
+        live.executemany(
+            "INSERT INTO prices_daily (date, code, open, close) VALUES (?, ?, ?, ?)",
+            [("2024-01-04", "7203", 100.0, 100.0), ("2024-02-01", "7203", 110.0, 110.0)],
+        )
+        live.executemany(
+            "INSERT INTO index_daily (date, index_code, open, close) VALUES (?, '0000', ?, ?)",
+            [("2024-01-04", 2000.0, 2000.0), ("2024-02-01", 2100.0, 2100.0)],
+        )
+        live.commit()
+        dest = create_snapshot(tmp_path / "snap.sqlite", source=live_path)
+        # スナップショット後の訂正とポートフォリオはライブDBにだけある
+        live.execute("UPDATE prices_daily SET close = 200.0 WHERE date = '2024-02-01'")
+        live.execute("INSERT INTO portfolio_monthly (rebalance_date, code, weight) VALUES ('2024-01-03', '7203', 1.0)")
+        live.commit()
+        live.close()
+        monkeypatch.setattr(db_module, "DB_PATH", live_path)
+
+        perf = calculate_portfolio_performance("2024-01-03", "2024-02-01", snapshot_path=str(dest))
+        assert perf["total_return_pct"] == pytest.approx(10.0)
+        assert perf["topix_comparison"]["topix_return_pct"] == pytest.approx(5.0)
+        assert calculate_portfolio_performance("2024-01-03", "2024-02-01")["total_return_pct"] == pytest.approx(100.0)
+
+    def test_refuses_overwrite_and_prunes(self, db_path, tmp_path):
+        directory = tmp_path / "snapshots"
+        for name in ("a.sqlite", "b.sqlite", "c.sqlite"):
+            create_snapshot(directory / name, source=db_path, analyze=False)
+        with pytest.raises(FileExistsError):
+            create_snapshot(directory / "c.sqlite", source=db_path)
+        removed = prune_snapshots(1, directory=directory)
+        assert [p.name for p in removed] == ["a.sqlite", "b.sqlite"]
+        assert [p.name for p in directory.glob("*.sqlite")] == ["c.sqlite"]
+
+
+# ----------------------------------------------------------------
+# ホットクエリの実行計画
+# ----------------------------------------------------------------
+
+class TestQueryPlans:
+    @pytest.fixture
+    def schema_conn(self):
+        conn = sqlite3.connect(":memory:")
+        conn.executescript(SQL_SCHEMA_PATH.read_text(encoding="utf-8"))
+        conn.executescript(SQL_INDEXES_PATH.read_text(encoding="utf-8"))
+        yield conn
+        conn.close()
+
+    def test_hot_queries_use_indexes(self, schema_conn):
+        assert find_plan_regressions(schema_conn) == []
+
+    def test_detects_dropped_index(self, schema_conn):
+        schema_conn.execute("DROP INDEX idx_index_code_date")
+        problems = find_plan_regressions(schema_conn)
+        assert any(p.startswith("regime.index_history") for p in problems)
+
+    def test_skips_missing_tables(self):
+        conn = sqlite3.connect(":memory:")
+        assert find_plan_regressions(conn, HOT_QUERIES) == []
+        conn.close()
+
+    def test_checks_the_sql_the_modules_run(self, schema_conn):
+        from omanta_3rd.features import loader
+        from omanta_3rd.infra import queries
+        from omanta_3rd.market import regime
+
+        by_name = {query.name: query.sql for query in HOT_QUERIES}
+        assert by_name["loader.latest_fy"] is loader.LATEST_FY_SQL is queries.LATEST_FY_SQL
+        assert by_name["regime.index_history"] is regime.INDEX_HISTORY_SQL
+        # 番号付きプレースホルダ（?1）の select も検査できる
+        assert "select.candidates_listed_info" in by_name
+        schema_conn.execute("DROP INDEX idx_feat_date_score")
+        schema_conn.execute("CREATE TABLE fm_tmp AS SELECT * FROM features_monthly")
+        schema_conn.execute("DROP TABLE features_monthly")
+        schema_conn.execute("ALTER TABLE fm_tmp RENAME TO features_monthly")
+        problems = find_plan_regressions(schema_conn)
+        assert any(p.startswith("select.candidates_segments") for p in problems)
+
+
+# ----------------------------------------------------------------
+# DBメンテナンス
+# ----------------------------------------------------------------
+
+class TestMaintenance:
+    def test_analyze_checkpoint_and_record(self, db_path, tmp_path):
+        # チェックポイントされていない WAL を作る
+        writer = sqlite3.connect(db_path)
+        writer.execute("PRAGMA wal_autocheckpoint=0")
+        writer.executemany(
+            "INSERT INTO prices_daily VALUES (?, '7203')", [(f"2023-{i:04d}",) for i in range(500)]
+        )
+        writer.commit()
+        writer.close()
+
+        history = tmp_path / "history.sqlite"
+        report = run_maintenance(db_path, history_path=history)
+        assert report.wal_bytes_after == 0
+        assert report.analyze_sec is not None and report.vacuum_sec is None
+
+        stats = report.table_stats.set_index("name")
+        assert stats.loc["prices_daily", "row_count"] == 501
+        assert stats.loc["prices_daily", "bytes"] > 0
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+        conn.close()
+
+        conn = sqlite3.connect(history)
+        log = load_maintenance_history(conn)
+        assert log["db_name"].tolist() == ["test.sqlite"]
+        n = conn.execute("SELECT COUNT(*) FROM db_table_stats WHERE name = 'prices_daily'").fetchone()[0]
+        assert n == 1
+        conn.close()
+
+    def test_vacuum_reclaims_freelist(self, db_path, tmp_path):
+        conn = sqlite3.connect(db_path)
+        conn.executemany(
+            "INSERT INTO prices_daily VALUES (?, ?)", [(f"2023-{i:04d}", "x" * 500) for i in range(2000)]
+        )
+        conn.commit()
+        conn.execute("DELETE FROM prices_daily WHERE date LIKE '2023-%'")
+        conn.commit()
+        conn.close()
+
+        report = run_maintenance(db_path, vacuum=True, record=False)
+        assert report.freelist_pages == 0
+        assert report.db_bytes_after < report.db_bytes_before
+
+    def test_optuna_storage(self, db_path, tmp_path, monkeypatch):
+        assert maintain_optuna_storage(None) is None
+        assert maintain_optuna_storage("postgresql://localhost/optuna") is None
+        report = maintain_optuna_storage(f"sqlite:///{db_path}", record=False)
+        assert report is not None and report.table_stats.empty
+
+        # 履歴はメインDBではなくストレージ自身に記録する
+        main_db = tmp_path / "main.sqlite"
+        monkeypatch.setattr(maintenance_module, "DB_PATH", main_db)
+        maintain_optuna_storage(f"sqlite:///{db_path}")
+        assert not main_db.exists()
+        conn = sqlite3.connect(db_path)
+        assert load_maintenance_history(conn)["db_name"].tolist() == ["test.sqlite"]
+        conn.close()
+
+    def test_row_counts_from_stat1(self, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.execute("ANALYZE")
+        conn.execute("CREATE TABLE no_stats (x INTEGER)")
+        conn.executemany("INSERT INTO no_stats VALUES (?)", [(i,) for i in range(3)])
+        conn.execute("INSERT INTO prices_daily VALUES ('2024-01-05', '7203')")
+        conn.commit()
+        stats = collect_table_stats(conn).set_index("name")
+        conn.close()
+        # 統計があるテーブルは ANALYZE 時点の行数、無いテーブルは COUNT(*)
+        assert stats.loc["prices_daily", "row_count"] == 1
+        assert stats.loc["no_stats", "row_count"] == 3
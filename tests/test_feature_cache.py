@@ -0,0 +1,304 @@
+"""FeatureCache の保存・読み込みのユニットテスト（DB不要）"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pickle
+
+from omanta_3rd.backtest.data_plane import SharedDataPlane
+from omanta_3rd.backtest.eval_cache import EvaluationCache
+from omanta_3rd.backtest.feature_cache import FeatureCache, SELECTION_FEATURE_COLUMNS
+from omanta_3rd.backtest.feature_matrix import FeatureMatrix, MATRIX_FEATURE_COLUMNS, build_feature_matrices
+from omanta_3rd.features.code_registry import CodeRegistry
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+DATES = ["2024-01-31", "2024-02-29", "2024-03-29"]
+
+
+def _features(date, n=5):
+    rng = np.random.default_rng(len(date))
+    df = pd.DataFrame({
+        "as_of_date": date,
+        "code": [f"{1000 + i}" for i in range(n)],
+        "sector33": ["銀行業", "証券業", "銀行業", "保険業", "証券業"][:n],
+        "record_high_forecast_flag": rng.integers(0, 2, n),
+    })
+    for col in ["liquidity_60d", "market_cap", "roe", "roe_trend", "pbr", "per",
+                "forward_per", "op_growth", "profit_growth", "op_trend"]:
+        df[col] = rng.random(n)
+    return df
+
+
+@pytest.fixture
+def cache(tmp_path):
+    fc = FeatureCache(cache_dir=str(tmp_path))
+    features = {d: _features(d) for d in DATES}
+    fc._save_cache(features, {d: {} for d in DATES}, DATES[0], DATES[-1])
+    return fc, features
+
+
+class TestFeatureCacheParquet:
+    def test_one_row_group_per_date(self, cache):
+        fc, _ = cache
+        meta = pq.ParquetFile(fc._get_cache_path(DATES[0], DATES[-1])).metadata
+        assert meta.num_row_groups == len(DATES)
+
+    def test_load_roundtrip(self, cache):
+        fc, features = cache
+        loaded = fc._load_cache(DATES[0], DATES[-1])
+        assert sorted(loaded) == DATES
+        for d in DATES:
+            pd.testing.assert_frame_equal(loaded[d], features[d], check_dtype=False)
+
+    def test_load_column_projection_and_date_filter(self, cache):
+        fc, _ = cache
+        loaded = fc._load_cache(DATES[0], DATES[-1], columns=["code", "roe"], rebalance_dates=[DATES[1]])
+        assert list(loaded) == [DATES[1]]
+        assert list(loaded[DATES[1]].columns) == ["code", "roe"]
+
+    def test_get_single_date(self, cache):
+        fc, features = cache
+        feat = fc.get(DATES[2], DATES[0], DATES[-1], columns=SELECTION_FEATURE_COLUMNS)
+        pd.testing.assert_frame_equal(feat, features[DATES[2]][SELECTION_FEATURE_COLUMNS], check_dtype=False)
+        assert not isinstance(feat["code"].dtype, pd.CategoricalDtype)
+
+    def test_get_missing_date_returns_none(self, cache):
+        fc, _ = cache
+        assert fc.get("2030-01-31", DATES[0], DATES[-1]) is None
+
+    def test_codes_stay_strings_with_shared_registry(self, cache):
+        fc, _ = cache
+        loaded = fc._load_cache(DATES[0], DATES[-1], rebalance_dates=[DATES[1]])
+        assert fc.registry == CodeRegistry.load(fc._get_registry_path(DATES[0], DATES[-1]))
+        feat = loaded[DATES[1]]
+        # 公開境界では文字列（文字列操作・merge がそのまま動く）
+        for col in ("code", "sector33"):
+            assert not isinstance(feat[col].dtype, pd.CategoricalDtype)
+        assert feat["code"].str.startswith("10").all()
+        # ID は日付を絞って読み込んでも全日付の対応表で決まる
+        assert fc.registry.encode_codes(feat["code"]).tolist() == [0, 1, 2, 3, 4]
+
+
+class TestFeatureMatrix:
+    def test_from_cache(self, cache):
+        fc, features = cache
+        loaded = fc._load_cache(DATES[0], DATES[-1], columns=SELECTION_FEATURE_COLUMNS)
+        matrices = build_feature_matrices(loaded, fc.registry)
+        assert sorted(matrices) == DATES
+        m = matrices[DATES[0]]
+        assert m.values.dtype == np.float32
+        assert m.values.shape == (5, len(MATRIX_FEATURE_COLUMNS))
+        assert m.code_ids.dtype == np.int32
+        assert m.sector_ids.dtype == np.int16
+        np.testing.assert_allclose(m.column("roe"), features[DATES[0]]["roe"], rtol=1e-6)
+
+    def test_valid_mask_and_missing_column(self):
+        feat = _features(DATES[0]).drop(columns=["op_trend"])
+        feat.loc[1, "roe"] = np.nan
+        m = FeatureMatrix.from_frame(feat, CodeRegistry.from_frames([feat]))
+        j = MATRIX_FEATURE_COLUMNS.index("roe")
+        assert m.valid[:, j].tolist() == [True, False, True, True, True]
+        assert not m.valid[:, MATRIX_FEATURE_COLUMNS.index("op_trend")].any()
+
+    def test_to_frame_roundtrip(self):
+        feat = _features(DATES[1])
+        m = FeatureMatrix.from_frame(feat, CodeRegistry.from_frames([feat]))
+        out = m.to_frame()
+        expected = feat[SELECTION_FEATURE_COLUMNS]
+        assert list(out.columns) == SELECTION_FEATURE_COLUMNS
+        pd.testing.assert_frame_equal(out, expected, check_dtype=False, rtol=1e-6)
+
+    def test_pickle_keeps_registry_compact(self):
+        feat = _features(DATES[2])
+        m = FeatureMatrix.from_frame(feat, CodeRegistry.from_frames([feat]))
+        restored = pickle.loads(pickle.dumps(m))
+        assert restored.registry == m.registry
+        assert restored.registry.encode_codes(["1003"]).tolist() == [3]
+        np.testing.assert_array_equal(restored.values, m.values)
+
+
+# ----------------------------------------------------------------
+# FeatureMatrix からの選定
+# ----------------------------------------------------------------
+
+def _selection_inputs(n=120):
+    rng = np.random.default_rng(7)
+    sectors = np.array(["銀行業", "証券業", "保険業", "電気機器", "小売業", None], dtype=object)
+    feat = pd.DataFrame({
+        "as_of_date": DATES[0],
+        "code": [f"{2000 + i}" for i in range(n)],
+        "sector33": sectors[rng.integers(0, len(sectors), n)],
+        "record_high_forecast_flag": rng.integers(0, 2, n).astype(float),
+    })
+    for col in ["liquidity_60d", "market_cap", "roe", "pbr", "forward_per",
+                "op_growth", "profit_growth", "op_trend"]:
+        feat[col] = rng.normal(1.0, 1.0, n)
+    feat.loc[rng.choice(n, 10, replace=False), "forward_per"] = np.nan
+    feat.loc[rng.choice(n, 10, replace=False), "op_growth"] = np.nan
+    feat.loc[rng.choice(n, 5, replace=False), "liquidity_60d"] = np.nan
+    prices = {
+        code: (100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, 20 if i % 7 == 0 else 260)))).tolist()
+        for i, code in enumerate(feat["code"])
+        if i % 11 != 0  # 価格の無い銘柄も含める
+    }
+    return feat, prices
+
+
+class TestSelectFromMatrix:
+    @pytest.mark.parametrize("use_entry_score,sector_cap,target", [(True, 4, 12), (False, 4, 12), (True, 1, 8)])
+    def test_matches_dataframe_selection(self, monkeypatch, use_entry_score, sector_cap, target):
+        from omanta_3rd.jobs import optimize
+        from omanta_3rd.jobs.longterm_run import StrategyParams
+        from omanta_3rd.features.technicals import EntryScoreParams
+
+        def no_db(*args, **kwargs):
+            raise AssertionError("warm 済み価格データがある場合は DB を読まない")
+
+        monkeypatch.setattr(optimize, "borrow_db", no_db)
+        feat, prices = _selection_inputs()
+        m = FeatureMatrix.from_frame(feat, CodeRegistry.from_frames([feat]))
+        sp = StrategyParams(
+            use_entry_score=use_entry_score, sector_cap=sector_cap,
+            target_min=target, target_max=target, pool_size=40, roe_min=0.0,
+        )
+        ep = EntryScoreParams(rsi_base=45.0, rsi_max=70.0, bb_z_base=-0.5, bb_z_max=1.5)
+
+        fast = optimize._select_portfolio_with_params(m, sp, ep, prices_data=prices)
+        slow = optimize._select_portfolio_with_params(m.to_frame(), sp, ep, prices_data=prices)
+        assert len(fast) == target
+        assert list(fast.columns) == list(slow.columns)
+        assert fast["code"].tolist() == [str(c) for c in slow["code"]]
+        np.testing.assert_allclose(fast["core_score"].to_numpy(), slow["core_score"].to_numpy(dtype=float))
+        np.testing.assert_allclose(
+            fast["entry_score"].to_numpy(), slow["entry_score"].to_numpy(dtype=float), equal_nan=True
+        )
+        assert (fast["rebalance_date"] == DATES[0]).all()
+
+    def test_pct_rank_array_matches_pandas(self):
+        from omanta_3rd.features.utils import _pct_rank_array
+
+        rng = np.random.default_rng(3)
+        x = rng.integers(0, 6, 80).astype(float)  # 同順位を含む
+        x[[2, 9]] = np.nan
+        groups = rng.integers(-1, 4, 80)
+        for ascending in (True, False):
+            expected = pd.Series(x).rank(pct=True, ascending=ascending).to_numpy()
+            np.testing.assert_allclose(_pct_rank_array(x, ascending), expected, equal_nan=True)
+            expected = (
+                pd.Series(x)
+                .groupby(pd.Series(groups).where(groups >= 0))
+                .transform(lambda s: s.rank(pct=True, ascending=ascending))
+                .to_numpy()
+            )
+            np.testing.assert_allclose(_pct_rank_array(x, ascending, groups), expected, equal_nan=True)
+
+
+
+# ----------------------------------------------------------------
+# SharedDataPlane
+# ----------------------------------------------------------------
+
+def _plane_inputs():
+    features = {d: _features(d) for d in DATES}
+    registry = CodeRegistry.from_frames(features.values())
+    matrices = build_feature_matrices(features, registry)
+    del matrices[DATES[1]]  # 特徴量の無い日
+    prices = {
+        DATES[0]: {"1000": [100.0, 101.5], "1001": [50.0]},
+        DATES[1]: {},
+        DATES[2]: {"1004": [10.0, 11.0, 12.0]},
+    }
+    return matrices, prices, registry
+
+
+class TestSharedDataPlane:
+    def test_roundtrip_is_memmapped(self, tmp_path):
+        matrices, prices, registry = _plane_inputs()
+        plane = SharedDataPlane.build(tmp_path / "plane", matrices, prices, registry)
+        assert plane.rebalance_dates == DATES
+        assert sorted(plane.features) == [DATES[0], DATES[2]]
+        for d, m in matrices.items():
+            got = plane.features[d]
+            assert isinstance(got.values, np.memmap)
+            assert not got.values.flags.writeable
+            np.testing.assert_array_equal(got.values, m.values)
+            np.testing.assert_array_equal(got.code_ids, m.code_ids)
+            pd.testing.assert_frame_equal(got.to_frame(), m.to_frame())
+        assert dict(plane.prices) == prices
+        assert plane.prices.get("2030-01-01") is None
+
+    def test_reopen(self, tmp_path):
+        matrices, prices, registry = _plane_inputs()
+        SharedDataPlane.build(tmp_path / "plane", matrices, prices, registry)
+        reopened = SharedDataPlane.open(tmp_path / "plane")
+        assert reopened.registry == registry
+        assert reopened.prices[DATES[2]]["1004"] == [10.0, 11.0, 12.0]
+        assert [p.name for p in tmp_path.iterdir()] == ["plane"]  # 一時ディレクトリは残らない
+
+    def test_warm_reuses_existing_plane(self, tmp_path, monkeypatch):
+        matrices, prices, registry = _plane_inputs()
+        fc = FeatureCache(cache_dir=str(tmp_path))
+        fc.registry = registry
+        calls = []
+        monkeypatch.setattr(
+            fc, "warm_matrices", lambda dates, **kw: calls.append(dates) or (matrices, prices)
+        )
+        plane = SharedDataPlane.warm(fc, DATES)
+        assert plane.root == tmp_path / f"plane_{DATES[0]}_{DATES[-1]}_{fc.data_version}"
+        mtime = (plane.root / "values.npy").stat().st_mtime_ns
+        again = SharedDataPlane.warm(fc, DATES[:2], root=plane.root)
+        assert (again.root / "values.npy").stat().st_mtime_ns == mtime
+        assert calls == [DATES]
+
+
+# ----------------------------------------------------------------
+# EvaluationCache
+# ----------------------------------------------------------------
+
+def _perf(rebalance_date, total_return_pct):
+    return {
+        "rebalance_date": rebalance_date,
+        "as_of_date": "2021-01-29",
+        "total_return_pct": total_return_pct,
+        "topix_comparison": {"topix_return_pct": 1.0, "excess_return_pct": total_return_pct - 1.0},
+        "stocks": [{"code": "1000", "weight": 1.0}],
+    }
+
+
+class TestEvaluationCache:
+    def test_params_key_is_order_independent(self):
+        a = EvaluationCache.params_key({"w_quality": 0.3, "roe_min": 0.1}, {"rsi_base": 50.0})
+        b = EvaluationCache.params_key({"roe_min": 0.1, "w_quality": 0.3}, {"rsi_base": 50.0})
+        c = EvaluationCache.params_key({"roe_min": 0.1, "w_quality": 0.31}, {"rsi_base": 50.0})
+        assert a == b != c
+
+    def test_key_includes_horizon_and_cost(self):
+        cache = EvaluationCache()
+        cache.put_many("k", 12, 0.0, [_perf(DATES[0], 5.0)])
+        assert cache.get("k", DATES[0], 12, 0.0)["total_return_pct"] == 5.0
+        assert cache.get("k", DATES[0], 24, 0.0) is None
+        assert cache.get("k", DATES[0], 12, 10.0) is None
+        assert cache.get("k", DATES[1], 12, 0.0) is None
+        assert cache.stats() == {"hits": 1, "misses": 3, "hit_rate": 0.25}
+
+    def test_returned_performance_is_a_copy(self):
+        cache = EvaluationCache()
+        perf = _perf(DATES[0], 5.0)
+        cache.put_many("k", 12, 0.0, [perf])
+        perf["stocks"].append({"code": "9999"})
+        got = cache.get("k", DATES[0], 12, 0.0)
+        got["topix_comparison"]["excess_return_pct"] = None
+        assert cache.get("k", DATES[0], 12, 0.0) == _perf(DATES[0], 5.0)
+
+    def test_persisted_across_instances(self, tmp_path):
+        fc = FeatureCache(cache_dir=str(tmp_path))
+        cache = EvaluationCache.for_feature_cache(fc)
+        assert cache.path == tmp_path / f"eval_cache_{fc.data_version}.sqlite"
+        assert cache.put_many("k", 12, 0.0, [_perf(d, float(i)) for i, d in enumerate(DATES)]) == len(DATES)
+        cache.close()
+
+        reopened = pickle.loads(pickle.dumps(EvaluationCache.for_feature_cache(fc)))
+        assert len(reopened) == len(DATES)
+        assert reopened.get("k", DATES[2], 12, 0.0) == _perf(DATES[2], 2.0)
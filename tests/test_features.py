@@ -9,6 +9,9 @@ from omanta_3rd.features.fundamentals import calculate_roe, calculate_growth_rat
 from omanta_3rd.features.valuation import calculate_per, calculate_pbr, calculate_forward_per
 from omanta_3rd.features.technicals import rsi_from_series, bb_zscore
 from omanta_3rd.features.utils import _safe_div, _clip01, _pct_rank, _log_safe, _calc_slope
+from omanta_3rd.ingest.price_aggregates import compute_rolling_aggregates
+from omanta_3rd.ingest.listed_segments import build_segment_intervals, normalize_market_segment
+from omanta_3rd.features.code_registry import CodeRegistry, UNKNOWN_ID
 
 
 # ---------------------------------------------------------------------------
@@ -235,3 +238,186 @@ class TestPctRank:
         s = pd.Series([10.0, 30.0, 20.0])
         ranks = _pct_rank(s, ascending=False)
         assert ranks[1] < ranks[2] < ranks[0]
+
+
+# ---------------------------------------------------------------------------
+# compute_rolling_aggregates（prices_rolling_daily の増分計算）
+# ---------------------------------------------------------------------------
+
+def _price_rows(code, values, factors=None, start="2024-01-01"):
+    dates = pd.date_range(start, periods=len(values), freq="D").strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        "date": dates,
+        "code": code,
+        "turnover_value": values,
+        "adjustment_factor": factors if factors is not None else [1.0] * len(values),
+    })
+
+
+class TestComputeRollingAggregates:
+    def test_liquidity_matches_tail_mean(self):
+        values = [float(i) for i in range(1, 11)]
+        out = compute_rolling_aggregates(_price_rows("1001", values), window=3)
+        assert out["liquidity_60d"].tolist() == pytest.approx([1.0, 1.5, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0])
+
+    def test_nan_is_skipped_within_window(self):
+        out = compute_rolling_aggregates(_price_rows("1001", [10.0, np.nan, 20.0]), window=3)
+        assert out["liquidity_60d"].iloc[-1] == pytest.approx(15.0)
+
+    def test_incremental_equals_full(self):
+        values = [float(i) for i in range(1, 21)]
+        factors = [1.0] * 20
+        factors[5] = 0.5
+        factors[15] = 0.25
+        rows = _price_rows("1001", values, factors)
+        full = compute_rolling_aggregates(rows, window=4)
+
+        head, tail = rows.iloc[:12], rows.iloc[12:]
+        first = compute_rolling_aggregates(head, window=4)
+        seed_cum = {"1001": first["split_factor_cum"].iloc[-1]}
+        second = compute_rolling_aggregates(tail, seed_rows=head.tail(3), seed_split_cum=seed_cum, window=4)
+        inc = pd.concat([first, second], ignore_index=True)
+
+        assert inc["liquidity_60d"].tolist() == pytest.approx(full["liquidity_60d"].tolist())
+        assert inc["split_factor_cum"].tolist() == pytest.approx(full["split_factor_cum"].tolist())
+
+    def test_split_factor_cum_ratio_gives_split_multiplier(self):
+        # 1:2分割（adjustment_factor=0.5）→ 分割前後の比は2倍
+        out = compute_rolling_aggregates(_price_rows("1001", [1.0] * 4, [1.0, 1.0, 0.5, 1.0]))
+        cum = out["split_factor_cum"].tolist()
+        assert cum[3] / cum[1] == pytest.approx(2.0)
+        assert cum[1] / cum[0] == pytest.approx(1.0)
+
+    def test_invalid_factor_ignored(self):
+        out = compute_rolling_aggregates(_price_rows("1001", [1.0] * 3, [np.nan, 0.0, -1.0]))
+        assert out["split_factor_cum"].tolist() == pytest.approx([1.0, 1.0, 1.0])
+
+    def test_codes_are_independent(self):
+        rows = pd.concat([
+            _price_rows("1001", [1.0, 1.0], [1.0, 0.5]),
+            _price_rows("1002", [3.0, 5.0]),
+        ])
+        out = compute_rolling_aggregates(rows).set_index(["code", "date"])
+        assert out.loc["1002", "split_factor_cum"].tolist() == pytest.approx([1.0, 1.0])
+        assert out.loc["1002", "liquidity_60d"].tolist() == pytest.approx([3.0, 4.0])
+
+
+# ---------------------------------------------------------------------------
+# listed_segments（市場区分の期間テーブル）
+# ---------------------------------------------------------------------------
+
+class TestNormalizeMarketSegment:
+    @pytest.mark.parametrize("name,expected", [
+        ("プライム", "prime"),
+        ("Prime", "prime"),
+        ("東証一部", "prime"),
+        ("スタンダード", "standard"),
+        ("東証二部", "standard"),
+        ("グロース", "growth"),
+        ("マザーズ", "growth"),
+        ("JASDAQ(スタンダード)", "standard"),
+        ("その他", "other"),
+        (None, "other"),
+    ])
+    def test_mapping(self, name, expected):
+        assert normalize_market_segment(name) == expected
+
+
+class TestBuildSegmentIntervals:
+    def _listed(self, rows):
+        return pd.DataFrame(rows, columns=["date", "code", "company_name", "market_name", "sector17", "sector33"])
+
+    def test_unchanged_rows_collapse(self):
+        df = self._listed([
+            ("2024-01-31", "1001", "A", "プライム", "x", "s"),
+            ("2024-02-29", "1001", "A", "プライム", "x", "s"),
+            ("2024-03-31", "1001", "A", "プライム", "x", "s"),
+        ])
+        out = build_segment_intervals(df)
+        assert len(out) == 1
+        assert out.iloc[0]["valid_from"] == "2024-01-31"
+        assert out.iloc[0]["valid_to"] == "2024-03-31"
+        assert pd.isna(out.iloc[0]["next_from"])
+
+    def test_attribute_change_splits(self):
+        df = self._listed([
+            ("2022-03-31", "1001", "A", "東証一部", "x", "s"),
+            ("2022-04-30", "1001", "A", "プライム", "x", "s"),
+        ])
+        out = build_segment_intervals(df)
+        assert out["valid_from"].tolist() == ["2022-03-31", "2022-04-30"]
+        assert out["next_from"].iloc[0] == "2022-04-30"
+        assert out["segment"].tolist() == ["prime", "prime"]
+
+    def test_missing_snapshot_splits(self):
+        df = self._listed([
+            ("2024-01-31", "1001", "A", "プライム", "x", "s"),
+            ("2024-01-31", "1002", "B", "プライム", "x", "s"),
+            ("2024-02-29", "1002", "B", "プライム", "x", "s"),
+            ("2024-03-31", "1001", "A", "プライム", "x", "s"),
+        ])
+        out = build_segment_intervals(df)
+        a = out[out["code"] == "1001"]
+        assert a["valid_to"].tolist() == ["2024-01-31", "2024-03-31"]
+
+    def test_migration_sql_matches_builder(self):
+        from pathlib import Path
+        import sqlite3
+
+        df = self._listed([
+            ("2022-03-31", "1001", "A", "東証一部", "x", "s"),
+            ("2022-04-30", "1001", "A", "プライム", "x", "s"),
+            ("2022-05-31", "1001", "A", "プライム", "x", "s"),
+            ("2022-03-31", "1002", "B", "マザーズ", None, "t"),
+            ("2022-04-30", "1002", "B", "グロース", None, "t"),
+            ("2022-03-31", "1003", "C", "JASDAQ(スタンダード)", "y", "u"),
+            ("2022-05-31", "1003", "C", "JASDAQ(スタンダード)", "y", "u"),
+        ])
+        conn = sqlite3.connect(":memory:")
+        df.to_sql("listed_info", conn, index=False)
+        sql = (Path(__file__).resolve().parents[1] / "sql" / "migration_add_listed_segments.sql").read_text(encoding="utf-8")
+        conn.executescript(sql)
+        got = pd.read_sql_query("SELECT * FROM listed_segments ORDER BY code, valid_from", conn)
+        expected = build_segment_intervals(df).sort_values(["code", "valid_from"]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(got[expected.columns].fillna("NA"), expected.fillna("NA"), check_dtype=False)
+
+
+# ----------------------------------------------------------------
+# CodeRegistry
+# ----------------------------------------------------------------
+
+class TestCodeRegistry:
+    def _registry(self):
+        return CodeRegistry(["7203", "1301", "6758", "1301"], ["輸送用機器", "水産・農林業", None])
+
+    def test_ids_follow_sorted_order(self):
+        reg = self._registry()
+        assert reg.codes == ["1301", "6758", "7203"]
+        assert reg.encode_codes(["6758"]).tolist() == [1]
+        assert reg.encode_sectors(["輸送用機器"]).tolist() == [1]
+
+    def test_unknown_and_missing_map_to_unknown_id(self):
+        reg = self._registry()
+        ids = reg.encode_codes(["7203", "9999", None, np.nan])
+        assert ids.dtype == np.int32
+        assert ids.tolist() == [2, UNKNOWN_ID, UNKNOWN_ID, UNKNOWN_ID]
+        assert reg.encode_sectors(["水産・農林業"]).dtype == np.int16
+
+    def test_decode_roundtrip(self):
+        reg = self._registry()
+        codes = ["7203", "1301", "6758"]
+        assert reg.decode_codes(reg.encode_codes(codes)).tolist() == codes
+        assert reg.decode_codes([UNKNOWN_ID]).tolist() == [None]
+
+    def test_encode_non_string_codes(self):
+        reg = self._registry()
+        # 数値で読み込まれたコード・欠損の混在も文字列のカテゴリに合わせる
+        assert reg.encode_codes(pd.Series([7203, None, 1301], dtype=object)).tolist() == [2, UNKNOWN_ID, 0]
+        assert reg.encode_codes(np.array([6758, 9999])).tolist() == [1, UNKNOWN_ID]
+
+    def test_save_load(self, tmp_path):
+        reg = self._registry()
+        path = tmp_path / "registry.json"
+        reg.save(path)
+        assert CodeRegistry.load(path) == reg
+
@@ -0,0 +1,204 @@
+"""ホールドアウト評価パイプライン（jobs/holdout_pipeline）のユニットテスト（DB不要な部分）"""
+
+import pandas as pd
+import optuna
+import pytest
+
+from omanta_3rd.jobs import holdout_pipeline, optimize_timeseries
+from omanta_3rd.jobs.holdout_pipeline import (
+    HoldoutPlane,
+    LeakageBarrier,
+    evaluate_params_batch,
+    params_from_trial,
+    run_holdout_pipeline,
+)
+
+TRAIN = ["2022-09-30", "2022-10-31", "2022-11-30", "2022-12-30"]
+HOLDOUT = ["2023-01-31", "2023-02-28", "2023-03-31"]
+
+
+def _plane(barrier):
+    dates = TRAIN + HOLDOUT
+    return HoldoutPlane(
+        barrier,
+        barrier.train_dates(dates),
+        barrier.holdout_dates(dates),
+        {d: pd.DataFrame({"code": ["1301"]}) for d in dates},
+        {d: {"1301": [1.0]} for d in dates},
+    )
+
+
+def _params(w_quality):
+    return {
+        "w_quality": w_quality, "w_value": 0.3, "w_growth": 0.1, "w_record_high": 0.1, "w_size": 0.2,
+        "w_forward_per": 0.4, "roe_min": 0.07, "liquidity_quantile_cut": 0.2,
+        "rsi_base": 40.0, "rsi_max": 70.0, "bb_z_base": -1.0, "bb_z_max": 1.5, "bb_weight": 0.7,
+    }
+
+
+# ---------------------------------------------------------------------------
+# LeakageBarrier
+# ---------------------------------------------------------------------------
+
+class TestLeakageBarrier:
+    def test_split_and_embargo(self):
+        barrier = LeakageBarrier("2022-12-31", "2023-01-01", embargo_months=1)
+        assert barrier.train_dates(TRAIN + HOLDOUT) == TRAIN
+        assert barrier.holdout_dates(TRAIN + HOLDOUT) == HOLDOUT[1:]
+
+    def test_overlap_rejected(self):
+        with pytest.raises(ValueError):
+            LeakageBarrier("2023-01-31", "2023-01-01")
+
+    def test_check_train_dates(self):
+        barrier = LeakageBarrier("2022-12-31", "2023-01-01")
+        barrier.check_train_dates(TRAIN)
+        with pytest.raises(ValueError):
+            barrier.check_train_dates(TRAIN + HOLDOUT[:1])
+
+
+# ---------------------------------------------------------------------------
+# HoldoutPlane
+# ---------------------------------------------------------------------------
+
+class TestHoldoutPlane:
+    def test_train_view_excludes_holdout(self):
+        plane = _plane(LeakageBarrier("2022-12-31", "2023-01-01"))
+        features, prices = plane.train_view()
+        assert sorted(features) == TRAIN
+        assert sorted(prices) == TRAIN
+        # 全体のデータは Holdout も含む（評価は同じデータで行う）
+        assert set(HOLDOUT) <= set(plane.features_dict)
+
+    def test_train_view_detects_leak(self):
+        plane = _plane(LeakageBarrier("2022-12-31", "2023-01-01"))
+        plane.train_dates.append(HOLDOUT[0])
+        with pytest.raises(ValueError):
+            plane.train_view()
+
+
+# ---------------------------------------------------------------------------
+# params_from_trial
+# ---------------------------------------------------------------------------
+
+class TestParamsFromTrial:
+    def test_normalization_matches_objective(self):
+        params = {
+            "w_quality": 0.3, "w_value": 0.3, "w_growth": 0.1, "w_record_high": 0.1, "w_size": 0.2,
+            "w_forward_per": 0.4, "roe_min": 0.07, "liquidity_quantile_cut": 0.2,
+            "rsi_base": 40.0, "rsi_max": 70.0, "bb_z_base": -1.0, "bb_z_max": 1.5, "bb_weight": 0.7,
+        }
+        params["w_size"] = 0.4  # 合計1.2 → 正規化
+        strategy, entry = params_from_trial(params)
+        total = strategy.w_quality + strategy.w_value + strategy.w_growth + strategy.w_record_high + strategy.w_size
+        assert total == pytest.approx(1.0)
+        assert strategy.w_quality == pytest.approx(0.25)
+        assert strategy.w_pbr == pytest.approx(0.6)
+        assert entry.rsi_weight == pytest.approx(0.3)
+        assert strategy.target_min == strategy.target_max == 12
+
+    def test_objective_uses_the_same_params(self, monkeypatch):
+        captured = {}
+
+        def fake_backtest(rebalance_dates, strategy_params, entry_params, **kwargs):
+            captured["params"] = (strategy_params, entry_params)
+            return {"sharpe_ratio": 1.0, "mean_excess_return": 0.0, "win_rate": 0.5}
+
+        monkeypatch.setattr(optimize_timeseries, "run_backtest_for_optimization_timeseries", fake_backtest)
+        study = optuna.create_study(direction="maximize", sampler=optuna.samplers.RandomSampler(seed=0))
+        study.optimize(lambda t: optimize_timeseries.objective_timeseries(t, ["2024-01-31"]), n_trials=3)
+        complete = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+        assert captured["params"] == params_from_trial(complete[-1].params)
+
+
+# ---------------------------------------------------------------------------
+# evaluate_params_batch / run_holdout_pipeline
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def fake_backtest(monkeypatch):
+    """ポートフォリオ選定・時系列P/Lを差し替え、渡された日付を記録する
+
+    w_quality が 0.12 未満のパラメータはポートフォリオを返さない。
+    月次リターンは正規化後の w_quality（どのパラメータの結果かを判別するため）。
+    """
+    calls = {"select": [], "timeseries": []}
+
+    def fake_select(rebalance_date, strategy_params_dict, entry_params_dict, features_df, prices):
+        assert features_df is not None and prices is not None
+        calls["select"].append(rebalance_date)
+        if strategy_params_dict["w_quality"] < 0.12:
+            return None
+        return pd.DataFrame({"code": ["1301"], "weight": [strategy_params_dict["w_quality"]]})
+
+    def fake_timeseries(portfolios, start_date, end_date, rebalance_dates=None, **kwargs):
+        calls["timeseries"].append(list(rebalance_dates))
+        returns = [float(portfolios[d]["weight"].iloc[0]) for d in rebalance_dates]
+        return {
+            "monthly_returns": returns,
+            "monthly_excess_returns": returns,
+            "equity_curve": [1.0] * (len(returns) + 1),
+            "dates": list(rebalance_dates),
+            "portfolio_details": [],
+        }
+
+    monkeypatch.setattr(optimize_timeseries, "_select_portfolio_for_rebalance_date", fake_select)
+    monkeypatch.setattr(holdout_pipeline, "calculate_timeseries_returns_from_portfolios", fake_timeseries)
+    return calls
+
+
+class TestEvaluateParamsBatch:
+    def test_order_and_empty_placeholder(self, fake_backtest):
+        plane = _plane(LeakageBarrier("2022-12-31", "2023-01-01", embargo_months=1))
+        params_list = [_params(0.5), _params(0.0), _params(0.3)]
+        results = evaluate_params_batch(params_list, plane.holdout_dates, plane)
+
+        assert len(results) == 3
+        for params, result in zip(params_list[::2], results[::2]):
+            w_quality = params_from_trial(params)[0].w_quality
+            assert result["monthly_returns"] == pytest.approx([w_quality] * len(HOLDOUT[1:]))
+        assert results[1] == {"monthly_returns": [], "monthly_excess_returns": [], "equity_curve": [1.0]}
+        assert fake_backtest["timeseries"] == [HOLDOUT[1:], HOLDOUT[1:]]
+        assert set(fake_backtest["select"]) == set(HOLDOUT[1:])
+
+
+class TestRunHoldoutPipeline:
+    def test_holdout_sees_only_embargoed_holdout_dates(self, fake_backtest, monkeypatch, tmp_path):
+        def fake_optimization_backtest(rebalance_dates, strategy_params, entry_params, **kwargs):
+            assert rebalance_dates == TRAIN
+            return {"sharpe_ratio": strategy_params.w_quality, "mean_excess_return": 0.0, "win_rate": 0.5}
+
+        monkeypatch.setattr(
+            holdout_pipeline,
+            "get_monthly_rebalance_dates",
+            lambda start, end, snapshot_path=None: [d for d in TRAIN + HOLDOUT if start <= d <= end],
+        )
+        monkeypatch.setattr(
+            holdout_pipeline.FeatureCache,
+            "warm",
+            lambda self, dates, n_jobs=-1: (
+                {d: pd.DataFrame({"code": ["1301"]}) for d in dates},
+                {d: {"1301": [1.0]} for d in dates},
+            ),
+        )
+        monkeypatch.setattr(optimize_timeseries, "run_backtest_for_optimization_timeseries", fake_optimization_backtest)
+
+        result = run_holdout_pipeline(
+            "2022-09-01", "2022-12-31", "2023-01-01", "2023-03-31",
+            n_trials=4, top_n=3, seed=0, embargo_months=1, cache_dir=str(tmp_path), n_boot=0,
+        )
+
+        # Train・Holdout を1回ずつ一括評価し、Holdout は embargo 後の日付だけ
+        holdout_calls = [dates for dates in fake_backtest["timeseries"] if dates != TRAIN]
+        assert holdout_calls and all(dates == HOLDOUT[1:] for dates in holdout_calls)
+        assert HOLDOUT[0] not in fake_backtest["select"]
+
+        candidates = result["candidates"]
+        assert len(candidates) == 3
+        train_values = [c["train_value"] for c in candidates]
+        assert train_values == sorted(train_values, reverse=True)
+        for c in candidates:
+            w_quality = params_from_trial(c["params_raw"])[0].w_quality
+            assert c["holdout_metrics"]["mean_return"] == pytest.approx(w_quality * 100.0)
+            assert c["holdout_metrics"]["num_periods"] == len(HOLDOUT[1:])
+        assert result["holdout_metrics"] == candidates[0]["holdout_metrics"]
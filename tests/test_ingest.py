@@ -0,0 +1,535 @@
+"""データ取り込み（ingest）のユニットテスト（インメモリSQLite）"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from omanta_3rd.features.universe import calculate_liquidity_60d
+from omanta_3rd.infra.db import bulk_load_session, bulk_upsert, upsert
+from omanta_3rd.ingest.fins_sync import (
+    CODE_SCOPE,
+    backfill_financial_statements_by_code,
+    get_table_watermark,
+    get_watermarks,
+    load_checkpoint,
+    sync_financial_statements,
+)
+from omanta_3rd.ingest.pipeline import run_ingest_pipeline
+from omanta_3rd.ingest.planner import (
+    find_gaps,
+    plan_ingest_dates,
+    record_empty_date,
+)
+from omanta_3rd.ingest.rebalance_calendar import (
+    get_month_end_trading_days,
+    get_month_start_trading_days,
+    load_rebalance_calendar,
+    refresh_rebalance_calendar,
+)
+
+
+@pytest.fixture
+def db():
+    """インメモリSQLiteのフィクスチャ"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE prices_daily (date TEXT, code TEXT, PRIMARY KEY (date, code));
+        CREATE TABLE index_daily (date TEXT, index_code TEXT, close REAL, PRIMARY KEY (date, index_code));
+    """)
+    yield conn
+    conn.close()
+
+
+def _insert_prices(conn, dates):
+    conn.executemany("INSERT INTO prices_daily VALUES (?, '7203')", [(d,) for d in dates])
+
+
+def _insert_topix(conn, dates):
+    conn.executemany("INSERT INTO index_daily VALUES (?, '0000', 1.0)", [(d,) for d in dates])
+
+
+# ----------------------------------------------------------------
+# plan_ingest_dates
+# ----------------------------------------------------------------
+
+class TestPlanIngestDates:
+    def test_skips_weekends_and_year_end(self, db):
+        # 2023-12-29(金) 〜 2024-01-09(火)
+        plan = plan_ingest_dates(db, "prices", "2023-12-29", "2024-01-09", table="prices_daily")
+        assert plan.dates == ["2023-12-29", "2024-01-04", "2024-01-05", "2024-01-08", "2024-01-09"]
+        assert plan.skipped["weekend"] == 4
+        assert plan.skipped["jpx_year_end"] == 3  # 12/31は日曜なので weekend に数える
+        assert plan.calendar_days == 12
+
+    def test_learned_holidays_from_topix(self, db):
+        # 2024-01-08（成人の日）は TOPIX に行が無い
+        _insert_topix(db, ["2024-01-05", "2024-01-09", "2024-01-10"])
+        plan = plan_ingest_dates(db, "prices", "2024-01-05", "2024-01-12", table="prices_daily")
+        assert "2024-01-08" not in plan.dates
+        assert plan.skipped["holiday"] == 1
+        # TOPIX の範囲外（01-11, 01-12）は判定しない
+        assert plan.dates == ["2024-01-05", "2024-01-09", "2024-01-10", "2024-01-11", "2024-01-12"]
+
+    def test_skips_loaded_dates_except_last(self, db):
+        _insert_prices(db, ["2024-01-04", "2024-01-05", "2024-01-09"])
+        plan = plan_ingest_dates(db, "prices", "2024-01-04", "2024-01-10", table="prices_daily")
+        assert plan.dates == ["2024-01-08", "2024-01-09", "2024-01-10"]
+        assert plan.skipped["loaded"] == 2
+
+        full = plan_ingest_dates(
+            db, "prices", "2024-01-04", "2024-01-10", table="prices_daily", skip_loaded=False
+        )
+        assert len(full.dates) == 5
+
+    def test_known_empty_dates(self, db):
+        assert record_empty_date(db, "prices", "2024-01-08", today="2024-02-01")
+        # 当日以降は記録しない
+        assert not record_empty_date(db, "prices", "2024-02-01", today="2024-02-01")
+        plan = plan_ingest_dates(db, "prices", "2024-01-04", "2024-01-10", table="prices_daily")
+        assert "2024-01-08" not in plan.dates
+        assert plan.skipped["known_empty"] == 1
+        # 他のデータセットには影響しない
+        fins = plan_ingest_dates(db, "fins", "2024-01-04", "2024-01-10")
+        assert "2024-01-08" in fins.dates
+
+    def test_five_year_backfill_call_count(self, db):
+        plan = plan_ingest_dates(db, "prices", "2019-01-01", "2023-12-31", table="prices_daily")
+        assert plan.calendar_days == 1826
+        assert len(plan.dates) < 1310
+
+
+# ----------------------------------------------------------------
+# find_gaps
+# ----------------------------------------------------------------
+
+class TestFindGaps:
+    def test_reports_missing_trading_days(self, db):
+        _insert_topix(db, ["2024-01-04", "2024-01-05", "2024-01-09", "2024-01-10"])
+        _insert_prices(db, ["2024-01-04", "2024-01-10"])
+        gaps = find_gaps(db, "prices", "prices_daily")
+        assert gaps == ["2024-01-05", "2024-01-09"]
+
+    def test_no_gaps_when_complete(self, db):
+        _insert_prices(db, ["2024-01-04", "2024-01-05", "2024-01-08"])
+        assert find_gaps(db, "prices", "prices_daily") == []
+
+    def test_missing_table(self, db):
+        assert find_gaps(db, "fins", "fins_statements", "disclosed_date") == []
+
+
+# ----------------------------------------------------------------
+# run_ingest_pipeline
+# ----------------------------------------------------------------
+
+class TestRunIngestPipeline:
+    @staticmethod
+    def _factory(written):
+        @contextmanager
+        def factory():
+            yield written
+        return factory
+
+    class _Conn:
+        def __init__(self):
+            self.rows = []
+            self.empty = []
+            self.commits = 0
+
+        def commit(self):
+            self.commits += 1
+
+    def _write(self, conn, item, mapped):
+        if mapped is None:
+            conn.empty.append(item)
+        else:
+            conn.rows.extend(mapped)
+
+    def test_all_items_written(self):
+        conn = self._Conn()
+        items = list(range(20))
+        stats = run_ingest_pipeline(
+            items,
+            fetch=lambda i: [] if i % 5 == 0 else [i] * 3,
+            transform=lambda i, rows: [r * 10 for r in rows],
+            write=self._write,
+            fetch_workers=3,
+            queue_size=2,
+            commit_every=10,
+            conn_factory=self._factory(conn),
+        )
+        assert sorted(conn.rows) == sorted(i * 10 for i in items if i % 5 for _ in range(3))
+        assert sorted(conn.empty) == [0, 5, 10, 15]
+        assert stats.items == 20 and stats.rows == 48 and stats.empty_items == 4
+        assert conn.commits >= 4
+
+    def test_error_propagates_without_deadlock(self):
+        conn = self._Conn()
+
+        def fetch(i):
+            if i == 7:
+                raise ValueError("boom")
+            return [i]
+
+        with pytest.raises(ValueError, match="boom"):
+            run_ingest_pipeline(
+                list(range(50)), fetch=fetch, transform=lambda i, rows: rows,
+                write=self._write, queue_size=1, conn_factory=self._factory(conn),
+            )
+
+    def test_backpressure_bounds_in_flight_items(self):
+        conn = self._Conn()
+        fetched = []
+        lock = threading.Lock()
+
+        def fetch(i):
+            with lock:
+                fetched.append(i)
+            return [i]
+
+        def slow_write(conn_, item, mapped):
+            # 書き込みが遅い間、取得済み・未書き込みの item は
+            # キュー長（2 × 2）+ 各段が保持中の分（取得2 + 変換1 + 書き込み1）に抑えられる
+            with lock:
+                in_flight = len(fetched) - len(conn_.rows)
+            assert in_flight <= 2 * 2 + 2 + 1 + 1
+            time.sleep(0.005)
+            conn_.rows.extend(mapped)
+
+        run_ingest_pipeline(
+            list(range(30)), fetch=fetch, transform=lambda i, rows: rows, write=slow_write,
+            fetch_workers=2, queue_size=2, conn_factory=self._factory(conn),
+        )
+        assert sorted(conn.rows) == list(range(30))
+
+
+# ----------------------------------------------------------------
+# bulk_upsert / bulk_load_session
+# ----------------------------------------------------------------
+
+class TestBulkUpsert:
+    @pytest.fixture
+    def prices_db(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        conn.executescript("""
+            CREATE TABLE prices_daily (
+                date TEXT NOT NULL, code TEXT NOT NULL, close REAL, turnover_value REAL,
+                PRIMARY KEY (date, code)
+            );
+            CREATE INDEX idx_prices_code_date ON prices_daily (code, date);
+        """)
+        yield conn
+        conn.close()
+
+    @staticmethod
+    def _rows(conn):
+        return [tuple(r) for r in conn.execute("SELECT * FROM prices_daily ORDER BY date, code")]
+
+    def test_matches_insert_or_replace(self, prices_db):
+        first = [{"date": "2024-01-04", "code": c, "close": 1.0, "turnover_value": 10.0} for c in "AB"]
+        second = [
+            {"date": "2024-01-04", "code": "B", "close": 2.0, "turnover_value": 20.0},
+            {"date": "2024-01-05", "code": "A", "close": 3.0, "turnover_value": 30.0},
+        ]
+        bulk_upsert(prices_db, "prices_daily", first, ["date", "code"])
+        bulk_upsert(prices_db, "prices_daily", second, ["date", "code"])
+        bulk = self._rows(prices_db)
+
+        prices_db.execute("DELETE FROM prices_daily")
+        upsert(prices_db, "prices_daily", first, ["date", "code"])
+        upsert(prices_db, "prices_daily", second, ["date", "code"])
+        assert bulk == self._rows(prices_db)
+
+    def test_keeps_columns_not_in_data(self, prices_db):
+        bulk_upsert(prices_db, "prices_daily",
+                    [{"date": "2024-01-04", "code": "A", "close": 1.0, "turnover_value": 10.0}],
+                    ["date", "code"])
+        bulk_upsert(prices_db, "prices_daily",
+                    [{"date": "2024-01-04", "code": "A", "close": 5.0}], ["date", "code"])
+        assert self._rows(prices_db) == [("2024-01-04", "A", 5.0, 10.0)]
+
+    def test_session_rebuilds_deferred_indexes(self, prices_db):
+        def index_names():
+            return {r["name"] for r in prices_db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+
+        with bulk_load_session(prices_db, defer_indexes_for=["prices_daily"]):
+            assert index_names() == set()
+            assert prices_db.execute("PRAGMA synchronous").fetchone()[0] == 0
+            bulk_upsert(prices_db, "prices_daily",
+                        [{"date": "2024-01-04", "code": "A", "close": 1.0, "turnover_value": 1.0}],
+                        ["date", "code"])
+        assert index_names() == {"idx_prices_code_date"}
+        assert len(self._rows(prices_db)) == 1
+
+    def test_session_rolls_back_and_restores_indexes_on_error(self, prices_db):
+        def index_names():
+            return {r["name"] for r in prices_db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+
+        bulk_upsert(prices_db, "prices_daily",
+                    [{"date": "2024-01-04", "code": "A", "close": 1.0, "turnover_value": 1.0}],
+                    ["date", "code"])
+        prices_db.commit()
+        with pytest.raises(RuntimeError):
+            with bulk_load_session(prices_db, defer_indexes_for=["prices_daily"]):
+                bulk_upsert(prices_db, "prices_daily",
+                            [{"date": "2024-01-05", "code": "A", "close": 2.0, "turnover_value": 2.0}],
+                            ["date", "code"])
+                raise RuntimeError("load failed")
+        # 失敗した取り込みはコミットされず、インデックスは残る
+        assert [r[0] for r in self._rows(prices_db)] == ["2024-01-04"]
+        assert index_names() == {"idx_prices_code_date"}
+        assert prices_db.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    def test_session_rebuilds_indexes_after_partial_commit(self, prices_db):
+        with pytest.raises(RuntimeError):
+            with bulk_load_session(prices_db, defer_indexes_for=["prices_daily"]):
+                bulk_upsert(prices_db, "prices_daily",
+                            [{"date": "2024-01-04", "code": "A", "close": 1.0, "turnover_value": 1.0}],
+                            ["date", "code"])
+                prices_db.commit()  # バッチごとのコミット（インデックスの削除も確定する）
+                bulk_upsert(prices_db, "prices_daily",
+                            [{"date": "2024-01-05", "code": "A", "close": 2.0, "turnover_value": 2.0}],
+                            ["date", "code"])
+                raise RuntimeError("load failed")
+        assert [r[0] for r in self._rows(prices_db)] == ["2024-01-04"]
+        assert {r["name"] for r in prices_db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")} == {"idx_prices_code_date"}
+
+
+
+# ----------------------------------------------------------------
+# fins の差分同期（sync_financial_statements / backfill_financial_statements_by_code）
+# ----------------------------------------------------------------
+
+class _FakeFinsClient:
+    """/fins/summary を date / code で返すフェイククライアント"""
+
+    def __init__(self, disclosures, fail_codes=()):
+        self.disclosures = disclosures  # [(DiscDate, Code)]
+        self.fail_codes = set(fail_codes)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_all_pages(self, endpoint, params):
+        with self._lock:
+            self.calls.append(dict(params))
+        if params.get("code") in self.fail_codes:
+            raise RuntimeError(f"fetch failed: {params['code']}")
+        return [
+            {"DiscDate": d, "Code": c + "0", "CurPerType": "FY", "CurPerEn": "2024-03-31", "NP": "1"}
+            for d, c in self.disclosures
+            if params.get("date") in (None, d) and params.get("code") in (None, c)
+        ]
+
+
+class TestFinsSync:
+    @pytest.fixture
+    def fins_db(self):
+        # パイプラインの writer スレッドから同じ接続を使うため check_same_thread=False
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.executescript("""
+            CREATE TABLE fins_statements (
+                disclosed_date TEXT NOT NULL, disclosed_time TEXT, code TEXT NOT NULL,
+                type_of_current_period TEXT, current_period_end TEXT,
+                operating_profit REAL, profit REAL, equity REAL, eps REAL, bvps REAL,
+                forecast_operating_profit REAL, forecast_profit REAL, forecast_eps REAL,
+                next_year_forecast_operating_profit REAL, next_year_forecast_profit REAL,
+                next_year_forecast_eps REAL, shares_outstanding REAL, treasury_shares REAL,
+                PRIMARY KEY (disclosed_date, code, type_of_current_period, current_period_end)
+            );
+            CREATE TABLE listed_info (date TEXT, code TEXT, PRIMARY KEY (date, code));
+            INSERT INTO listed_info VALUES ('2024-01-10', '7203'), ('2024-01-10', '6758');
+        """)
+
+        yield conn
+        conn.close()
+
+    @pytest.fixture
+    def factory(self, fins_db):
+        @contextmanager
+        def factory():
+            yield fins_db
+            fins_db.commit()
+        return factory
+
+    @staticmethod
+    def _fins(conn):
+        return [tuple(r) for r in conn.execute(
+            "SELECT disclosed_date, code FROM fins_statements ORDER BY disclosed_date, code")]
+
+    def test_daily_sync_fetches_only_new_dates(self, fins_db, factory):
+        client = _FakeFinsClient([("2024-01-09", "7203"), ("2024-01-10", "6758")])
+        wm = sync_financial_statements(
+            end_date="2024-01-10", client=client, lookback_days=7,
+            today="2024-01-10", conn_factory=factory,
+        )
+        # 当日分は公開途中の可能性があるため前日までを完了とする
+        assert wm == "2024-01-09"
+        assert self._fins(fins_db) == [("2024-01-09", "7203"), ("2024-01-10", "6758")]
+
+        # 翌営業日の同期は当日（01-10）と新しい日（01-11）の2回だけ
+        client.calls.clear()
+        wm = sync_financial_statements(
+            end_date="2024-01-11", client=client, today="2024-01-11", conn_factory=factory,
+        )
+        assert wm == "2024-01-10"
+        assert sorted(c["date"] for c in client.calls) == ["2024-01-10", "2024-01-11"]
+
+    def test_watermark_falls_back_to_latest_disclosure(self, fins_db):
+        fins_db.execute(
+            "INSERT INTO fins_statements (disclosed_date, code) VALUES ('2024-01-05', '7203')")
+        assert get_table_watermark(fins_db) == "2024-01-04"
+
+    def test_backfill_writes_delta_and_resumes(self, fins_db, factory, tmp_path):
+        checkpoint = tmp_path / "fins_checkpoint.json"
+        disclosures = [("2023-05-10", "7203"), ("2024-01-09", "7203"), ("2023-11-01", "6758")]
+
+        # 6758 の取得に失敗 → 7203 は完了済みとしてチェックポイントに残る
+        failing = _FakeFinsClient(disclosures, fail_codes={"6758"})
+        with pytest.raises(RuntimeError):
+            backfill_financial_statements_by_code(
+                client=failing, workers=1, checkpoint_path=checkpoint,
+                today="2024-01-10", conn_factory=factory,
+            )
+        state = load_checkpoint(checkpoint)
+        assert sorted(state["codes"]) == ["6758", "7203"]
+        assert set(state["done"]) <= {"7203"}
+
+        # 再実行は未完了の銘柄だけを取得し、完了後にチェックポイントを削除する
+        client = _FakeFinsClient(disclosures)
+        backfill_financial_statements_by_code(
+            client=client, workers=2, checkpoint_path=checkpoint,
+            today="2024-01-10", conn_factory=factory,
+        )
+        assert {c["code"] for c in client.calls} == {"6758", "7203"} - set(state["done"])
+        assert not checkpoint.exists()
+        assert len(self._fins(fins_db)) == 3
+        # ウォーターマークは取得できた最終開示日
+        assert get_watermarks(fins_db, CODE_SCOPE) == {"6758": "2023-11-01", "7203": "2024-01-09"}
+
+    def test_backfill_rejects_codes_that_differ_from_checkpoint(self, fins_db, factory, tmp_path):
+        checkpoint = tmp_path / "fins_checkpoint.json"
+        failing = _FakeFinsClient([("2023-05-10", "7203")], fail_codes={"7203"})
+        with pytest.raises(RuntimeError):
+            backfill_financial_statements_by_code(
+                codes=["7203"], client=failing, workers=1, checkpoint_path=checkpoint,
+                today="2024-01-10", conn_factory=factory,
+            )
+        client = _FakeFinsClient([("2023-05-10", "7203"), ("2023-11-01", "6758")])
+        with pytest.raises(ValueError):
+            backfill_financial_statements_by_code(
+                codes=["6758"], client=client, workers=1, checkpoint_path=checkpoint,
+                today="2024-01-10", conn_factory=factory,
+            )
+        assert client.calls == []
+        # 同じ銘柄なら再開、restart=True なら指定した銘柄でやり直す
+        backfill_financial_statements_by_code(
+            codes=["6758"], client=client, workers=1, checkpoint_path=checkpoint,
+            restart=True, today="2024-01-10", conn_factory=factory,
+        )
+        assert [c["code"] for c in client.calls] == ["6758"]
+
+    def test_backfill_again_picks_up_late_disclosures(self, fins_db, factory, tmp_path):
+        disclosures = [("2023-05-10", "7203")]
+        client = _FakeFinsClient(disclosures)
+        backfill_financial_statements_by_code(
+            codes=["7203"], client=client, workers=1, checkpoint_path=tmp_path / "a.json",
+            today="2024-01-10", conn_factory=factory,
+        )
+        assert get_watermarks(fins_db, CODE_SCOPE) == {"7203": "2023-05-10"}
+
+        # 1回目の取得時点では未公開だった開示（2023-12-01）も再バックフィルで取り込む
+        disclosures.append(("2023-12-01", "7203"))
+        backfill_financial_statements_by_code(
+            codes=["7203"], client=client, workers=1, checkpoint_path=tmp_path / "b.json",
+            today="2024-01-11", conn_factory=factory,
+        )
+        assert self._fins(fins_db) == [("2023-05-10", "7203"), ("2023-12-01", "7203")]
+        assert get_watermarks(fins_db, CODE_SCOPE) == {"7203": "2023-12-01"}
+
+    def test_backfill_skips_disclosures_before_code_watermark(self, fins_db, factory, tmp_path):
+        client = _FakeFinsClient([("2023-05-10", "7203"), ("2024-01-12", "7203")])
+        backfill_financial_statements_by_code(
+            codes=["7203"], client=client, workers=1, checkpoint_path=tmp_path / "a.json",
+            today="2024-01-10", conn_factory=factory,
+        )
+        fins_db.execute("DELETE FROM fins_statements")
+        backfill_financial_statements_by_code(
+            codes=["7203"], client=client, workers=1, checkpoint_path=tmp_path / "b.json",
+            today="2024-01-13", conn_factory=factory,
+        )
+        # ウォーターマーク（2024-01-09）以前の開示は書き込まない
+        assert self._fins(fins_db) == [("2024-01-12", "7203")]
+
+
+# ----------------------------------------------------------------
+# rebalance_calendar
+# ----------------------------------------------------------------
+
+class TestRebalanceCalendar:
+    DATES = ["2024-01-04", "2024-01-31", "2024-02-01", "2024-02-29", "2024-03-01", "2024-03-15"]
+
+    def test_month_end_and_start(self, db):
+        _insert_prices(db, self.DATES)
+        refresh_rebalance_calendar(db)
+        assert get_month_end_trading_days(db, "2024-01-01", "2024-03-10") == ["2024-01-31", "2024-02-29"]
+        assert get_month_start_trading_days(db, "2024-01-10", "2024-03-31") == ["2024-02-01", "2024-03-01"]
+        cal = load_rebalance_calendar(db)
+        assert cal["n_trading_days"].tolist() == [2, 2, 2]
+
+    def test_incremental_refresh_extends_current_month(self, db):
+        _insert_prices(db, self.DATES)
+        refresh_rebalance_calendar(db)
+        _insert_prices(db, ["2024-03-29", "2024-04-01"])
+        assert refresh_rebalance_calendar(db, date_from="2024-03-29") == 2
+        assert get_month_end_trading_days(db, "2024-01-01", "2024-12-31")[-2:] == ["2024-03-29", "2024-04-01"]
+
+    def test_falls_back_when_missing_or_stale(self, db):
+        _insert_prices(db, self.DATES)
+        assert get_month_end_trading_days(db, "2024-01-01", "2024-12-31") == [
+            "2024-01-31", "2024-02-29", "2024-03-15"
+        ]
+        refresh_rebalance_calendar(db)
+        _insert_prices(db, ["2024-03-29"])
+        assert get_month_end_trading_days(db, "2024-03-01", "2024-12-31") == ["2024-03-29"]
+
+
+# ----------------------------------------------------------------
+# prices_rolling_daily の参照（calculate_liquidity_60d）
+# ----------------------------------------------------------------
+
+class TestLiquidityFromAggregates:
+    @pytest.fixture
+    def price_db(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        conn.executescript("""
+            CREATE TABLE prices_daily (date TEXT, code TEXT, turnover_value REAL, PRIMARY KEY (date, code));
+            CREATE TABLE prices_rolling_daily (
+              date TEXT, code TEXT, liquidity_60d REAL, split_factor_cum REAL, PRIMARY KEY (date, code)
+            );
+        """)
+        conn.executemany(
+            "INSERT INTO prices_daily VALUES (?, '7203', ?)",
+            [("2024-01-04", 100.0), ("2024-01-05", 200.0), ("2024-01-09", 600.0)],
+        )
+        conn.executemany(
+            "INSERT INTO prices_rolling_daily VALUES (?, '7203', ?, 1.0)",
+            [("2024-01-04", 100.0), ("2024-01-05", 150.0)],
+        )
+        yield conn
+        conn.close()
+
+    def test_uses_aggregate_on_latest_price_date(self, price_db):
+        assert calculate_liquidity_60d(price_db, "7203", "2024-01-08") == pytest.approx(150.0)
+
+    def test_falls_back_when_aggregate_lags_prices(self, price_db):
+        # 2024-01-09 が未集計なら 2024-01-05 の集計値ではなく prices_daily から計算
+        assert calculate_liquidity_60d(price_db, "7203", "2024-01-10") == pytest.approx(300.0)
@@ -0,0 +1,123 @@
+"""J-Quants クライアントのレスポンスキャッシュのユニットテスト（ネットワーク不使用）"""
+
+import pytest
+
+from omanta_3rd.infra import jquants
+from omanta_3rd.infra.jquants import JQuantsCacheMiss, JQuantsClient, ResponseCache
+
+
+class _FakeResponse:
+    def __init__(self, body):
+        self._body = body
+        self.status_code = 200
+        self.text = ""
+        self.url = ""
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """2ページに分かれる /equities/bars/daily を返すフェイクAPI（呼び出しを記録）"""
+    calls = []
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(dict(params))
+        if params.get("pagination_key") == "p2":
+            return _FakeResponse({"data": [{"Code": "72030", "Date": params.get("date")}]})
+        if params.get("date") == "2024-01-08":
+            return _FakeResponse({"data": []})
+        return _FakeResponse({"data": [{"Code": "67580", "Date": params.get("date")}], "pagination_key": "p2"})
+
+    monkeypatch.setattr(jquants.requests, "get", fake_get)
+    return calls
+
+
+def _client(tmp_path, mode, api_key="dummy"):
+    return JQuantsClient(
+        api_key=api_key, requests_per_minute=60000, cache_mode=mode, cache_dir=tmp_path
+    )
+
+
+# ----------------------------------------------------------------
+# ResponseCache
+# ----------------------------------------------------------------
+
+class TestResponseCache:
+    def test_key_ignores_param_order_and_type(self):
+        a = ResponseCache.request_key("/x", {"date": "2024-01-04", "code": 7203})
+        b = ResponseCache.request_key("/x", {"code": "7203", "date": "2024-01-04"})
+        assert a == b
+        assert a != ResponseCache.request_key("/x", {"code": "7203", "date": "2024-01-04"}, "p2")
+
+    def test_identical_bodies_share_one_object(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+        d1 = cache.put("/x", {"date": "2024-01-06"}, None, {"data": []})
+        d2 = cache.put("/x", {"date": "2024-01-07"}, None, {"data": []})
+        assert d1 == d2
+        assert len(list((tmp_path / "objects").rglob("*.json.gz"))) == 1
+        assert cache.get("/x", {"date": "2024-01-07"}) == {"data": []}
+        assert cache.get("/x", {"date": "2024-01-05"}) is None
+
+
+# ----------------------------------------------------------------
+# JQuantsClient のキャッシュモード
+# ----------------------------------------------------------------
+
+class TestClientCacheModes:
+    def test_readwrite_then_replay_without_network(self, tmp_path, fake_api):
+        rows = _client(tmp_path, "readwrite").get_all_pages("/equities/bars/daily", {"date": "2024-01-04"})
+        assert len(fake_api) == 2  # 2ページ
+
+        # replay はAPIキー無しで作成でき、ネットワークに出ない
+        replay = _client(tmp_path, "replay", api_key="")
+        assert replay.get_all_pages("/equities/bars/daily", {"date": "2024-01-04"}) == rows
+        assert len(fake_api) == 2
+        assert replay.cache.hits == 2
+
+    def test_replay_miss_raises(self, tmp_path, fake_api):
+        with pytest.raises(JQuantsCacheMiss):
+            _client(tmp_path, "replay").get("/equities/bars/daily", {"date": "2024-01-05"})
+        assert fake_api == []
+
+    def test_refresh_always_fetches(self, tmp_path, fake_api):
+        client = _client(tmp_path, "refresh")
+        client.get("/equities/bars/daily", {"date": "2024-01-08"})
+        client.get("/equities/bars/daily", {"date": "2024-01-08"})
+        assert len(fake_api) == 2
+        assert client.cache.stores == 2
+
+    def test_does_not_cache_today_or_later(self, tmp_path, fake_api):
+        client = _client(tmp_path, "readwrite")
+        client.get("/equities/bars/daily", {"date": "2999-01-01"})
+        assert client.cache.stores == 0
+
+    def test_open_ended_requests_expire_in_readwrite(self, tmp_path, fake_api, monkeypatch):
+        params = {"code": "72030"}
+        client = _client(tmp_path, "readwrite")
+        client.open_ttl_seconds = 3600.0
+        client.get("/fins/summary", params)
+        client.get("/fins/summary", params)
+        assert len(fake_api) == 1
+
+        # 有効期間を過ぎたら取得し直す（日付の上限があるリクエストは期限なし）
+        client.get("/equities/bars/daily", {"date": "2024-01-08"})
+        now = jquants.time.time()
+        monkeypatch.setattr(jquants.time, "time", lambda: now + 7200.0)
+        client.get("/fins/summary", params)
+        client.get("/equities/bars/daily", {"date": "2024-01-08"})
+        assert len(fake_api) == 3
+
+        # replay は期限を見ない
+        replay = _client(tmp_path, "replay")
+        replay.open_ttl_seconds = 0.0
+        assert replay.get("/fins/summary", params)["data"]
+
+    def test_off_by_default_and_invalid_mode(self, tmp_path, fake_api):
+        assert _client(tmp_path, "off").cache is None
+        with pytest.raises(ValueError):
+            _client(tmp_path, "bogus")
@@ -1,6 +1,7 @@
 """バックテスト指標のユニットテスト（DB不要な純粋関数）"""
 
 import math
+import numpy as np
 import pytest
 
 from omanta_3rd.backtest.metrics import (
@@ -9,6 +10,32 @@ from omanta_3rd.backtest.metrics import (
     calculate_cagr,
     calculate_percentile,
     calculate_annualized_return_from_period,
+    calculate_sortino_ratio,
+    calculate_calmar_ratio,
+    calculate_volatility_timeseries,
+    calculate_profit_factor_timeseries,
+)
+from omanta_3rd.backtest.metrics import (
+    equity_curves_2d,
+    calculate_max_drawdown_2d,
+    calculate_sharpe_ratio_2d,
+    calculate_sortino_ratio_2d,
+    calculate_calmar_ratio_2d,
+    calculate_cagr_2d,
+    calculate_volatility_2d,
+    calculate_profit_factor_2d,
+    calculate_win_rate_2d,
+    calculate_percentile_2d,
+    calculate_win_rate_timeseries,
+)
+from omanta_3rd.backtest.eval_common import (
+    calculate_metrics_from_timeseries_data,
+    calculate_metrics_from_timeseries_batch,
+)
+from omanta_3rd.backtest.bootstrap import (
+    stationary_bootstrap_indices,
+    timeseries_metrics_2d,
+    bootstrap_metric_cis,
 )
 
 
@@ -151,3 +178,170 @@ class TestCalculateAnnualizedReturnFromPeriod:
             end_date="2024-01-01",
         )
         assert result < 0
+
+
+# ---------------------------------------------------------------------------
+# 2次元配列版（n_series × n_periods）
+# ---------------------------------------------------------------------------
+
+def _optional(value):
+    return None if math.isnan(value) else value
+
+
+class TestMetrics2d:
+    def _rows(self):
+        rng = np.random.default_rng(7)
+        rows = rng.normal(0.005, 0.04, size=(6, 18))
+        rows[1] = 0.01  # 損失なし・ドローダウンなし
+        rows[2, :] = rng.normal(-0.02, 0.01, 18)  # 勝ちなし
+        return rows
+
+    def test_scalar_parity(self):
+        rows = self._rows()
+        equity = equity_curves_2d(rows)
+        n = rows.shape[1]
+        out = {
+            "max_dd": calculate_max_drawdown_2d(equity),
+            "sharpe": calculate_sharpe_ratio_2d(rows, risk_free_rate=0.02),
+            "sortino": calculate_sortino_ratio_2d(rows),
+            "calmar": calculate_calmar_ratio_2d(equity, n),
+            "cagr": calculate_cagr_2d(equity, n),
+            "vol": calculate_volatility_2d(rows),
+            "pf": calculate_profit_factor_2d(rows, equity),
+            "pf_simple": calculate_profit_factor_2d(rows),
+            "win": calculate_win_rate_2d(rows),
+            "p10": calculate_percentile_2d(rows, 10.0),
+        }
+        for i, r in enumerate(rows.tolist()):
+            curve = equity[i].tolist()
+            expected = {
+                "max_dd": calculate_max_drawdown(curve),
+                "sharpe": calculate_sharpe_ratio(r, risk_free_rate=0.02),
+                "sortino": calculate_sortino_ratio(r),
+                "calmar": calculate_calmar_ratio(curve, r),
+                "cagr": calculate_cagr(curve, n),
+                "vol": calculate_volatility_timeseries(r),
+                "pf": calculate_profit_factor_timeseries(r, curve),
+                "pf_simple": calculate_profit_factor_timeseries(r),
+                "win": calculate_win_rate_timeseries(r),
+                "p10": calculate_percentile(r, 10.0),
+            }
+            for key, value in expected.items():
+                actual = _optional(out[key][i])
+                if value is None:
+                    assert actual is None, (i, key)
+                else:
+                    assert actual == pytest.approx(value, rel=1e-12, abs=1e-15), (i, key)
+
+    def test_one_dimensional_input(self):
+        r = [0.01, -0.02, 0.03]
+        assert calculate_sharpe_ratio_2d(r).shape == (1,)
+        assert calculate_sharpe_ratio_2d(r)[0] == pytest.approx(calculate_sharpe_ratio(r))
+
+    def test_short_series(self):
+        assert math.isnan(calculate_sharpe_ratio_2d(np.zeros((2, 1)))[0])
+        assert calculate_max_drawdown_2d(np.ones((2, 1))).tolist() == [0.0, 0.0]
+        assert calculate_percentile_2d(np.zeros((2, 0)), 50.0).tolist() == [0.0, 0.0]
+
+
+class TestMetricsBatch:
+    def _timeseries(self, seed, n):
+        rng = np.random.default_rng(seed)
+        returns = rng.normal(0.01, 0.05, n).tolist()
+        excess = (np.array(returns) - rng.normal(0.008, 0.04, n)).tolist()
+        equity = [1.0]
+        for r in returns:
+            equity.append(equity[-1] * (1.0 + r))
+        return {
+            "monthly_returns": returns,
+            "monthly_excess_returns": excess,
+            "equity_curve": equity,
+            "portfolio_details": [{"num_missing_stocks": seed % 3}],
+        }
+
+    def test_matches_per_series(self):
+        """200 trial 分の一括計算が1件ずつの計算と一致する（系列長の異なるデータ・欠損を含む）"""
+        data = [self._timeseries(seed, 24 if seed % 4 else 12) for seed in range(200)]
+        data[5]["equity_curve"] = []  # 系列長が揃っていない → 1件ずつ計算
+        data[6] = {"monthly_returns": []}
+        batch = calculate_metrics_from_timeseries_batch(data)
+        assert len(batch) == len(data)
+        for d, metrics in zip(data, batch):
+            expected = calculate_metrics_from_timeseries_data(d)
+            assert set(metrics) == set(expected)
+            for key, value in expected.items():
+                if value is None or isinstance(value, str):
+                    assert metrics[key] == value, key
+                else:
+                    assert metrics[key] == pytest.approx(value, rel=1e-12, abs=1e-12), key
+
+
+# ---------------------------------------------------------------------------
+# bootstrap（2次元一括計算・block bootstrap）
+# ---------------------------------------------------------------------------
+
+def _series(seed, n=24):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.01, 0.05, n)
+    excess = returns - rng.normal(0.008, 0.04, n)
+    return returns.tolist(), excess.tolist()
+
+
+class TestTimeseriesMetrics2d:
+    def test_matches_scalar_metrics(self):
+        """各行の結果が metrics.py の関数と一致する"""
+        series = [_series(s) for s in range(3)]
+        out = timeseries_metrics_2d(
+            np.array([r for r, _ in series]),
+            np.array([x for _, x in series]),
+        )
+        for i, (returns, excess) in enumerate(series):
+            equity = [1.0] + list(np.cumprod(1.0 + np.array(returns)))
+            assert out["sharpe_ratio"][i] == pytest.approx(calculate_sharpe_ratio(returns, excess))
+            assert out["sortino_ratio"][i] == pytest.approx(calculate_sortino_ratio(returns, excess))
+            assert out["max_drawdown"][i] == pytest.approx(calculate_max_drawdown(equity))
+            assert out["cagr"][i] == pytest.approx(calculate_cagr(equity, len(returns)))
+            assert out["calmar_ratio"][i] == pytest.approx(calculate_calmar_ratio(equity, returns))
+            assert out["volatility"][i] == pytest.approx(calculate_volatility_timeseries(returns))
+            assert out["profit_factor"][i] == pytest.approx(calculate_profit_factor_timeseries(returns, equity))
+            assert out["excess_percentile_5"][i] == pytest.approx(calculate_percentile(excess, 5.0))
+
+    def test_uncomputable_is_nan(self):
+        """定数系列（std=0）・損失なしは NaN（metrics.py の None に相当）"""
+        out = timeseries_metrics_2d(np.full((1, 12), 0.01), np.zeros((1, 12)))
+        assert math.isnan(out["sharpe_ratio"][0])
+        assert math.isnan(out["profit_factor"][0])
+        assert math.isnan(out["calmar_ratio"][0])
+
+
+class TestBootstrap:
+    def test_indices_shape_and_blocks(self):
+        rng = np.random.default_rng(0)
+        idx = stationary_bootstrap_indices(24, 500, mean_block_length=4.0, rng=rng)
+        assert idx.shape == (500, 24)
+        assert idx.min() >= 0 and idx.max() < 24
+        # ブロック内は1つずつ進む（循環）。連続率は約 1 - 1/4
+        continued = (np.diff(idx, axis=1) % 24 == 1).mean()
+        assert 0.7 < continued < 0.8
+
+    def test_iid_when_block_length_one(self):
+        idx = stationary_bootstrap_indices(24, 2000, mean_block_length=1.0, rng=np.random.default_rng(1))
+        continued = (np.diff(idx, axis=1) % 24 == 1).mean()
+        assert continued == pytest.approx(1 / 24, abs=0.01)
+
+    def test_metric_cis_for_candidates(self):
+        candidates = {1: _series(1), 2: _series(2), 3: _series(3, n=12)}
+        cis = bootstrap_metric_cis(candidates, n_boot=500, random_seed=0)
+        assert set(cis) == {1, 2, 3}
+        for key, (returns, excess) in candidates.items():
+            sharpe = cis[key]["sharpe_ratio"]
+            assert sharpe["point"] == pytest.approx(calculate_sharpe_ratio(returns, excess))
+            assert sharpe["ci_low"] < sharpe["point"] < sharpe["ci_high"]
+            assert cis[key]["max_drawdown"]["ci_high"] <= 0.0
+        # 同じシードなら再現する
+        again = bootstrap_metric_cis(candidates, n_boot=500, random_seed=0)
+        assert again[1]["cagr"] == cis[1]["cagr"]
+
+    def test_length_mismatch_raises(self):
+        with pytest.raises(ValueError):
+            bootstrap_metric_cis({1: ([0.01, 0.02], [0.01])})
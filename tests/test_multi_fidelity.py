@@ -0,0 +1,115 @@
+"""multi-fidelity 最適化（jobs/multi_fidelity）のユニットテスト"""
+
+import numpy as np
+import optuna
+import pytest
+from optuna.trial import TrialState
+
+from omanta_3rd.jobs.multi_fidelity import (
+    FIDELITY_PRUNED_ATTR,
+    evaluate_multi_fidelity,
+    fidelity_date_subsets,
+    make_fidelity_pruner,
+)
+
+DATES = [f"{y}-{m:02d}-28" for y in range(2016, 2022) for m in range(1, 13)]  # 72日
+
+
+# ---------------------------------------------------------------------------
+# 日付サブセット
+# ---------------------------------------------------------------------------
+
+class TestFidelityDateSubsets:
+    def test_nested_and_full(self):
+        subsets = fidelity_date_subsets(DATES, n_rungs=3, reduction_factor=2)
+        assert [len(s) for s in subsets] == [18, 36, 72]
+        assert subsets[-1] == DATES
+        for small, large in zip(subsets, subsets[1:]):
+            assert set(small) <= set(large)
+        # 期間全体に散らばる（4ヶ月ごと）
+        assert subsets[0][0] == DATES[0] and subsets[0][-1] >= DATES[-4]
+
+    def test_drops_too_small_rungs(self):
+        subsets = fidelity_date_subsets(DATES[:20], n_rungs=3, reduction_factor=4, min_dates=6)
+        assert [len(s) for s in subsets] == [20]
+        assert fidelity_date_subsets(DATES, n_rungs=1) == [DATES]
+        with pytest.raises(ValueError):
+            fidelity_date_subsets(DATES, reduction_factor=1)
+
+
+# ---------------------------------------------------------------------------
+# 段階評価と足切り
+# ---------------------------------------------------------------------------
+
+class TestEvaluateMultiFidelity:
+    def test_prunes_and_ranks_on_full_fidelity(self):
+        subsets = fidelity_date_subsets(DATES, n_rungs=3, reduction_factor=2)
+        evaluated = []
+
+        def objective(trial):
+            x = trial.suggest_float("x", -1.0, 1.0)
+
+            def evaluate(dates):
+                evaluated.append(len(dates))
+                # 日付が少ないほどノイズの大きい近似
+                noise = np.random.default_rng(trial.number).normal(0.0, 0.05 * 72 / len(dates))
+                return {"value": -x * x + noise}
+
+            return evaluate_multi_fidelity(trial, subsets, evaluate, lambda perf: perf["value"])
+
+        study = optuna.create_study(
+            direction="maximize",
+            sampler=optuna.samplers.RandomSampler(seed=0),
+            pruner=make_fidelity_pruner(reduction_factor=2, min_trials_per_rung=5),
+        )
+        study.optimize(objective, n_trials=60)
+
+        pruned = [t for t in study.trials if t.state == TrialState.PRUNED]
+        complete = [t for t in study.trials if t.state == TrialState.COMPLETE]
+        assert pruned and all(FIDELITY_PRUNED_ATTR in t.user_attrs for t in pruned)
+        # 全日付の評価は一部の trial だけ
+        assert evaluated.count(72) == len(complete) < 60
+        # 1 trial あたりの評価日数の期待値は 18 + 36/2 + 72/4 = 54（全日付の 75%、増分評価ならさらに少ない）
+        assert sum(evaluated) < 60 * 72 * 0.8
+        # 最終的な順位付けは全日付で評価した trial のみ
+        assert study.best_trial.state == TrialState.COMPLETE
+        assert abs(study.best_trial.params["x"]) < 0.3
+
+    @pytest.mark.parametrize("reduction_factor", [2, 3])
+    def test_promotion_rate_per_rung(self, reduction_factor):
+        subsets = fidelity_date_subsets(DATES, n_rungs=3, reduction_factor=reduction_factor, min_dates=1)
+        reached = [0] * len(subsets)
+
+        def objective(trial):
+            x = trial.suggest_float("x", -1.0, 1.0)
+
+            def evaluate(dates):
+                reached[subsets.index(dates)] += 1
+                noise = np.random.default_rng(trial.number).normal(0.0, 0.3 * 72 / len(dates))
+                return {"value": -x * x + noise}
+
+            return evaluate_multi_fidelity(trial, subsets, evaluate, lambda perf: perf["value"])
+
+        study = optuna.create_study(
+            direction="maximize",
+            sampler=optuna.samplers.RandomSampler(seed=1),
+            pruner=make_fidelity_pruner(reduction_factor=reduction_factor, min_trials_per_rung=5),
+        )
+        n_trials = 400
+        study.optimize(objective, n_trials=n_trials)
+
+        # 各段階で、その段階を評価した trial の約 1/reduction_factor が次の段階に進む
+        for rung in range(len(subsets) - 1):
+            rate = reached[rung + 1] / reached[rung]
+            assert rate == pytest.approx(1.0 / reduction_factor, abs=0.08), (rung, reached)
+        # study の後半でも通過率が下がり続けない（閾値が生き残りの上位に引きずられない）
+        late = study.trials[-100:]
+        late_complete = sum(t.state == TrialState.COMPLETE for t in late)
+        assert late_complete >= 100 / reduction_factor ** (len(subsets) - 1) * 0.6
+
+    def test_single_rung_is_plain_evaluation(self):
+        study = optuna.create_study(direction="maximize")
+        trial = study.ask()
+        value = evaluate_multi_fidelity(trial, [DATES], lambda dates: {"n": len(dates)}, lambda perf: perf["n"])
+        assert value == 72
+        assert trial.user_attrs == {}
@@ -0,0 +1,123 @@
+"""目的関数バリアント・再採点（jobs/objective_variants, jobs/rescore_trials）のユニットテスト"""
+
+import numpy as np
+import optuna
+import pytest
+
+from omanta_3rd.features.technicals import EntryScoreParams
+from omanta_3rd.jobs.longterm_run import StrategyParams
+from omanta_3rd.jobs.objective_variants import (
+    EVALUATION_FAILED_VALUE,
+    PER_DATE_ATTR,
+    ObjectiveVariant,
+    decode_per_date,
+    encode_per_date,
+    parse_variants,
+    trial_mean_excess,
+)
+from omanta_3rd.jobs.optimize_longterm import score_longterm_trial
+from omanta_3rd.jobs.rescore_trials import rank_by_variant, rescore_trials
+
+PAIRS = [(f"{y}-{m:02d}-28", float(v)) for (y, m), v in zip(
+    [(y, m) for y in (2020, 2021) for m in range(1, 13)],
+    np.random.default_rng(5).normal(2.0, 8.0, 24),
+)]
+
+
+def _perf(pairs):
+    values = [v for _, v in pairs]
+    return {
+        "annual_excess_returns_list": values,
+        "annual_excess_by_rebalance": pairs,
+        "mean_annual_excess_return_pct": float(np.mean(values)) if values else 0.0,
+        "median_annual_excess_return_pct": float(np.median(values)) if values else 0.0,
+        "p10_annual_excess_return_pct": float(np.percentile(values, 10.0)) if values else 0.0,
+        "min_annual_excess_return_pct": float(np.min(values)) if values else 0.0,
+        "n_periods": len(values),
+        "num_portfolios": len(values),
+        "win_rate": 0.5,
+        "median_annual_return_pct": 5.0,
+        "cumulative_return_pct": 10.0,
+        "mean_excess_return_pct": 3.0,
+        "mean_holding_years": 2.0,
+    }
+
+
+def _score(pairs, **kwargs):
+    study = optuna.create_study(directions=["maximize"] * len(kwargs.get("objective_variants") or [1]))
+    trial = study.ask()
+    value = score_longterm_trial(trial, _perf(pairs), StrategyParams(), EntryScoreParams(), **kwargs)
+    return trial, value
+
+
+# ---------------------------------------------------------------------------
+# ObjectiveVariant
+# ---------------------------------------------------------------------------
+
+class TestObjectiveVariant:
+    def test_parse(self):
+        variants = parse_variants("mean:0, median:0.05,trimmed_mean")
+        assert [v.name for v in variants] == ["mean_l0", "median_l0.05", "trimmed_mean_l0"]
+        with pytest.raises(ValueError):
+            ObjectiveVariant.parse("max:0.1")
+
+    def test_trimmed_mean(self):
+        values = np.arange(20, dtype=float)
+        values[0], values[-1] = -1000.0, 1000.0
+        # 上下 int(0.1 * 20) = 2件ずつ除外
+        assert ObjectiveVariant("trimmed_mean").base_excess(values) == pytest.approx(np.mean(np.sort(values)[2:18]))
+
+    def test_score(self):
+        values = [v for _, v in PAIRS]
+        p10 = np.percentile(values, 10.0)
+        assert ObjectiveVariant("median", 0.05).score(values) == pytest.approx(np.median(values) + 0.05 * min(0.0, p10))
+        assert ObjectiveVariant().score([]) == EVALUATION_FAILED_VALUE
+
+    @pytest.mark.parametrize("objective_type", ["mean", "median", "trimmed_mean"])
+    def test_matches_score_longterm_trial(self, objective_type):
+        _, value = _score(PAIRS, lambda_penalty=0.05, objective_type=objective_type)
+        assert ObjectiveVariant(objective_type, 0.05).score([v for _, v in PAIRS]) == pytest.approx(value)
+
+
+# ---------------------------------------------------------------------------
+# リバランス日単位の結果の保存・再採点
+# ---------------------------------------------------------------------------
+
+class TestPerDateRescore:
+    def test_roundtrip(self):
+        dates, values = decode_per_date(encode_per_date(PAIRS))
+        assert dates == [d for d, _ in PAIRS]
+        np.testing.assert_array_equal(values, [v for _, v in PAIRS])
+        assert decode_per_date(encode_per_date([]))[0] == []
+
+    def test_multi_objective_and_rescore(self):
+        variants = parse_variants("mean:0,mean:0.1,median:0")
+        trial, values = _score(PAIRS, objective_variants=variants)
+        assert len(values) == 3
+        assert trial.user_attrs["objective_variants"] == [v.name for v in variants]
+
+        study = trial.study
+        study.tell(trial, values)
+        rows = rescore_trials(study.trials, variants)
+        assert [rows[0]["scores"][v.name] for v in variants] == pytest.approx(list(values))
+        assert rank_by_variant(rows, variants, top=1)["median_l0"][0]["number"] == trial.number
+
+    def test_trial_mean_excess_is_not_the_objective(self):
+        variants = parse_variants("median:0.1,mean:0")
+        trial, values = _score(PAIRS, objective_variants=variants)
+        trial.study.tell(trial, values)
+        frozen = trial.study.trials[0]
+        mean = float(np.mean([v for _, v in PAIRS]))
+        assert trial_mean_excess(frozen) == pytest.approx(mean)
+        assert values[0] != pytest.approx(mean)
+
+        # mean_excess が無い trial は per_date_excess から求める
+        attrs = {PER_DATE_ATTR: frozen.user_attrs[PER_DATE_ATTR]}
+        assert trial_mean_excess(optuna.trial.create_trial(values=list(values), user_attrs=attrs)) == pytest.approx(mean)
+        assert trial_mean_excess(optuna.trial.create_trial(values=list(values))) is None
+
+    def test_failed_trial(self):
+        variants = parse_variants("mean:0,median:0")
+        trial, values = _score([], objective_variants=variants)
+        assert values == (EVALUATION_FAILED_VALUE, EVALUATION_FAILED_VALUE)
+        assert PER_DATE_ATTR not in trial.user_attrs
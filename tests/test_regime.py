@@ -0,0 +1,166 @@
+"""市場レジーム判定（market/regime）・レジーム切替シミュレーターのユニットテスト"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from omanta_3rd.backtest.regime_simulator import (
+    HOLD,
+    ParamsOutcomeTable,
+    RegimePolicy,
+    simulate_policies,
+    simulate_policy,
+)
+from omanta_3rd.market.regime import (
+    MARegimeRule,
+    _regime_from_close,
+    clear_regime_cache,
+    get_market_regime,
+    get_regime_timeline,
+    get_topix_close_series,
+)
+
+
+@pytest.fixture
+def conn():
+    """TOPIX 600営業日分（上昇 → 下落）のインメモリDB"""
+    clear_regime_cache()
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE index_daily (date TEXT, index_code TEXT, close REAL, PRIMARY KEY (date, index_code))"
+    )
+    dates = pd.bdate_range("2020-01-01", periods=600)
+    rng = np.random.default_rng(1)
+    trend = np.r_[np.full(350, 0.002), np.full(250, -0.003)]
+    close = 1500 * np.exp(np.cumsum(trend + rng.normal(0, 0.005, 600)))
+    conn.executemany(
+        "INSERT INTO index_daily VALUES (?, '0000', ?)",
+        [(d.strftime("%Y-%m-%d"), float(c)) for d, c in zip(dates, close)],
+    )
+    yield conn
+    conn.close()
+    clear_regime_cache()
+
+
+def _dates(conn):
+    return [r[0] for r in conn.execute("SELECT date FROM index_daily ORDER BY date")]
+
+
+# ----------------------------------------------------------------
+# RegimeTimeline
+# ----------------------------------------------------------------
+
+class TestRegimeTimeline:
+    def test_matches_per_date_computation(self, conn):
+        dates = _dates(conn)
+        # 初期期間（MA200不足・傾き不足）と休日を含む
+        queries = dates[::5] + [dates[199], dates[218], dates[219], "2019-12-31", "2021-06-05"]
+        regimes = set()
+        for d in queries:
+            expected = _regime_from_close(get_topix_close_series(conn, d, 250))
+            actual = get_market_regime(conn, d)
+            assert actual["regime"] == expected["regime"], d
+            for key in ("ma20", "ma60", "ma200", "slope200_20"):
+                assert actual[key] == pytest.approx(expected[key]), (d, key)
+            regimes.add(actual["regime"])
+        assert regimes == {"up", "down", "range"}
+
+    def test_cache_rebuilt_when_index_updated(self, conn):
+        timeline = get_regime_timeline(conn)
+        assert get_regime_timeline(conn) is timeline
+        conn.execute("INSERT INTO index_daily VALUES ('2030-01-04', '0000', 1000.0)")
+        rebuilt = get_regime_timeline(conn)
+        assert rebuilt is not timeline
+        assert len(rebuilt) == len(timeline) + 1
+
+    def test_multiple_rules_in_one_pass(self, conn):
+        fast = MARegimeRule(name="ma10_30_100", short=10, mid=30, long=100, slope_lag=10)
+        timeline = get_regime_timeline(conn, rules=(MARegimeRule(), fast))
+        d = _dates(conn)[150]
+        # MA200 は未計算でも MA100 のルールは判定できる
+        assert timeline.lookup(d)["ma200"] is None
+        assert timeline.lookup(d, "ma10_30_100")["ma100"] is not None
+        table = timeline.regimes(_dates(conn)[::50])
+        assert list(table.columns) == ["ma20_60_200", "ma10_30_100"]
+        with pytest.raises(ValueError):
+            get_regime_timeline(conn, rules=(fast, fast))
+
+
+# ----------------------------------------------------------------
+# レジーム切替ポリシーのシミュレーター
+# ----------------------------------------------------------------
+
+_SIM_DATES = ["2020-01-31", "2020-02-28", "2020-03-31", "2020-04-30", "2020-05-29"]
+_SIM_REGIMES = dict(zip(_SIM_DATES, ["up", "range", "down", "range", "range"]))
+_HORIZONS = {"12M_momentum": 12, "12M_reversal": 12, "operational_24M": 24}
+
+
+def _sim_table(as_of="2022-12-31", missing=()):
+    calls = []
+
+    def build(date, params_id):
+        calls.append((date, params_id))
+        if (date, params_id) in missing:
+            return None, _HORIZONS[params_id]
+        return pd.DataFrame({"code": ["1111"], "weight": [1.0]}), _HORIZONS[params_id]
+
+    def evaluate(portfolio, date, horizon, as_of_date):
+        return {"eval_end_date": as_of_date, "snap_diff_days": 0, "annualized_excess_return_pct": float(horizon)}
+
+    return ParamsOutcomeTable(as_of, regimes=_SIM_REGIMES, build_portfolio=build, evaluate=evaluate), calls
+
+
+class TestRegimeSimulator:
+    def test_hysteresis_holds_previous_params_id(self):
+        table, _ = _sim_table()
+        policy = RegimePolicy.from_mapping(
+            "hyst", {"up": "operational_24M", "down": "12M_momentum", "range": HOLD}
+        )
+        sim = simulate_policy(table, policy, _SIM_DATES)
+        ids = [sim.portfolio_metadata[d]["params_id"] for d in _SIM_DATES]
+        assert ids == ["operational_24M", "operational_24M", "12M_momentum", "12M_momentum", "12M_momentum"]
+        assert sim.switch_count == 1
+
+    def test_disallowed_params_id_falls_back(self):
+        table, _ = _sim_table()
+        policy = RegimePolicy.from_mapping(
+            "12m", {"up": "operational_24M", "down": "12M_reversal", "range": "12M_momentum"},
+            allowed_params_ids={"12M_momentum", "12M_reversal"},
+        )
+        assert policy.params_ids() == ["12M_momentum", "12M_reversal"]
+        sim = simulate_policy(table, policy, _SIM_DATES)
+        assert [p["params_id"] for p in sim.performances][:3] == ["12M_momentum", "12M_momentum", "12M_reversal"]
+
+    def test_portfolios_shared_across_policies(self):
+        table, calls = _sim_table()
+        policies = [
+            RegimePolicy.fixed("12M_momentum"),
+            RegimePolicy.fixed("operational_24M"),
+            RegimePolicy.from_mapping("sw", {"up": "12M_momentum", "range": "operational_24M"}),
+        ]
+        sims = simulate_policies(table, policies, _SIM_DATES)
+        assert len(sims) == 3
+        # 切替ポリシーの選択は固定ポリシーで作成済みの組だけ
+        assert table.n_built == 2 * len(_SIM_DATES)
+        assert len(calls) == len(set(calls)) == table.n_built
+        assert table.n_evaluated == table.n_built
+
+    def test_skipped_dates_do_not_update_previous(self):
+        # 24M はホライズン未達、2020-01-31 の 12M はポートフォリオ作成失敗
+        table, _ = _sim_table(as_of="2021-06-30", missing={("2020-01-31", "12M_momentum")})
+        policy = RegimePolicy.from_mapping(
+            "hyst", {"up": "12M_momentum", "down": "operational_24M", "range": HOLD},
+            initial_params_id="12M_reversal",
+        )
+        sim = simulate_policy(table, policy, _SIM_DATES)
+        assert "2020-01-31" not in sim.portfolio_metadata
+        assert "2020-03-31" not in sim.portfolio_metadata
+        # 前回（採用されたもの）が無いため初回は initial、その後も維持
+        assert [sim.portfolio_metadata[d]["params_id"] for d in sorted(sim.portfolio_metadata)] == [
+            "12M_reversal", "12M_reversal", "12M_reversal",
+        ]
+        loose = simulate_policy(table, policy, _SIM_DATES, require_full_horizon=False)
+        assert loose.portfolio_metadata["2020-03-31"]["params_id"] == "operational_24M"
+        assert loose.portfolio_metadata["2020-04-30"]["params_id"] == "operational_24M"
@@ -0,0 +1,111 @@
+"""seed耐性テストの集計（backtest/seed_robustness）のユニットテスト"""
+
+import random
+
+import numpy as np
+import pytest
+
+from omanta_3rd.backtest.seed_robustness import (
+    PerDateResults,
+    aggregate_splits,
+    annualize_fixed_horizon,
+    bootstrap_mean_excess,
+    sign_flip_pvalues,
+)
+
+DATES = [f"{y}-{m:02d}-28" for y in (2019, 2020, 2021) for m in range(1, 13)]
+
+
+def _performances():
+    rng = np.random.default_rng(3)
+    perfs = {}
+    for i, d in enumerate(DATES):
+        if i % 7 == 3:
+            continue  # 評価できなかった日
+        total = float(rng.normal(8.0, 15.0))
+        excess = float(rng.normal(2.0, 10.0))
+        if i == 10:
+            excess = -120.0  # 年率化できない
+        if i == 11:
+            excess = None
+        perfs[d] = {"rebalance_date": d, "total_return_pct": total, "topix_comparison": {"excess_return_pct": excess}}
+    return perfs
+
+
+def _naive(perfs, dates, horizon_months):
+    """calculate_fixed_horizon_performance と同じ手順の集計（リスト版）"""
+    years = horizon_months / 12.0
+    returns, excesses, n = [], [], 0
+    for d in dates:
+        if d not in perfs:
+            continue
+        n += 1
+        r, e = annualize_fixed_horizon(perfs[d], years)
+        if not np.isnan(r):
+            returns.append(r)
+        if not np.isnan(e):
+            excesses.append(e)
+    return {
+        "mean_annual_excess_return_pct": np.mean(excesses) if excesses else 0.0,
+        "median_annual_excess_return_pct": np.median(excesses) if excesses else 0.0,
+        "mean_annual_return_pct": np.mean(returns) if returns else 0.0,
+        "win_rate": sum(1 for x in excesses if x > 0) / len(excesses) if excesses else 0.0,
+        "num_portfolios": n,
+    }
+
+
+def _random_splits(n_seeds, train_ratio=0.8):
+    splits = []
+    for seed in range(n_seeds):
+        shuffled = DATES.copy()
+        random.Random(seed).shuffle(shuffled)
+        splits.append(sorted(shuffled[int(round(len(DATES) * train_ratio)):]))
+    return splits
+
+
+class TestAggregateSplits:
+    def test_matches_per_split_evaluation(self):
+        perfs = _performances()
+        per_date = PerDateResults.from_performances(DATES, perfs, 12)
+        splits = _random_splits(30)
+        stats = aggregate_splits(per_date, per_date.masks(splits))
+        for i, test_dates in enumerate(splits):
+            expected = _naive(perfs, test_dates, 12)
+            for key, value in expected.items():
+                assert stats[key][i] == pytest.approx(value), (i, key)
+
+    def test_annualization_uses_horizon(self):
+        r, e = annualize_fixed_horizon({"total_return_pct": 21.0, "topix_comparison": {"excess_return_pct": -19.0}}, 2.0)
+        assert r == pytest.approx(10.0)
+        assert e == pytest.approx(-10.0)
+        assert np.isnan(annualize_fixed_horizon({"total_return_pct": None}, 1.0)[0])
+
+    def test_empty_split(self):
+        per_date = PerDateResults.from_performances(DATES, {}, 12)
+        stats = aggregate_splits(per_date, per_date.masks([DATES[:5], ["2030-01-31"]]))
+        assert list(stats["num_portfolios"]) == [0, 0]
+        assert list(stats["mean_annual_excess_return_pct"]) == [0.0, 0.0]
+
+
+class TestSignificance:
+    def test_bootstrap_interval_contains_mean(self):
+        perfs = _performances()
+        per_date = PerDateResults.from_performances(DATES, perfs, 12)
+        masks = per_date.masks(_random_splits(10) + [[]])
+        stats = aggregate_splits(per_date, masks)
+        boot = bootstrap_mean_excess(per_date, masks, n_boot=500, random_seed=1)
+        valid = stats["n_periods"] > 0
+        mean = stats["mean_annual_excess_return_pct"][valid]
+        assert np.all(boot["ci_low"][valid] <= mean) and np.all(mean <= boot["ci_high"][valid])
+        assert np.isnan(boot["ci_low"][-1])
+        again = bootstrap_mean_excess(per_date, masks, n_boot=500, random_seed=1)
+        np.testing.assert_array_equal(again["ci_low"], boot["ci_low"])
+
+    def test_sign_flip_pvalues(self):
+        dates = DATES[:20]
+        positive = {d: {"total_return_pct": 10.0, "topix_comparison": {"excess_return_pct": 5.0 + i % 3}} for i, d in enumerate(dates)}
+        symmetric = {d: {"total_return_pct": 0.0, "topix_comparison": {"excess_return_pct": 5.0 * (-1) ** i}} for i, d in enumerate(dates)}
+        p_pos = sign_flip_pvalues(PerDateResults.from_performances(dates, positive, 12), np.ones((1, 20), bool), n_perm=999)
+        p_sym = sign_flip_pvalues(PerDateResults.from_performances(dates, symmetric, 12), np.ones((1, 20), bool), n_perm=999)
+        assert p_pos[0] < 0.01
+        assert p_sym[0] > 0.2
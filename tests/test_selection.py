@@ -131,6 +131,66 @@ class TestSelectPortfolio:
         assert "LOW" not in codes
 
 
+# ---------------------------------------------------------------------------
+# select_portfolio（listed_segments 経由の市場フィルタ）
+# ---------------------------------------------------------------------------
+
+class TestSelectPortfolioWithSegments:
+    @pytest.fixture
+    def seg_db(self, db):
+        from omanta_3rd.ingest.listed_segments import ensure_listed_segments_table, refresh_listed_segments
+
+        db.execute("ALTER TABLE listed_info ADD COLUMN company_name TEXT")
+        db.execute("ALTER TABLE listed_info ADD COLUMN sector17 TEXT")
+        db.execute("ALTER TABLE listed_info ADD COLUMN sector33 TEXT")
+        rows = [
+            ("1001", "2022-03-31", "東証一部"),
+            ("1001", "2022-04-30", "プライム"),
+            ("1002", "2022-03-31", "マザーズ"),
+            ("1002", "2022-04-30", "グロース"),
+            ("1003", "2022-03-31", "東証一部"),
+        ]
+        db.executemany("INSERT INTO listed_info (code, date, market_name) VALUES (?, ?, ?)", rows)
+        ensure_listed_segments_table(db)
+        refresh_listed_segments(db)
+        db.commit()
+        return db
+
+    def test_prime_filter_uses_latest_interval(self, seg_db):
+        config = StrategyConfig(target_markets=["プライム"], max_stocks_per_sector=10)
+        for code in ("1001", "1002", "1003"):
+            _insert_feature(seg_db, code, "2024-06-01", "銀行業", 0.8)
+        codes = {item["code"] for item in select_portfolio(seg_db, "2024-06-01", config=config)}
+        # 1003 は2022-04以降のスナップショットに無いが、最新属性（東証一部）で判定される
+        assert codes == {"1001", "1003"}
+
+    def test_matches_listed_info_path(self, seg_db):
+        config = StrategyConfig(target_markets=["グロース"], max_stocks_per_sector=10)
+        for code in ("1001", "1002", "1003"):
+            _insert_feature(seg_db, code, "2022-03-31", "銀行業", 0.8)
+        with_segments = select_portfolio(seg_db, "2022-03-31", config=config)
+        seg_db.execute("DROP TABLE listed_segments")
+        without_segments = select_portfolio(seg_db, "2022-03-31", config=config)
+        assert with_segments == without_segments
+        assert [item["code"] for item in with_segments] == ["1002"]
+
+    def test_empty_or_stale_segments_fall_back_to_listed_info(self, seg_db):
+        config = StrategyConfig(target_markets=["プライム"], max_stocks_per_sector=10)
+        for code in ("1001", "1002", "1003"):
+            _insert_feature(seg_db, code, "2024-06-01", "銀行業", 0.8)
+        expected = select_portfolio(seg_db, "2024-06-01", config=config)
+        assert {item["code"] for item in expected} == {"1001", "1003"}
+
+        # listed_info だけ新しいスナップショットが追加された（集計が追いついていない）
+        seg_db.execute("INSERT INTO listed_info (code, date, market_name) VALUES ('1002', '2024-05-31', 'プライム')")
+        stale = {item["code"] for item in select_portfolio(seg_db, "2024-06-01", config=config)}
+        assert stale == {"1001", "1002", "1003"}
+
+        # 作成直後の空テーブル
+        seg_db.execute("DELETE FROM listed_segments")
+        assert {item["code"] for item in select_portfolio(seg_db, "2024-06-01", config=config)} == stale
+
+
 # ---------------------------------------------------------------------------
 # apply_replacement_limit
 # ---------------------------------------------------------------------------
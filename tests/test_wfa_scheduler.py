@@ -0,0 +1,194 @@
+"""WFA グローバルワーカープール（jobs/wfa_scheduler）・fold間ウォームスタートのユニットテスト（DB不要）"""
+
+import numpy as np
+import optuna
+import pandas as pd
+import pytest
+
+from omanta_3rd.backtest.data_plane import SharedDataPlane
+from omanta_3rd.backtest.feature_matrix import build_feature_matrices
+from omanta_3rd.features.code_registry import CodeRegistry
+from omanta_3rd.jobs import wfa_scheduler
+from omanta_3rd.jobs.wfa_scheduler import run_walk_forward_global_pool
+from omanta_3rd.jobs.wfa_warm_start import enqueue_warm_start, top_trial_params
+
+DATES = [f"2020-{m:02d}-28" for m in range(1, 13)]
+
+
+def fake_evaluate(rebalance_dates, strategy_params_dict, entry_params_dict, horizon_months, as_of_date, cost_bps):
+    """w_quality が 0.3 に近いほど良いダミー評価（ワーカーでデータプレーンが開けていることも確認）"""
+    assert wfa_scheduler._PLANE is not None
+    assert set(rebalance_dates) <= set(wfa_scheduler._PLANE.features)
+    excess = 10.0 - 100.0 * (strategy_params_dict["w_quality"] - 0.3) ** 2
+    returns = [excess / 100.0] * len(rebalance_dates)
+    return {
+        "annual_excess_returns_list": returns,
+        "mean_annual_excess_return_pct": excess,
+        "median_annual_excess_return_pct": excess,
+        "p10_annual_excess_return_pct": excess,
+        "min_annual_excess_return_pct": excess,
+        "mean_annual_return_pct": excess + 5.0,
+        "median_annual_return_pct": excess + 5.0,
+        "cumulative_return_pct": 0.0,
+        "mean_excess_return_pct": 0.0,
+        "mean_holding_years": horizon_months / 12.0,
+        "win_rate": 1.0,
+        "num_portfolios": len(rebalance_dates),
+        "n_periods": len(rebalance_dates),
+        "by_year": {},
+        "as_of_date": as_of_date,
+    }
+
+
+@pytest.fixture
+def plane(tmp_path):
+    features = {
+        d: pd.DataFrame({
+            "as_of_date": d,
+            "code": ["1000", "1001"],
+            "sector33": ["銀行業", "証券業"],
+            "roe": np.random.default_rng(i).random(2),
+        })
+        for i, d in enumerate(DATES)
+    }
+    registry = CodeRegistry.from_frames(features.values())
+    return SharedDataPlane.build(tmp_path / "plane", build_feature_matrices(features, registry), {}, registry)
+
+
+def _folds():
+    return [
+        {"fold": 1, "train_dates": DATES[:4], "test_dates": DATES[4:6],
+         "train_start": DATES[0], "train_end": DATES[3], "test_start": DATES[4], "test_end": DATES[5]},
+        {"fold": 2, "train_dates": DATES[:8], "test_dates": DATES[8:],
+         "train_start": DATES[0], "train_end": DATES[7], "test_start": DATES[8], "test_end": DATES[-1],
+         "is_holdout": True},
+    ]
+
+
+class TestGlobalPool:
+    def test_runs_all_folds_in_one_pool(self, plane):
+        results = run_walk_forward_global_pool(
+            _folds(), plane, horizon_months=12, as_of_date="2021-12-31",
+            n_trials=6, seed=0, n_workers=3, evaluate_fn=fake_evaluate,
+        )
+        assert [r["fold"] for r in results] == [1, 2]
+        for r, fold in zip(results, _folds()):
+            opt = r["optimization"]
+            assert opt["n_completed"] == 6
+            # best_params は正規化済みの重み（build_params_from_json と同じキー）
+            weights = sum(opt["best_params"][k] for k in ("w_quality", "w_value", "w_growth", "w_record_high", "w_size"))
+            assert weights == pytest.approx(1.0)
+            assert r["test_performance"]["n_portfolios"] == len(fold["test_dates"])
+            assert r["train_as_of_date"] == fold["test_start"]
+        assert results[1]["is_holdout"] is True
+
+    def test_failed_evaluations_are_reported(self, plane):
+        results = run_walk_forward_global_pool(
+            _folds()[:1], plane, horizon_months=12, as_of_date="2021-12-31",
+            n_trials=2, n_workers=2, evaluate_fn=_failing_evaluate,
+        )
+        assert results == [{"fold": 1, "error": "完了したtrialがありません"}]
+
+
+def _failing_evaluate(*args):
+    raise RuntimeError("No portfolios were generated")
+
+
+# ----------------------------------------------------------------
+# fold間ウォームスタート
+# ----------------------------------------------------------------
+
+def _quadratic(trial):
+    x = trial.suggest_float("x", -1.0, 1.0)
+    y = trial.suggest_int("y", 0, 3)
+    return -((x - 0.3) ** 2) - 0.1 * (y - 2) ** 2
+
+
+class TestWarmStart:
+    def _study(self, direction="maximize", n_trials=20):
+        study = optuna.create_study(direction=direction, sampler=optuna.samplers.RandomSampler(seed=0))
+        study.optimize(_quadratic, n_trials=n_trials)
+        return study
+
+    def test_top_trial_params_ordered_by_direction(self):
+        study = self._study()
+        top = top_trial_params(study, 3)
+        assert top[0] == study.best_params
+        values = {tuple(sorted(t.params.items())): t.value for t in study.trials}
+        ranked = [values[tuple(sorted(p.items()))] for p in top]
+        assert ranked == sorted(ranked, reverse=True)
+        assert top_trial_params(study, 0) == []
+
+        minimize = self._study(direction="minimize")
+        assert top_trial_params(minimize, 1) == [minimize.best_params]
+
+    def test_enqueued_trials_run_first(self):
+        prev = self._study()
+        top = top_trial_params(prev, 3)
+        study = optuna.create_study(direction="maximize", sampler=optuna.samplers.TPESampler(seed=1))
+        assert enqueue_warm_start(study, top) == 3
+        assert enqueue_warm_start(study, None) == 0
+        study.optimize(_quadratic, n_trials=5)
+        assert [t.params for t in study.trials[:3]] == top
+        assert study.best_value >= prev.best_value
+
+
+# ----------------------------------------------------------------
+# fold間の評価キャッシュ（walk_forward_longterm.run_optimization_for_fold）
+# ----------------------------------------------------------------
+
+class _NoopConn:
+    def execute(self, *args):
+        return self
+
+    def commit(self):
+        pass
+
+
+class TestFoldEvaluationCache:
+    def test_second_fold_hits_cache(self, tmp_path, monkeypatch):
+        from contextlib import contextmanager
+
+        import walk_forward_longterm
+        from omanta_3rd.backtest.feature_cache import FeatureCache
+        from omanta_3rd.jobs import optimize_longterm
+
+        @contextmanager
+        def no_db(*args, **kwargs):
+            yield _NoopConn()
+
+        selected = []
+
+        def fake_select(rebalance_date, *args):
+            selected.append(rebalance_date)
+            return pd.DataFrame({"rebalance_date": [rebalance_date], "weight": [1.0]}, index=["1000"])
+
+        def fake_performance(rebalance_date, eval_date, portfolio_df_dict, cost_bps=0.0, snapshot_path=None):
+            return {
+                "rebalance_date": rebalance_date,
+                "as_of_date": eval_date,
+                "total_return_pct": 12.0,
+                "topix_comparison": {"topix_return_pct": 5.0, "excess_return_pct": 7.0},
+            }
+
+        monkeypatch.chdir(tmp_path)  # Optuna の SQLite ストレージの作成先
+        monkeypatch.setattr(FeatureCache, "warm", lambda self, dates, n_jobs=1: ({}, {}))
+        monkeypatch.setattr(optimize_longterm, "connect_db", no_db)
+        monkeypatch.setattr(optimize_longterm, "_snap_price_date", lambda conn, d: d)
+        monkeypatch.setattr(optimize_longterm, "_select_portfolio_for_rebalance_date", fake_select)
+        monkeypatch.setattr(optimize_longterm, "_calculate_performance_single_longterm", fake_performance)
+
+        common = dict(n_trials=2, seed=0, cache_dir=str(tmp_path), use_eval_cache=True, horizon_months=3)
+        first = walk_forward_longterm.run_optimization_for_fold(
+            DATES[:3], fold_num=1, warm_start_top_k=2, as_of_date=DATES[6], **common
+        )
+        assert first["eval_cache_stats"]["hits"] == 0
+        assert len(selected) == 2 * 3
+
+        selected.clear()
+        second = walk_forward_longterm.run_optimization_for_fold(
+            DATES[:5], fold_num=2, warm_start_params=first["top_params"], as_of_date=DATES[8], **common
+        )
+        # 前foldの上位trialは train 期間の重なる3日分をキャッシュから読む
+        assert second["eval_cache_stats"]["hits"] == 2 * 3
+        assert sorted(set(selected)) == DATES[3:5]
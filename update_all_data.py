@@ -16,9 +16,11 @@ from typing import Optional
 
 from src.omanta_3rd.infra.db import connect_db
 from src.omanta_3rd.infra.jquants import JQuantsClient
+from src.omanta_3rd.infra.maintenance import run_maintenance
 from src.omanta_3rd.ingest.listed import ingest_listed_info
 from src.omanta_3rd.ingest.prices import ingest_prices
 from src.omanta_3rd.ingest.fins import ingest_financial_statements
+from src.omanta_3rd.ingest.fins_sync import sync_financial_statements
 from src.omanta_3rd.ingest.indices import ingest_index_data, TOPIX_CODE
 from src.omanta_3rd.portfolio.holdings import update_holding_performance, update_holdings_summary
 
@@ -166,6 +168,21 @@ def update_financials(
     if client is None:
         client = JQuantsClient()
     
+    if start_date is None and auto_calculate:
+        # 期間未指定: 前回同期した開示日（ウォーターマーク）の翌日以降だけを取得
+        print("=" * 80)
+        print("【財務データの更新（差分同期）】")
+        print("=" * 80)
+        try:
+            watermark = sync_financial_statements(end_date=end_date, client=client)
+            print(f"✅ 財務データの更新が完了しました（同期済み: {watermark}）。")
+            return True
+        except Exception as e:
+            print(f"❌ 財務データの更新中にエラーが発生しました: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
     if start_date is None or end_date is None:
         if auto_calculate:
             start_date, end_date = calculate_date_range("fins_statements", "disclosed_date", default_days=90, end_date=end_date)
@@ -241,6 +258,7 @@ def main(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     auto_calculate: bool = True,
+    maintenance: bool = True,
 ):
     """
     一括更新を実行
@@ -251,6 +269,7 @@ def main(
         start_date: 開始日（価格・財務・指数データ用、YYYY-MM-DD）
         end_date: 終了日（価格・財務・指数データ用、YYYY-MM-DD）
         auto_calculate: 自動で日付範囲を計算するか
+        maintenance: 更新後にDBメンテナンス（ANALYZE / WALチェックポイント）を実行するか
     """
     print("=" * 80)
     print("APIデータ一括更新スクリプト")
@@ -310,6 +329,15 @@ def main(
             results["holdings"] = False
             print()
     
+    # DBメンテナンス（統計更新・WAL切り詰め・サイズ記録）
+    if maintenance:
+        try:
+            print(run_maintenance().summary())
+        except Exception as e:
+            # メンテナンスの失敗は更新結果に影響させない
+            print(f"⚠️  DBメンテナンス中にエラーが発生しました: {e}")
+        print()
+    
     # 結果サマリー
     print("=" * 80)
     print("【更新結果サマリー】")
@@ -383,6 +411,11 @@ if __name__ == "__main__":
         action="store_true",
         help="自動で日付範囲を計算しない（デフォルトの日数分を取得）",
     )
+    parser.add_argument(
+        "--no-maintenance",
+        action="store_true",
+        help="更新後のDBメンテナンス（ANALYZE / WALチェックポイント）を実行しない",
+    )
     
     args = parser.parse_args()
     
@@ -392,6 +425,7 @@ if __name__ == "__main__":
         start_date=args.start_date,
         end_date=args.end_date,
         auto_calculate=not args.no_auto_calculate,
+        maintenance=not args.no_maintenance,
     ))
 
 
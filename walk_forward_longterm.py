@@ -45,6 +45,7 @@ from omanta_3rd.jobs.batch_longterm_run import get_monthly_rebalance_dates
 from omanta_3rd.jobs.longterm_run import StrategyParams
 from omanta_3rd.jobs.optimize import EntryScoreParams
 from omanta_3rd.backtest.feature_cache import FeatureCache
+from omanta_3rd.backtest.data_plane import SharedDataPlane
 from omanta_3rd.backtest.performance import calculate_portfolio_performance
 from omanta_3rd.jobs.longterm_run import save_portfolio
 from test_seed_robustness_fixed_horizon import calculate_fixed_horizon_performance
@@ -463,6 +464,12 @@ def run_optimization_for_fold(
     cache_dir: str = "cache/features",
     fold_num: Optional[int] = None,
     n_jobs_optuna: int = 1,  # Optunaの並列化数（-1: 自動, 1: 逐次実行）
+    warm_start_params: Optional[List[Dict[str, Any]]] = None,
+    warm_start_top_k: int = 0,
+    use_eval_cache: bool = False,
+    snapshot_path: Optional[str] = None,
+    horizon_months: int = 24,
+    as_of_date: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     foldのtrain期間で最適化を実行（長期保有型）
@@ -473,6 +480,13 @@ def run_optimization_for_fold(
         study_type: スタディタイプ（A/B/C）
         seed: 乱数シード
         cache_dir: キャッシュディレクトリ
+        warm_start_params: 最初に評価するパラメータ（前foldの上位trial、enqueue_trialで投入）
+        warm_start_top_k: 次のfold用に返す上位trial数（結果の"top_params"）
+        use_eval_cache: パラメータ × リバランス日の評価キャッシュ（cache_dir内のSQLite）を使用するか
+        snapshot_path: 特徴量の構築・評価の価格とTOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
+        horizon_months: 投資ホライズン（月数）
+        as_of_date: train評価の打ち切り日（必須、foldのtest_start）
+                    評価キャッシュもこの日までにホライズンが完了する日付だけを再利用する
     
     Returns:
         最適化結果の辞書（best_params含む）
@@ -486,6 +500,8 @@ def run_optimization_for_fold(
         split_rebalance_dates,
     )
     from omanta_3rd.backtest.feature_cache import FeatureCache
+    from omanta_3rd.backtest.eval_cache import EvaluationCache
+    from omanta_3rd.jobs.wfa_warm_start import enqueue_warm_start, top_trial_params
     
     # Optunaスタディを作成（毎回新しいstudy_nameを生成）
     # 並列実行時の競合を避けるため、fold番号とプロセスIDを含める
@@ -539,15 +555,19 @@ def run_optimization_for_fold(
         else:
             print(f"  ✓ Optunaスタディを作成しました (load_if_exists=False)")
         
+        # 前foldの上位trialを最初に評価（n_trialsに含める）
+        enqueue_warm_start(study, warm_start_params)
+        
         # 特徴量キャッシュを構築
         # 注意: 親プロセスで既にwarm済みの場合は、ここでは再読み込みのみ
         # ただし、子プロセスではpickleの問題があるため、キャッシュから再読み込みが必要
-        feature_cache = FeatureCache(cache_dir=cache_dir)
+        feature_cache = FeatureCache(cache_dir=cache_dir, snapshot_path=snapshot_path)
         # train_datesのみをwarm（既にキャッシュがある場合は読み込みのみ）
         features_dict, prices_dict = feature_cache.warm(
             train_dates,
             n_jobs=1  # fold間並列化が有効な場合は1に設定（プロセス数の爆発を防ぐ）
         )
+        result_cache = EvaluationCache.for_feature_cache(feature_cache) if use_eval_cache else None
         
         # 最適化実行（timed_objectiveで進捗を可視化）
         import time
@@ -569,6 +589,10 @@ def run_optimization_for_fold(
                     n_jobs=1,  # 各trial内では逐次実行（Optunaの並列化と競合を避ける）
                     features_dict=features_dict,
                     prices_dict=prices_dict,
+                    horizon_months=horizon_months,
+                    as_of_date=as_of_date,
+                    result_cache=result_cache,
+                    snapshot_path=snapshot_path,
                 )
                 dt = time.perf_counter() - t0
                 print(f"  [Trial {trial.number}] ✅ 完了: value={v:.6f}, 時間={dt:.1f}秒 ({dt/60:.1f}分)")
@@ -646,7 +670,8 @@ def run_optimization_for_fold(
         print(f"    Best value: {study.best_value:.4f}")
         print(f"    Best params:")
         for key, value in sorted(best_params_raw.items()):
-            print(f"      {key}: {value:.6f}")
+            # rsi_direction / bb_direction はカテゴリ（文字列）
+            print(f"      {key}: {value:.6f}" if isinstance(value, float) else f"      {key}: {value}")
         
         # Core Score重みの正規化
         w_quality = best_params_raw.get("w_quality", 0.0)
@@ -675,6 +700,12 @@ def run_optimization_for_fold(
         normalized_best_params["w_record_high"] = w_record_high_norm
         normalized_best_params["w_size"] = w_size_norm
         
+        eval_cache_stats = None
+        if result_cache is not None:
+            eval_cache_stats = result_cache.stats()
+            print(f"  評価キャッシュ: hit={eval_cache_stats['hits']}, miss={eval_cache_stats['misses']} (hit率 {eval_cache_stats['hit_rate']:.1%})")
+            result_cache.close()
+        
         return {
             "best_value": study.best_value,
             "best_params": normalized_best_params,
@@ -682,6 +713,9 @@ def run_optimization_for_fold(
             "n_trials": n_trials,
             "best_trial_number": study.best_trial.number,
             "study_name": study_name,
+            "n_warm_start": len(warm_start_params or []),
+            "top_params": top_trial_params(study, warm_start_top_k),
+            "eval_cache_stats": eval_cache_stats,
         }
     except Exception as e:
         print(f"  ❌ 最適化エラー: {e}")
@@ -696,6 +730,7 @@ def run_backtest_with_fixed_params_longterm(
     horizon_months: int,
     features_dict: Dict[str, pd.DataFrame],
     prices_dict: Dict[str, Dict[str, List[float]]],
+    snapshot_path: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     固定パラメータでtest期間のバックテストを実行（長期保有型・固定ホライズン）
@@ -706,6 +741,7 @@ def run_backtest_with_fixed_params_longterm(
         horizon_months: ホライズン（月数）
         features_dict: 特徴量辞書
         prices_dict: 価格データ辞書
+        snapshot_path: 価格・TOPIXの読み取りに使うDBスナップショット（Noneの場合は本番DB）
     
     Returns:
         メトリクスの辞書
@@ -726,6 +762,7 @@ def run_backtest_with_fixed_params_longterm(
         cost_bps=0.0,
         features_dict=features_dict,
         prices_dict=prices_dict,
+        snapshot_path=snapshot_path,
     )
     
     return perf
@@ -740,6 +777,8 @@ def _process_single_fold_wrapper(
     cache_dir: str,
     rebalance_dates: List[str],  # 全リバランス日（キャッシュ再読み込み用）
     n_jobs_optuna: int,  # Optunaの並列化数
+    use_eval_cache: bool = False,
+    snapshot_path: Optional[str] = None,
 ) -> Dict[str, Any]:
     """単一foldの処理をラップ（並列化用、グローバル関数として定義）"""
     try:
@@ -766,10 +805,12 @@ def _process_single_fold_wrapper(
         fold_num = fold_info["fold"]
         train_dates = fold_info["train_dates"]
         test_dates = fold_info["test_dates"]
+        # train評価の打ち切り日（wfa_scheduler と同じく fold の test_start）
+        train_as_of_date = fold_info.get("train_as_of_date") or fold_info["test_start"]
         
         # 各プロセス内でキャッシュからデータを再読み込み（pickle問題を回避）
         print(f"  [Fold {fold_num}] キャッシュからデータを読み込みます...")
-        feature_cache = FeatureCache(cache_dir=cache_dir)
+        feature_cache = FeatureCache(cache_dir=cache_dir, snapshot_path=snapshot_path)
         features_dict, prices_dict = feature_cache.warm(
             rebalance_dates,
             n_jobs=1  # 並列化は既にfold間で行われているため、ここでは1
@@ -785,6 +826,10 @@ def _process_single_fold_wrapper(
             cache_dir=cache_dir,
             fold_num=fold_num,  # fold番号を渡してstudy_nameに含める
             n_jobs_optuna=n_jobs_optuna,  # Optunaの並列化数
+            use_eval_cache=use_eval_cache,
+            snapshot_path=snapshot_path,
+            horizon_months=horizon_months,
+            as_of_date=train_as_of_date,
         )
         
         if opt_result is None:
@@ -800,6 +845,7 @@ def _process_single_fold_wrapper(
             horizon_months=horizon_months,
             features_dict=features_dict,
             prices_dict=prices_dict,
+            snapshot_path=snapshot_path,
         )
         
         fold_result = {
@@ -808,6 +854,7 @@ def _process_single_fold_wrapper(
             "train_end": fold_info["train_end"],
             "test_start": fold_info["test_start"],
             "test_end": fold_info["test_end"],
+            "train_as_of_date": train_as_of_date,
             "train_dates_count": len(train_dates),
             "test_dates_count": len(test_dates),
             "is_holdout": fold_info.get("is_holdout", False),
@@ -854,6 +901,11 @@ def run_walk_forward_analysis_longterm(
     holdout_eval_year: Optional[int] = None,
     n_jobs_fold: int = 1,
     n_jobs_optuna: int = -1,  # Optunaの並列化数（-1: 自動, 1: 逐次実行）
+    scheduler: str = "fold",  # "fold": fold単位の並列化、"global": fold × trial単位のグローバルプール
+    n_workers: int = -1,  # scheduler="global"のワーカー数（-1: CPU数）
+    warm_start_top_k: int = 0,  # 前foldの上位K件のtrialを次のfoldにenqueue（0: 無効）
+    eval_cache: bool = False,  # パラメータ × リバランス日の評価キャッシュをfold間で共有
+    snapshot_path: Optional[str] = None,  # 読み取りに使うDBスナップショット（None: 本番DB）
 ) -> Dict[str, Any]:
     """
     長期保有型のWalk-Forward Analysisを実行
@@ -871,6 +923,14 @@ def run_walk_forward_analysis_longterm(
         use_2025_holdout: 最終年をホールドアウトとして使う（リバランス年ベース）
         fold_type: foldタイプ（"roll"または"simple"）
         holdout_eval_year: 評価終了年でホールドアウトを指定（例: 2025、評価終了年ベース）
+        scheduler: "global" の場合、共有データプレーンを1回だけ構築し、全foldのtrialを
+            1つのワーカープールで実行する（omanta_3rd.jobs.wfa_scheduler）
+        n_workers: scheduler="global" のワーカー数
+        warm_start_top_k: 前foldの上位K件のtrialを次のfoldのstudyに最初に投入する（逐次実行のみ）
+        eval_cache: 評価キャッシュ（cache_dir内のSQLite）を使用し、foldが重なるリバランス日では
+            同じパラメータの評価結果を再利用する（fold並列・逐次実行）
+        snapshot_path: 読み取りに使うDBスナップショット（Noneの場合は本番DB）。
+            リバランス日・特徴量・価格の読み取りだけがスナップショットを参照する
     
     Returns:
         WFA結果の辞書
@@ -903,7 +963,7 @@ def run_walk_forward_analysis_longterm(
     
     # リバランス日を取得
     print("リバランス日を取得します...")
-    rebalance_dates = get_monthly_rebalance_dates(start_date, end_date)
+    rebalance_dates = get_monthly_rebalance_dates(start_date, end_date, snapshot_path=snapshot_path)
     print(f"✓ リバランス日数: {len(rebalance_dates)}")
     print()
     
@@ -946,14 +1006,22 @@ def run_walk_forward_analysis_longterm(
     print()
     
     # 特徴量キャッシュを構築（全期間分）
-    print("特徴量キャッシュを構築します...")
-    feature_cache = FeatureCache(cache_dir=cache_dir)
-    features_dict, prices_dict = feature_cache.warm(
-        rebalance_dates,
-        n_jobs=-1
-    )
-    print(f"✓ 特徴量: {len(features_dict)}日分、価格データ: {len(prices_dict)}日分")
-    print()
+    if scheduler == "global":
+        # 全foldで共有するデータプレーン（ワーカーはmemmapで開く）
+        print("共有データプレーンを構築します...")
+        data_plane = SharedDataPlane.warm(
+            FeatureCache(cache_dir=cache_dir, snapshot_path=snapshot_path), rebalance_dates
+        )
+        print()
+    else:
+        print("特徴量キャッシュを構築します...")
+        feature_cache = FeatureCache(cache_dir=cache_dir, snapshot_path=snapshot_path)
+        features_dict, prices_dict = feature_cache.warm(
+            rebalance_dates,
+            n_jobs=-1
+        )
+        print(f"✓ 特徴量: {len(features_dict)}日分、価格データ: {len(prices_dict)}日分")
+        print()
     
     # 各foldで実行
     print("=" * 80)
@@ -961,38 +1029,72 @@ def run_walk_forward_analysis_longterm(
     print("=" * 80)
     
     # 並列化の設定
-    import multiprocessing as mp
-    if n_jobs_fold == -1:
-        n_jobs_fold = min(len(folds), max(1, mp.cpu_count() // 2))  # CPUコア数の半分を上限
-    elif n_jobs_fold <= 0:
-        n_jobs_fold = 1
+    if scheduler == "global":
+        print(f"並列実行: グローバルワーカープール（fold × trial単位、n_workers={n_workers}）")
+        if warm_start_top_k > 0 or eval_cache:
+            print("⚠️  注意: scheduler=global では全foldのstudyが同時に進むため、ウォームスタート・評価キャッシュは使用しません")
+        print()
     else:
-        n_jobs_fold = min(n_jobs_fold, len(folds), mp.cpu_count())
+        import multiprocessing as mp
+        if n_jobs_fold == -1:
+            n_jobs_fold = min(len(folds), max(1, mp.cpu_count() // 2))  # CPUコア数の半分を上限
+        elif n_jobs_fold <= 0:
+            n_jobs_fold = 1
+        else:
+            n_jobs_fold = min(n_jobs_fold, len(folds), mp.cpu_count())
     
-    # 並列戦略: fold並列とOptuna並列を同時に使わない（オーバーサブスクライブを防ぐ）
-    use_fold_parallel = (n_jobs_fold > 1 and len(folds) > 1)
-    if use_fold_parallel:
-        # fold並列を使用する場合、Optuna並列は無効化
-        if n_jobs_optuna > 1:
-            print(f"⚠️  注意: fold並列が有効なため、Optuna並列を無効化します（n_jobs_optuna: {n_jobs_optuna} → 1）")
-            n_jobs_optuna = 1
-        print(f"並列実行: {n_jobs_fold}プロセス（fold間並列化）")
-    else:
-        # fold並列が無効な場合、Optuna並列を有効化
-        if n_jobs_optuna == -1:
-            n_jobs_optuna = max(1, min(n_trials, 2))  # 最大2並列（メモリ使用量を考慮）
-        elif n_jobs_optuna <= 0:
-            n_jobs_optuna = 1
-        if n_jobs_optuna > 1:
-            print(f"並列実行: Optuna並列化（n_jobs={n_jobs_optuna}）")
+        # 並列戦略: fold並列とOptuna並列を同時に使わない（オーバーサブスクライブを防ぐ）
+        use_fold_parallel = (n_jobs_fold > 1 and len(folds) > 1)
+        if use_fold_parallel:
+            # fold並列を使用する場合、Optuna並列は無効化
+            if n_jobs_optuna > 1:
+                print(f"⚠️  注意: fold並列が有効なため、Optuna並列を無効化します（n_jobs_optuna: {n_jobs_optuna} → 1）")
+                n_jobs_optuna = 1
+            print(f"並列実行: {n_jobs_fold}プロセス（fold間並列化）")
+            if warm_start_top_k > 0:
+                print("⚠️  注意: fold並列ではfoldが同時に実行されるため、ウォームスタートは無効です（評価キャッシュは有効）")
         else:
-            print("逐次実行（fold間、Optuna）")
-    print()
+            # fold並列が無効な場合、Optuna並列を有効化
+            if n_jobs_optuna == -1:
+                n_jobs_optuna = max(1, min(n_trials, 2))  # 最大2並列（メモリ使用量を考慮）
+            elif n_jobs_optuna <= 0:
+                n_jobs_optuna = 1
+            if n_jobs_optuna > 1:
+                print(f"並列実行: Optuna並列化（n_jobs={n_jobs_optuna}）")
+            else:
+                print("逐次実行（fold間、Optuna）")
+        print()
     
     fold_results = []
     
+    if scheduler == "global":
+        # fold × trial を1つのワーカープールで実行（test評価は価格データ終端を打ち切り日とする）
+        from omanta_3rd.jobs.wfa_scheduler import run_walk_forward_global_pool
+        with connect_db(read_only=True, snapshot=snapshot_path) as conn:
+            latest_date = conn.execute("SELECT MAX(date) FROM prices_daily").fetchone()[0]
+        for fold_result in run_walk_forward_global_pool(
+            folds,
+            data_plane,
+            horizon_months=horizon_months,
+            as_of_date=latest_date,
+            n_trials=n_trials,
+            study_type=study_type,
+            seed=seed,
+            n_workers=n_workers,
+        ):
+            if "error" in fold_result:
+                print(f"  ❌ Fold {fold_result['fold']}: {fold_result['error']}")
+                continue
+            fold_results.append(fold_result)
+            test_perf = fold_result["test_performance"]
+            print(f"[Fold {fold_result['fold']}/{len(folds)}] 完了")
+            print(f"  Train期間: {fold_result['train_start']} ～ {fold_result['train_end']} ({fold_result['train_dates_count']}日、評価打ち切り: {fold_result['train_as_of_date']})")
+            print(f"  Test期間: {fold_result['test_start']} ～ {fold_result['test_end']} ({fold_result['test_dates_count']}日)")
+            print(f"  年率超過リターン（平均）: {test_perf.get('mean_annual_excess_return_pct', 0):.4f}%")
+            print(f"  勝率: {test_perf.get('win_rate', 0):.2%}")
+    
     # fold間の並列化
-    if n_jobs_fold > 1 and len(folds) > 1:
+    elif n_jobs_fold > 1 and len(folds) > 1:
         from concurrent.futures import ProcessPoolExecutor, as_completed
         
         # 並列実行
@@ -1008,6 +1110,8 @@ def run_walk_forward_analysis_longterm(
                     cache_dir,
                     rebalance_dates,  # 全リバランス日を渡して、各プロセスでキャッシュから再読み込み
                     n_jobs_optuna,  # Optunaの並列化数
+                    eval_cache,
+                    snapshot_path,
                 ): fold_info["fold"]
                 for fold_info in folds
             }
@@ -1046,10 +1150,13 @@ def run_walk_forward_analysis_longterm(
     
     else:
         # 逐次実行（既存のコード）
+        prev_top_params: List[Dict[str, Any]] = []  # 前foldの上位trial（ウォームスタート用）
         for fold_info in folds:
             fold_num = fold_info["fold"]
             train_dates = fold_info["train_dates"]
             test_dates = fold_info["test_dates"]
+            # train評価の打ち切り日（wfa_scheduler と同じく fold の test_start）
+            train_as_of_date = fold_info.get("train_as_of_date") or fold_info["test_start"]
             
             print()
             is_holdout = fold_info.get("is_holdout", False)
@@ -1095,11 +1202,18 @@ def run_walk_forward_analysis_longterm(
                 cache_dir=cache_dir,
                 fold_num=fold_num,  # fold番号を渡してstudy_nameに含める
                 n_jobs_optuna=n_jobs_optuna,  # Optunaの並列化数
+                warm_start_params=prev_top_params,
+                warm_start_top_k=warm_start_top_k,
+                use_eval_cache=eval_cache,
+                snapshot_path=snapshot_path,
+                horizon_months=horizon_months,
+                as_of_date=train_as_of_date,
             )
             
             if opt_result is None:
                 print(f"  ❌ Fold {fold_num}の最適化に失敗しました")
                 continue
+            prev_top_params = opt_result.get("top_params", [])
             
             best_params = opt_result["best_params"]
             best_value = opt_result["best_value"]
@@ -1113,6 +1227,7 @@ def run_walk_forward_analysis_longterm(
                 horizon_months=horizon_months,
                 features_dict=features_dict,
                 prices_dict=prices_dict,
+                snapshot_path=snapshot_path,
             )
             
             # fold_labelを生成（holdoutの場合は特別なラベル）
@@ -1133,6 +1248,7 @@ def run_walk_forward_analysis_longterm(
                 "train_end": fold_info["train_end"],
                 "test_start": fold_info["test_start"],
                 "test_end": fold_info["test_end"],
+                "train_as_of_date": train_as_of_date,
                 "train_dates": train_dates,  # 全リバランス日を保存
                 "test_dates": test_dates,  # 全リバランス日を保存
                 "train_dates_count": len(train_dates),
@@ -1144,6 +1260,8 @@ def run_walk_forward_analysis_longterm(
                     "n_trials": n_trials,
                     "best_trial_number": opt_result.get("best_trial_number"),
                     "study_name": opt_result.get("study_name"),
+                    "n_warm_start": opt_result.get("n_warm_start", 0),
+                    "eval_cache_stats": opt_result.get("eval_cache_stats"),
                 },
                 "test_performance": {
                     # 要件に合わせた主要指標
@@ -1245,6 +1363,8 @@ def run_walk_forward_analysis_longterm(
         "study_type": str(study_type),
         "use_2025_holdout": bool(use_2025_holdout),
         "fold_type": str(fold_type),
+        "warm_start_top_k": int(warm_start_top_k),
+        "eval_cache": bool(eval_cache),
         "fold_results": fold_results,
         "summary": {
             "n_folds": len(fold_results),
@@ -1399,6 +1519,36 @@ if __name__ == "__main__":
         default=-1,
         help="Optunaの並列数（-1で自動、1で逐次実行、デフォルト: -1）",
     )
+    parser.add_argument(
+        "--scheduler",
+        type=str,
+        default="fold",
+        choices=["fold", "global"],
+        help="並列化方式（fold: fold単位、global: 共有データプレーン + fold × trial単位のワーカープール、デフォルト: fold）",
+    )
+    parser.add_argument(
+        "--n-workers",
+        type=int,
+        default=-1,
+        help="--scheduler global のワーカー数（-1でCPU数、デフォルト: -1）",
+    )
+    parser.add_argument(
+        "--warm-start-top-k",
+        type=int,
+        default=0,
+        help="前foldの上位K件のtrialを次のfoldにenqueue（逐次実行のみ、0で無効、デフォルト: 0）",
+    )
+    parser.add_argument(
+        "--eval-cache",
+        action="store_true",
+        help="パラメータ × リバランス日の評価キャッシュをfold間で共有（cache-dir内のSQLite）",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=str,
+        default=None,
+        help="読み取りに使うDBスナップショット（python -m omanta_3rd.jobs.snapshot_db で作成、デフォルト: 本番DB）",
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -1424,6 +1574,11 @@ if __name__ == "__main__":
             holdout_eval_year=args.holdout_eval_year,
             n_jobs_fold=args.n_jobs_fold,
             n_jobs_optuna=args.n_jobs_optuna,
+            scheduler=args.scheduler,
+            n_workers=args.n_workers,
+            warm_start_top_k=args.warm_start_top_k,
+            eval_cache=args.eval_cache,
+            snapshot_path=args.snapshot,
         )
         
         # 結果をJSONファイルに保存